@@ -6,7 +6,8 @@ __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
 import eflips.depot.layout_opt
 import eflips.depot.settings_config
-from eflips.depot.configuration import DepotConfigurator
+from eflips.depot.configuration import ConfigurationSnapshot, DepotConfigurator
+from eflips.depot.data_logger import ColumnarLogger
 from eflips.depot.depot import (
     DepotWorkingData,
     BackgroundStore,
@@ -21,8 +22,14 @@ from eflips.depot.depot import (
     SpecificActivityPlan,
 )
 from eflips.depot.evaluation import DepotEvaluation
+from eflips.depot.event_kernel import DirectDepotKernel
 from eflips.depot.filters import VehicleFilter
-from eflips.depot.input_epex_power_price import InputReader, PowerFrame
+from eflips.depot.input_epex_power_price import (
+    InputReader,
+    PowerFrame,
+    PriceImporter,
+    PriceStore,
+)
 from eflips.depot.processes import (
     ProcessStatus,
     EstimateValue,
@@ -51,4 +58,5 @@ from eflips.depot.simulation import (
 )
 from eflips.depot.smart_charging import SmartCharging, ControlSmartCharging
 from eflips.depot.standalone import VehicleGenerator, SimpleTrip, Timetable
+from eflips.depot.step_series import StepSeries
 from eflips.depot.validation import Validator
@@ -30,16 +30,20 @@ The following steps are recommended for using the API:
    the consumption simulation in step 4b.
 """
 import copy
+import dataclasses
 import logging
 import os
+import random
 import warnings
 from collections import OrderedDict
 from datetime import timedelta, datetime
 from enum import Enum
 from math import ceil
-from typing import Any, Dict, Optional, Union, List
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Optional, Tuple, Union, List
 
 
+import pandas as pd
 import sqlalchemy.orm
 from eflips.model import (
     Area,
@@ -83,6 +87,7 @@ from eflips.depot.api.private.consumption import (
 from eflips.depot.api.private.depot import (
     delete_depots,
     depot_to_template,
+    DepotTemplateBuilder,
     group_rotations_by_start_end_stop,
     generate_depot,
     depot_smallest_possible_size,
@@ -100,6 +105,13 @@ from eflips.depot.api.private.results_to_database import (
     UnstableSimulationException,
     DelayedTripException,
 )
+from eflips.depot.api.private.smart_charging import (
+    DEMAND_CHARGE,
+    add_slack_time_to_charging_events,
+    charging_events_of_depot,
+    optimize_charging_events_min_price,
+    to_price_profile,
+)
 from eflips.depot.api.private.util import (
     create_session,
     repeat_vehicle_schedules,
@@ -137,8 +149,9 @@ class SmartChargingStrategy(Enum):
     """
     Use smart charging in order to minimize the cost of charging.
 
-    The price profile can be specified using the
-    PRICE_PROFILE environment variable. If this is not set, the price is loaded using an API.
+    The cost consists of the energy cost and a demand charge for the peak power. The price profile is passed to
+    :func:`simulate_scenario` or read from the CSV file given by the PRICE_PROFILE environment variable. See
+    :func:`apply_min_price_smart_charging`.
     """
 
 
@@ -641,6 +654,86 @@ def apply_even_smart_charging(
                 session.add(event)
 
 
+def apply_min_price_smart_charging(
+    scenario: Union[Scenario, int, Any],
+    database_url: Optional[str] = None,
+    price_profile: Union[pd.Series, str, None] = None,
+    demand_charge: float = DEMAND_CHARGE,
+    grid_limit: Optional[float] = None,
+    time_step: timedelta = timedelta(minutes=5),
+    standby_departure_duration: timedelta = timedelta(minutes=5),
+    delete_existing_charging_timeseries: bool = False,
+) -> None:
+    """
+    Takes a scenario where depot simulation has been run and applies cost-minimal smart charging to each depot.
+
+    For each depot, the charging power of all charging events is determined by one sparse linear program (solved with
+    HiGHS through :func:`scipy.optimize.linprog`) that minimizes the energy cost plus the demand charge for the peak
+    power of the depot. Each vehicle receives the same energy as before and is charged with at most the power of its
+    charging curve and the depot's charging process. The charging events are extended into the following
+    STANDBY_DEPARTURE events to leave room for shifting the charging power.
+
+    This modifies the time and power of the charging events in the database. The arrival and departure times and SoCs at
+    these times are not modified.
+
+    :param scenario: A :class:`eflips.model.Scenario` object containing the input data for the simulation.
+
+    :param database_url: An optional database URL. If no database URL is passed and the `scenario` parameter is not a
+        :class:`eflips.model.Scenario` object, the environment variable `DATABASE_URL` must be set to a valid database
+        URL.
+
+    :param price_profile: The energy prices in EUR/kWh. Either a :class:`pandas.Series` indexed by time zone aware
+        start times of the price intervals, or the path of a CSV file with a time and a price column. If None, the path
+        is read from the PRICE_PROFILE environment variable. It must cover the period of the charging events, otherwise
+        a ValueError is raised. The last price is assumed to be valid for as long as the price before it.
+
+    :param demand_charge: The demand charge in EUR per kW of peak power and year. It is scaled to the duration of the
+        optimized period. The default is 66.82 EUR/kW/a.
+
+    :param grid_limit: An optional limit of the total charging power of each depot in kW. If the charging events
+        cannot be served within this limit, a ValueError is raised.
+
+    :param time_step: The time resolution of the optimization. The default is 5 minutes.
+
+    :param standby_departure_duration: The duration of the STANDBY_DEPARTURE event. This is the time the vehicle is
+        allowed to wait at the depot before it has to leave. The default is 5 minutes.
+
+    :param delete_existing_charging_timeseries: If True, the existing timeseries in the charging events will be deleted.
+
+    :return: None. The results are added to the database.
+    """
+    prices = to_price_profile(price_profile)
+
+    with create_session(scenario, database_url) as (session, scenario):
+        if delete_existing_charging_timeseries is False:
+            raise ValueError(
+                "The existing timeseries of charging events needed to be deleted. Set "
+                "delete_existing_charging_timeseries=True to delete them."
+            )
+
+        # Delete existing timeseries in charging events
+        session.query(Event).filter(
+            Event.event_type == EventType.CHARGING_DEPOT,
+            Event.scenario_id == scenario.id,
+        ).update({"timeseries": None}, synchronize_session=False)
+        session.expire_all()
+
+        depots = session.query(Depot).filter(Depot.scenario_id == scenario.id).all()
+        for depot in depots:
+            events_for_depot = charging_events_of_depot(session, depot.id)
+            add_slack_time_to_charging_events(
+                events_for_depot, session, standby_departure_duration
+            )
+            optimize_charging_events_min_price(
+                events_for_depot,
+                prices,
+                demand_charge=demand_charge,
+                grid_limit=grid_limit,
+                time_step=time_step,
+            )
+            session.flush()
+
+
 def shrink_to_peak_usage(
     scenario: Union[Scenario, int, Any],
     database_url: Optional[str] = None,
@@ -691,6 +784,7 @@ def simulate_scenario(
     ignore_delayed_trips: bool = False,
     shrink_to_peak_usage: bool = True,
     shrink_resolution: timedelta = timedelta(minutes=5),
+    price_profile: Union[pd.Series, str, None] = None,
 ) -> None:
     """
     This method simulates a scenario and adds the results to the database.
@@ -721,7 +815,9 @@ def simulate_scenario(
         from the time they arrive at the depot until they are full (or leave the depot).
         - SmartChargingStrategy.EVEN: Use smart charging with an even distribution of charging power over the time the
         bus is at the depot. This aims to minimize the peak power demand.
-        - SmartChargingStrategy.MIN_PRICE: Not implemented yet.
+        - SmartChargingStrategy.MIN_PRICE: Use smart charging in order to minimize the energy cost and the demand
+        charge for the peak power of each depot. The prices are given by ``price_profile``. See
+        :func:`apply_min_price_smart_charging`.
 
     :param ignore_unstable_simulation: If True, the simulation will not raise an exception if it becomes unstable.
     :param ignore_delayed_trips: If True, the simulation will not raise an exception if there are delayed trips.
@@ -737,6 +833,12 @@ def simulate_scenario(
     :param shrink_resolution: Time-block resolution used when computing peak
         concurrency for the shrinking step. Default 5 minutes.
 
+    :param price_profile: The energy prices for SmartChargingStrategy.MIN_PRICE in EUR/kWh. Either a
+        :class:`pandas.Series` indexed by time zone aware start times of the price intervals, or the path of a CSV file
+        with a time and a price column. If None, the path is read from the PRICE_PROFILE environment variable. It is
+        loaded before the simulation starts, so a missing price profile raises a ValueError right away. Ignored for
+        the other strategies.
+
     :return: Nothing. The results are added to the database.
 
     :raises UnstableSimulationException: If the simulation becomes numerically unstable or if
@@ -745,6 +847,9 @@ def simulate_scenario(
     """
     logger = logging.getLogger(__name__)
 
+    if smart_charging_strategy == SmartChargingStrategy.MIN_PRICE:
+        price_profile = to_price_profile(price_profile)
+
     with create_session(scenario, database_url) as (session, scenario):
         simulation_host = init_simulation(
             scenario=scenario,
@@ -790,7 +895,12 @@ def simulate_scenario(
                     scenario, database_url, delete_existing_charging_timeseries=True
                 )
             case SmartChargingStrategy.MIN_PRICE:
-                raise NotImplementedError("MIN_PRICE strategy is not implemented yet.")
+                apply_min_price_smart_charging(
+                    scenario,
+                    database_url,
+                    price_profile=price_profile,
+                    delete_existing_charging_timeseries=True,
+                )
             case _:
                 raise NotImplementedError()
 
@@ -800,6 +910,7 @@ def init_simulation(
     session: Session,
     repetition_period: Optional[timedelta] = None,
     vehicle_count_dict: Optional[Dict[str, Dict[str, int]]] = None,
+    depot_templates: Optional[Dict[int, Dict]] = None,
 ) -> SimulationHost:
     """
     This methods checks the input data for consistency, initializes a simulation host object and returns it.
@@ -833,6 +944,10 @@ def init_simulation(
                     ...
                 },
 
+    :param depot_templates: An optional dictionary of depot templates keyed by depot ID. They are used instead of
+        converting these depots with :func:`depot_to_template`, e.g. templates created by
+        :meth:`eflips.depot.api.private.depot.DepotTemplateBuilder.depot_template`.
+
     :return: A :class:`eflips.depot.Simulation.SimulationHost` object. This object should be reagrded as a "black box"
         by the user. It should be passed to :func:`run_simulation()` to run the simulation and obtain the results.
     """
@@ -848,7 +963,10 @@ def init_simulation(
         # Step 1.5: Check validity of a depot
         check_depot_validity(depot)
 
-        depot_dict = depot_to_template(depot)
+        if depot_templates is not None and depot.id in depot_templates:
+            depot_dict = depot_templates[depot.id]
+        else:
+            depot_dict = depot_to_template(depot)
         eflips_depots.append(
             eflips.depot.Depotinput(filename_template=depot_dict, show_gui=False)
         )
@@ -1596,6 +1714,254 @@ def generate_optimal_depot_layout(
         )
 
 
+def optimize_depot_layout(
+    depot_config_wish: DepotConfigurationWish,
+    scenario: Union[Scenario, int, Any],
+    depot_size: Tuple[float, float],
+    database_url: Optional[str] = None,
+    delete_existing_depot: bool = False,
+    population_size: int = 20,
+    generations: int = 20,
+    cxpb: float = 0.5,
+    mutpb: float = 0.5,
+    processes: Optional[int] = None,
+    repetition_period: Optional[timedelta] = None,
+    choose: Optional[Callable[[List[Any]], Optional[Any]]] = None,
+    seed: Optional[int] = None,
+) -> List[Any]:
+    """
+    Search the Pareto set of charging area configurations for a depot with NSGA-II and create the chosen one.
+
+    The search uses the evolutionary operators of :mod:`eflips.depot.layout_opt` and maximizes two objectives: the total
+    capacity of the charging areas and the mean number of unblocked vehicles ready for departure. Each candidate must
+    fit into the rectangular depot space and is simulated with the vehicle schedules of the scenario. The schedules are
+    loaded from the database once and passed to the worker processes, which simulate the candidates in parallel.
+
+    Before calling this function, a consumption simulation creating the driving events must have been run. The depot
+    may only serve rotations of a single vehicle type.
+
+    :param depot_config_wish: A :class:`eflips.depot.api.private.depot.DepotConfigurationWish` object with
+        ``auto_generate=False``. Its ``default_power`` is used for all charging areas. Its ``areas`` are ignored, they are
+        the result of the optimization.
+    :param scenario: Either a :class:`eflips.model.Scenario` object containing the input data for the simulation. Or
+        an integer specifying the ID of a scenario in the database. Or any other object that has an attribute "id"
+        containing an integer pointing to a unique scenario id.
+    :param depot_size: The dimensions (a, b) of the depot space for the charging areas in m.
+    :param database_url: An optional database URL. Used if no database url is given by the environment variable.
+    :param delete_existing_depot: If there is already a depot existing in this scenario, set True to delete this
+        existing depot. Set to False and a ValueError will be raised if there is a depot
+    :param population_size: The number of individuals in each generation.
+    :param generations: The number of generations after the initial population.
+    :param cxpb: The probability of a crossover for each pair of individuals.
+    :param mutpb: The probability of a mutation for each individual.
+    :param processes: The number of worker processes for the simulations. Defaults to ``os.cpu_count()``. With 1, the
+        candidates are simulated in this process.
+    :param repetition_period: An optional timedelta object specifying the period of the vehicle schedules, see
+        :func:`init_simulation`.
+    :param choose: An optional function selecting the layout to be created from the Pareto set. It may return None
+        to create no depot. Defaults to
+        :func:`eflips.depot.api.private.layout_optimization.choose_layout`.
+    :param seed: An optional seed for the search. The operators of :mod:`eflips.depot.layout_opt` use the global
+        :mod:`random` module, which is seeded with it during the search. Its previous state is restored afterwards.
+    :return: The Pareto set as a list of :class:`eflips.depot.api.private.layout_optimization.LayoutCandidate`
+        objects, sorted by capacity. The chosen layout is added to the database.
+    """
+    # Local import, as deap is only needed for the layout optimization
+    from eflips.depot.api.private import layout_optimization
+    from eflips.depot.layout_opt.settings import OPT_CONSTANTS
+
+    if depot_config_wish.auto_generate:
+        raise ValueError("The depot configuration wish must not be auto-generated.")
+    if depot_config_wish.default_power is None:
+        raise ValueError("The depot configuration wish must have a default_power.")
+    power = depot_config_wish.default_power
+
+    with create_session(scenario, database_url) as (session, scenario):
+        # Delete all non-Driving events
+        session.query(Event).filter(
+            Event.scenario_id == scenario.id, Event.event_type != EventType.DRIVING
+        ).delete()
+
+        if session.query(Depot).filter(Depot.scenario_id == scenario.id).count() != 0:
+            if delete_existing_depot is False:
+                raise ValueError(
+                    "Depot already exists. Set delete_existing_depot to True to delete it."
+                )
+
+            delete_depots(scenario, session)
+
+        station = (
+            session.query(Station)
+            .filter(Station.id == depot_config_wish.station_id)
+            .one()
+        )
+        grouped_rotations = group_rotations_by_start_end_stop(scenario.id, session)
+        if (station, station) not in grouped_rotations:
+            raise ValueError(
+                "There are no rotations starting and ending at this station."
+            )
+        if len(grouped_rotations[station, station]) != 1:
+            raise ValueError(
+                "The layout optimization only supports depots with a single vehicle type."
+            )
+        vehicle_type, rotations = next(
+            iter(grouped_rotations[station, station].items())
+        )
+
+        def create_depot(areas: List[AreaInformation]) -> Depot:
+            wish = dataclasses.replace(depot_config_wish, areas=areas)
+            create_depots_from_wish([wish], grouped_rotations, scenario, session)
+            return session.query(Depot).filter(Depot.scenario_id == scenario.id).one()
+
+        def candidate_areas(ind) -> List[AreaInformation]:
+            return [
+                layout_optimization.area_information_from_prototype(
+                    area, vehicle_type.id, power
+                )
+                for area in ind.areas
+            ]
+
+        # The vehicle schedules and the invariant parts of the templates are created once with a placeholder depot.
+        # They refer to a fixed depot ID instead of the placeholder's.
+        savepoint = session.begin_nested()
+        try:
+            depot = create_depot(
+                [
+                    AreaInformation(
+                        area_type=AreaType.DIRECT_ONESIDE,
+                        capacity=len(rotations),
+                        power=power,
+                        vehicle_type_id=vehicle_type.id,
+                    )
+                ]
+            )
+            vehicle_schedules = [
+                dataclasses.replace(
+                    VehicleSchedule.from_rotation(rotation, scenario, session),
+                    start_depot_id=layout_optimization.DEPOT_ID,
+                    end_depot_id=layout_optimization.DEPOT_ID,
+                )
+                for rotation in rotations
+            ]
+            template_builder = DepotTemplateBuilder(
+                depot, depot_id=layout_optimization.DEPOT_ID
+            )
+        finally:
+            savepoint.rollback()
+
+        if repetition_period is None:
+            repetition_period = schedule_duration_days(scenario)
+        vehicle_schedules = repeat_vehicle_schedules(
+            vehicle_schedules, repetition_period
+        )
+        sim_start_time, total_duration_seconds = start_and_end_times(vehicle_schedules)
+        simulation_input = layout_optimization.LayoutSimulationInput(
+            vehicle_schedules=vehicle_schedules,
+            simulation_start=sim_start_time,
+            simulation_duration=total_duration_seconds,
+            # We multiply by 4 because we repeat the vehicle schedules 4 times
+            vehicle_count={str(vehicle_type.id): len(rotations) * 4},
+            vehicle_types={
+                str(vt.id): vehicle_type_to_global_constants_dict(vt)
+                for vt in session.query(VehicleType)
+                .filter(VehicleType.scenario_id == scenario.id)
+                .all()
+            },
+        )
+
+        def evaluate(inds) -> List[Tuple[Tuple[float, float], Dict[str, Any]]]:
+            # The templates are created in this process, the simulations run in the pool
+            results = []
+            templates = []
+            to_simulate = []
+            for ind in inds:
+                areas = candidate_areas(ind)
+                result = {
+                    "simulated": False,
+                    "capacity": sum(area.capacity for area in areas),
+                }
+                if layout_optimization.packable(ind):
+                    templates.append(template_builder.template(areas))
+                    to_simulate.append(result)
+                results.append(result)
+
+            for result, simulation_result in zip(
+                to_simulate,
+                map_function(layout_optimization.simulate_template, templates),
+            ):
+                result.update(simulation_result)
+                result["simulated"] = True
+
+            return [
+                (
+                    (result["capacity"], result["rfd_unblocked"])
+                    if result["simulated"]
+                    else (0, 0),
+                    result,
+                )
+                for result in results
+            ]
+
+        # Only the depot dimensions are replaced, the other scenario settings of layout_opt are kept
+        previous_opt_scenario = OPT_CONSTANTS["scenario"]
+        OPT_CONSTANTS["scenario"] = {
+            **previous_opt_scenario,
+            "DEPOT_A": depot_size[0],
+            "DEPOT_B": depot_size[1],
+        }
+        # The operators of layout_opt draw from the global random module. It is seeded for the search and restored
+        # afterwards.
+        previous_random_state = random.getstate()
+        if seed is not None:
+            random.seed(seed)
+        pool = None
+        try:
+            if processes == 1:
+                layout_optimization.init_worker(simulation_input)
+                map_function = map
+            else:
+                pool = Pool(
+                    processes,
+                    initializer=layout_optimization.init_worker,
+                    initargs=(simulation_input,),
+                )
+                map_function = pool.map
+
+            pareto_front = layout_optimization.nsga2(
+                evaluate, population_size, generations, cxpb, mutpb
+            )
+            candidates = [
+                layout_optimization.LayoutCandidate(
+                    id=ind.ID,
+                    areas=candidate_areas(ind),
+                    capacity=ind.results["capacity"],
+                    rfd_unblocked=ind.results["rfd_unblocked"],
+                    delay=ind.results["delay"],
+                )
+                for ind in pareto_front
+                if ind.results["simulated"]
+            ]
+        finally:
+            OPT_CONSTANTS["scenario"] = previous_opt_scenario
+            random.setstate(previous_random_state)
+            if pool is not None:
+                pool.terminate()
+        candidates.sort(key=lambda candidate: candidate.capacity)
+
+        if choose is None:
+            choose = layout_optimization.choose_layout
+        chosen = choose(candidates)
+        if chosen is None:
+            warnings.warn(
+                "No layout was chosen from the Pareto set. No depot was created.",
+                UserWarning,
+            )
+        else:
+            create_depot(chosen.areas)
+
+        return candidates
+
+
 def create_diesel_vehicle_type_copies(
     vehicle_type_ids: set,
     scenario: Any,
@@ -483,6 +483,251 @@ def depot_to_template(depot: Depot) -> Dict[str, str | Dict[str, str | int]]:
     return template
 
 
+class DepotTemplateBuilder:
+    """
+    Builds depot templates for many candidate configurations of the charging areas of one depot.
+
+    The invariant parts of the template (processes including the charging processes per vehicle type, resources,
+    resource switches, the other areas and the plan) are built once from a depot with :func:`depot_to_template`. For
+    each candidate, only the charging areas, their charging interfaces and the groups are generated. Candidates are
+    either given as a list of :class:`AreaInformation` objects (:meth:`template`) or as a depot in the database that
+    only differs in its charging areas (:meth:`depot_template`).
+
+    The templates share the invariant entries. They can be passed to :meth:`eflips.depot.DepotConfigurator.load`
+    directly, which does not alter them, but they must not be modified otherwise.
+
+    :param depot: A depot whose charging areas (areas with a charging process) all have the same processes, as created
+        by :func:`create_depots_from_wish`. The charging areas are replaced by the candidate areas.
+    :param depot_id: An optional depot ID for the templates. Defaults to the ID of the depot.
+    """
+
+    def __init__(self, depot: Depot, depot_id: Optional[str] = None):
+        template = depot_to_template(depot)
+        if depot_id is not None:
+            template["general"] = dict(template["general"], depotID=depot_id)
+
+        charging_areas = [
+            area
+            for area in depot.areas
+            if any(process_type(p) == ProcessType.CHARGING for p in area.processes)
+        ]
+        if not charging_areas:
+            raise ValueError("The depot has no charging areas.")
+        processes = charging_areas[0].processes
+        if any(area.processes != processes for area in charging_areas):
+            raise ValueError("All charging areas must have the same processes.")
+
+        # Template keys of the charging areas, including the rows of LINE areas
+        charging_area_ids = {str(area.id) for area in charging_areas}
+        charging_keys = {
+            key
+            for key in template["areas"]
+            if key in charging_area_ids or key.split("_row_")[0] in charging_area_ids
+        }
+        charging_interfaces = {
+            ci_id
+            for key in charging_keys
+            for ci_id in template["areas"][key].get("charging_interfaces", [])
+        }
+
+        self.template_base = template
+        # Names of the other areas, to find them in depots passed to depot_template()
+        self.area_names = {
+            str(area.id): area.name
+            for area in depot.areas
+            if area not in charging_areas
+        }
+        self.areas = {
+            key: entry
+            for key, entry in template["areas"].items()
+            if key not in charging_keys
+        }
+        self.resources = {
+            key: entry
+            for key, entry in template["resources"].items()
+            if key not in charging_interfaces
+        }
+        # Groups with charging areas are completed per candidate, the others are kept
+        self.groups = {}
+        for name, group in template["groups"].items():
+            stores = [store for store in group["stores"] if store not in charging_keys]
+            if len(stores) < len(group["stores"]):
+                self.groups[name] = dict(group, stores=stores)
+            else:
+                self.groups[name] = group
+        self.charging_groups = {
+            name
+            for name, group in template["groups"].items()
+            if any(store in charging_keys for store in group["stores"])
+        }
+
+        self.processes = [(str(p.id), process_type(p)) for p in processes]
+        self.issink = any(
+            ptype == ProcessType.STANDBY_DEPARTURE for _, ptype in self.processes
+        )
+        charging_process = next(
+            p for p in processes if process_type(p) == ProcessType.CHARGING
+        )
+        self.charging_interface = {
+            "typename": "DepotChargingInterface",
+            "max_power": charging_process.electric_power,
+        }
+        self._process_entries = {}
+
+    def _entry_filter_and_processes(self, vehicle_type_id: int) -> Tuple[dict, list]:
+        """Return the entry filter and available processes of charging areas for a vehicle type (cached)."""
+        if vehicle_type_id not in self._process_entries:
+            vt_id = str(vehicle_type_id)
+            entry_filter = {"filter_names": ["vehicle_type"], "vehicle_types": [vt_id]}
+            available = [
+                pid + "vt" + vt_id if ptype == ProcessType.CHARGING else pid
+                for pid, ptype in self.processes
+            ]
+            self._process_entries[vehicle_type_id] = entry_filter, available
+        return self._process_entries[vehicle_type_id]
+
+    def template(self, areas: List[AreaInformation]) -> Dict:
+        """
+        Create the template of the depot with *areas* as charging areas.
+
+        The charging power of the areas is the one of the depot's charging process, like in
+        :func:`create_depots_from_wish`.
+
+        :param areas: A non-empty list of :class:`AreaInformation` objects.
+        :return: A dict that can be consumed by eFLIPS-Depot.
+        """
+        if not areas:
+            raise ValueError("At least one charging area is required.")
+
+        return self._assemble(
+            [
+                (
+                    f"candidate_{i}",
+                    area_info.area_type,
+                    area_info.capacity,
+                    area_info.vehicle_type_id,
+                    area_info.capacity // area_info.block_length
+                    if area_info.area_type == AreaType.LINE
+                    else None,
+                )
+                for i, area_info in enumerate(areas)
+            ]
+        )
+
+    def depot_template(self, depot: Depot) -> Dict:
+        """
+        Create the template of a depot in the database that only differs from the builder's depot in its charging areas.
+
+        This is the case for depots created by :func:`generate_depot` with the same arguments apart from the capacities
+        of the charging areas. The other areas are identified by their names, their entries are reused with the IDs of
+        *depot*. The template is the same as the one :func:`depot_to_template` creates, except for the keys of the
+        processes and charging interfaces.
+
+        :param depot: A :class:`eflips.model.Depot` object.
+        :return: A dict that can be consumed by eFLIPS-Depot.
+        """
+        keys_by_name = {name: key for key, name in self.area_names.items()}
+        area_keys = {}
+        charging_areas = []
+        for area in depot.areas:
+            if any(process_type(p) == ProcessType.CHARGING for p in area.processes):
+                if [process_type(p) for p in area.processes] != [
+                    ptype for _, ptype in self.processes
+                ]:
+                    raise ValueError(
+                        f"The charging area {area.id} has other processes than the charging areas of the builder."
+                    )
+                charging_areas.append(area)
+            elif area.name in keys_by_name:
+                area_keys[keys_by_name.pop(area.name)] = str(area.id)
+            else:
+                raise ValueError(
+                    f"The area {area.name} is not part of the builder's depot."
+                )
+        if keys_by_name:
+            raise ValueError(
+                f"The depot misses the areas {', '.join(sorted(keys_by_name.values()))}."
+            )
+        if not charging_areas:
+            raise ValueError("The depot has no charging areas.")
+
+        return self._assemble(
+            [
+                (
+                    str(area.id),
+                    area.area_type,
+                    area.capacity,
+                    area.vehicle_type_id,
+                    area.row_count,
+                )
+                for area in charging_areas
+            ],
+            depot_id=str(depot.id),
+            area_keys=area_keys,
+        )
+
+    def _assemble(
+        self,
+        charging_areas: List[Tuple[str, AreaType, int, int, Optional[int]]],
+        depot_id: Optional[str] = None,
+        area_keys: Optional[Dict[str, str]] = None,
+    ) -> Dict:
+        """
+        Combine the invariant parts with the charging areas.
+
+        :param charging_areas: Tuples of key, area type, capacity, vehicle type ID and row count (LINE areas only).
+        :param depot_id: An optional depot ID replacing the one of the builder.
+        :param area_keys: An optional mapping of the keys of the other areas to new keys.
+        :return: A dict that can be consumed by eFLIPS-Depot.
+        """
+
+        def rename(key: str) -> str:
+            if area_keys is None:
+                return key
+            area_id, sep, row = key.partition("_row_")
+            return area_keys[area_id] + sep + row
+
+        resources = dict(self.resources)
+        entries = {}
+        for key, area_type, capacity, vehicle_type_id, row_count in charging_areas:
+            entry_filter, available = self._entry_filter_and_processes(vehicle_type_id)
+            ci_ids = [f"ci_{key}_{j}" for j in range(capacity)]
+            for ci_id in ci_ids:
+                resources[ci_id] = self.charging_interface
+            entry = {
+                "typename": "LineArea" if area_type == AreaType.LINE else "DirectArea",
+                "capacity": capacity,
+                "available_processes": available,
+                "issink": self.issink,
+                "entry_filter": entry_filter,
+                "charging_interfaces": ci_ids,
+            }
+            if area_type == AreaType.LINE:
+                entry["row_count"] = row_count
+            entries[key] = entry
+        entries = _expand_line_areas(entries)
+        charging_keys = list(entries)
+
+        groups = {}
+        for name, group in self.groups.items():
+            if area_keys is not None:
+                group = dict(group, stores=[rename(store) for store in group["stores"]])
+            if name in self.charging_groups:
+                group = dict(group, stores=group["stores"] + charging_keys)
+            groups[name] = group
+
+        template = dict(self.template_base)
+        if depot_id is not None:
+            template["general"] = dict(template["general"], depotID=depot_id)
+        template["resources"] = resources
+        template["areas"] = {
+            **{rename(key): entry for key, entry in self.areas.items()},
+            **entries,
+        }
+        template["groups"] = groups
+        return template
+
+
 def find_first_last_stop_for_rotation_id(
     rotation: Rotation, session: sqlalchemy.orm.session.Session
 ) -> Tuple[Station, Station, VehicleType]:
@@ -1120,7 +1365,12 @@ def depot_smallest_possible_size(
     """
 
     # Local imports to avoid circular imports
-    from eflips.depot.api import simulate_scenario
+    from eflips.depot.api import (
+        simulate_scenario,
+        init_simulation,
+        run_simulation,
+        add_evaluation_to_database,
+    )
 
     logger = logging.getLogger(__name__)
 
@@ -1237,43 +1487,70 @@ def depot_smallest_possible_size(
                     logger.debug(f"Temporarily Deleted all rotations for {vt2.name}")
             area_needed[vt] = dict()
             occupancy_of_direct_areas[vt] = dict()
+
+            def create_sizing_depot(amount_of_line_areas: int) -> Depot:
+                # Create a depot with the given amount of line areas
+                new_vts_and_counts = {
+                    vt: {
+                        AreaType.LINE: amount_of_line_areas * standard_block_length,
+                        AreaType.DIRECT_ONESIDE: len(vts_and_rotations[vt])
+                        + 100,  # +10 to work around the "Depot is too small" error
+                        AreaType.DIRECT_TWOSIDE: 0,
+                    }
+                }
+                generate_depot(
+                    new_vts_and_counts,
+                    station,
+                    scenario,
+                    session,
+                    standard_block_length=standard_block_length,
+                    cleaning_duration=None,
+                    shunting_duration=None,
+                    charging_power=charging_power,
+                )
+                return (
+                    session.query(Depot).filter(Depot.scenario_id == scenario.id).one()
+                )
+
+            # The depots of the sizing loop only differ in their charging areas. Build the other parts of the
+            # templates once. Depots without charging areas (diesel vehicles) are converted in each iteration.
+            builder_savepoint = session.begin_nested()
+            try:
+                template_builder = DepotTemplateBuilder(create_sizing_depot(0))
+            except ValueError:
+                template_builder = None
+            finally:
+                builder_savepoint.rollback()
+
             for amount_of_line_areas in range(max_number_of_line_areas[vt] + 2):
                 # This is the savepoint for each number of line areas
                 inner_savepoint = session.begin_nested()
                 try:
-                    # Create a depot with the given amount of line areas
-                    new_vts_and_counts = {
-                        vt: {
-                            AreaType.LINE: amount_of_line_areas * standard_block_length,
-                            AreaType.DIRECT_ONESIDE: len(vts_and_rotations[vt])
-                            + 100,  # +10 to work around the "Depot is too small" error
-                            AreaType.DIRECT_TWOSIDE: 0,
-                        }
-                    }
+                    depot = create_sizing_depot(amount_of_line_areas)
 
-                    # Create the depot
-                    generate_depot(
-                        new_vts_and_counts,
-                        station,
+                    # Simulate the depot. Unstable simulations are accepted, delayed trips mean the depot is too small.
+                    simulation_host = init_simulation(
                         scenario,
                         session,
-                        standard_block_length=standard_block_length,
-                        cleaning_duration=None,
-                        shunting_duration=None,
-                        charging_power=charging_power,
-                    )
-                    depot = (
-                        session.query(Depot)
-                        .filter(Depot.scenario_id == scenario.id)
-                        .one()
-                    )
-
-                    # Simulate the depot
-                    simulate_scenario(
-                        scenario,
-                        smart_charging_strategy=SmartChargingStrategy.NONE,
-                        ignore_unstable_simulation=True,
+                        depot_templates={
+                            depot.id: template_builder.depot_template(depot)
+                        }
+                        if template_builder is not None
+                        else None,
                     )
+                    depot_evaluations = run_simulation(simulation_host)
+                    delayed = False
+                    try:
+                        add_evaluation_to_database(scenario, depot_evaluations, session)
+                    except* DelayedTripException:
+                        delayed = True
+                    except* UnstableSimulationException:
+                        pass
+                    if delayed:
+                        logger.debug(
+                            f"Trips are delayed, suggesting depot is too small."
+                        )
+                        continue
 
                     # Find the peak usage of the depot
                     peak_occupancies: Dict[
@@ -0,0 +1,342 @@
+"""
+This module contains the multi-objective depot layout optimization used by :func:`eflips.depot.api.optimize_depot_layout`.
+
+It runs the NSGA-II search of :mod:`eflips.depot.layout_opt` on area configurations of a single depot. The two
+objectives are the total parking capacity and the mean number of unblocked vehicles ready for departure (urfd), both
+maximized. Candidates are packed into the rectangular depot space with :mod:`eflips.depot.layout_opt.packing` and
+simulated with the vehicle schedules of the scenario, which are prepared once and passed to each pool worker.
+"""
+import logging
+import os
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from deap import base, creator, tools
+from eflips.model import AreaType
+
+import eflips.depot
+from eflips.depot.api.private.depot import AreaInformation
+from eflips.depot.api.private.util import VehicleSchedule
+from eflips.depot.data_logger import RESULT_ATTRIBUTES
+from eflips.depot.layout_opt import util
+from eflips.depot.layout_opt.opt_tools import (
+    cxOnePoint_depot,
+    init_random_depot,
+    mutgaussian_depot_or,
+    clone_depot,
+    DepotPrototype,
+    DDRPrototype,
+    LinePrototype,
+)
+from eflips.depot.layout_opt.opt_tools.fitness_util import lookup, memorize
+
+DEPOT_ID = "layout_optimization"
+"""Depot ID used in the templates and vehicle schedules of all candidates."""
+
+DEFAULT_MUTATION_PARAMETERS = {
+    "mutsigma_area_count": 2,
+    "mutpb_area_count": 1 / 3,
+    "mutpb_area_type": 1 / 3,
+    "mutsigma_area_capacity": 5,
+    "mutpb_area_capacity": 1 / 3,
+    "splitpb": 0.5,
+}
+"""Default keyword arguments of :func:`eflips.depot.layout_opt.opt_tools.mutgaussian_depot_or`."""
+
+# The operators of layout_opt create individuals with creator.Individual. Use the same definitions as the
+# optimization scripts and do not overwrite them if they already exist.
+if not hasattr(creator, "FitnessMulti"):
+    creator.create("FitnessMulti", base.Fitness, weights=(1.0, 1.0))
+if not hasattr(creator, "Individual"):
+    creator.create("Individual", DepotPrototype, fitness=creator.FitnessMulti)
+
+
+@dataclass
+class LayoutCandidate:
+    """A depot layout of the Pareto set returned by :func:`eflips.depot.api.optimize_depot_layout`."""
+
+    id: str
+    """The ID of the area configuration, e.g. ``"2x10DSR_1x6L"`` (see :class:`DepotPrototype`)."""
+
+    areas: List[AreaInformation]
+    """The charging areas of the layout. They can be used for a :class:`DepotConfigurationWish`."""
+
+    capacity: int
+    """The total capacity of the charging areas."""
+
+    rfd_unblocked: float
+    """The mean number of vehicles that are ready for departure and not blocked by other vehicles."""
+
+    delay: float
+    """The total departure delay in hours."""
+
+    @property
+    def feasible(self) -> bool:
+        """Whether all trips depart on time with this layout."""
+        return self.delay == 0
+
+
+@dataclass
+class LayoutSimulationInput:
+    """The data each worker needs to simulate a candidate template without database access."""
+
+    vehicle_schedules: List[VehicleSchedule]
+    """The repeated vehicle schedules of the depot, with :data:`DEPOT_ID` as start and end depot."""
+
+    simulation_start: datetime
+    """The start of the simulation, see :func:`eflips.depot.api.private.util.start_and_end_times`."""
+
+    simulation_duration: int
+    """The duration of the simulation in seconds."""
+
+    vehicle_count: Dict[str, int]
+    """The number of vehicles for each vehicle type ID."""
+
+    vehicle_types: Dict[str, Dict[str, float]]
+    """The global constants entries of the vehicle types, keyed by vehicle type ID."""
+
+
+_simulation_input: Optional[LayoutSimulationInput] = None
+
+
+def init_worker(simulation_input: LayoutSimulationInput) -> None:
+    """
+    Prepare the eflips settings for simulating candidates in this process.
+
+    It is used as pool initializer, so that the settings and vehicle schedules are set up once per worker instead of
+    once per candidate.
+
+    :param simulation_input: A :class:`LayoutSimulationInput` object.
+    :return: Nothing. The settings are stored in the global constants of this process.
+    """
+    global _simulation_input
+    _simulation_input = simulation_input
+
+    eflips.settings.reset_settings()
+    path_to_default_settings = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "defaults", "default_settings"
+    )
+    eflips.load_settings(path_to_default_settings)
+
+    eflips.globalConstants["general"]["SIMULATION_TIME"] = int(
+        simulation_input.simulation_duration
+    )
+    eflips.globalConstants["general"][
+        "SIMULATION_START_DATETIME"
+    ] = simulation_input.simulation_start
+    eflips.globalConstants["depot"]["vehicle_count"] = {
+        DEPOT_ID: dict(simulation_input.vehicle_count)
+    }
+    # simulate_template only needs the ready-for-departure counts of the areas
+    eflips.globalConstants["general"]["LOGGED_ATTRIBUTES"] = RESULT_ATTRIBUTES
+    for vehicle_type_id, vehicle_type_dict in simulation_input.vehicle_types.items():
+        eflips.globalConstants["depot"]["vehicle_types"][
+            vehicle_type_id
+        ] = vehicle_type_dict
+
+    eflips.depot.settings_config.check_gc_validity()
+    eflips.depot.settings_config.complete_gc()
+
+
+def simulate_template(template: Dict) -> Dict[str, float]:
+    """
+    Simulate the depot template of a candidate. :func:`init_worker` must have been called in this process.
+
+    :param template: A depot template as created by :class:`eflips.depot.api.private.depot.DepotTemplateBuilder`,
+        with :data:`DEPOT_ID` as depot ID.
+    :return: A dictionary with the total departure delay in hours ("delay") and the mean number of unblocked vehicles
+        ready for departure ("rfd_unblocked").
+    """
+    if _simulation_input is None:
+        raise RuntimeError("init_worker() must be called before simulate_template().")
+
+    simulation_host = eflips.depot.SimulationHost(
+        [eflips.depot.Depotinput(filename_template=template, show_gui=False)],
+        print_timestamps=False,
+    )
+    simulation_host.timetable = VehicleSchedule._to_timetable(
+        _simulation_input.vehicle_schedules,
+        simulation_host.env,
+        _simulation_input.simulation_start,
+    )
+    for dh, di in zip(simulation_host.depot_hosts, simulation_host.to_simulate):
+        dh.load_and_complete_template(di.filename_template)
+    simulation_host.complete()
+    simulation_host.run()
+
+    ev = simulation_host.depot_hosts[0].evaluation
+    ev.total_delay()
+    ev.calc_count_rfd_unblocked_total()
+    return {
+        "delay": ev.results["total_delay"] / 3600,
+        "rfd_unblocked": float(ev.results["count_rfd_unblocked_total"]["mean"]),
+    }
+
+
+def area_information_from_prototype(
+    area, vehicle_type_id: int, power: float
+) -> AreaInformation:
+    """
+    Convert an area prototype of :mod:`eflips.depot.layout_opt` into an :class:`AreaInformation` object.
+
+    DSR and DSR_90 areas become DIRECT_ONESIDE areas. DDR areas become DIRECT_TWOSIDE areas, whose capacity must be
+    even, so an odd capacity is reduced by one. A line prototype is a single row, so it becomes a LINE area with the
+    block length equal to its capacity.
+
+    :param area: An :class:`eflips.depot.layout_opt.opt_tools.init.AreaPrototype` object.
+    :param vehicle_type_id: The vehicle type ID of the area.
+    :param power: The charging power of the area in kW.
+    :return: An :class:`AreaInformation` object.
+    """
+    if isinstance(area, LinePrototype):
+        return AreaInformation(
+            area_type=AreaType.LINE,
+            capacity=area.capacity,
+            power=power,
+            vehicle_type_id=vehicle_type_id,
+            block_length=area.capacity,
+        )
+    elif isinstance(area, DDRPrototype):
+        return AreaInformation(
+            area_type=AreaType.DIRECT_TWOSIDE,
+            capacity=area.capacity - area.capacity % 2,
+            power=power,
+            vehicle_type_id=vehicle_type_id,
+        )
+    else:
+        return AreaInformation(
+            area_type=AreaType.DIRECT_ONESIDE,
+            capacity=area.capacity,
+            power=power,
+            vehicle_type_id=vehicle_type_id,
+        )
+
+
+def packable(ind: DepotPrototype) -> bool:
+    """
+    Check whether the areas of an individual fit into the depot space.
+
+    :param ind: A :class:`DepotPrototype` object.
+    :return: True if the packing succeeds. An empty depot is not packable.
+    """
+    if not ind.areas:
+        return False
+    if ind.visu.feasible is None:
+        ind.visu.pack()
+    return ind.visu.feasible
+
+
+def evaluate_population(
+    inds: List[DepotPrototype],
+    evaluate: Callable[[List[DepotPrototype]], List[Tuple[Tuple, Dict]]],
+    memory: Dict,
+) -> int:
+    """
+    Assign fitness values and results to all individuals without valid fitness.
+
+    Each area configuration is only evaluated once. Known configurations are looked up in *memory*.
+
+    :param inds: A list of individuals.
+    :param evaluate: A function taking a list of individuals with distinct IDs and returning a list of (fitness,
+        results) tuples in the same order.
+    :param memory: A dictionary mapping IDs to fitness values and results, see
+        :func:`eflips.depot.layout_opt.opt_tools.fitness_util.memorize`.
+    :return: The number of newly evaluated individuals.
+    """
+    inds = [ind for ind in inds if not ind.fitness.valid]
+    uniques, duplicates = util.attrbased_set(inds, "ID")
+    for ind in uniques:
+        lookup(ind, memory)
+    new_inds = [ind for ind in uniques if not ind.fitness.valid]
+    if new_inds:
+        for ind, (fitness, results) in zip(new_inds, evaluate(new_inds)):
+            ind.fitness.values = fitness
+            ind.results = results
+            memorize(ind, memory)
+    for ind in duplicates:
+        lookup(ind, memory)
+    return len(new_inds)
+
+
+def nsga2(
+    evaluate: Callable[[List[DepotPrototype]], List[Tuple[Tuple, Dict]]],
+    population_size: int,
+    generations: int,
+    cxpb: float,
+    mutpb: float,
+    mutation_parameters: Optional[Dict[str, float]] = None,
+) -> tools.ParetoFront:
+    """
+    Run the NSGA-II search with the crossover and mutation operators of :mod:`eflips.depot.layout_opt`.
+
+    The depot dimensions must be set in ``OPT_CONSTANTS["scenario"]`` before, since they bound the number and
+    capacity of areas.
+
+    :param evaluate: The evaluation function, see :func:`evaluate_population`.
+    :param population_size: The number of individuals in each generation.
+    :param generations: The number of generations after the initial population.
+    :param cxpb: The probability of a crossover for each pair of individuals.
+    :param mutpb: The probability of a mutation for each individual.
+    :param mutation_parameters: Keyword arguments of :func:`eflips.depot.layout_opt.opt_tools.mutgaussian_depot_or`.
+        Defaults to :data:`DEFAULT_MUTATION_PARAMETERS`.
+    :return: The Pareto front of all evaluated individuals.
+    """
+    logger = logging.getLogger(__name__)
+
+    if mutation_parameters is None:
+        mutation_parameters = DEFAULT_MUTATION_PARAMETERS
+
+    toolbox = base.Toolbox()
+    toolbox.register("individual", init_random_depot, creator.Individual)
+    toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+    toolbox.register("clone", clone_depot)
+    toolbox.register("mate", cxOnePoint_depot)
+    toolbox.register("mutate", mutgaussian_depot_or, **mutation_parameters)
+    toolbox.register("select", tools.selNSGA2)
+
+    memory = {}
+    pareto_front = tools.ParetoFront()
+
+    pop = toolbox.population(n=population_size)
+    evals = evaluate_population(pop, evaluate, memory)
+    pareto_front.update(pop)
+    logger.info(f"Generation 0: {evals} evaluations, {len(pareto_front)} on front")
+
+    for g in range(1, generations + 1):
+        offspring = list(map(toolbox.clone, pop))
+
+        for child1, child2 in zip(offspring[::2], offspring[1::2]):
+            if random.random() < cxpb:
+                toolbox.mate(child1, child2)
+                del child1.fitness.values
+                del child2.fitness.values
+
+        for mutant in offspring:
+            if random.random() < mutpb:
+                if toolbox.mutate(mutant):
+                    del mutant.fitness.values
+
+        evals = evaluate_population(offspring, evaluate, memory)
+        pop[:] = toolbox.select(pop + offspring, population_size)
+        pareto_front.update(pop)
+        logger.info(
+            f"Generation {g}: {evals} evaluations, {len(pareto_front)} on front"
+        )
+
+    return pareto_front
+
+
+def choose_layout(candidates: List[LayoutCandidate]) -> Optional[LayoutCandidate]:
+    """
+    The default choice of the layout to be persisted.
+
+    :param candidates: The Pareto set of layouts.
+    :return: The feasible layout with the most unblocked vehicles ready for departure, preferring larger capacity on
+        ties. None if no layout is feasible.
+    """
+    feasible = [candidate for candidate in candidates if candidate.feasible]
+    if not feasible:
+        return None
+    return max(feasible, key=lambda c: (c.rfd_unblocked, c.capacity))
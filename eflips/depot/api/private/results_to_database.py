@@ -11,6 +11,7 @@ from eflips.model import Event, EventType, Rotation, Vehicle, Area, AreaType
 from sqlalchemy import case, select, update
 
 from eflips.depot import SimpleVehicle, ProcessStatus
+from eflips.depot.intervals import SocIndex
 
 
 class DelayedTripException(Exception):
@@ -120,16 +121,11 @@ def get_finished_schedules_per_vehicle(
 
     if idx_last_orig_trip == len(list_of_finished_trips) - 1:
         # the last trip of this vehicle is a non-copy trip
-        all_processes_current_vehicle = non_copy_trips[-1].vehicle.logger.loggedData[
-            "dwd.active_processes_copy"
-        ]
-        time_stamps = [k for k, v in all_processes_current_vehicle.items()]
-        last_time_stamp = max(time_stamps)
-        if len(all_processes_current_vehicle[last_time_stamp]) == 0:
+        process_log = non_copy_trips[-1].vehicle.dwd.process_log
+        last_time_stamp, current_processes = process_log.last_snapshot()
+        if len(current_processes) == 0:
             latest_time = last_time_stamp
         else:
-            current_processes = all_processes_current_vehicle[last_time_stamp]
-
             latest_time = 0
             for p in current_processes:
                 latest_time = max((p.starts[0] + p.dur), latest_time)
@@ -187,8 +183,6 @@ def generate_vehicle_events(
     logger = logging.getLogger(__name__)
 
     # For convenience
-    area_log = current_vehicle.logger.loggedData["dwd.current_area"]
-    slot_log = current_vehicle.logger.loggedData["dwd.current_slot"]
     waiting_log = current_vehicle.logger.loggedData["area_waiting_time"]
 
     # Handling waiting events
@@ -226,137 +220,134 @@ def generate_vehicle_events(
                 "is_waiting": True,
             }
 
-    for time_stamp, process_log in current_vehicle.logger.loggedData[
-        "dwd.active_processes_copy"
-    ].items():
-        if earliest_time <= time_stamp <= latest_time:
-            if len(process_log) == 0:
-                # A departure happens and this trip should already be stored in the dictionary
-                pass
-            else:
-                for process in process_log:
-                    current_area = area_log[time_stamp]
-                    current_slot = slot_log[time_stamp]
+    # Handling process events. The active processes are replayed from the
+    # vehicle's process log at each logged step within the time window
+    process_log = current_vehicle.dwd.process_log
+    locations = process_log.locations()
+    for time_stamp, active_processes in process_log.snapshots(
+        earliest_time, latest_time
+    ):
+        if len(active_processes) == 0:
+            # A departure happens and this trip should already be stored in the dictionary
+            pass
+        else:
+            for process in active_processes:
+                current_area, current_slot = locations[process]
 
-                    if current_area is None or current_slot is None:
-                        raise ValueError(
-                            f"For process {process.ID} Area and slot should not be None."
+                if current_area is None or current_slot is None:
+                    raise ValueError(
+                        f"For process {process.ID} Area and slot should not be None."
+                    )
+
+                match process.status:
+                    case ProcessStatus.COMPLETED | ProcessStatus.CANCELLED:
+                        assert len(process.starts) == 1 and len(process.ends) == 1, (
+                            f"Current process {process.ID} is completed and should only contain one start and "
+                            f"one end time."
                         )
 
-                    match process.status:
-                        case ProcessStatus.COMPLETED | ProcessStatus.CANCELLED:
-                            assert (
-                                len(process.starts) == 1 and len(process.ends) == 1
-                            ), (
-                                f"Current process {process.ID} is completed and should only contain one start and "
-                                f"one end time."
+                        if process.dur > 0:
+                            # Valid duration
+                            dict_of_events[time_stamp] = {
+                                "type": type(process).__name__,
+                                "end": process.ends[0],
+                                "area": current_area.ID,
+                                "slot": current_slot,
+                                "id": process.ID,
+                            }
+                        else:
+                            # Duration is 0
+                            assert current_area.issink is True, (
+                                f"A process with no duration could only "
+                                f"happen in the last area before dispatched"
                             )
-
-                            if process.dur > 0:
-                                # Valid duration
-                                dict_of_events[time_stamp] = {
-                                    "type": type(process).__name__,
-                                    "end": process.ends[0],
-                                    "area": current_area.ID,
-                                    "slot": current_slot,
-                                    "id": process.ID,
-                                }
-                            else:
-                                # Duration is 0
-                                assert current_area.issink is True, (
-                                    f"A process with no duration could only "
-                                    f"happen in the last area before dispatched"
+                            start_this_event = None
+                            if time_stamp in dict_of_events.keys():
+                                assert "end" in dict_of_events[time_stamp].keys(), (
+                                    f"The former event of {process} "
+                                    f"should have an end time."
                                 )
-                                start_this_event = None
-                                if time_stamp in dict_of_events.keys():
-                                    assert "end" in dict_of_events[time_stamp].keys(), (
-                                        f"The former event of {process} "
-                                        f"should have an end time."
-                                    )
-                                    start_this_event = dict_of_events[time_stamp]["end"]
+                                start_this_event = dict_of_events[time_stamp]["end"]
+                            else:
+                                if len(active_processes) > 1:
+                                    # This is for the case where the charging and standby_departure happen in the same area, and the standby_departure is the last process.
+                                    for other_process in active_processes:
+                                        if (
+                                            other_process.ID != process.ID
+                                            and other_process.dur > 0
+                                        ):
+                                            start_this_event = other_process.ends[0]
+                                            break
                                 else:
-                                    if len(process_log) > 1:
-                                        # This is for the case where the charging and standby_departure happen in the same area, and the standby_departure is the last process.
-                                        for other_process in process_log:
-                                            if (
-                                                other_process.ID != process.ID
-                                                and other_process.dur > 0
-                                            ):
-                                                start_this_event = other_process.ends[0]
-                                                break
-                                    else:
-                                        # This is for the case where only standby_departure happens in the last area.
-                                        start_this_event = time_stamp
-
-                                assert (
-                                    start_this_event is not None
-                                ), f"Current process {process} should have a start time by now"
-
-                                if start_this_event in dict_of_events.keys():
-                                    if (
-                                        dict_of_events[start_this_event]["type"]
-                                        == "Trip"
-                                    ):
-                                        logger.info(
-                                            f"Vehicle {current_vehicle.ID} must depart immediately after charged. "
-                                            f"Thus there will be no STANDBY_DEPARTURE event."
-                                        )
-
-                                    else:
-                                        raise ValueError(
-                                            f"There is already an event "
-                                            f"{dict_of_events[start_this_event]} at {start_this_event}."
-                                        )
-
-                                    continue
-
-                                dict_of_events[start_this_event] = {
-                                    "type": type(process).__name__,
-                                    "area": current_area.ID,
-                                    "slot": current_slot,
-                                    "id": process.ID,
-                                }
-
-                        case ProcessStatus.IN_PROGRESS:
+                                    # This is for the case where only standby_departure happens in the last area.
+                                    start_this_event = time_stamp
+
                             assert (
-                                len(process.starts) == 1 and len(process.ends) == 0
-                            ), f"Current process {process.ID} is marked IN_PROGRESS, but has an end."
+                                start_this_event is not None
+                            ), f"Current process {process} should have a start time by now"
+
+                            if start_this_event in dict_of_events.keys():
+                                if dict_of_events[start_this_event]["type"] == "Trip":
+                                    logger.info(
+                                        f"Vehicle {current_vehicle.ID} must depart immediately after charged. "
+                                        f"Thus there will be no STANDBY_DEPARTURE event."
+                                    )
 
-                            if current_area is None or current_slot is None:
-                                raise ValueError(
-                                    f"For process {process.ID} Area and slot should not be None."
-                                )
+                                else:
+                                    raise ValueError(
+                                        f"There is already an event "
+                                        f"{dict_of_events[start_this_event]} at {start_this_event}."
+                                    )
 
-                            if process.dur > 0:
-                                # Valid duration
-                                dict_of_events[time_stamp] = {
-                                    "type": type(process).__name__,
-                                    "end": process.etc,
-                                    "area": current_area.ID,
-                                    "slot": current_slot,
-                                    "id": process.ID,
-                                }
-                            else:
-                                raise NotImplementedError(
-                                    "We believe this should never happen. If it happens, handle it here."
-                                )
+                                continue
 
-                        # The following ProcessStatus possibly only happen while the simulation is running,
-                        # not in the results
-                        case ProcessStatus.WAITING:
-                            raise NotImplementedError(
-                                f"Current process {process.ID} is waiting. Not implemented yet."
+                            dict_of_events[start_this_event] = {
+                                "type": type(process).__name__,
+                                "area": current_area.ID,
+                                "slot": current_slot,
+                                "id": process.ID,
+                            }
+
+                    case ProcessStatus.IN_PROGRESS:
+                        assert (
+                            len(process.starts) == 1 and len(process.ends) == 0
+                        ), f"Current process {process.ID} is marked IN_PROGRESS, but has an end."
+
+                        if current_area is None or current_slot is None:
+                            raise ValueError(
+                                f"For process {process.ID} Area and slot should not be None."
                             )
 
-                        case ProcessStatus.NOT_STARTED:
+                        if process.dur > 0:
+                            # Valid duration
+                            dict_of_events[time_stamp] = {
+                                "type": type(process).__name__,
+                                "end": process.etc,
+                                "area": current_area.ID,
+                                "slot": current_slot,
+                                "id": process.ID,
+                            }
+                        else:
                             raise NotImplementedError(
-                                f"Current process {process.ID} is not started. Not implemented yet."
+                                "We believe this should never happen. If it happens, handle it here."
                             )
 
-                        case _:
-                            raise ValueError(
-                                f"Invalid process status {process.status} for process {process.ID}."
-                            )
+                    # The following ProcessStatus possibly only happen while the simulation is running,
+                    # not in the results
+                    case ProcessStatus.WAITING:
+                        raise NotImplementedError(
+                            f"Current process {process.ID} is waiting. Not implemented yet."
+                        )
+
+                    case ProcessStatus.NOT_STARTED:
+                        raise NotImplementedError(
+                            f"Current process {process.ID} is not started. Not implemented yet."
+                        )
+
+                    case _:
+                        raise ValueError(
+                            f"Invalid process status {process.status} for process {process.ID}."
+                        )
 
 
 def complete_standby_departure_events(
@@ -396,19 +387,13 @@ def add_soc_to_events(dict_of_events, battery_log) -> None:
 
     :return: None. The results are added to the dictionary.
     """
-    battery_log_list = []
-    for log in battery_log:
-        # TODO this is a bypass of update events having lower energy_real than the event before. It happens in processes L 1304
-        if log.event_name == "update":
-            continue
-
-        battery_log_list.append((log.t, round(log.energy / log.energy_real, 4)))
+    # TODO this is a bypass of update events having lower energy_real than the event before. It happens in processes L 1304
+    soc_index = SocIndex(battery_log, exclude=("update",))
 
     time_keys = sorted(dict_of_events.keys())
 
-    battery_log_times = [log[0] for log in battery_log_list]
-    battery_log_socs = [log[1] for log in battery_log_list]
-    battery_log_index = {t: i for i, t in enumerate(battery_log_times)}
+    battery_log_times = soc_index.times.tolist()
+    battery_log_socs = [round(soc, 4) for soc in soc_index.soc.tolist()]
 
     for i in range(len(time_keys)):
         # Get soc
@@ -420,8 +405,17 @@ def add_soc_to_events(dict_of_events, battery_log) -> None:
             case "Charge" | "ChargeSteps" | "ChargeEquationSteps":
                 event_start = start_time
                 event_end = process_dict["end"]
-                start_time_index = battery_log_index[event_start]
-                end_time_index = battery_log_index[event_end]
+                # Last log at the start and end time
+                start_time_index = int(soc_index.position(event_start))
+                end_time_index = int(soc_index.position(event_end))
+                if (
+                    start_time_index < 0
+                    or battery_log_times[start_time_index] != event_start
+                    or battery_log_times[end_time_index] != event_end
+                ):
+                    raise KeyError(
+                        f"No battery log at the start or end of charging event at {event_start}."
+                    )
                 time_series = {
                     "time": battery_log_times[start_time_index:end_time_index],
                     "soc": battery_log_socs[start_time_index:end_time_index],
@@ -0,0 +1,439 @@
+"""Price- and peak-aware smart charging of depot charging events.
+
+Internal helpers for :func:`eflips.depot.api.apply_min_price_smart_charging`.
+The charging power of all CHARGING_DEPOT events of a depot is determined by a
+single sparse linear program that is solved with the HiGHS solver of
+:func:`scipy.optimize.linprog`. Time is discretized into equal time steps and
+each event may charge in every time step it overlaps, with the power in the
+partial first and last time steps scaled to the overlap.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from eflips.model import Area, Event, EventType
+from scipy.optimize import linprog
+from sqlalchemy.orm import Session
+
+DEMAND_CHARGE = 66.82
+"""Default demand charge in EUR per kW of peak power and year."""
+
+
+def load_price_profile(path: str) -> pd.Series:
+    """Load a price profile from a CSV file.
+
+    The file must have two columns: the start time of each price interval as ISO 8601 string with time zone and the
+    price in EUR/kWh. Each price is valid until the start of the next interval.
+
+    :param path: The path of the CSV file.
+    :return: A :class:`pandas.Series` of prices in EUR/kWh, indexed by the time zone aware start times, sorted by time.
+    """
+    frame = pd.read_csv(path)
+    if frame.shape[1] < 2:
+        raise ValueError(
+            f"Price profile {path} must have a time and a price column, got {list(frame.columns)}."
+        )
+    times = pd.to_datetime(frame.iloc[:, 0], utc=True)
+    prices = pd.Series(
+        frame.iloc[:, 1].to_numpy(dtype=float), index=pd.DatetimeIndex(times)
+    )
+    return prices.sort_index()
+
+
+def price_profile_from_environment() -> pd.Series:
+    """Load the price profile from the CSV file given by the PRICE_PROFILE environment variable.
+
+    :return: See :func:`load_price_profile`.
+    """
+    path = os.environ.get("PRICE_PROFILE")
+    if path is None:
+        raise ValueError(
+            "Smart charging with SmartChargingStrategy.MIN_PRICE needs a price profile. Pass price_profile to "
+            "simulate_scenario() or apply_min_price_smart_charging(), or set the PRICE_PROFILE environment variable "
+            "to the path of a CSV file with time and price columns."
+        )
+    return load_price_profile(path)
+
+
+def max_charging_power(event: Event) -> float:
+    """Find the maximum charging power of a charging event in kW.
+
+    This is the minimum of the maximum power of the charging curve of the vehicle's type and the power of the charging
+    process of the event's area. The vehicle type is the same one the energies are calculated with. The dependency of the charging power on the state of charge is not considered.
+
+    :param event: A CHARGING_DEPOT event.
+    :return: The maximum charging power in kW.
+    """
+    vehicle_max_power = max(p[1] for p in event.vehicle.vehicle_type.charging_curve)
+    charging_processes = [
+        p
+        for p in event.area.processes
+        if p.electric_power is not None and p.duration is None
+    ]
+    if len(charging_processes) != 1:
+        raise ValueError(
+            f"Area {event.area.id} must have exactly one process with electric power and no duration."
+        )
+    return min(vehicle_max_power, charging_processes[0].electric_power)
+
+
+@dataclass
+class ChargingSchedule:
+    """The result of :func:`solve_min_price`."""
+
+    step_starts: np.ndarray
+    """Start times of the time steps in seconds, relative to the start of the first time step."""
+
+    first_step: np.ndarray
+    """Index of the first time step of each event."""
+
+    powers: List[np.ndarray]
+    """The mean charging power in kW of each event in each time step it overlaps, starting with ``first_step``."""
+
+    unchanged: np.ndarray
+    """Whether each event was left out of the optimization because its energy cannot be charged at its maximum power
+    within the event. These events have zero powers."""
+
+    peak_power: float
+    """The peak of the summed charging power in kW."""
+
+    energy_cost: float
+    """The cost of the charged energy in EUR."""
+
+
+def solve_min_price(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    energies: np.ndarray,
+    max_powers: np.ndarray,
+    prices: np.ndarray,
+    time_step: float,
+    peak_cost: float = 0.0,
+    grid_limit: Optional[float] = None,
+) -> ChargingSchedule:
+    """Determine the charging power of events with minimal energy cost plus peak cost.
+
+    The linear program has one variable per event and time step overlapped by the event, which is the mean power of the
+    event in the time step, and one variable for the peak power:
+
+    - minimize ``sum(price[t] * power[e, t] * time_step) + peak_cost * peak``
+    - such that ``sum_t(power[e, t] * time_step) == energy[e]`` for each event,
+    - ``sum_e(power[e, t]) <= peak`` for each time step,
+    - ``0 <= power[e, t] <= max_power[e] * overlap[e, t]`` and ``0 <= peak <= grid_limit``,
+
+    where ``overlap[e, t]`` is the fraction of time step ``t`` that lies within event ``e``.
+
+    All constraint matrices are sparse, so that thousands of events can be solved at once.
+
+    :param starts: Start times of the events in seconds, relative to the start of the first time step (0).
+    :param ends: End times of the events in seconds.
+    :param energies: The energy to charge in each event in kWh. Events whose energy cannot be charged at the maximum
+        power within the event are left out, see :attr:`ChargingSchedule.unchanged`.
+    :param max_powers: The maximum charging power of each event in kW.
+    :param prices: The price in EUR/kWh in each time step. Its length determines the number of time steps.
+    :param time_step: The duration of a time step in seconds.
+    :param peak_cost: The cost in EUR per kW of peak power.
+    :param grid_limit: An optional upper bound of the summed charging power in kW.
+    :return: A :class:`ChargingSchedule`.
+    :raises ValueError: If the problem is infeasible, e.g. because of the grid limit.
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    max_powers = np.asarray(max_powers, dtype=float)
+    prices = np.asarray(prices, dtype=float)
+    n_events = len(starts)
+    n_steps = len(prices)
+    hours = time_step / 3600
+
+    # Time steps that overlap each event, including partial first and last steps
+    first_step = np.clip(np.floor(starts / time_step + 1e-9), 0, n_steps).astype(int)
+    last_step = np.clip(np.ceil(ends / time_step - 1e-9), 0, n_steps).astype(int)
+    step_counts = np.maximum(last_step - first_step, 0)
+
+    # One variable per (event, time step) pair, ordered by event
+    n_pairs = int(step_counts.sum())
+    pair_event = np.repeat(np.arange(n_events), step_counts)
+    offsets = np.cumsum(step_counts) - step_counts
+    pair_step = np.repeat(first_step - offsets, step_counts) + np.arange(n_pairs)
+    peak = n_pairs
+    overlap = (
+        np.minimum(ends[pair_event], (pair_step + 1) * time_step)
+        - np.maximum(starts[pair_event], pair_step * time_step)
+    ) / time_step
+    pair_max_powers = max_powers[pair_event] * np.clip(overlap, 0, 1)
+
+    # Events that cannot be charged at their maximum power are left out instead of charging less
+    energies = np.maximum(np.asarray(energies, dtype=float), 0)
+    capacities = np.bincount(
+        pair_event, weights=pair_max_powers * hours, minlength=n_events
+    )
+    unchanged = energies > capacities * (1 + 1e-9) + 1e-9
+    energies = np.where(unchanged, 0.0, np.minimum(energies, capacities))
+
+    cost = np.append(prices[pair_step] * hours, peak_cost)
+    a_eq = sp.csr_matrix(
+        (np.full(n_pairs, hours), (pair_event, np.arange(n_pairs))),
+        shape=(n_events, n_pairs + 1),
+    )
+    active_steps, pair_row = np.unique(pair_step, return_inverse=True)
+    n_rows = len(active_steps)
+    a_ub = sp.csr_matrix(
+        (
+            np.append(np.ones(n_pairs), np.full(n_rows, -1.0)),
+            (
+                np.append(pair_row, np.arange(n_rows)),
+                np.append(np.arange(n_pairs), np.full(n_rows, peak)),
+            ),
+        ),
+        shape=(n_rows, n_pairs + 1),
+    )
+    bounds = np.zeros((n_pairs + 1, 2))
+    bounds[:peak, 1] = pair_max_powers
+    bounds[peak, 1] = np.inf if grid_limit is None else grid_limit
+
+    # The interior point method is an order of magnitude faster than the simplex method for thousands of events
+    result = linprog(
+        cost,
+        A_ub=a_ub,
+        b_ub=np.zeros(n_rows),
+        A_eq=a_eq,
+        b_eq=energies,
+        bounds=bounds,
+        method="highs-ipm",
+    )
+    if result.status != 0:
+        raise ValueError(f"Smart charging optimization failed: {result.message}")
+
+    powers = np.clip(result.x[:peak], 0, None)
+    return ChargingSchedule(
+        step_starts=np.arange(n_steps) * time_step,
+        first_step=first_step,
+        powers=np.split(powers, np.cumsum(step_counts)[:-1]),
+        unchanged=unchanged,
+        peak_power=float(result.x[peak]),
+        energy_cost=float(np.dot(cost[:peak], powers)),
+    )
+
+
+def prices_at(price_profile: pd.Series, times: pd.DatetimeIndex) -> np.ndarray:
+    """Return the prices valid at the given times.
+
+    Each price is valid from its time until the next time in the profile. Times before the first price get the first
+    price.
+
+    :param price_profile: A :class:`pandas.Series` of prices, indexed by time zone aware times.
+    :param times: The times to look up.
+    :return: An array of prices.
+    """
+    index = price_profile.index.tz_convert("UTC")
+    positions = index.searchsorted(times.tz_convert("UTC"), side="right") - 1
+    return price_profile.to_numpy(dtype=float)[np.maximum(positions, 0)]
+
+
+def price_profile_span(price_profile: pd.Series) -> Tuple[datetime, datetime]:
+    """Return the period covered by a price profile.
+
+    Each price is valid until the next time in the profile. The last price is assumed to be valid for as long as the
+    price before it.
+
+    :param price_profile: A :class:`pandas.Series` of prices, indexed by time zone aware times.
+    :return: The start and end of the covered period.
+    """
+    if len(price_profile) < 2:
+        raise ValueError(
+            "A price profile needs at least two prices to determine the period it covers."
+        )
+    index = price_profile.index.tz_convert("UTC")
+    return index[0], index[-1] + (index[-1] - index[-2])
+
+
+def optimize_charging_events_min_price(
+    charging_events: List[Event],
+    price_profile: pd.Series,
+    demand_charge: float = DEMAND_CHARGE,
+    grid_limit: Optional[float] = None,
+    time_step: timedelta = timedelta(minutes=5),
+) -> Optional[ChargingSchedule]:
+    """Optimize the charging power of depot charging events for minimal cost.
+
+    The cost consists of the energy cost according to the price profile and the demand charge for the peak power,
+    scaled to the duration of the optimized period. The timeseries of the events are replaced by the optimized state of
+    charge. The start and end times and SoCs of the events are not modified. Events whose energy cannot be charged at
+    the maximum charging power within the event are not modified.
+
+    :param charging_events: The CHARGING_DEPOT events of one depot.
+    :param price_profile: A :class:`pandas.Series` of prices in EUR/kWh, indexed by time zone aware times.
+    :param demand_charge: The demand charge in EUR per kW of peak power and year.
+    :param grid_limit: An optional limit of the summed charging power of the events in kW.
+    :param time_step: The duration of a time step of the optimization.
+    :return: The :class:`ChargingSchedule`, or None if there are no events.
+    :raises ValueError: If the price profile does not cover the period of the events.
+    """
+    logger = logging.getLogger(__name__)
+
+    assert all(
+        event.event_type == EventType.CHARGING_DEPOT for event in charging_events
+    )
+    if not charging_events:
+        return None
+
+    origin = min(event.time_start for event in charging_events)
+    end = max(event.time_end for event in charging_events)
+    profile_start, profile_end = price_profile_span(price_profile)
+    if profile_start > origin or profile_end < end:
+        raise ValueError(
+            f"The price profile covers {profile_start} to {profile_end}, but the charging events last from {origin} "
+            f"to {end}. Use a price profile that covers the whole simulated period."
+        )
+    step = time_step.total_seconds()
+    n_steps = int(np.ceil((end - origin).total_seconds() / step))
+
+    starts = np.array(
+        [(e.time_start - origin).total_seconds() for e in charging_events]
+    )
+    ends = np.array([(e.time_end - origin).total_seconds() for e in charging_events])
+    energies = np.array(
+        [
+            e.vehicle.vehicle_type.battery_capacity * (e.soc_end - e.soc_start)
+            for e in charging_events
+        ]
+    )
+    max_powers = np.array([max_charging_power(e) for e in charging_events])
+    prices = prices_at(
+        price_profile, pd.date_range(origin, periods=n_steps, freq=time_step)
+    )
+
+    schedule = solve_min_price(
+        starts,
+        ends,
+        energies,
+        max_powers,
+        prices,
+        step,
+        peak_cost=demand_charge * (end - origin) / timedelta(days=365),
+        grid_limit=grid_limit,
+    )
+    if schedule.unchanged.any():
+        logger.warning(
+            f"{schedule.unchanged.sum()} charging events cannot be charged at their maximum power and are not "
+            f"optimized."
+        )
+    logger.info(
+        f"Smart charging optimization successful. Peak power: {schedule.peak_power:.2f} kW, "
+        f"energy cost: {schedule.energy_cost:.2f} EUR"
+    )
+
+    for event, first_step, powers in zip(
+        charging_events, schedule.first_step, schedule.powers
+    ):
+        if len(powers) and powers.sum() > 0:
+            _update_timeseries(event, origin, first_step, powers, time_step)
+    return schedule
+
+
+def _update_timeseries(
+    event: Event,
+    origin: datetime,
+    first_step: int,
+    powers: np.ndarray,
+    time_step: timedelta,
+) -> None:
+    """Replace the timeseries of an event by the state of charge resulting from the charging powers.
+
+    The powers are the mean powers in the time steps overlapped by the event, so the event charges its full energy and
+    the points of the timeseries are the start and end of the event and the time step boundaries in between.
+    """
+    hours = time_step.total_seconds() / 3600
+    energies = np.cumsum(powers[:-1]) * hours
+    socs = np.minimum(
+        event.soc_start + energies / event.vehicle.vehicle_type.battery_capacity,
+        event.soc_end,
+    )
+    times = [origin + (first_step + i) * time_step for i in range(1, len(powers))]
+
+    times = [event.time_start] + times + [event.time_end]
+    socs = [event.soc_start] + socs.tolist() + [event.soc_end]
+
+    event.timeseries = None  # type: ignore
+    event.timeseries = {
+        "time": [t.isoformat() for t in times],
+        "soc": [min(float(soc), 1.0) for soc in socs],  # type: ignore
+    }
+
+
+def add_slack_time_to_charging_events(
+    charging_events: List[Event],
+    session: Session,
+    standby_departure_duration: timedelta = timedelta(minutes=5),
+) -> None:
+    """Extend charging events into the subsequent STANDBY_DEPARTURE events.
+
+    A charging event ends as soon as the vehicle is fully charged, and the vehicle waits for departure in a
+    STANDBY_DEPARTURE event. Each STANDBY_DEPARTURE event that directly follows a charging event of the same vehicle
+    is shortened to ``standby_departure_duration`` and the charging event is extended until its start, giving room
+    for shifting the charging power. A timeseries keeping the original charging end is added to the charging event.
+
+    :param charging_events: CHARGING_DEPOT events without timeseries.
+    :param session: An open database session.
+    :param standby_departure_duration: The remaining duration of the STANDBY_DEPARTURE events.
+    """
+    if not charging_events:
+        return
+    vehicle_ids = {event.vehicle_id for event in charging_events}
+    standby_events: Dict[tuple, Event] = {
+        (event.vehicle_id, event.time_start): event
+        for event in session.query(Event)
+        .filter(Event.event_type == EventType.STANDBY_DEPARTURE)
+        .filter(Event.vehicle_id.in_(vehicle_ids))
+    }
+
+    for charging_event in charging_events:
+        next_event = standby_events.get(
+            (charging_event.vehicle_id, charging_event.time_end)
+        )
+        if next_event is None:
+            continue
+        if next_event.time_end - next_event.time_start > standby_departure_duration:
+            next_event.time_start = next_event.time_end - standby_departure_duration
+            charging_event.timeseries = {
+                "time": [
+                    charging_event.time_start.isoformat(),
+                    charging_event.time_end.isoformat(),
+                    next_event.time_start.isoformat(),
+                ],
+                "soc": [
+                    charging_event.soc_start,
+                    charging_event.soc_end,
+                    charging_event.soc_end,
+                ],
+            }
+            charging_event.time_end = next_event.time_start
+    session.flush()
+
+
+def charging_events_of_depot(session: Session, depot_id: int) -> List[Event]:
+    """Return the CHARGING_DEPOT events at the areas of a depot."""
+    return (
+        session.query(Event)
+        .join(Area)
+        .filter(Area.depot_id == depot_id)
+        .filter(Event.event_type == EventType.CHARGING_DEPOT)
+        .all()
+    )
+
+
+def to_price_profile(price_profile: Union[pd.Series, str, None]) -> pd.Series:
+    """Return a price profile from a Series, a CSV file path or the PRICE_PROFILE environment variable (None)."""
+    if price_profile is None:
+        return price_profile_from_environment()
+    if isinstance(price_profile, str):
+        return load_price_profile(price_profile)
+    if price_profile.index.tz is None:
+        raise ValueError("The index of the price profile must be time zone aware.")
+    return price_profile.sort_index()
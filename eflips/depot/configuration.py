@@ -7,17 +7,26 @@ Created on Thu Sep  7 09:31:54 2017
 Components for the configuration of a depot.
 
 """
+import copy
 import json
 import os
 from os.path import basename
 from typing import Dict
 
+import simpy
+
 import eflips
-from eflips.depot.depot import Depot, LineArea, ParkingAreaGroup, SpecificActivityPlan
+from eflips.depot.depot import (
+    Depot,
+    DefaultActivityPlan,
+    LineArea,
+    ParkingAreaGroup,
+    SpecificActivityPlan,
+)
 from eflips.depot.filters import VehicleFilter
 from eflips.depot.resources import DepotResource, DepotChargingInterface, ResourceSwitch
 from eflips.depot.processes import ChargeSteps
-from eflips.evaluation import DataLogger
+from eflips.depot.data_logger import create_logger
 from eflips.helperFunctions import load_json, save_json
 
 
@@ -30,6 +39,9 @@ class DepotConfigurator:
 
     Before env.run is called, complete() must be called.
 
+    For repeated simulations of the same template, create a
+    ConfigurationSnapshot once and use load_snapshot instead of load.
+
     Configuration-related errors are not raised. Instead, the current action is
     cancelled and a prepared error message is returned to enable the sender to
     decide on further actions (e.g. show an info popup in GUI).
@@ -62,6 +74,7 @@ class DepotConfigurator:
         self.multiplied_areas = {}
 
         self.completed = False
+        self.validated = False
 
     @property
     def isvalid(self):
@@ -172,6 +185,7 @@ class DepotConfigurator:
         self.templatename_display = ""
 
         self.multiplied_areas.clear()
+        self.validated = False
 
         self.depot.ID = "New depot"
         self.depot.resources.clear()
@@ -472,6 +486,7 @@ class DepotConfigurator:
         area = cls(env=self.env, **kwargs)
         self.depot.areas[ID] = area
         area.depot = self.depot
+        self.depot.update_vacant(area.vacant, area.vacant_accessible)
 
         # Add area to departure_areas if issink
         if area.issink:
@@ -514,6 +529,7 @@ class DepotConfigurator:
                 areas.remove(area)
 
         del self.depot.areas[ID]
+        self.depot.update_vacant(-area.vacant, -area.vacant_accessible)
         return removed_from_special
 
     def export_area(self, area):
@@ -764,6 +780,9 @@ class DepotConfigurator:
         - dict containing the configuration
         - a string containing a path without extension to a json file
 
+        The template is not altered, so the same dict can be loaded by
+        multiple configurators without copying it.
+
         :param template: dict or str
         """
         self.reset()
@@ -787,9 +806,12 @@ class DepotConfigurator:
             "dispatch_strategy_name"
         ]
 
+        # Entries are copied before removing the typename. Nested values are
+        # shared with the template and must not be altered.
+
         # Import resources
         for k in loaded_data["resources"]:
-            data = loaded_data["resources"][k]
+            data = dict(loaded_data["resources"][k])
             resource, errormsg = self.add_resource(data.pop("typename"), ID=k, **data)
             if resource is None:
                 return False, errormsg
@@ -803,34 +825,128 @@ class DepotConfigurator:
 
         # Import processes
         for k in loaded_data["processes"]:
-            data = loaded_data["processes"][k]
+            data = dict(loaded_data["processes"][k])
             process, errormsg = self.add_process(data.pop("typename"), ID=k, **data)
             if process is None:
                 return False, errormsg
 
         # Import areas
         for k in loaded_data["areas"]:
-            data = loaded_data["areas"][k]
+            data = dict(loaded_data["areas"][k])
             area, errormsg = self.add_area(data.pop("typename"), ID=k, **data)
             if area is None:
                 return False, errormsg
 
         # Import groups
         for k in loaded_data["groups"]:
-            data = loaded_data["groups"][k]
+            data = dict(loaded_data["groups"][k])
             group, errormsg = self.add_group(data.pop("typename"), ID=k, **data)
             if group is None:
                 return False, errormsg
 
         # Import activity plans
         for k in loaded_data["plans"]:
-            data = loaded_data["plans"][k]
+            data = dict(loaded_data["plans"][k])
             plan, errormsg = self.add_plan(data.pop("typename"), ID=k, **data)
             if plan is None:
                 return False, errormsg
 
         return True, None
 
+    def load_snapshot(self, snapshot):
+        """Load a depot configuration from a ConfigurationSnapshot.
+        Unlike load, IDs and references are not checked and complete() skips
+        the validity check because the snapshot was validated at creation.
+        Changes made with the add and remove methods after loading are
+        therefore not validated. The snapshot entries are copied, so such
+        changes do not affect the snapshot.
+        Return (True, None) like load.
+        """
+        self.reset()
+
+        resources, resource_switches, processes, areas, groups, plans = copy.deepcopy(
+            (
+                snapshot.resources,
+                snapshot.resource_switches,
+                snapshot.processes,
+                snapshot.areas,
+                snapshot.groups,
+                snapshot.plans,
+            )
+        )
+
+        self.filename_loaded = snapshot.filename_loaded
+        self.templatename = snapshot.templatename
+        self.templatename_display = snapshot.templatename_display
+        self.depot.ID = snapshot.depotID
+        self.depot.depot_control.dispatch_strategy_name = (
+            snapshot.dispatch_strategy_name
+        )
+        depot = self.depot
+
+        for ID, cls, kwargs in resources:
+            depot.resources[ID] = cls(env=self.env, depot=depot, ID=ID, **kwargs)
+
+        for ID, kwargs in resource_switches:
+            depot.resource_switches[ID] = ResourceSwitch(
+                env=self.env,
+                ID=ID,
+                **dict(kwargs, resource=depot.resources[kwargs["resource"]])
+            )
+
+        for ID, typename, cls, kwargs in processes:
+            kwargs = dict(kwargs, ID=ID)
+            if kwargs.get("vehicle_filter") is not None:
+                kwargs["vehicle_filter"] = VehicleFilter(
+                    env=self.env, **kwargs["vehicle_filter"]
+                )
+            if kwargs.get("required_resources"):
+                kwargs["required_resources"] = [
+                    depot.resources[resID] for resID in kwargs["required_resources"]
+                ]
+            depot.processes[ID] = {"kwargs": kwargs, "type": cls, "typename": typename}
+
+        for ID, cls, kwargs in areas:
+            kwargs = dict(kwargs, ID=ID)
+            if kwargs["entry_filter"] is not None:
+                kwargs["entry_filter"] = VehicleFilter(
+                    env=self.env, **kwargs["entry_filter"]
+                )
+            if kwargs.get("charging_interfaces"):
+                kwargs["charging_interfaces"] = [
+                    depot.resources[ciID] for ciID in kwargs["charging_interfaces"]
+                ]
+            area = cls(env=self.env, **kwargs)
+            depot.areas[ID] = area
+            area.depot = depot
+            depot.update_vacant(area.vacant, area.vacant_accessible)
+            if area.issink:
+                depot.depot_control.departure_areas.add_store(area)
+
+        for ID, cls, kwargs in groups:
+            stores = [depot.areas[areaID] for areaID in kwargs["stores"]]
+            group = cls(env=self.env, ID=ID, **dict(kwargs, stores=stores))
+            depot.groups[ID] = group
+            group.depot = depot
+            if cls is ParkingAreaGroup:
+                depot.parking_area_groups.append(group)
+                for area in group.stores:
+                    area.parking_area_group = group
+
+        for ID, cls, kwargs in plans:
+            kwargs = dict(kwargs, locations=self.get_locations(kwargs["locations"])[0])
+            if cls is DefaultActivityPlan:
+                depot.default_plan = cls(**kwargs)
+            else:
+                if kwargs.get("vehicle_filter") is not None:
+                    kwargs["vehicle_filter"] = VehicleFilter(
+                        env=self.env, **kwargs["vehicle_filter"]
+                    )
+                depot.specific_plans[ID] = cls(ID=ID, **kwargs)
+
+        self.validated = True
+        return True, None
+
     def save(self, filename):
         """Save current configuration as a json template. The configuration
         must be valid.
@@ -892,15 +1008,17 @@ class DepotConfigurator:
             errormsg = "Method DepotConfigurator.complete can be called " "only once."
             return False, errormsg
 
-        # Final check for validity
-        success, errormsg = self.isvalid
-        if not success:
-            return success, errormsg
+        # Final check for validity. Skipped for snapshots, which were
+        # validated at creation
+        if not self.validated:
+            success, errormsg = self.isvalid
+            if not success:
+                return success, errormsg
 
         self.depot.depot_control._complete()
 
         if eflips.globalConstants["general"]["LOG_ATTRIBUTES"]:
-            self.depot.init_store.logger = DataLogger(
+            self.depot.init_store.logger = create_logger(
                 self.env, self.depot.init_store, "BACKGROUNDSTORE"
             )
 
@@ -929,3 +1047,78 @@ class DepotConfigurator:
 
         self.completed = True
         return True, None
+
+
+class ConfigurationSnapshot:
+    """Validated depot configuration that can be loaded into any number of
+    DepotConfigurator instances with DepotConfigurator.load_snapshot, e.g. for
+    parameter sweeps that simulate the same template with different settings.
+
+    At creation, the template is parsed, loaded and completed once in a
+    separate simpy environment, which raises ValueError if the configuration is
+    invalid. The snapshot stores the template entries with resolved classes
+    and without typenames. Loading it only instantiates the simpy-bound
+    objects for the new environment. The eflips settings must be loaded before
+    creation because they are used for validation.
+
+    Parameters:
+    template: [dict or str] depot template as accepted by
+        DepotConfigurator.load. A dict is copied, so later changes do not
+        affect the snapshot. A json file is parsed only here.
+    """
+
+    def __init__(self, template):
+        if isinstance(template, str):
+            loaded_data = load_json(template)
+            self.filename_loaded = template
+            self.templatename = template.split("\\")[-1]
+        else:
+            loaded_data = copy.deepcopy(template)
+            self.filename_loaded = "No filename"
+            self.templatename = "Not template name"
+
+        configurator = DepotConfigurator(simpy.Environment())
+        success, errormsg = configurator.load(loaded_data)
+        if not success:
+            raise ValueError("Error while loading template: " + errormsg)
+        success, errormsg = configurator.complete()
+        if not success:
+            raise ValueError(errormsg)
+
+        self.templatename_display = configurator.templatename_display
+        self.depotID = configurator.depot.ID
+        self.dispatch_strategy_name = (
+            configurator.depot.depot_control.dispatch_strategy_name
+        )
+
+        self.resources = [
+            (ID, type(configurator.depot.resources[ID]), self._kwargs(data))
+            for ID, data in loaded_data["resources"].items()
+        ]
+        self.resource_switches = list(loaded_data["resource_switches"].items())
+        self.processes = [
+            (
+                ID,
+                data["typename"],
+                configurator.depot.processes[ID]["type"],
+                self._kwargs(data),
+            )
+            for ID, data in loaded_data["processes"].items()
+        ]
+        self.areas = [
+            (ID, type(configurator.depot.areas[ID]), self._kwargs(data))
+            for ID, data in loaded_data["areas"].items()
+        ]
+        self.groups = [
+            (ID, type(configurator.depot.groups[ID]), self._kwargs(data))
+            for ID, data in loaded_data["groups"].items()
+        ]
+        self.plans = [
+            (ID, getattr(eflips.depot.depot, data["typename"]), self._kwargs(data))
+            for ID, data in loaded_data["plans"].items()
+        ]
+
+    @staticmethod
+    def _kwargs(data):
+        """Return the template entry *data* without typename and amount."""
+        return {k: v for k, v in data.items() if k not in ("typename", "amount")}
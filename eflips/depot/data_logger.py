@@ -0,0 +1,622 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar attribute logging for the depot simulation.
+
+ColumnarLogger is a replacement for eflips.evaluation.DataLogger for the
+logging mode that the depot simulation uses (LOG_SPECIFIC_STEPS). Instead of
+one dict entry per logged value, values are appended to typed arrays. Objects
+such as areas and processes are interned once per simulation and stored as integer
+codes. The usual loggedData mapping is built lazily from the columns when it
+is accessed.
+
+"""
+from array import array
+from collections import namedtuple
+from collections.abc import MutableMapping
+from math import ceil
+from operator import attrgetter
+from weakref import WeakKeyDictionary
+
+from eflips.depot.events import LogWindow, WindowedDict
+from eflips.evaluation import DataLogger
+from eflips.helperFunctions import createEvalScheme
+from eflips.settings import globalConstants
+
+
+RESULT_ATTRIBUTES = {
+    "VEHICLE": ["dwd.active_processes_copy"],
+    "DIRECTAREA": ["count_rfd_unblocked"],
+    "LINEAREA": ["count_rfd_unblocked"],
+    "BACKGROUNDSTORE": [],
+    "DEPOTRESOURCE": [],
+}
+"""Value for the setting LOGGED_ATTRIBUTES that only logs the attributes
+read by eflips.depot.api.private.results_to_database and
+DepotEvaluation.calc_count_rfd_unblocked_total. The plots of DepotEvaluation
+are not available with it."""
+
+
+def create_logger(env, logObj, classToLog):
+    """Return a logger for *logObj*.
+
+    A ColumnarLogger is returned if the logging settings allow it, otherwise
+    an eflips.evaluation.DataLogger. The logged attributes can be restricted
+    per class with the optional setting globalConstants['general'][
+    'LOGGED_ATTRIBUTES'], e.g. {'VEHICLE': ['dwd.current_area']}. Without
+    it, the full evaluation scheme is logged. RESULT_ATTRIBUTES is a
+    selection for runs that only need the results written to the database
+    and the ready-for-departure counts. Only ColumnarLogger honours the
+    optional setting LOG_WINDOW (see eflips.depot.events).
+    """
+    general = globalConstants["general"]
+    if (
+        general.get("LOG_COLUMNAR", True)
+        and general["LOG_SPECIFIC_STEPS"]
+        and not general["LOG_CONTINUOUSLY"]
+        and not general["LOG_COPIES"]
+    ):
+        attributes = general.get("LOGGED_ATTRIBUTES", {}).get(classToLog)
+        return ColumnarLogger(env, logObj, classToLog, attributes)
+    return DataLogger(env, logObj, classToLog)
+
+
+class ColumnarLogger:
+    """Log attributes of one object at specific steps in columnar form.
+
+    Drop-in replacement for eflips.evaluation.DataLogger with
+    LOG_SPECIFIC_STEPS enabled. Logging is triggered by calling steplog or log.
+
+    Parameters:
+    env: [simpy.Environment]
+    logObj: object whose attributes are logged
+    classToLog: [str] key in the evaluation scheme in settings
+    attributes: [iterable or None] names of attributes to log. If not None,
+        only attributes that are in this selection and in the evaluation
+        scheme are logged.
+
+    Attributes:
+    attsToLog: [dict] attribute names by 'attsToLog_const' and
+        'attsToLog_time' as in DataLogger
+    loggedData: [LoggedData] mapping with the same interface as
+        DataLogger.loggedData
+    window: [LogWindow or None] evaluation window from the setting
+        LOG_WINDOW. Only the last value before the window is kept and values
+        after the window are dropped.
+    """
+
+    replayed_attributes = {"dwd.active_processes_copy": "dwd.process_log"}
+    """Attributes that are not copied at each step. Instead, a step is marked
+    in the event log given as value, from which the logged values are
+    replayed on access."""
+
+    def __init__(self, env, logObj, classToLog, attributes=None):
+        self.env = env
+        self.logObj = logObj
+        self.attsToLog = createEvalScheme(classToLog)
+        if attributes is not None:
+            attributes = set(attributes)
+            self.attsToLog = {
+                key: [attr for attr in atts if attr in attributes]
+                for key, atts in self.attsToLog.items()
+            }
+        self.check_attsToLog()
+        self.evaluationSets = globalConstants["evaluationScheme"][classToLog]
+        self.window = LogWindow.of(env)
+        self.loggedData = LoggedData(Symbols.of(env), self.window)
+        self.action = None
+
+        self._getters = {
+            attr: attrgetter(attr) for atts in self.attsToLog.values() for attr in atts
+        }
+        self._replayed = {}
+        for attr in self._getters:
+            if attr in self.replayed_attributes:
+                try:
+                    event_log = attrgetter(self.replayed_attributes[attr])(logObj)
+                except AttributeError:
+                    continue
+                self._replayed[attr] = event_log
+                self.loggedData.add_view(attr, _ReplayColumn(event_log))
+
+        self.steplogSwitch = (
+            globalConstants["general"]["LOG_ATTRIBUTES"]
+            and any(self.attsToLog["attsToLog_time"])
+            and globalConstants["general"]["LOG_SPECIFIC_STEPS"]
+        )
+
+        if self.steplogSwitch:
+            for attr in self.attsToLog["attsToLog_const"]:
+                self.log(attr)
+            for attr in self.attsToLog["attsToLog_time"]:
+                self.log(attr)
+
+    def steplog(self, *args, **kwargs):
+        """Call log() for each attr in attsToLog at specific timestep in code.
+        Accepts *args/**kwargs in order to allow calling this method as a simpy
+        event callback.
+        """
+        if self.steplogSwitch:
+            for attr in self.attsToLog["attsToLog_time"]:
+                self.log(attr)
+
+    def log(self, attr):
+        """Get *attr* from logObj and append it to its column. Log None if the
+        attribute doesn't exist.
+        """
+        if not globalConstants["general"]["LOG_ATTRIBUTES"]:
+            return
+        event_log = self._replayed.get(attr)
+        if event_log is not None:
+            window = self.window
+            if window is not None:
+                t = self.env.now
+                if t >= window.end:
+                    return
+                if t < window.start and event_log.step_times:
+                    if event_log.step_times[-1] < window.start:
+                        event_log.pop_step()
+            event_log.step()
+            self.loggedData.touch(attr)
+            return
+        getter = self._getters.get(attr)
+        if getter is None:
+            getter = self._getters[attr] = attrgetter(attr)
+        try:
+            value = getter(self.logObj)
+        except AttributeError:
+            value = None
+        self.loggedData.append(attr, self.env.now, value)
+
+    def get_valList(self, attr, SIM_TIME=False):
+        """Return a list with the logged values of *attr* by time step and
+        None where no value was logged. See DataLogger.get_valList.
+        """
+        data = self.loggedData
+        if not SIM_TIME:
+            SIM_TIME = ceil(max(data.times(attr)) + 1)
+        y = [None] * SIM_TIME
+        for t, value in data.items_of(attr):
+            y[t] = value
+        return y
+
+    def check_attsToLog(self):
+        for attr in self.attsToLog["attsToLog_time"]:
+            if not isinstance(attr, str):
+                raise ValueError(
+                    "list attsToLog for class '%s' " % (type(self.logObj))
+                    + "must only contain strings"
+                )
+        return True
+
+
+class LoggedData(MutableMapping):
+    """Mapping of attribute name to a dict {time: value}, like
+    DataLogger.loggedData.
+
+    Values appended through append are stored in columns and converted to a
+    dict only when accessed. Dicts that are assigned directly (e.g. for
+    logging custom events) are stored as they are.
+
+    If *window* [LogWindow] is given, values after the window are dropped
+    and of the values before the window only the last one is kept.
+    """
+
+    def __init__(self, symbols, window=None):
+        self._columns = {}
+        self._dicts = {}
+        self._cache = {}
+        self._symbols = symbols
+        self._window = window
+
+    def append(self, attr, t, value):
+        """Log *value* of *attr* at time *t*. An existing value at *t* is
+        replaced.
+        """
+        window = self._window
+        if window is not None:
+            if t >= window.end:
+                return
+            if t < window.start:
+                self._drop_before(attr, window.start)
+        column = self._columns.get(attr)
+        if column is None:
+            if attr in self._dicts:
+                self._dicts[attr][t] = value
+                return
+            column = self._columns[attr] = _new_column(value)
+        elif not column.accepts(t, value):
+            # Values that don't fit into the column: fall back to a dict
+            data = self[attr]
+            del self._columns[attr]
+            self._cache.pop(attr, None)
+            if window is not None:
+                data = WindowedDict(window, data)
+            self._dicts[attr] = data
+            data[t] = value
+            return
+        column.append(t, value, self._symbols)
+        self._cache.pop(attr, None)
+
+    def _drop_before(self, attr, start):
+        """Drop the last value of *attr* if it was logged before *start*,
+        i.e. it is replaced by a newer checkpoint.
+        """
+        column = self._columns.get(attr)
+        if column is not None and column.times and column.times[-1] < start:
+            column.pop()
+
+    def add_view(self, attr, view):
+        """Use *view* as column of *attr*. *view* must provide times and
+        items(symbols) like the columns, but is not appended to.
+        """
+        self._dicts.pop(attr, None)
+        self._cache.pop(attr, None)
+        self._columns[attr] = view
+
+    def touch(self, attr):
+        """Drop the cached dict of *attr* after its view changed."""
+        self._cache.pop(attr, None)
+
+    def times(self, attr):
+        """Return the logged times of *attr*."""
+        column = self._columns.get(attr)
+        if column is None:
+            return self._dicts[attr].keys()
+        return column.times
+
+    def items_of(self, attr):
+        """Return an iterable of (time, value) tuples of *attr* without
+        building the dict.
+        """
+        column = self._columns.get(attr)
+        if column is None:
+            return self._dicts[attr].items()
+        return column.items(self._symbols)
+
+    def __getitem__(self, attr):
+        data = self._cache.get(attr)
+        if data is None:
+            column = self._columns.get(attr)
+            if column is None:
+                return self._dicts[attr]
+            data = self._cache[attr] = dict(column.items(self._symbols))
+        return data
+
+    def __setitem__(self, attr, value):
+        self._columns.pop(attr, None)
+        self._cache.pop(attr, None)
+        self._dicts[attr] = value
+
+    def __delitem__(self, attr):
+        if attr in self._columns:
+            del self._columns[attr]
+            self._cache.pop(attr, None)
+        else:
+            del self._dicts[attr]
+
+    def __iter__(self):
+        yield from self._columns
+        yield from self._dicts
+
+    def __len__(self):
+        return len(self._columns) + len(self._dicts)
+
+    def __contains__(self, attr):
+        return attr in self._columns or attr in self._dicts
+
+    def __repr__(self):
+        return "{%s} %s" % (type(self).__name__, list(self))
+
+
+class Symbols:
+    """Interning table that maps logged objects to integer codes. Ints are
+    interned by value, all other objects by identity. One table is shared by
+    all loggers of a simulation environment.
+    """
+
+    _tables = WeakKeyDictionary()
+
+    def __init__(self):
+        self.values = []
+        self._int_codes = {}
+        self._obj_codes = {}
+
+    @classmethod
+    def of(cls, env):
+        """Return the table of simulation environment *env*."""
+        table = cls._tables.get(env)
+        if table is None:
+            table = cls._tables[env] = cls()
+        return table
+
+    def code(self, value):
+        """Return the code of *value*. Add *value* if it is new."""
+        if type(value) is int:
+            codes = self._int_codes
+            key = value
+        else:
+            codes = self._obj_codes
+            key = id(value)
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class TimeArray:
+    """Append-only sequence of simulation times. The times are kept in an
+    array of ints as long as all of them are ints, and in a list once a time
+    of another type (e.g. float) is appended. Times are returned as they were
+    appended, like the keys of DataLogger.loggedData.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = array("q")
+
+    def append(self, t):
+        if type(t) is not int and type(self._data) is array:
+            self._data = self._data.tolist()
+        self._data.append(t)
+
+    def pop(self):
+        return self._data.pop()
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __repr__(self):
+        return "{%s} %s" % (type(self).__name__, list(self._data))
+
+
+def _new_column(value):
+    if type(value) is list:
+        return _SequenceColumn()
+    if type(value) is dict:
+        return _ObjectColumn()
+    return _ScalarColumn()
+
+
+class _ScalarColumn:
+    """Column of single values stored as symbol codes."""
+
+    __slots__ = ("times", "codes")
+
+    def __init__(self):
+        self.times = TimeArray()
+        self.codes = array("i")
+
+    def accepts(self, t, value):
+        return type(value) not in (list, dict) and (
+            not self.times or t >= self.times[-1]
+        )
+
+    def append(self, t, value, symbols):
+        code = symbols.code(value)
+        if self.times and self.times[-1] == t:
+            self.codes[-1] = code
+        else:
+            self.times.append(t)
+            self.codes.append(code)
+
+    def pop(self):
+        self.times.pop()
+        self.codes.pop()
+
+    def items(self, symbols):
+        values = symbols.values
+        return zip(self.times, [values[code] for code in self.codes])
+
+
+class _SequenceColumn:
+    """Column of lists stored as one flat list of the items and the end
+    offset of each list. Items are referenced directly because most of them
+    (e.g. processes) are logged only a few times, which doesn't pay off for
+    interning.
+    """
+
+    __slots__ = ("times", "ends", "flat")
+
+    def __init__(self):
+        self.times = TimeArray()
+        self.ends = array("q")
+        self.flat = []
+
+    def accepts(self, t, value):
+        return type(value) is list and (not self.times or t >= self.times[-1])
+
+    def append(self, t, value, symbols):
+        if self.times and self.times[-1] == t:
+            self.pop()
+        self.flat.extend(value)
+        self.times.append(t)
+        self.ends.append(len(self.flat))
+
+    def pop(self):
+        start = self.ends[-2] if len(self.ends) > 1 else 0
+        del self.flat[start:]
+        self.ends.pop()
+        self.times.pop()
+
+    def items(self, symbols):
+        flat = self.flat
+        lists = []
+        start = 0
+        for end in self.ends:
+            lists.append(flat[start:end])
+            start = end
+        return zip(self.times, lists)
+
+
+class _ObjectColumn:
+    """Column of values that are unique per log entry, such as dicts. Values
+    are referenced directly.
+    """
+
+    __slots__ = ("times", "values")
+
+    def __init__(self):
+        self.times = TimeArray()
+        self.values = []
+
+    def accepts(self, t, value):
+        return not self.times or t >= self.times[-1]
+
+    def append(self, t, value, symbols):
+        if self.times and self.times[-1] == t:
+            self.values[-1] = value
+        else:
+            self.times.append(t)
+            self.values.append(value)
+
+    def pop(self):
+        self.times.pop()
+        self.values.pop()
+
+    def items(self, symbols):
+        return zip(self.times, self.values)
+
+
+class _ReplayColumn:
+    """View of the steps of an event log such as ProcessLog as column."""
+
+    __slots__ = ("event_log",)
+
+    def __init__(self, event_log):
+        self.event_log = event_log
+
+    @property
+    def times(self):
+        return self.event_log.step_times
+
+    def items(self, symbols):
+        return self.event_log.snapshots()
+
+
+ProcessRecord = namedtuple("ProcessRecord", "t kind process area slot")
+
+
+class ProcessLog:
+    """Event-sourced log of the processes of one vehicle.
+
+    A record is appended once per transition of a process: when it is added
+    to or removed from the vehicle's active processes and when it is
+    interrupted and resumed later. Records contain the vehicle's area and slot
+    at the time of the transition.
+
+    Snapshots of the active processes are not copied. Instead, step marks the
+    current position in the log, and snapshots replays the records up to
+    each mark.
+
+    Parameters:
+    vehicle: [SimpleVehicle] owner of the log
+
+    Attributes:
+    step_times, step_positions: [array] time and number of records of each
+        step
+    """
+
+    START = 0
+    END = 1
+    CANCEL = 2
+    INTERRUPT = 3
+    kind_names = ("start", "end", "cancel", "interrupt")
+
+    def __init__(self, vehicle):
+        self.vehicle = vehicle
+        self.env = vehicle.env
+
+        self.times = TimeArray()
+        self.kinds = array("b")
+        self.processes = []
+        self.areas = []
+        self.slots = array("i")
+
+        self.step_times = TimeArray()
+        self.step_positions = array("q")
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        """Iterate over all records as ProcessRecord tuples."""
+        for t, kind, process, area, slot in zip(
+            self.times, self.kinds, self.processes, self.areas, self.slots
+        ):
+            yield ProcessRecord(
+                t, self.kind_names[kind], process, area, slot if slot >= 0 else None
+            )
+
+    def record(self, kind, process):
+        """Append a record of *kind* for *process*."""
+        dwd = self.vehicle.dwd
+        slot = dwd.current_slot
+        self.times.append(self.env.now)
+        self.kinds.append(kind)
+        self.processes.append(process)
+        self.areas.append(dwd.current_area)
+        self.slots.append(slot if slot is not None else -1)
+
+    def step(self):
+        """Mark the current position in the log. A mark at the same time is
+        replaced.
+        """
+        t = self.env.now
+        if self.step_times and self.step_times[-1] == t:
+            self.step_positions[-1] = len(self.kinds)
+        else:
+            self.step_times.append(t)
+            self.step_positions.append(len(self.kinds))
+
+    def pop_step(self):
+        """Remove the last step mark."""
+        self.step_times.pop()
+        self.step_positions.pop()
+
+    def snapshots(self, start=None, end=None):
+        """Generator that yields (time, list of active processes) for each
+        step, in the same form as logged snapshots of
+        DepotWorkingData.active_processes_copy. If given, only steps with
+        start <= time <= end are yielded.
+        """
+        kinds = self.kinds
+        processes = self.processes
+        active = []
+        i = 0
+        for t, position in zip(self.step_times, self.step_positions):
+            if end is not None and t > end:
+                break
+            while i < position:
+                kind = kinds[i]
+                if kind == ProcessLog.START:
+                    active.append(processes[i])
+                elif kind != ProcessLog.INTERRUPT:
+                    active.remove(processes[i])
+                i += 1
+            if start is None or t >= start:
+                yield t, active.copy()
+
+    def last_snapshot(self):
+        """Return (time, list of active processes) of the last step."""
+        for t, active in self.snapshots(start=self.step_times[-1]):
+            return t, active
+
+    def locations(self):
+        """Return a dict {process: (area, slot)} with the location of each
+        process at its start.
+        """
+        return {
+            process: (area, slot if slot >= 0 else None)
+            for kind, process, area, slot in zip(
+                self.kinds, self.processes, self.areas, self.slots
+            )
+            if kind == ProcessLog.START
+        }
@@ -8,12 +8,15 @@ Core components of the depot simulation model.
 """
 
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
 from collections import Counter
+from itertools import count
+from math import inf
 from warnings import warn
 
 import simpy
-from eflips.evaluation import DataLogger
-from eflips.helperFunctions import flexprint, SortedList
+from eflips.depot.data_logger import create_logger, ProcessLog
+from eflips.helperFunctions import flexprint
 from eflips.settings import globalConstants
 from eflips.simpy_ext import (
     FilterStoreExt,
@@ -30,9 +33,14 @@ from simpy.core import BoundClass
 from simpy.resources.store import StorePut
 from simpy.util import start_delayed
 
-from eflips.depot.evaluation import Departure, ProcessCalled
+from eflips.depot.events import Departure, ProcessCalled
 from eflips.depot.filters import VehicleFilter
-from eflips.depot.processes import EstimateValue, ChargeAbstract, Precondition
+from eflips.depot.processes import (
+    EstimateValue,
+    ChargeAbstract,
+    Precondition,
+    ProcessStatus,
+)
 from eflips.depot.rating import (
     SlotAlternative,
     ParkRating,
@@ -41,6 +49,10 @@ from eflips.depot.rating import (
 )
 from eflips.depot.resources import DepotChargingInterface
 
+# If True, incrementally maintained occupancy counters of areas and depots are
+# checked against a full recount after every update. Slow, for debugging only.
+DEBUG_COUNTERS = False
+
 
 class DepotWorkingData:
     """Data container for communication between vehicle and depot.
@@ -57,12 +69,19 @@ class DepotWorkingData:
         the depot. None outside.
     active_processes: [list] for statistics, contains BaseDepotProcess
         or subclass objects that are currently active and not on hold
+    process_log: [ProcessLog] records of process starts, ends,
+        cancellations and interruptions of the vehicle
     any_active_processes: [bool] True if any BaseDepotProcess is currently
         active. Not the same as bool(active_processes) because
         any_active_processes is also True if processes are on hold, e.g. when
         interrupted and waiting for restart.
     on_hold: [bool] flag used to prevent vehicles from being eligible for
         departure between entering an area and starting processes
+    stored_in: [list] of areas whose items contain the vehicle. Updated upon
+        put and get, whereas current_area is updated by a callback afterwards.
+        Contains two areas while the vehicle is moved from one to another
+        because the put request precedes the get request. Used for the
+        occupancy counters of areas.
     """
 
     def __init__(self, env, vehicle, home_depot=None):
@@ -74,17 +93,57 @@ class DepotWorkingData:
         self.repair_need = False
         self.maintenance_need = False
         self.plan = None
+        self.stored_in = []
+        self._rfd = False
+        self._n_blocking_processes = 0
         self.current_area = None
         self._current_slot = None
         self.previous_area = None
         self.current_depot = None
         self.active_processes = []
+        self.process_log = ProcessLog(vehicle)
         self.any_active_processes = False
         self.on_hold = False
 
+    @property
+    def current_area(self):
+        return self._current_area
+
+    @current_area.setter
+    def current_area(self, value):
+        self._current_area = value
+        self.update_rfd()
+
+    def add_active_process(self, process):
+        """Add *process* to self.active_processes and update the rfd state."""
+        self.active_processes.append(process)
+        self.process_log.record(ProcessLog.START, process)
+        if not isinstance(process, Precondition):
+            self._n_blocking_processes += 1
+            self.update_rfd()
+
+    def remove_active_process(self, process):
+        """Remove *process* from self.active_processes and update the rfd
+        state.
+        """
+        self.active_processes.remove(process)
+        self.process_log.record(
+            ProcessLog.CANCEL
+            if process.status is ProcessStatus.CANCELLED
+            else ProcessLog.END,
+            process,
+        )
+        if not isinstance(process, Precondition):
+            self._n_blocking_processes -= 1
+            self.update_rfd()
+
     @property
     def active_processes_copy(self):
-        """Snapshot of self.active_processes for logging."""
+        """Snapshot of self.active_processes for logging. Only used by
+        eflips.evaluation.DataLogger, ColumnarLogger replays the snapshots
+        from self.process_log instead.
+        """
+        self.process_log.step()
         return self.active_processes.copy()
 
     @property
@@ -173,11 +232,23 @@ class DepotWorkingData:
         trip requirements.
         """
         return (
-            self.current_area is not None
-            and self.current_area.issink
-            and all(isinstance(proc, Precondition) for proc in self.active_processes)
+            self._current_area is not None
+            and self._current_area.issink
+            and self._n_blocking_processes == 0
         )
 
+    def update_rfd(self):
+        """Pass a change of the rfd state on to the rfd counter of the area
+        the vehicle is stored in.
+        """
+        rfd = self.isrfd
+        if rfd is not self._rfd:
+            self._rfd = rfd
+            for area in self.stored_in:
+                area._n_rfd += 1 if rfd else -1
+                if DEBUG_COUNTERS:
+                    area.check_counters()
+
 
 class BackgroundStorePut(StorePut):
     """Interface for customization of put-events."""
@@ -239,8 +310,84 @@ class BackgroundStore(FilterStoreExt):
         return item
 
 
-class UnassignedTrips(SortedList):
-    """Subclass of SortedList with specific logging upon modification."""
+class SortedTrips:
+    """Sequence of trips sorted by the constant value of attribute *key*.
+
+    Replacement for eflips.helperFunctions.SortedList that inserts by
+    bisection instead of sorting upon each insertion. Trips with equal keys
+    keep the order of insertion. Supports range queries by key.
+
+    Parameters:
+    key: [str] name of the trip attribute to sort by, e.g. 'std'
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self._keys = []
+        self._trips = []
+
+    def __len__(self):
+        return len(self._trips)
+
+    def __iter__(self):
+        return iter(self._trips)
+
+    def __getitem__(self, index):
+        return self._trips[index]
+
+    def __contains__(self, trip):
+        try:
+            self.index(trip)
+        except ValueError:
+            return False
+        return True
+
+    def __repr__(self):
+        return "{%s} %s" % (type(self).__name__, self._trips)
+
+    def _insert(self, trip):
+        k = getattr(trip, self.key)
+        i = bisect_right(self._keys, k)
+        self._keys.insert(i, k)
+        self._trips.insert(i, trip)
+
+    def _delete(self, i):
+        del self._keys[i]
+        return self._trips.pop(i)
+
+    def append(self, trip):
+        """Insert *trip* after trips with an equal or lower key."""
+        self._insert(trip)
+
+    def extend(self, trips):
+        for trip in trips:
+            self._insert(trip)
+
+    def index(self, trip):
+        """Return the index of *trip*. Raise ValueError if not present."""
+        k = getattr(trip, self.key)
+        for i in range(bisect_left(self._keys, k), bisect_right(self._keys, k)):
+            if self._trips[i] is trip:
+                return i
+        raise ValueError("%s is not in %s" % (trip, type(self).__name__))
+
+    def remove(self, trip):
+        self._delete(self.index(trip))
+
+    def pop(self, index=-1):
+        return self._delete(index if index >= 0 else len(self._trips) + index)
+
+    def until(self, value):
+        """Return a list of trips with key <= *value*."""
+        return self._trips[: bisect_right(self._keys, value)]
+
+    def before(self, value):
+        """Return a list of trips with key < *value*."""
+        return self._trips[: bisect_left(self._keys, value)]
+
+
+class UnassignedTrips(SortedTrips):
+    """Subclass of SortedTrips with specific logging upon modification."""
 
     def append(self, trip):
         super().append(trip)
@@ -261,6 +408,95 @@ class UnassignedTrips(SortedList):
         return item
 
 
+class PendingDepartures(SortedTrips):
+    """Trips sorted by std that may depart from a depot.
+
+    Additionally keeps trips without vehicle sorted by std and grouped by
+    vehicle types, so that the stress level can be determined without
+    scanning all pending trips. Updated by SimpleTrip upon assignment of a
+    vehicle.
+    """
+
+    def __init__(self):
+        super().__init__("std")
+        self._seq = count()
+        # Sort keys (std, seq) and trips without vehicle by vehicle types
+        self._unassigned = {}
+        self._unassigned_key = {}
+        self._groups_by_type = {}
+
+    def _insert(self, trip):
+        super()._insert(trip)
+        if trip.vehicle is None:
+            self._add_unassigned(trip)
+
+    def _delete(self, i):
+        trip = super()._delete(i)
+        if trip in self._unassigned_key:
+            self._remove_unassigned(trip)
+        return trip
+
+    def _add_unassigned(self, trip):
+        group = trip.vehicle_types_joinedstr
+        if group not in self._unassigned:
+            self._unassigned[group] = ([], [])
+            for vehicle_type in trip.vehicle_types:
+                self._groups_by_type.setdefault(vehicle_type, []).append(group)
+        keys, trips = self._unassigned[group]
+        key = (trip.std, next(self._seq))
+        i = bisect_right(keys, key)
+        keys.insert(i, key)
+        trips.insert(i, trip)
+        self._unassigned_key[trip] = key
+
+    def _remove_unassigned(self, trip):
+        key = self._unassigned_key.pop(trip)
+        keys, trips = self._unassigned[trip.vehicle_types_joinedstr]
+        i = bisect_left(keys, key)
+        del keys[i]
+        del trips[i]
+
+    def update_assignment(self, trip):
+        """Update the index of trips without vehicle after trip.vehicle
+        changed. Trips that are not pending are ignored.
+        """
+        if trip.vehicle is None:
+            if trip not in self._unassigned_key and trip in self:
+                self._add_unassigned(trip)
+        elif trip in self._unassigned_key:
+            self._remove_unassigned(trip)
+
+    def unassigned_counts(self, until):
+        """Return a dict {vehicle_types_joinedstr: n} with the number n > 0 of
+        trips without vehicle and std <= *until*.
+        """
+        bound = (until, inf)
+        counts = {}
+        for group, (keys, trips) in self._unassigned.items():
+            n = bisect_right(keys, bound)
+            if n:
+                counts[group] = n
+        return counts
+
+    def first_unassigned(self, vehicle_type, counts, skip):
+        """Return the vehicle_types_joinedstr of the trip without vehicle that
+        departs first and can be served by *vehicle_type*, or None.
+
+        counts: [dict] as returned by unassigned_counts
+        skip: [dict] number of first trips to skip by vehicle_types_joinedstr
+        """
+        best = None
+        best_key = None
+        for group in self._groups_by_type.get(vehicle_type, ()):
+            k = skip.get(group, 0)
+            if k < counts.get(group, 0):
+                key = self._unassigned[group][0][k]
+                if best_key is None or key < best_key:
+                    best = group
+                    best_key = key
+        return best
+
+
 class Depot:
     """Representation of a depot.
 
@@ -313,12 +549,13 @@ class Depot:
     init_store: [BackgroundStore] where vehicles that have this depot as
         home depot are put in by VehicleGenerator before simulation start and
         retrieved during the simulation.
-    pending_departures: [list] of SimpleTrip objects for departures that may
-        have a vehicle assigned to, but haven't started yet and are not
-        supposed to be served by vehicles from self.init_store.
-    unassigned_trips: [list] of trips in pending_departures that have no
-        scheduled vehicle.
-    pending_arrivals: [list] of SimpleTrip objects on which a vehicle is
+    pending_departures: [PendingDepartures] of SimpleTrip objects for
+        departures that may have a vehicle assigned to, but haven't started
+        yet and are not supposed to be served by vehicles from
+        self.init_store. Sorted by std.
+    unassigned_trips: [UnassignedTrips] of trips in pending_departures that
+        have no scheduled vehicle. Sorted by std.
+    pending_arrivals: [SortedTrips] of SimpleTrip objects on which a vehicle is
         currently on it's way to this depot. Sorted by estimated time of
         arrival (atd) as long as atd doesn't change during the trip.
     any_process_cancellable_for_dispatch: [bool] True if at least one process
@@ -356,15 +593,17 @@ class Depot:
 
         self.depot_control = DepotControl(env, self)
 
-        self.pending_departures = []
+        self.pending_departures = PendingDepartures()
         self.unassigned_trips = UnassignedTrips(key="std")
-        self.pending_arrivals = SortedList(key="eta")
+        self.pending_arrivals = SortedTrips(key="eta")
         self.any_process_cancellable_for_dispatch = False
 
         self.checkins = 0
         self.checkouts = 0
         self._count = 0
         self._max_count = 0
+        self._vacant = 0
+        self._vacant_accessible = 0
 
         self._total_power = 0
 
@@ -385,7 +624,7 @@ class Depot:
     @property
     def vacant(self):
         """Return the total sum of slots that are unoccupied in the depot."""
-        return sum(area.vacant for area in self.list_areas)
+        return self._vacant
 
     @property
     def vacant_accessible(self):
@@ -393,7 +632,29 @@ class Depot:
 
         (not blocked) from the default entrance side on all areas.
         """
-        return sum(area.vacant_accessible for area in self.list_areas)
+        return self._vacant_accessible
+
+    def update_vacant(self, value, value_accessible):
+        """Add *value* to the depot-wide number of vacant slots and
+        *value_accessible* to the number of vacant accessible slots. Called by
+        areas upon put and get and by the configurator upon adding or removing
+        an area.
+        """
+        self._vacant += value
+        self._vacant_accessible += value_accessible
+        if DEBUG_COUNTERS:
+            self.check_counters()
+
+    def check_counters(self):
+        """Assert that the incrementally maintained counters match a full
+        recount.
+        """
+        assert self._vacant == sum(
+            area.items.count(None) for area in self.list_areas
+        ), (self.ID, self._vacant)
+        assert self._vacant_accessible == sum(
+            area.vacant_accessible for area in self.list_areas
+        ), (self.ID, self._vacant_accessible)
 
     @property
     def count(self):
@@ -435,15 +696,7 @@ class Depot:
         vehicle assigned to.
         Relies on self.unassigned_trips to be sorted by std.
         """
-        result = []
-
-        for trip in self.unassigned_trips:
-            if trip.std <= self.env.now:
-                result.append(trip)
-            else:
-                break
-
-        return result
+        return self.unassigned_trips.until(self.env.now)
 
     @property
     def overdue_trips(self):
@@ -454,8 +707,8 @@ class Depot:
         """
         return [
             trip
-            for trip in self.pending_departures
-            if trip.atd is None and trip.std < self.env.now
+            for trip in self.pending_departures.before(self.env.now)
+            if trip.atd is None
         ]
 
     def checkin(self, vehicle):
@@ -1094,6 +1347,14 @@ class DepotControl:
         #     flexprint('Vehicle %s departure trip %s is not the same as arrival trip %s'
         #               % (vehicle.ID, vehicle.trip_at_departure.ID, vehicle.trip.ID),
         #               env=self.env)
+        self.register_arrival(vehicle)
+        self.proceed(vehicle)
+        self.depot.checkins += 1
+
+    def register_arrival(self, vehicle):
+        """Bookkeeping for an arriving vehicle before it proceeds to the first
+        area of its plan.
+        """
         assert vehicle.trip_at_departure is vehicle.trip
 
         # flexprint('Vehicle %s in checkin'
@@ -1117,9 +1378,6 @@ class DepotControl:
         vehicle.finished_trips.append(vehicle.trip)
         vehicle.trip = None
 
-        self.proceed(vehicle)
-        self.depot.checkins += 1
-
     def assign_plan(self, vehicle):
         """Check what activity plan is suitable for the vehicle and assign it."""
         vehicle.dwd.plan = None
@@ -1422,6 +1680,16 @@ class DepotControl:
 
     def checkout(self, vehicle):
         """Actions that are necessary for a vehicle when leaving the depot."""
+        self.register_departure(vehicle)
+
+        self.env.process(vehicle.drive())
+
+        self.env.process(assert_after_checkout(self.env, vehicle))
+
+        self.trigger_dispatch()
+
+    def register_departure(self, vehicle):
+        """Bookkeeping for a departing vehicle before it starts driving."""
         # flexprint('Vehicle %s in checkout'
         #           % vehicle.ID, env=self.env, switch='objID', objID=vehicle.ID)
         if vehicle.dwd.plan is not None:
@@ -1482,12 +1750,6 @@ class DepotControl:
         if globalConstants["general"]["LOG_SPECIFIC_STEPS"]:
             vehicle.logger.steplog()
 
-        self.env.process(vehicle.drive())
-
-        self.env.process(assert_after_checkout(self.env, vehicle))
-
-        self.trigger_dispatch()
-
     def trigger_dispatch(self):
         """Trigger the matching of trips and vehicles of.
 
@@ -1758,9 +2020,90 @@ class BaseArea(ABC):
 
         self.slot_orientation = slot_orientation
 
+        # Occupancy counters, updated upon put, get and changes of vehicle
+        # states instead of scanning self.items
+        self._n_vehicles = 0
+        self._n_rfd = 0
+        self._n_scheduled = 0
+
     def __repr__(self):
         return "{%s} %s" % (type(self).__name__, self.ID)
 
+    @property
+    def count(self):
+        """Return the amount of occupied slots."""
+        return self._n_vehicles
+
+    @property
+    def vacant(self):
+        """Return the amount of vacant slots, regardless of accessibility."""
+        return self.capacity - self._n_vehicles
+
+    def _on_put(self, vehicle, vacant_accessible_before):
+        """Update counters after *vehicle* was put into self.items.
+
+        vacant_accessible_before: [int] value of self.vacant_accessible before
+            the put.
+        """
+        self._n_vehicles += 1
+        vehicle.dwd.stored_in.append(self)
+        if vehicle.dwd._rfd:
+            self._n_rfd += 1
+        if vehicle.trip is not None:
+            self._n_scheduled += 1
+        if self.depot is not None:
+            self.depot.update_vacant(
+                -1, self.vacant_accessible - vacant_accessible_before
+            )
+        if DEBUG_COUNTERS:
+            self.check_counters()
+
+    def _on_get(self, vehicle, vacant_accessible_before):
+        """Update counters after *vehicle* was removed from self.items.
+
+        vacant_accessible_before: [int] value of self.vacant_accessible before
+            the get.
+        """
+        self._n_vehicles -= 1
+        vehicle.dwd.stored_in.remove(self)
+        if vehicle.dwd._rfd:
+            self._n_rfd -= 1
+        if vehicle.trip is not None:
+            self._n_scheduled -= 1
+        if self.depot is not None:
+            self.depot.update_vacant(
+                1, self.vacant_accessible - vacant_accessible_before
+            )
+        if DEBUG_COUNTERS:
+            self.check_counters()
+
+    def update_scheduled(self, value):
+        """Add *value* to the number of vehicles with a trip assigned. Called
+        by vehicles stored in this area upon change of their trip.
+        """
+        self._n_scheduled += value
+        if DEBUG_COUNTERS:
+            self.check_counters()
+
+    def check_counters(self):
+        """Assert that the incrementally maintained counters match a full
+        recount.
+        """
+        vehicles = self.vehicles
+        assert self._n_vehicles == len(vehicles), (self.ID, self._n_vehicles)
+        assert self._n_rfd == sum(
+            vehicle.dwd.current_area is not None
+            and vehicle.dwd.current_area.issink
+            and all(
+                isinstance(proc, Precondition) for proc in vehicle.dwd.active_processes
+            )
+            for vehicle in vehicles
+        ), (self.ID, self._n_rfd)
+        assert self._n_scheduled == sum(
+            vehicle.trip is not None for vehicle in vehicles
+        ), (self.ID, self._n_scheduled)
+        assert all(self in vehicle.dwd.stored_in for vehicle in vehicles)
+
     @property
     def vacant_accessible(self):
         """Helper function to distinguish between direct and line areas for the.
@@ -1803,7 +2146,21 @@ class BaseArea(ABC):
     @property
     def scheduledVehicles(self):
         """Returns list of scheduled vehicles (trips assigned)."""
-        return [vehicle for vehicle in self.vehicle if vehicle.trip is not None]
+        if not self._n_scheduled:
+            return []
+        return [vehicle for vehicle in self.vehicles if vehicle.trip is not None]
+
+    @property
+    def count_scheduled(self):
+        """Return the number of vehicles with a trip assigned at this area."""
+        return self._n_scheduled
+
+    @property
+    def count_pending(self):
+        """Return the number of vehicles without a trip assigned at this
+        area.
+        """
+        return self._n_vehicles - self._n_scheduled
 
     @property
     def count_rfd(self):
@@ -1811,7 +2168,7 @@ class BaseArea(ABC):
 
         area.
         """
-        return sum(item.dwd.isrfd for item in self.vehicles)
+        return self._n_rfd
 
     @property
     @abstractmethod
@@ -2028,11 +2385,48 @@ class DirectArea(BaseArea, PositionalFilterStore):
         )
 
         if globalConstants["general"]["LOG_ATTRIBUTES"]:
-            self.logger = DataLogger(env, self, "DIRECTAREA")
+            self.logger = create_logger(env, self, "DIRECTAREA")
 
     put = BoundClass(DirectAreaPut)
     get = BoundClass(DirectAreaGet)
 
+    def _do_put(self, event):
+        vacant_accessible = self.vacant
+        proceed = super(DirectArea, self)._do_put(event)
+        if event.triggered:
+            self._on_put(event.item, vacant_accessible)
+        return proceed
+
+    def _do_get(self, event):
+        vacant_accessible = self.vacant
+        proceed = super(DirectArea, self)._do_get(event)
+        if event.triggered:
+            self._on_get(event.value, vacant_accessible)
+        return proceed
+
+    def put_direct(self, vehicle):
+        """Put *vehicle* on the first vacant slot without issuing a request.
+
+        There must be a vacant slot. Request queues and callbacks of put
+        requests are bypassed, which is up to the caller (used by
+        DirectDepotKernel). Return the index of the slot.
+        """
+        vacant_accessible = self.vacant
+        index = self.items.index(None)
+        self.items[index] = vehicle
+        self._on_put(vehicle, vacant_accessible)
+        self.update_max_count()
+        return index
+
+    def get_direct(self, vehicle):
+        """Remove *vehicle* from its slot without issuing a request.
+
+        Counterpart of put_direct.
+        """
+        vacant_accessible = self.vacant
+        self.items[self.items.index(vehicle)] = None
+        self._on_get(vehicle, vacant_accessible)
+
     @property
     def pendingVehicles(self):
         """Returns list of pending vehicles (potentially blocking vehicles)."""
@@ -2044,7 +2438,7 @@ class DirectArea(BaseArea, PositionalFilterStore):
 
         blocked from departure at this area.
         """
-        return sum(vehicle.dwd.isrfd for vehicle in self.vehicles)
+        return self._n_rfd
 
     def slot_no(self, item):
         """Return the slot number of *item*.
@@ -2153,15 +2547,114 @@ class LineArea(BaseArea, LineFilterStore):
                 "an area that is not a sink is immediately successful."
             )
 
+        # Indices of the occupied slots closest to the back and front side.
+        # None if the area is empty
+        self._idx_back = None
+        self._idx_front = None
+
         if globalConstants["general"]["LOG_ATTRIBUTES"]:
-            self.logger = DataLogger(env, self, "LINEAREA")
+            self.logger = create_logger(env, self, "LINEAREA")
 
     put = BoundClass(LineAreaPut)
     get = BoundClass(LineAreaGet)
 
+    def _do_put(self, event):
+        idx = self.index_put(event.side)
+        if idx is not False:
+            vacant_accessible = self.vacant_entrance
+            self.items[idx] = event.item
+            if self._idx_back is None:
+                self._idx_back = idx
+                self._idx_front = idx
+            elif idx < self._idx_back:
+                self._idx_back = idx
+            elif idx > self._idx_front:
+                self._idx_front = idx
+            self._on_put(event.item, vacant_accessible)
+            event.succeed()
+
+    def _do_get(self, event):
+        idx = self.index_get(event.side)
+        if idx is not False and event.filter(self.items[idx]):
+            item = self.items[idx]
+            vacant_accessible = self.vacant_entrance
+            self.items[idx] = None
+            if self._idx_back == self._idx_front:
+                self._idx_back = None
+                self._idx_front = None
+            elif idx == self._idx_front:
+                self._idx_front = next(
+                    i for i in range(idx - 1, -1, -1) if self.items[i] is not None
+                )
+            else:
+                self._idx_back = next(
+                    i
+                    for i in range(idx + 1, self.capacity)
+                    if self.items[i] is not None
+                )
+            self._on_get(item, vacant_accessible)
+            event.succeed(item)
+        return True
+
+    def index_put(self, side="default"):
+        """Return the index of the deepest accessible slot in self.items.
+
+        starting from *side*. Return False if there is no accessible slot.
+        Constant time replacement of LineStore.index_put based on the indices
+        of the outermost vehicles.
+        """
+        if side == "default":
+            side = self.side_put_default
+
+        if side == "back":
+            if self._idx_back is None:
+                return self.capacity - 1
+            return self._idx_back - 1 if self._idx_back > 0 else False
+        elif side == "front":
+            if self._idx_front is None:
+                return 0
+            return self._idx_front + 1 if self._idx_front < self.capacity - 1 else False
+        raise ValueError("Invalid side '%s'. Must be 'back' or 'front'." % side)
+
+    def index_get(self, side):
+        """Return the index of the first item in self.items that is accessible.
+
+        from *side*. Return False if there is no item in self.items.
+        Constant time replacement of LineStore.index_get.
+        """
+        if side == "default":
+            side = self.side_get_default
+
+        if side == "back":
+            return self._idx_back if self._idx_back is not None else False
+        elif side == "front":
+            return self._idx_front if self._idx_front is not None else False
+        raise ValueError("Invalid side '%s'. Must be 'back' or 'front'." % side)
+
+    def isunblocked(self, item, side="default"):
+        """Return True if *item* can be retrieved from *side*."""
+        idx = self.index_get(side)
+        if idx is not False and self.items[idx] is item:
+            return True
+        # Not unblocked or not in the store, which is checked by the parent
+        return super(LineArea, self).isunblocked(item, side)
+
+    def check_counters(self):
+        super(LineArea, self).check_counters()
+        occupied = [i for i, item in enumerate(self.items) if item is not None]
+        if occupied:
+            assert (self._idx_back, self._idx_front) == (
+                occupied[0],
+                occupied[-1],
+            ), (self.ID, self._idx_back, self._idx_front)
+        else:
+            assert self._idx_back is None and self._idx_front is None, self.ID
+
     @property
     def pendingVehicles(self):
         """Returns list of pending vehicles (potentially blocking vehicles)."""
+        if self._n_scheduled == self._n_vehicles:
+            return []
         return [item for item in self.items if item is not None and item.trip is None]
 
     @property
@@ -2170,9 +2663,10 @@ class LineArea(BaseArea, LineFilterStore):
 
         blocked from departure at this area.
         """
-        return sum(
-            vehicle.dwd.isrfd and self.isunblocked(vehicle) for vehicle in self.vehicles
-        )
+        if not self._n_rfd:
+            return 0
+        idx = self.index_get(self.side_get_default)
+        return int(self.items[idx].dwd.isrfd)
 
     def slot_no(self, item):
         """Return the slot number of *item*.
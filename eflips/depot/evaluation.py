@@ -18,74 +18,65 @@ https://intellij-support.jetbrains.com/hc/en-us/community/posts/115000736584-
 SciView-in-PyCharm-2017-3-reduces-functionality-of-Matplotlib
 
 """
+from array import array
 import itertools
-import locale
-import operator
 import os
 import pprint as pp
 import traceback
 from collections import OrderedDict, Counter
-from datetime import datetime, timedelta
-from functools import reduce
+from datetime import datetime
 
-import matplotlib.patches as mpatch
-import matplotlib.patches as mpatches
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
 import numpy as np
 import pandas as pd
-import xlsxwriter
-from eflips.helperFunctions import cm2in
+from eflips.depot.events import (
+    ArrivalLog,
+    BatteryLog,
+    ChargeStart,
+    Departure,
+    DepotLog,
+    FullyCharged,
+    LogWindow,
+    ProcessCalled,
+    ProcessFinished,
+    windowed_dict,
+    windowed_list,
+)
+from eflips.depot.export import (
+    forward_fill,
+    logged_items,
+    table_rows,
+    union_times,
+    write_parquet,
+    write_xlsx,
+)
+from eflips.depot.intervals import VehicleIndex
+from eflips.depot.plotting import (
+    adjust_plt,
+    adjust_plt_hist,
+    align_yaxis,
+    baseplot,
+    font_manager,
+    make_patch_spines_invisible,
+    mpatches,
+    plt,
+    savefig,
+    seconds2date,
+    setting_language,
+    ticker,
+    to_dateaxis,
+)
+from eflips.depot.stays import (
+    clip_durations,
+    park_periods,
+    process_intervals,
+    stay_table,
+)
+from eflips.depot.step_series import StepSeries
 from eflips.settings import globalConstants
-from matplotlib.font_manager import FontProperties
-from openpyxl import Workbook
 from simpy.resources.store import StorePut, StoreGet
 
 import eflips
 
-# Settings for dates on x axis
-abs_time_fmt = "%"
-base_date = datetime(2018, 12, 4, 0, 0)  # arbitrary Tuesday 0:00
-datefmt_general = "%a %H:%M"  # format to "Mon 00:00"
-datefmt_major = "%a"  # 'Mon'
-datefmt_major2 = "%H:%M\n%a"  # '00:00\nMon'
-datefmt_minor = "%H:%M"  # '00:00'
-xdatespacing_major = 86400  # show major x ticks at these multiplier seconds
-# divisor for of xdatespacing_major to show  minor ticks at (e.g. 4 for every
-# 6 hours if xdatespacing_major is 86400)
-minor_intervals_per_major_tick = 4
-
-color_bvg_yellow = "#f0d722"
-
-
-class ArrivalLog:
-    """Container for data to be logged when a vehicle arrives at a depot.
-    Independent from the DataLogger. Temporary, may be replaced by a DataLogger
-    rework.
-    """
-
-    def __init__(self, t, vehicle):
-        self.arrival_time = t
-        self.vehicle = vehicle
-        self.trip = vehicle.trip
-        self.energy = vehicle.battery.energy
-        self.energy_real = vehicle.battery.energy_real
-
-
-class BatteryLog:
-    """Container for logging data related to charging. Independent from the
-    DataLogger. Temporary, may be replaced by a DataLogger rework.
-
-    Parameters:
-    event_name: [str]
-    """
-
-    def __init__(self, t, vehicle, event_name):
-        self.t = t
-        self.energy = vehicle.battery.energy
-        self.energy_real = vehicle.battery.energy_real
-        self.event_name = event_name
-
 
 class DepotEvaluation:
     """Container for data of one depot simulation run to be accessible after
@@ -97,7 +88,13 @@ class DepotEvaluation:
     Attributes:
     results: [dict] storing results of evaluation after the simulation
     xlim: [tuple] of x axis limits for some plots and calculations. Default is
-        (0, self.SIM_TIME)
+        (0, self.SIM_TIME) or the part of the setting LOG_WINDOW within it.
+    log_window: [LogWindow or None] window of logging during the simulation
+        from the setting LOG_WINDOW (see eflips.depot.events)
+    stats_start: [int] time from which descriptive statistics are
+        calculated. Is the start of the log window if set, otherwise the end
+        of the first day (if the simulation is longer), which is treated as
+        warm-up.
     arrival_logs: [list] of ArrivalLog objects
     sl_logs: [dict] with logged stress level values (by self.calculate_sl)
     cm_report: [DepotAnalysis]
@@ -118,6 +115,8 @@ class DepotEvaluation:
 
         self.SIM_TIME = None
         self.xlim = None
+        self.log_window = None
+        self.stats_start = 0
         self.sim_start_datetime = None
 
         self.power_logs = {0: 0}
@@ -126,6 +125,11 @@ class DepotEvaluation:
 
         self.cm_report = None
 
+        self._stay_table = None
+        self._stay_table_time = None
+        self._vehicle_index = None
+        self._vehicle_index_time = None
+
         # Further preparation of results
         self.results["idle_time"] = {}
 
@@ -146,7 +150,48 @@ class DepotEvaluation:
         if "SIMULATION_START_DATETIME" in self.gc["general"]:
             self.sim_start_datetime = self.gc["general"]["SIMULATION_START_DATETIME"]
 
-        self.xlim = (0, self.SIM_TIME)
+        self.log_window = LogWindow.of(self.env)
+        if self.log_window is None:
+            self.xlim = (0, self.SIM_TIME)
+            self.stats_start = 86400 if self.SIM_TIME > 86400 else 0
+        else:
+            self.xlim = (
+                max(self.log_window.start, 0),
+                min(self.log_window.end, self.SIM_TIME),
+            )
+            self.stats_start = self.xlim[0]
+
+        self.power_logs = windowed_dict(self.env, self.power_logs)
+        self.arrival_logs = windowed_list(self.env, "arrival_time", checkpoint=False)
+        self.sl_logs = windowed_dict(self.env, self.sl_logs)
+
+    def stats_window(self, series):
+        """Return StepSeries *series* restricted to the period for descriptive
+        statistics from stats_start to the end of xlim.
+        """
+        return series.window(self.stats_start, self.xlim[1])
+
+    def get_stay_table(self):
+        """Return the table of vehicle stays at areas (see
+        eflips.depot.stays.stay_table). Is extracted once after the
+        simulation.
+        """
+        if self._stay_table is None or self._stay_table_time != self.env.now:
+            self._stay_table = stay_table(self.vehicle_generator.items, self.SIM_TIME)
+            self._stay_table_time = self.env.now
+        return self._stay_table
+
+    def get_vehicle_index(self):
+        """Return the index of process intervals and battery levels of all
+        vehicles (see eflips.depot.intervals.VehicleIndex). Is built once
+        after the simulation.
+        """
+        if self._vehicle_index is None or self._vehicle_index_time != self.env.now:
+            self._vehicle_index = VehicleIndex(
+                self.vehicle_generator.items, self.SIM_TIME
+            )
+            self._vehicle_index_time = self.env.now
+        return self._vehicle_index
 
     @property
     def now_repr(self):
@@ -174,17 +219,16 @@ class DepotEvaluation:
         """
         sl_period = self.env.now + globalConstants["depot"]["sl_period"]
 
-        # Get trips that are supposed to depart from now until now + sl_period
-        trips = [
-            trip
-            for trip in self.depot.pending_departures
-            if trip.vehicle is None and trip.std <= sl_period
-        ]
+        # Count trips without vehicle that are supposed to depart from now
+        # until now + sl_period by vehicle types
+        pending_departures = self.depot.pending_departures
+        counts = pending_departures.unassigned_counts(sl_period)
 
         # Find vehicles that are ready to depart or will be in now + sl_period
-        # and match them with trips from above, considering vehicle types.
-        # c_vehicles will contain the number of remaining unmatched vehicles by
-        # vehicle type
+        # and match them with the first departing trip from above,
+        # considering vehicle types. c_vehicles will contain the number of
+        # remaining unmatched vehicles by vehicle type
+        matched = Counter()
         c_vehicles = Counter()
         for area in self.depot.depot_control.departure_areas.stores:
             for vehicle in area.vehicles:
@@ -195,28 +239,23 @@ class DepotEvaluation:
                         or isinstance(etc, int)
                         and etc <= sl_period
                     ):
-                        # flexprint('Considering vehicle %s. Number of trips: %d' % (vehicle.ID, len(trips)),
-                        #           env=self.env)
-                        match = False
-                        for trip in trips:
-                            if vehicle.vehicle_type in trip.vehicle_types:
-                                trips.remove(trip)
-                                match = True
-                                # flexprint('Found match for vehicle %s. trips left: %d' % (vehicle.ID, len(trips)), env=self.env)
-                                break
-                        if not match:
+                        group = pending_departures.first_unassigned(
+                            vehicle.vehicle_type, counts, matched
+                        )
+                        if group is not None:
+                            matched[group] += 1
+                        else:
                             if vehicle.vehicle_type.group is not None:
                                 k = vehicle.vehicle_type.group.vehicle_types_joinedstr
                             else:
                                 k = vehicle.vehicle_type.ID
                             c_vehicles[k] += 1
-                            # flexprint("Didn't find match for vehicle %s. Number of trips: %d" % (vehicle.ID, len(trips)),
-                            #     env=self.env)
 
         # Count the remaining unmatched trips by vehicle type
         c_trips = Counter()
-        for trip in trips:
-            c_trips[trip.vehicle_types_joinedstr] += 1
+        for group, n in counts.items():
+            if n > matched[group]:
+                c_trips[group] = n - matched[group]
 
         return c_trips, c_vehicles
 
@@ -239,14 +278,14 @@ class DepotEvaluation:
     ):
         """Vehicle count over time in the depot's init_store. Plot as line."""
 
-        plot_series = self.depot.init_store.logger.get_valList("count", self.SIM_TIME)
-
-        plot_series = to_prev_values(plot_series)
+        plot_series = StepSeries.from_logger(
+            self.depot.init_store.logger, "count", self.SIM_TIME
+        )
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(plot_series)
+            plot_series.plot(ax)
             ax.set_title(
                 'Depot "' + self.depot.ID + '" number of vehicles in init store'
             )
@@ -382,22 +421,17 @@ class DepotEvaluation:
     ):
         """Total vehicle count over time in the depot in total. Plot as line."""
         # Sum up the counts of all areas in the depot
-        plot_series = np.zeros(self.SIM_TIME, dtype=np.int32)
-        for area in self.depot.list_areas:
-            y = area.logger.get_valList("count", self.SIM_TIME)
-            y = to_prev_values(y)
-            y = np.array(y)
-            plot_series += y
+        plot_series = self.count_total("count")
 
-        if len(plot_series) > 86400:
+        if self.stats_start:
             print("After the first day:")
-            print("\tMin: %d" % np.min(plot_series[86400:]))
-            print("\tMax: %d" % np.max(plot_series[86400:]))
+            print("\tMin: %d" % self.stats_window(plot_series).min())
+            print("\tMax: %d" % self.stats_window(plot_series).max())
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(plot_series)
+            plot_series.plot(ax)
 
             # # engl. labels
             ax.set_title('Depot "' + self.depot.ID + '" total number of vehicles')
@@ -593,6 +627,13 @@ class DepotEvaluation:
         park_end_found = True
         first_period_found = False
 
+        # Trips by arrival and departure time (first match)
+        trips_by_ata = {}
+        trips_by_atd = {}
+        for trip in vehicle.finished_trips:
+            trips_by_ata.setdefault(trip.ata, trip)
+            trips_by_atd.setdefault(trip.atd, trip)
+
         # Determine depot and parking periods and trip info
         for t in logged_data_areas:
             current = logged_data_areas[t]
@@ -608,9 +649,7 @@ class DepotEvaluation:
 
                     # arrival trip info (only first trip for each vehicle)
                     if not first_period_found:
-                        trip = next(
-                            (ti for ti in vehicle.finished_trips if t == ti.ata), None
-                        )
+                        trip = trips_by_ata.get(t)
 
                         # TODO there is no clear message on which area is too small
                         assert trip is not None, (
@@ -654,7 +693,7 @@ class DepotEvaluation:
                     )
 
                 # departure trip info
-                trip = next((ti for ti in vehicle.finished_trips if t == ti.atd), None)
+                trip = trips_by_atd.get(t)
                 if trip is None:
                     # trip wasn't finished until sim end, it's the current
                     trip = vehicle.trip
@@ -702,25 +741,11 @@ class DepotEvaluation:
         if proc_IDs:
             for procID in proc_IDs:
                 data[procID] = {"xranges": [], "yranges": (y, 0.5)}
-            logged_data_processes = vehicle.logger.loggedData[
-                "dwd.active_processes_copy"
-            ]
-            for t in logged_data_processes:
-                for proc in logged_data_processes[t]:
-                    if proc.ID in data:
-                        # Fill xranges with tuples (start, duration)
-                        for startno, start in enumerate(proc.starts):
-                            if startno != len(proc.ends):
-                                # startno has a match in end
-                                data[proc.ID]["xranges"].append(
-                                    (start, proc.ends[startno] - start)
-                                )
-                            else:
-                                # ends is shorter than starts; proc lasted
-                                # until sim time end
-                                data[proc.ID]["xranges"].append(
-                                    (start, self.SIM_TIME - start)
-                                )
+            # Fill xranges with tuples (start, duration)
+            for procID, start, end in self.get_vehicle_index().process_intervals(
+                vehicle.ID, proc_IDs
+            ):
+                data[procID]["xranges"].append((start, end - start))
 
         data["trip"] = {"xranges": [], "yranges": (y, 0.75), "triptexts": []}
 
@@ -856,25 +881,22 @@ class DepotEvaluation:
             # ax1.set_axisbelow(True)
 
             # Create variables for the legend
-            marks = [mpatch.Rectangle((0, 0), 1, 1, fc=clr) for clr in periods.values()]
+            marks = [
+                mpatches.Rectangle((0, 0), 1, 1, fc=clr) for clr in periods.values()
+            ]
             names = list(periods.keys())
 
             # Additional plot in same window: vehicle count
             # Sum up the counts of all areas in the depot
             if show_vehicle_count:
-                y2 = np.zeros(self.SIM_TIME, dtype=np.int32)
-                for area in self.depot.list_areas:
-                    nv = area.logger.get_valList("count", SIM_TIME=self.SIM_TIME)
-                    nv = to_prev_values(nv)
-                    nv = np.array(nv)
-                    y2 += nv
+                y2 = self.count_total("count")
 
                 # Plot on own y axis that aligns with periods axis
                 # Correct y and axis to align with period history middle-placed
                 # y ticks
                 ax2 = ax1.twinx()
                 y2_offset = y2 + 0.5  # offset of half the period bar height
-                count_plot = ax2.plot(y2_offset, color=vehicle_count_color)
+                count_plot = y2_offset.plot(ax2, color=vehicle_count_color)
 
                 ax2.set_ylim(0.5, len(vehicledata) + 1.5)
                 ax2.set_yticks(
@@ -890,8 +912,14 @@ class DepotEvaluation:
                 marks.append(count_plot[0])
                 names.append("vehicle count")
 
-                print("\nMin vehicle count after first day: ", min(y2[xmin_calcs:]))
-                print("Max vehicle count after first day: ", max(y2[xmin_calcs:]))
+                print(
+                    "\nMin vehicle count after first day: ",
+                    y2.window(xmin_calcs).min(),
+                )
+                print(
+                    "Max vehicle count after first day: ",
+                    y2.window(xmin_calcs).max(),
+                )
 
             # Additional plot in same window: total power
             if show_total_power:
@@ -901,14 +929,14 @@ class DepotEvaluation:
                 ):
                     power = smart_charging.power.used_power_smart.sort_index()
                     power = power.to_dict()
-                    y3 = discrete2continuous_logs(power, first=0)
+                    y3 = StepSeries.from_dict(power, self.SIM_TIME)
                 else:
-                    y3 = discrete2continuous_logs(
-                        self.depot.evaluation.power_logs, first=0
+                    y3 = StepSeries.from_dict(
+                        self.depot.evaluation.power_logs, self.SIM_TIME
                     )
                 ax3 = ax1.twinx()
                 ax3.set_ylabel(seriesname, fontsize=axislabelsize)
-                power_plot = ax3.plot(y3, color=total_power_color)
+                power_plot = y3.plot(ax3, color=total_power_color)
                 ax3.set_zorder(-1)
 
                 max_possible_power = sum(
@@ -918,7 +946,7 @@ class DepotEvaluation:
                         if isinstance(ci, eflips.depot.DepotChargingInterface)
                     ]
                 )
-                total_max_power = max(y3[xmin_calcs:]) + max(y3[xmin_calcs:]) * 0.1
+                total_max_power = y3.window(xmin_calcs).max() * 1.1
                 ax3.set_ylim(top=total_max_power)
                 ax3.yaxis.set_major_locator(ticker.MultipleLocator(250))
 
@@ -929,8 +957,8 @@ class DepotEvaluation:
                 marks.append(power_plot[0])
                 names.append("power")
 
-                print("\nMin power after first day: ", min(y3[xmin_calcs:]))
-                print("Max power after first day: ", max(y3[xmin_calcs:]))
+                print("\nMin power after first day: ", y3.window(xmin_calcs).min())
+                print("Max power after first day: ", y3.window(xmin_calcs).max())
 
             # Extension of periods: Annotate depot stay periods with trip IDs
             if show_annotates:
@@ -938,7 +966,7 @@ class DepotEvaluation:
                 ax4.set_zorder(0)
                 ax4.set_ylim(0.5, ylim_upper)
                 ax4.get_yaxis().set_visible(False)
-                font = FontProperties(size=1)
+                font = font_manager.FontProperties(size=1)
                 alignment = {
                     "horizontalalignment": "center",
                     "verticalalignment": "center",
@@ -971,7 +999,7 @@ class DepotEvaluation:
 
                         # Highlight the delay
                         if tripInfo["delay"] != 0:
-                            circle = mpatch.Ellipse(
+                            circle = mpatches.Ellipse(
                                 (tripInfo["x"] + xoffset - 500, tripInfo["y"]),
                                 # 10000, 1.15,
                                 1500,
@@ -990,7 +1018,7 @@ class DepotEvaluation:
                             )
 
                 # Extension of periods: Annotate parking periods with slot numbers
-                font = FontProperties(size=1)
+                font = font_manager.FontProperties(size=1)
                 alignment = {
                     "horizontalalignment": "left",
                     "verticalalignment": "bottom",
@@ -1068,45 +1096,38 @@ class DepotEvaluation:
                     return
 
         # Get the data
-        periods = {"park": "burlywood"}  # arbitrary color
-        for charge_ID in charge_IDs:
-            periods[charge_ID] = "#2ca02c"  # arbitrary color
-        self.vehicle_periods(periods=periods, show=False, save=False)
-        vehicledata = self.results["vehicle_periods"]["vehicledata"]
         # Set sim time lower bound to avoid inaccuracy of first day
-        xmin_calcs = 86400 if self.SIM_TIME > 86400 else 0
+        xmin_calcs = self.stats_start
+        parking = park_periods(self.get_stay_table())
+        parking = parking[parking["start"] >= xmin_calcs]
+        if vehicle_types != "all":
+            parking = parking[parking["vehicle_type"].isin(vehicle_types)]
+        parking = parking.astype({"start": float}).sort_values("start")
+        charging = process_intervals(
+            self.vehicle_generator.items, charge_IDs, self.SIM_TIME
+        )
 
         idle_times = []
-        for vehicleID in vehicledata:
-            if (
-                vehicle_types == "all"
-                or self.vehicle_generator.select(vehicleID).vehicle_type.ID
-                in vehicle_types
-            ):
-                for charge_ID in charge_IDs:
-                    pp = vehicledata[vehicleID]["plotdata"]["park"]["xranges"]
-                    # Get the ID of the correct charging process
-                    # c_ID = next(charge_ID for charge_ID in charge_IDs
-                    # if charge_ID in vehicledata[vehicleID]['plotdata'].keys())
-                    c_ID = charge_ID
-                    cc = vehicledata[vehicleID]["plotdata"][c_ID]["xranges"]
-                    for p in pp:
-                        if p[0] >= xmin_calcs:
-                            # Find corresponding charging period, if there is one
-                            # Ignore charging periods that lasted until sim time end
-                            c = next(
-                                (
-                                    ci
-                                    for ci in cc
-                                    if p[0] <= ci[0] <= p[0] + p[1]
-                                    and ci[0] + ci[1] != self.SIM_TIME
-                                ),
-                                None,
-                            )
-                            if c:
-                                idle_times.append((p[0] + p[1] - (c[0] + c[1])) / 60)
-        # idle_times.append(0)
-        # idle_times.append(900)
+        for charge_ID in charge_IDs:
+            # Find the first charging period that started during parking
+            cc = charging[charging["process"] == charge_ID]
+            cc = cc.astype({"start": float}).sort_values("start")
+            matches = pd.merge_asof(
+                parking,
+                cc[["vehicle", "start", "end"]].rename(
+                    columns={"start": "c_start", "end": "c_end"}
+                ),
+                left_on="start",
+                right_on="c_start",
+                by="vehicle",
+                direction="forward",
+            )
+            # Ignore charging periods that lasted until sim time end
+            matches = matches[
+                (matches["c_start"] <= matches["end"])
+                & (matches["c_end"] != self.SIM_TIME)
+            ]
+            idle_times.extend(((matches["end"] - matches["c_end"]) / 60).tolist())
 
         # Calculate, save and print additional figures
         if vehicle_types == "all":
@@ -1164,14 +1185,14 @@ class DepotEvaluation:
         """Plot the total power in the depot over time as line."""
         plot_title = "Depot total power"
 
-        y = discrete2continuous_logs(self.power_logs, first=0)
-        print("Min power: ", min(y))
-        print("Max power: ", max(y))
+        y = StepSeries.from_dict(self.power_logs, self.SIM_TIME)
+        print("Min power: ", y.min())
+        print("Max power: ", y.max())
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(y)
+            y.plot(ax)
             plt.title(plot_title)
             plt.ylabel("Power [kW]")
             plt.xlim(*self.xlim)
@@ -1196,31 +1217,24 @@ class DepotEvaluation:
         language=("eng"),
     ):
         """Plot the total power over time as line of charging infrastructures (cis)."""
-        # Something wrong with discrete2continuous_logs!! Looks fine for EN, but not for HPC
-
         plot_title = "Total power of ci_" + str(cis[0]) + " - ci_" + str(cis[1])
 
-        power_logs_cis = np.empty_like(
-            discrete2continuous_logs(
-                self.depot.resources["ci_" + str(cis[0])].power_logs_ci, first=0
-            )
-        )
+        power_logs_cis = []
         ci_counter = 0
 
         for ci_no in range(cis[0], cis[1] + 1):
-            power_logs_ci = discrete2continuous_logs(
-                self.depot.resources["ci_" + str(ci_no)].power_logs_ci, first=0
+            power_logs_ci = StepSeries.from_dict(
+                self.depot.resources["ci_" + str(ci_no)].power_logs_ci, self.SIM_TIME
             )
-            # print(power_logs_ci)
-            power_logs_cis = np.add(power_logs_ci, power_logs_cis)
-            print("ci", ci_no, ": ", str(max(power_logs_ci)))
-            if max(power_logs_ci) > 0:
+            power_logs_cis.append(power_logs_ci)
+            print("ci", ci_no, ": ", str(power_logs_ci.max()))
+            if power_logs_ci.max() > 0:
                 ci_counter += 1
         print("Amount used cis: ", ci_counter)
-        print(power_logs_cis, len(power_logs_cis))
-        y = power_logs_cis
-        print("Min power: ", min(y))
-        print("Max power: ", max(y))
+        y = StepSeries.sum(power_logs_cis, self.SIM_TIME)
+        print(y, len(y))
+        print("Min power: ", y.min())
+        print("Max power: ", y.max())
 
         if show or save:
             fig, ax = baseplot(show)
@@ -1236,7 +1250,7 @@ class DepotEvaluation:
             else:
                 plt.ylabel("Leistung [kW]")
 
-            ax.plot(y)
+            y.plot(ax)
             plt.title(plot_title)
             plt.xlim(*self.xlim)
             to_dateaxis(ax)
@@ -1297,18 +1311,18 @@ class DepotEvaluation:
         if not hasattr(self.sl_logs, "calculated"):
             self.calculate_sl()
 
-        sl = discrete2continuous_logs(
-            self.sl_logs, first=0, subkeys=["sl", vehicle_type_ID]
+        sl = StepSeries.from_dict(
+            self.sl_logs, self.SIM_TIME, subkeys=["sl", vehicle_type_ID]
         )
-        n_trips = discrete2continuous_logs(
-            self.sl_logs, first=0, subkeys=["trips", vehicle_type_ID]
+        n_trips = StepSeries.from_dict(
+            self.sl_logs, self.SIM_TIME, subkeys=["trips", vehicle_type_ID]
         )
-        n_vehicles = discrete2continuous_logs(
-            self.sl_logs, first=0, subkeys=["vehicles", vehicle_type_ID]
+        n_vehicles = StepSeries.from_dict(
+            self.sl_logs, self.SIM_TIME, subkeys=["vehicles", vehicle_type_ID]
         )
 
         # Set sim time lower bound to avoid inaccuracy of first day
-        xmin_calcs = 86400 if self.SIM_TIME > 86400 else 0
+        xmin_calcs = self.stats_start
 
         # Print results
         period = globalConstants["depot"]["sl_period"]
@@ -1318,18 +1332,19 @@ class DepotEvaluation:
         )
         labels = ["stress level", "trips", "vehicles"]
         for label, values in zip(labels, [sl, n_trips, n_vehicles]):
+            values = self.stats_window(values)
             print("\t", label, ":")
-            print("\t\tMin: %s" % min(values[xmin_calcs:]))
-            print("\t\tMax: %s" % max(values[xmin_calcs:]))
-            print("\t\tMean: %s" % np.mean(values[xmin_calcs:]))
-            print("\t\tMedian: %s" % np.median(values[xmin_calcs:]))
+            print("\t\tMin: %s" % values.min())
+            print("\t\tMax: %s" % values.max())
+            print("\t\tMean: %s" % values.mean())
+            print("\t\tMedian: %s" % values.median())
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(sl)
-            ax.plot(n_trips, "--")
-            ax.plot(n_vehicles, "--")
+            sl.plot(ax)
+            n_trips.plot(ax, "--")
+            n_vehicles.plot(ax, "--")
 
             plot_title = (
                 "Stress level for vehicle type(s) %s for a period of %s hours"
@@ -1375,13 +1390,15 @@ class DepotEvaluation:
 
         sl_values = []
         for category in self.results["sl"]["categories"]:
-            sl = discrete2continuous_logs(
-                self.depot.evaluation.sl_logs, first=0, subkeys=["sl", category]
+            sl = StepSeries.from_dict(
+                self.depot.evaluation.sl_logs,
+                self.SIM_TIME,
+                subkeys=["sl", category],
             )
             sl_values.append(sl)
 
         # Set sim time lower bound to avoid inaccuracy of first day
-        xmin_calcs = 86400 if self.SIM_TIME > 86400 else 0
+        xmin_calcs = self.stats_start
 
         self.results["sl"]["minimums"] = []
         self.results["sl"]["maximums"] = []
@@ -1389,10 +1406,11 @@ class DepotEvaluation:
         self.results["sl"]["medians"] = []
 
         for values in sl_values:
-            self.results["sl"]["minimums"].append(min(values[xmin_calcs:]))
-            self.results["sl"]["maximums"].append(max(values[xmin_calcs:]))
-            self.results["sl"]["means"].append(np.mean(values[xmin_calcs:]))
-            self.results["sl"]["medians"].append(np.median(values[xmin_calcs:]))
+            values = self.stats_window(values)
+            self.results["sl"]["minimums"].append(values.min())
+            self.results["sl"]["maximums"].append(values.max())
+            self.results["sl"]["means"].append(values.mean())
+            self.results["sl"]["medians"].append(values.median())
 
         # Totals
         self.results["sl"]["minimum"] = min(self.results["sl"]["minimums"])
@@ -1423,7 +1441,7 @@ class DepotEvaluation:
             fig, ax = baseplot(show)
 
             for values in sl_values:
-                ax.plot(values)
+                values.plot(ax)
 
             plot_title = (
                 "Current dispatch safety for all vehicle types or vehicle type groups for a period of %s hours"
@@ -1447,9 +1465,22 @@ class DepotEvaluation:
             if not show:
                 plt.close(fig)
 
-    def calc_count_rfd_unblocked_total(self):
-        y = np.zeros(self.SIM_TIME, dtype=np.int32)
+    def count_total(self, attr, areas=None):
+        """Return the sum of the logged counts *attr* (e.g. 'count') of
+        *areas* as StepSeries. Default for *areas* are all areas in the
+        depot.
+        """
+        if areas is None:
+            areas = self.depot.list_areas
+        return StepSeries.sum(
+            (
+                StepSeries.from_logger(area.logger, attr, self.SIM_TIME)
+                for area in areas
+            ),
+            self.SIM_TIME,
+        )
 
+    def calc_count_rfd_unblocked_total(self):
         for area in self.depot.list_areas:
             if area.issink:
                 if "count_rfd_unblocked" not in area.logger.loggedData:
@@ -1459,14 +1490,12 @@ class DepotEvaluation:
                     )
                     return
 
-            yi = area.logger.get_valList("count_rfd_unblocked", SIM_TIME=self.SIM_TIME)
-            yi = np.array(to_prev_values(yi))
-            y += yi
-
+        y = self.count_total("count_rfd_unblocked")
+        y_after_first_day = self.stats_window(y)
         self.results["count_rfd_unblocked_total"] = {
-            "min": np.min(y[86400:]),
-            "max": np.max(y[86400:]),
-            "mean": np.mean(y[86400:]),
+            "min": y_after_first_day.min(),
+            "max": y_after_first_day.max(),
+            "mean": y_after_first_day.mean(),
         }
         return y
 
@@ -1481,7 +1510,7 @@ class DepotEvaluation:
         parking areas over time.
         """
         y = self.calc_count_rfd_unblocked_total()
-        if len(y) > 86400:
+        if self.stats_start:
             print("After the first day:")
             print("\tMin: %d" % self.results["count_rfd_unblocked_total"]["min"])
             print("\tMax: %d" % self.results["count_rfd_unblocked_total"]["max"])
@@ -1490,7 +1519,7 @@ class DepotEvaluation:
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(y)
+            y.plot(ax)
             to_dateaxis(ax)
 
             ax.set_title("Total number of vehicles rfd and unblocked in the depot")
@@ -1519,19 +1548,18 @@ class DepotEvaluation:
         """Plot vehicle count over time on the area with *area_ID*."""
         area = self.depot.areas[area_ID]
 
-        plot_series = area.logger.get_valList("count", SIM_TIME=self.SIM_TIME)
-        plot_series = to_prev_values(plot_series)
+        plot_series = StepSeries.from_logger(area.logger, "count", self.SIM_TIME)
 
-        if len(plot_series) > 86400:
+        if self.stats_start:
             print("After the first day:")
-            print("\tMin: %d" % np.min(plot_series[86400:]))
-            print("\tMax: %d" % np.max(plot_series[86400:]))
+            print("\tMin: %d" % self.stats_window(plot_series).min())
+            print("\tMax: %d" % self.stats_window(plot_series).max())
 
         if show or save:
             fig, ax = baseplot(show)
             setting_language(language)
 
-            ax.plot(plot_series)
+            plot_series.plot(ax)
             to_dateaxis(ax)
 
             ax.set_title('Number of vehicles at area "%s"' % area.ID)
@@ -1568,21 +1596,22 @@ class DepotEvaluation:
             fig, ax = baseplot(show)
             setting_language(language)
 
-            plot_series_total = np.zeros(self.SIM_TIME, dtype=np.int32)
+            plot_series_total = []
 
             for area in group.stores:
-                plot_series = area.logger.get_valList("count", SIM_TIME=self.SIM_TIME)
-                plot_series = to_prev_values(plot_series)
-                if len(plot_series) > 86400:
+                plot_series = StepSeries.from_logger(
+                    area.logger, "count", self.SIM_TIME
+                )
+                if self.stats_start:
                     print("After the first day:" + str(area))
-                    print("\tMin: %d" % np.min(plot_series[86400:]))
-                    print("\tMax: %d" % np.max(plot_series[86400:]))
+                    print("\tMin: %d" % self.stats_window(plot_series).min())
+                    print("\tMax: %d" % self.stats_window(plot_series).max())
 
-                ax.plot(plot_series, label=area.entry_filter.vehicle_types_str[0])
-                plot_series = np.array(plot_series)
-                plot_series_total += plot_series
+                plot_series.plot(ax, label=area.entry_filter.vehicle_types_str[0])
+                plot_series_total.append(plot_series)
 
-            ax.plot(plot_series_total, label="Total")
+            plot_series_total = StepSeries.sum(plot_series_total, self.SIM_TIME)
+            plot_series_total.plot(ax, label="Total")
             to_dateaxis(ax)
             # ax.set_title('Number of vehicles at area "%s"' % group.ID)
             if language == "eng":
@@ -1620,20 +1649,19 @@ class DepotEvaluation:
                 "'count_rfd_unblocked' at areas."
             )
             return
-        plot_series = area.logger.get_valList(
-            "count_rfd_unblocked", SIM_TIME=self.SIM_TIME
+        plot_series = StepSeries.from_logger(
+            area.logger, "count_rfd_unblocked", self.SIM_TIME
         )
-        plot_series = to_prev_values(plot_series)
 
-        if len(plot_series) > 86400:
+        if self.stats_start:
             print("After the first day:")
-            print("\tMin: %d" % np.min(plot_series[86400:]))
-            print("\tMax: %d" % np.max(plot_series[86400:]))
+            print("\tMin: %d" % self.stats_window(plot_series).min())
+            print("\tMax: %d" % self.stats_window(plot_series).max())
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(plot_series)
+            plot_series.plot(ax)
             to_dateaxis(ax)
 
             ax.set_title('Number of vehicles rfd and unblocked at "%s"' % area.ID)
@@ -1658,15 +1686,14 @@ class DepotEvaluation:
         formats=("png",),
     ):
         """Plot vehicles generated over time."""
-        plot_series = self.vehicle_generator.logger.get_valList(
-            "count", SIM_TIME=self.SIM_TIME
+        plot_series = StepSeries.from_logger(
+            self.vehicle_generator.logger, "count", self.SIM_TIME
         )
-        plot_series = to_prev_values(plot_series)
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(plot_series)
+            plot_series.plot(ax)
             ax.set_title("Cumulative number of vehicles generated")
             plt.xlabel("Time [s]")
             plt.ylabel("No of vehicles")
@@ -2390,39 +2417,21 @@ class DepotEvaluation:
         if vehicle is None:
             raise ValueError("Vehicle with ID '%s' couldn't be found" % vehicle_ID)
 
-        data_dict = vehicle.logger.loggedData["dwd.active_processes_copy"]
-
-        plotdata = {}
-        used_ID_count = 0
-        registered_instances = []
-
-        for t in data_dict:
-            for proc in data_dict[t]:
-                if proc not in registered_instances:
-                    if proc.ID not in plotdata:
-                        used_ID_count += 1
-                        plotdata[proc.ID] = {}
-                        plotdata[proc.ID]["IDno"] = used_ID_count
-                        plotdata[proc.ID]["xranges"] = []
-                        plotdata[proc.ID]["yrange"] = (used_ID_count * 10, 9.8)
-
-                    # Fill xranges with tuples (start, duration)
-                    for startno, start in enumerate(proc.starts):
-                        if startno != len(proc.ends):
-                            # startno has a match in end
-                            plotdata[proc.ID]["xranges"].append(
-                                (start, proc.ends[startno] - start)
-                            )
-                        else:
-                            # ends is shorter than starts; proc lasted until simtime
-                            plotdata[proc.ID]["xranges"].append(
-                                (start, self.SIM_TIME - start)
-                            )
-
-        # Sort plotdata by first start value
-        plotdata = OrderedDict(
-            sorted(plotdata.items(), key=lambda v: v[1]["xranges"][0][0])
-        )
+        plotdata = OrderedDict()
+        # Intervals in ascending order of start, processes that lasted until
+        # the end of the simulation end at SIM_TIME
+        for procID, start, end in self.get_vehicle_index().process_intervals(
+            vehicle_ID
+        ):
+            if procID not in plotdata:
+                IDno = len(plotdata) + 1
+                plotdata[procID] = {
+                    "IDno": IDno,
+                    "xranges": [],
+                    "yrange": (IDno * 10, 9.8),
+                }
+            # Fill xranges with tuples (start, duration)
+            plotdata[procID]["xranges"].append((start, end - start))
 
         if show or save:
             fig, ax = baseplot(show)
@@ -2480,26 +2489,23 @@ class DepotEvaluation:
                 % (process_ID, self.depot.ID)
             )
 
-        # Calculate for each vehicle
+        # Calculate for each vehicle the intervals between the ends of
+        # consecutive applications. The first application is skipped.
         intervals_by_v = {v.ID: {"intervals": []} for v in self.vehicle_generator.items}
 
-        for v in self.vehicle_generator.items:
-            prev = None
-            for processes in v.logger.loggedData["dwd.active_processes_copy"].values():
-                for proc in processes:
-                    if proc.ID == process_ID:
-                        if prev is not None:  # first appearance is skipped
-                            intervals_by_v[v.ID]["intervals"].append(
-                                proc.ends[-1] - prev.ends[-1]
-                            )
-                        prev = proc
+        _, ends, vehicle_IDs = self.get_vehicle_index().intervals_of(process_ID)
+        vehicle_IDs = np.asarray(vehicle_IDs, dtype=object)
+        for vID, d in intervals_by_v.items():
+            vehicle_ends = ends[vehicle_IDs == vID]
+            d["intervals"] = np.diff(np.sort(vehicle_ends)).tolist()
 
         # Extra calc
         sum_crits = 0
         v_with_crit = []
 
         for vID, d in intervals_by_v.items():
-            calc_descr_stats(d, "intervals")
+            if d["intervals"]:
+                calc_descr_stats(d, "intervals")
 
             # count values > 2 days
             d["above_crit_value"] = sum(i > crit_value for i in d["intervals"])
@@ -2511,6 +2517,9 @@ class DepotEvaluation:
         intervals_all = {"intervals": []}
         for i in intervals_by_v.values():
             intervals_all["intervals"].extend(i["intervals"])
+        if not intervals_all["intervals"]:
+            print("Process '%s' was applied at most once per vehicle." % process_ID)
+            return
         calc_descr_stats(intervals_all, "intervals")
 
         # Output for each vehicle
@@ -2580,21 +2589,7 @@ class DepotEvaluation:
         if vehicle is None:
             raise ValueError("Vehicle with ID '%s' couldn't be found" % vehicle_ID)
 
-        y = np.zeros(self.SIM_TIME)
-
-        previous = None
-        for current in vehicle.battery_logs:
-            if previous is None:  # True for first log
-                previous = current
-                continue
-
-            y[previous.t : current.t] = np.linspace(
-                previous.energy, current.energy, current.t - previous.t, endpoint=False
-            )
-            previous = current
-
-        y[0 : vehicle.battery_logs[0].t] = vehicle.battery_logs[0].energy
-        y[vehicle.battery_logs[-1].t :] = vehicle.battery_logs[-1].energy
+        y = self.get_vehicle_index().soc(vehicle_ID).to_dense(self.SIM_TIME)
 
         if show or save:
             fig, ax = baseplot(show)
@@ -2636,15 +2631,14 @@ class DepotEvaluation:
 
         plot_title = "Vehicle %s power at charging interfaces" % vehicle.ID
 
-        print(vehicle, vehicle.power_logs)
-        y = discrete2continuous_logs(vehicle.power_logs, first=0)
-        print("Min power: ", min(y))
-        print("Max power: ", max(y))
+        y = self.get_vehicle_index().power(vehicle_ID)
+        print("Min power: ", y.min())
+        print("Max power: ", y.max())
 
         if show or save:
             fig, ax = baseplot(show)
 
-            ax.plot(y)
+            y.plot(ax)
             plt.title(plot_title)
             plt.ylabel("Power [kW]")
             plt.xlim(*self.xlim)
@@ -2678,7 +2672,7 @@ class DepotEvaluation:
                 for user in users:
                     if user not in user_counts:
                         # First entry for this user
-                        user_counts[user] = [None] * self.SIM_TIME
+                        user_counts[user] = {}
                     # Get count of this user
                     user_counts[user][t] = resource.logger.loggedData["user_count"][t][
                         user
@@ -2697,7 +2691,9 @@ class DepotEvaluation:
 
             for user in user_counts:
                 # plot.addSeries(, label=user)
-                ax.plot(to_prev_values(user_counts[user]), label=user)
+                StepSeries.from_dict(user_counts[user], self.SIM_TIME).plot(
+                    ax, label=user
+                )
 
             plt.xlabel("Time [s]")
             plt.ylabel("Area")
@@ -2721,41 +2717,41 @@ class DepotEvaluation:
         """Calculates the congestion in the depot.
         return: WATCH out times are in hours
         """
-        congestion_vehicle = pd.Series()
-        areas = ["Pre Depot"]
-        for area, value in self.depot.areas.items():
-            areas.append(value.ID)
-        congestion_area_caused = pd.Series(0.0, index=areas)
-        congestion_area_stands = pd.Series(0.0, index=areas)
-        total_congestion = 0.0
-        total_dwelltime = 0.0
+        stays = self.get_stay_table()
+        areas = ["Pre Depot"] + [area.ID for area in self.depot.areas.values()]
+
+        # Area the vehicle stands on while waiting: the area of the previous
+        # stay during the same depot visit
+        previous = stays.groupby(["vehicle", "visit"], sort=False)["area"].shift()
+        stands = previous.fillna("Pre Depot")
+        waiting_time = pd.Series(
+            clip_durations(stays["start"] - stays["waiting"], stays["start"], self.xlim)
+            / 60
+            / 60,
+            index=stays.index,
+        )  # in h
+
+        congestion_vehicle = (
+            waiting_time.groupby(stays["vehicle"], sort=False)
+            .sum()
+            .reindex([v.ID for v in self.vehicle_generator.items], fill_value=0.0)
+        )
+        congestion_area_caused = (
+            waiting_time.groupby(stays["area"]).sum().reindex(areas, fill_value=0.0)
+        )
+        congestion_area_stands = (
+            waiting_time.groupby(stands).sum().reindex(areas, fill_value=0.0)
+        )
+        total_congestion = waiting_time.sum()
 
+        # Time in depot between trips
+        pre_atas = []
+        atds = []
         for vehicle in self.vehicle_generator.items:
-            congestion_vehicle[vehicle.ID] = 0.0  # init
-            pre_area = "Pre Depot"
-            for key, item in vehicle.logger.loggedData["area_waiting_time"].items():
-                inter_interval = intersection(
-                    self.xlim, [key - item["waiting_time"], key]
-                )
-                if isinstance(inter_interval, list):
-                    waiting_time = inter_interval[1] - inter_interval[0]
-                    if waiting_time != 0:
-                        waiting_time = waiting_time / 60 / 60  # in h
-                        congestion_vehicle[item["vehicle"]] += waiting_time
-                        congestion_area_caused[item["area"]] += waiting_time
-                        congestion_area_stands[pre_area] += waiting_time
-                        total_congestion += waiting_time
-                pre_area = item["area"]
-
-            pre_ata = None
-            for trip in vehicle.finished_trips:  # Time in depot
-                if pre_ata is not None:
-                    inter_interval = intersection(self.xlim, [pre_ata, trip.atd])
-                    if isinstance(inter_interval, list):
-                        total_dwelltime += (
-                            (inter_interval[1] - inter_interval[0]) / 60 / 60
-                        )
-                pre_ata = trip.ata
+            trips = vehicle.finished_trips
+            pre_atas.extend(trip.ata for trip in trips[:-1])
+            atds.extend(trip.atd for trip in trips[1:])
+        total_dwelltime = clip_durations(pre_atas, atds, self.xlim).sum() / 60 / 60
 
         return (
             total_congestion,
@@ -2931,35 +2927,20 @@ class DepotEvaluation:
         Calculates the occupancy rate for each slot.
         :return: dict with occupancy rates in seconds
         """
+        stays = self.get_stay_table()
+        occupied = pd.Series(
+            clip_durations(stays["start"], stays["end"], self.xlim), index=stays.index
+        )
+        occupied = occupied.groupby([stays["area"], stays["slot"]]).sum()
 
         areas_and_slots = {}
         for area in self.depot.areas.values():
-            areas_and_slots[area.ID] = pd.Series(0, index=range(1, area.capacity + 1))
-
-        for vehicle in self.vehicle_generator.items:
-            pre_log = {"area": None, "slot": None, "time": None}
-            for time, slot in vehicle.logger.loggedData["dwd.current_slot"].items():
-                if pre_log["slot"] is not None and pre_log["area"] is not None:
-                    inter_interval = intersection(self.xlim, [pre_log["time"], time])
-                    if isinstance(inter_interval, list):
-                        time_delta = inter_interval[1] - inter_interval[0]
-                        areas_and_slots[pre_log["area"]].loc[
-                            pre_log["slot"]
-                        ] += time_delta
-
-                if isinstance(
-                    vehicle.logger.loggedData["dwd.current_area"][time],
-                    eflips.depot.depot.BaseArea,
-                ):
-                    pre_log["area"] = vehicle.logger.loggedData["dwd.current_area"][
-                        time
-                    ].ID
-                else:
-                    pre_log["area"] = vehicle.logger.loggedData["dwd.current_area"][
-                        time
-                    ]
-                pre_log["slot"] = slot
-                pre_log["time"] = time
+            slots = range(1, area.capacity + 1)
+            if area.ID in occupied.index.get_level_values(0):
+                series = occupied.loc[area.ID].reindex(slots, fill_value=0)
+            else:
+                series = pd.Series(0, index=slots)
+            areas_and_slots[area.ID] = series
 
         return areas_and_slots
 
@@ -2969,6 +2950,8 @@ class DepotEvaluation:
         """
         areas_and_slots = self.occupancy_rate_calculation()
 
+        import xlsxwriter
+
         filename = self.path_results + basefilename
         wb = xlsxwriter.Workbook(filename)
         absolute_sheet = wb.add_worksheet("absolute occupancy")
@@ -3042,19 +3025,13 @@ class DepotEvaluation:
         :return:
         """
 
-        count_parked_vehicle = np.zeros(self.SIM_TIME, dtype=np.int32)
-        count_blocked_slots = np.zeros(self.SIM_TIME, dtype=np.int32)
-        for area in self.depot.areas.values():
-            if isinstance(area, eflips.depot.LineArea):
-                nv = area.logger.get_valList("count", SIM_TIME=self.SIM_TIME)
-                nv = to_prev_values(nv)
-                nv = np.array(nv)
-                count_parked_vehicle += nv
-
-                nv = area.logger.get_valList("vacant_blocked", SIM_TIME=self.SIM_TIME)
-                nv = to_prev_values(nv)
-                nv = np.array(nv)
-                count_blocked_slots += nv
+        line_areas = [
+            area
+            for area in self.depot.areas.values()
+            if isinstance(area, eflips.depot.LineArea)
+        ]
+        count_parked_vehicle = self.count_total("count", line_areas)
+        count_blocked_slots = self.count_total("vacant_blocked", line_areas)
 
         count_together = count_blocked_slots + count_parked_vehicle
 
@@ -3078,10 +3055,10 @@ class DepotEvaluation:
             to_dateaxis(ax)
             plt.xlim(*self.xlim)
 
-            ax.plot(count_blocked_slots, color="black")
+            count_blocked_slots.plot(ax, color="black")
 
             ax2 = ax.twinx()
-            ax2.plot(count_together, color="green")
+            count_together.plot(ax2, color="green")
             plt.ylabel("Total number of used and blocked slots", color="green")
 
             if show:
@@ -3178,34 +3155,6 @@ class DepotEvaluation:
         print(energy / 60 / 60)
 
 
-def baseplot(show, figsize=None):
-    """Return new fig and ax after setting interactive mode based on *show*
-    [bool].
-    figsize: [None or tuple] figure size in cm (not inches)
-    """
-    if show:
-        plt.ion()
-        plt.show()  # may be required to return to the console
-    else:
-        plt.ioff()
-
-    if figsize is not None:
-        figsize = cm2in(*figsize)
-
-    fig, ax = plt.subplots(figsize=figsize)
-    return fig, ax
-
-
-def setting_language(language):
-    # English (default)
-    if language == "eng":
-        locale.setlocale(locale.LC_ALL, "en_US")
-
-    # German
-    if language == "de":
-        locale.setlocale(locale.LC_ALL, "de_DE")
-
-
 def intersection(interval_a, interval_b):
     """
 
@@ -3221,25 +3170,6 @@ def intersection(interval_a, interval_b):
         return [lower, upper]
 
 
-def savefig(fig, filename, formats=("png",), confirm=True, dpi=None, **kwargs):
-    """filename: [str] including path, excluding extension.
-
-    formats: [tuple] of file extensions [str]
-    dpi: Parameter of fig.savefig()
-
-    Accepts other arguments of fig.savefig as kwargs
-    (example: bbox_inches='tight').
-    """
-    if "png" in formats:
-        fig.savefig(filename + ".png", dpi=dpi, **kwargs)
-        if confirm:
-            print("Saved %s.png" % filename)
-    if "pdf" in formats:
-        fig.savefig(filename + ".pdf", dpi=dpi, **kwargs)
-        if confirm:
-            print("Saved %s.pdf" % filename)
-
-
 def abs_time(s: int):
     """Return an absolute amount of seconds as hh:mm string."""
     hours = s // 3600
@@ -3249,146 +3179,6 @@ def abs_time(s: int):
     # return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
-def as_text(value):
-    """Return *value* as str, except if *value* is None, in which case an empty
-    string is returned.
-    """
-    if value is None:
-        return ""
-    return str(value)
-
-
-def adjust_column_width(ws):
-    """Set column widths in worksheet *ws* of class
-    openpyxl.worksheet.worksheet.Worksheet to max length of cell contents.
-    Is exact when using a monospace font in excel (not by default), but also
-    provides a decent estimation without.
-    From: https://stackoverflow.com/questions/13197574/openpyxl-adjust-column-width-size
-    """
-    for column_cells in ws.columns:
-        length = max(len(as_text(cell.value)) for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column].width = length
-
-
-def to_prev_values(vector, to_replace=None, first=0):
-    """Replace values identical with *to_replace* in a list by previous value
-    that is not *to_replace*. If the first value is *to_replace*, *first* is
-    set as first value.
-    """
-    if vector:
-        if vector[0] is to_replace:
-            vector[0] = first
-        for i, val in enumerate(vector):
-            if val is to_replace:
-                vector[i] = vector[i - 1]
-    return vector
-
-
-def discrete2continuous_logs(data_dict, first=0, subkeys=None):
-    """Take a dict of discrete timestep logs and return a list with values of
-    every timestep.
-    *first* is the parameter for function to_prev_values.
-    *subkeys* is a list of strings that may be supplied if values in
-    *data_dict* are subdicts, optionally further nested. Values for the return
-    list are then extracted from the subdict with all keys.
-    """
-    if subkeys is None:
-        subkeys = []
-    vector = [None] * globalConstants["general"]["SIMULATION_TIME"]
-    for t, subdict in data_dict.items():
-        vector[t] = reduce(operator.getitem, subkeys, subdict)
-
-    vector = to_prev_values(vector, first=first)
-
-    return vector
-
-
-def seconds2date(si, datefmt=datefmt_general, *args):
-    """Convert a second to a date based on base_date being equivalent to 0.
-    Return a str of *datefmt*.
-    """
-    return (base_date + timedelta(seconds=si)).strftime(datefmt)
-
-
-def seconds2date_major(si, *args):
-    """Convert a second to a date based on base_date being equivalent to 0."""
-    return seconds2date(si, datefmt_major, *args)
-
-
-def seconds2date_major2(si, *args):
-    """Convert a second to a date based on base_date being equivalent to 0."""
-    return seconds2date(si, datefmt_major2, *args)
-
-
-def seconds2date_minor(si, *args):
-    """Convert a second to a date based on base_date being equivalent to 0."""
-    return seconds2date(si, datefmt_minor, *args)
-
-
-def to_dateaxis(ax):
-    """Format a date x axis. Set base_date, datefmt and byhour at the top of
-    the script. Assumes that one step equals one second.
-
-    ax: [Axes]
-    """
-    fmt_major = ticker.FuncFormatter(seconds2date_major2)
-    ax.xaxis.set_major_formatter(fmt_major)
-    ax.xaxis.set_major_locator(ticker.MultipleLocator(xdatespacing_major))
-
-    fmt_minor = ticker.FuncFormatter(seconds2date_minor)
-    ax.xaxis.set_minor_formatter(fmt_minor)
-    ax.xaxis.set_minor_locator(ticker.AutoMinorLocator(minor_intervals_per_major_tick))
-
-    # plt.gcf().autofmt_xdate(which='both')
-    ax.tick_params(axis="x", which="both", labelsize=8)
-    # ax.tick_params(axis='y', labelsize=12)
-    # ax.tick_params(axis='x', which='major', pad=15)
-    ax.tick_params(axis="x", which="minor", pad=5)
-    # ax.set_xlabel('Time', fontsize=10)
-    # ax.set_xlabel('Zeit', fontsize=12)
-
-    ax.xaxis.grid(which="major", color="grey", linewidth=1.5)
-    ax.tick_params(axis="x", which="major", width=1.5)
-    ax.xaxis.grid(which="minor", color="lightgrey", linestyle="--", dashes=(5, 5))
-    ax.tick_params(which="minor", left=False, right=False, bottom=True)
-
-
-def adjust_plt():
-    plt.xlim(left=0, right=globalConstants["general"]["SIMULATION_TIME"])
-    plt.ylim(bottom=0)
-    plt.grid(True)
-    plt.show()
-
-
-def adjust_plt_hist():
-    plt.xlim(left=0)
-    plt.ylim(bottom=0)
-    plt.gca().yaxis.grid(True)
-    plt.show()
-
-
-def make_patch_spines_invisible(ax):
-    """Helper function for a third or following y axis.
-    From: https://matplotlib.org/gallery/ticks_and_spines/multiple_yaxis_with_spines.html
-    """
-    ax.set_frame_on(True)
-    ax.patch.set_visible(False)
-    for sp in ax.spines.values():
-        sp.set_visible(False)
-
-
-def align_yaxis(ax1, v1, ax2, v2):
-    """Adjust ax2 ylimit so that v2 in ax2 is aligned to v1 in ax1.
-    Modified; from: https://stackoverflow.com/questions/10481990/matplotlib-axis-with-two-scales-shared-origin
-    """
-    _, y1 = ax1.transData.transform((0, v1))
-    _, y2 = ax2.transData.transform((0, v2))
-    inv = ax2.transData.inverted()
-    _, dy = inv.transform((0, 0)) - inv.transform((0, y1 - y2))
-    miny, maxy = ax2.get_ylim()
-    ax2.set_ylim(miny + dy, maxy)
-
-
 def calc_descr_stats(d, key):
     """Update dict *d* by some descriptive statistics based on values in list
     *d*[*key*].
@@ -3405,68 +3195,41 @@ class Report:
         self.depotsim = depotsim
         self.configurator = depotsim.configurator
 
-    def get_depot_logs(self):
-        depot_logs = [None] * globalConstants["general"]["SIMULATION_TIME"]
+    def get_depot_log_table(self):
+        """Return a column-wise table {header: column} of the area counts and
+        the total power in the depot at every time step something was logged.
+        Values are forward-filled from the last logged value.
+        """
+        depot = self.depotsim.depot
+        logs = {}
 
         # Area count
-        for area in itertools.chain(
-            self.depotsim.depot.list_areas, [self.depotsim.depot.init_store]
-        ):
-            data_count = area.logger.loggedData["count"]
-            key = "count " + area.ID
-            for t, c in data_count.items():
-                if depot_logs[t] is None:
-                    depot_logs[t] = {}
-                depot_logs[t][key] = c
+        for area in itertools.chain(depot.list_areas, [depot.init_store]):
+            logs["count " + area.ID] = logged_items(area.logger, "count")
 
         # Total power in depot
-        key = "total power [kW]"
-        for t, p in self.depotsim.depot.evaluation.power_logs.items():
-            if depot_logs[t] is None:
-                depot_logs[t] = {}
-            depot_logs[t][key] = p
-
-        # Fill gaps (assuming that at step 0 every info was logged once)
-        all_keys = depot_logs[0].keys()
-        for t, subd in enumerate(depot_logs):
-            if t == 0 or depot_logs[t] is None:
-                continue
-
-            for k in all_keys:
-                if k not in subd:
-                    found = False
-                    back = 1
-                    while not found:
-                        if (
-                            depot_logs[t - back] is not None
-                            and k in depot_logs[t - back]
-                        ):
-                            depot_logs[t][k] = depot_logs[t - back][k]
-                            found = True
-                        back += 1
-
-        # Append time and total depot count
-        keys_count = ["count " + ID for ID in self.depotsim.depot.areas.keys()] + [
-            "count init"
-        ]
-        for t, subd in enumerate(depot_logs):
-            if subd is not None:
-                subd["time [s]"] = t
-                subd["count depot total"] = sum([subd[a] for a in keys_count])
+        logs["total power [kW]"] = sorted(depot.evaluation.power_logs.items())
 
-        # Remove entries where nothing happened
-        depot_logs = [c for c in depot_logs if c is not None]
+        times = union_times(*logs.values())
+        table = {"time [s]": times}
+        for key, items in logs.items():
+            table[key] = forward_fill(items, times)
 
-        # Convert to list of ordered lists, ready for export
+        # Order columns for export
+        keys_count = ["count " + ID for ID in depot.areas.keys()] + ["count init"]
         headers = ["time [s]"] + keys_count + ["total power [kW]"]
-        depot_logs = [[d[header] for header in headers] for d in depot_logs]
-
-        return depot_logs, headers
+        return {header: table[header] for header in headers}
 
-    def append_tripdata(self, wb):
-        ws = wb.create_sheet("Trip Data")
+    def get_depot_logs(self):
+        """Return the rows of get_depot_log_table as list of lists and the
+        headers.
+        """
+        table = self.get_depot_log_table()
+        return list(table_rows(table)), list(table)
 
-        headers = [
+    def trip_rows(self):
+        """Yield the headers and a row per issued trip."""
+        yield [
             "ID",
             "vehicle_types",
             "distance [km]",
@@ -3489,11 +3252,8 @@ class Report:
             "departure delay [hh:mm]",
         ]
 
-        ws.append(headers)
-
-        # data
         for trip in self.depotsim.depot.timetable.trips_issued:
-            row = [
+            yield [
                 trip.ID,
                 trip.vehicle_types_joinedstr,
                 trip.distance,
@@ -3520,30 +3280,46 @@ class Report:
                 else None,
             ]
 
-            ws.append(row)
-
-        adjust_column_width(ws)
+    @property
+    def basefilename(self):
+        return (
+            globalConstants["depot"]["path_results"]
+            + self.configurator.templatename
+            + "__results"
+        )
 
     def export_to_excel(self):
-        wb = Workbook()
+        """Export the depot logs and trip data to an xlsx file. Rows are
+        written one by one without keeping the sheets in memory.
+        """
+        table = self.get_depot_log_table()
+        filename = self.basefilename + ".xlsx"
+        write_xlsx(
+            filename,
+            [
+                ("Vehicle Events", itertools.chain([list(table)], table_rows(table))),
+                ("Trip Data", self.trip_rows()),
+            ],
+        )
 
-        ws = wb.active
-        ws.title = "Vehicle Events"
-        depot_logs, headers_depot = self.get_depot_logs()
-        ws.append(headers_depot)
-        for l in depot_logs:
-            ws.append(l)
-        adjust_column_width(ws)
+        print("Export to %s successful." % filename)
 
-        self.append_tripdata(wb)
+    def export_to_parquet(self):
+        """Export the depot logs and trip data to Parquet files. Requires
+        pyarrow.
+        """
+        filename = self.basefilename + ".parquet"
+        write_parquet(filename, self.get_depot_log_table())
 
-        filename = self.configurator.templatename + "__results" + ".xlsx"
-        wb.save(globalConstants["depot"]["path_results"] + filename)
+        rows = self.trip_rows()
+        headers = next(rows)
+        trips = {header: list(column) for header, column in zip(headers, zip(*rows))}
+        if not trips:
+            trips = {header: [] for header in headers}
+        filename_trips = self.basefilename + "_trips.parquet"
+        write_parquet(filename_trips, trips)
 
-        print(
-            "Export to %s successful."
-            % (globalConstants["depot"]["path_results"] + filename)
-        )
+        print("Export to %s and %s successful." % (filename, filename_trips))
 
 
 class DepotAnalysis:
@@ -3565,6 +3341,12 @@ class DepotAnalysis:
         self.depot = depotsim.depot
         self.env = depotsim.env
         self.logs = []
+        # Events outside of the log window are not logged
+        self.window = LogWindow.of(self.env)
+
+        # Area counts per log in a flat array, ordered like count_IDs
+        self.count_IDs = None
+        self._counts = array("i")
 
     @property
     def defaultname(self):
@@ -3576,6 +3358,9 @@ class DepotAnalysis:
         )
 
     def log(self, event=None):
+        if self.window is not None and self.env.now not in self.window:
+            return
+
         if isinstance(event, StorePut):
             eventname = self.ACTION_POP_PARK
         elif isinstance(event, StoreGet):
@@ -3596,22 +3381,93 @@ class DepotAnalysis:
         log = DepotLog(self.env.now, eventname, event)
         self.logs.append(log)
 
-        log.area_counts = {}
-        log.depot_count_total = 0
-
-        for area in self.depot.list_areas:
-            area_population = area.count
-            log.area_counts[area.ID] = area_population
-            log.depot_count_total += area_population
+        if self.count_IDs is None:
+            self.count_IDs = [area.ID for area in self.depot.list_areas] + [
+                self.depot.init_store.ID
+            ]
+        self._counts.extend([area.count for area in self.depot.list_areas])
+        self._counts.append(self.depot.init_store.count)
 
-        log.init_store_count = self.depot.init_store.count
         log.overdue_trips = len(self.depot.overdue_trips)
 
-    def export_logs(self, filename):
+    def get_area_counts(self):
+        """Return a dict {area ID: array} with the vehicle count of each area
+        and the init store at the time of each log.
+        """
+        if not self.logs:
+            return {}
+        counts = np.frombuffer(self._counts, dtype=np.int32).reshape(
+            len(self.logs), len(self.count_IDs)
+        )
+        return {ID: counts[:, i] for i, ID in enumerate(self.count_IDs)}
+
+    def get_log_table(self):
+        """Return the logs as column-wise table {header: column}."""
+        area_counts = self.get_area_counts()
+        depot_count_total = sum(
+            (area_counts[area.ID] for area in self.depot.list_areas),
+            np.zeros(len(self.logs), dtype=np.int64),
+        )
+
+        columns = [[] for _ in range(10)]
+        for log in self.logs:
+            power = None
+            if log.action == "ACTION_CHARGE_FULL":
+                power = log.area.charging_interfaces[log.slot].max_power
+
+            # action relevance check
+            relevance_cm = (
+                log.area is not None
+                and log.area.issink
+                and (
+                    log.action == "ACTION_CHARGE_START"
+                    or log.action == "ACTION_CHARGE_FULL"
+                    or log.action == "ACTION_POP_DEPART"
+                )
+            )
+
+            row = [
+                log.simTime,
+                log.vehicle.ID,
+                log.vehicle.vehicle_type.ID,
+                log.battery_level,
+                log.vehicle.battery.energy_real,
+                log.area.ID if log.area is not None else "",
+                power,
+                log.action,
+                relevance_cm,
+                log.overdue_trips,
+            ]
+            for column, value in zip(columns, row):
+                column.append(value)
+
+        headers = [
+            "sim time",
+            "vehicle ID",
+            "vehicle type",
+            "battery level",
+            "battery capacity",
+            "area ID",
+            "power",
+            "event name",
+            "event relevance CM",
+            "overdue trips",
+        ]
+        table = {"event ID": np.arange(len(self.logs))}
+        table.update(zip(headers, columns))
+        table["depot total count"] = depot_count_total
+        for ID, counts in area_counts.items():
+            table[ID + " count"] = counts
+        return table
+
+    def export_logs(self, filename, file_format="xlsx"):
         """
         Exports the list of logs into an Excel file located at [filename].
 
         filename: [str] excluding path and file extension
+        file_format: [str] 'xlsx' for an Excel file with vehicle events and
+            trip data or 'parquet' for a Parquet file with vehicle events
+            (requires pyarrow)
         """
         if not self.logs:
             raise RuntimeError(
@@ -3622,95 +3478,42 @@ class DepotAnalysis:
 
         if filename:
             try:
-                wb = Workbook()
-                ws = wb.active
-                ws.title = "VehicleEvents"
-
-                # meta
-                meta_dateTime = ["time", datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
-                ws.append(meta_dateTime)
-
-                ws.append(["templatename", self.configurator.templatename])
-                ws.append(["depot ID", self.depot.ID])
-
-                ws.append([])  # empty row
-                ws.append([])  # empty row
-
-                # headers
-                headers = [
-                    "event ID",
-                    "sim time",
-                    "vehicle ID",
-                    "vehicle type",
-                    "battery level",
-                    "battery capacity",
-                    "area ID",
-                    "power",
-                    "event name",
-                    "event relevance CM",
-                    "overdue trips",
-                    "depot total count",
+                if hasattr(self.depot, "view"):
+                    filename_full = self.depot.view.path_results + filename
+                else:
+                    filename_full = globalConstants["depot"]["path_results"] + filename
+                filename_full += "." + file_format
+
+                table = self.get_log_table()
+                meta = [
+                    ["time", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+                    ["templatename", self.configurator.templatename],
+                    ["depot ID", self.depot.ID],
                 ]
 
-                for area in self.depot.areas.values():
-                    headers.append(area.ID + " count")
-                headers.append(self.depot.init_store.ID + " count")
-
-                ws.append(headers)
-
-                # data
-                for event_ID, log in enumerate(self.logs):
-                    current_area_ID = log.area.ID if log.area is not None else ""
-                    power = None
-                    if log.action == "ACTION_CHARGE_FULL":
-                        power = log.area.charging_interfaces[log.slot].max_power
-
-                    # action relevance check
-                    relevance_cm = (
-                        log.area is not None
-                        and log.area.issink
-                        and (
-                            log.action == "ACTION_CHARGE_START"
-                            or log.action == "ACTION_CHARGE_FULL"
-                            or log.action == "ACTION_POP_DEPART"
-                        )
+                if file_format == "xlsx":
+                    vehicle_events = itertools.chain(
+                        meta, [[], [], list(table)], table_rows(table)
                     )
+                    trip_data, trip_checks = self.tripdata_rows()
+                    write_xlsx(
+                        filename_full,
+                        [
+                            ("VehicleEvents", vehicle_events),
+                            ("TripData", trip_data),
+                            ("TripChecks", trip_checks),
+                        ],
+                    )
+                elif file_format == "parquet":
+                    write_parquet(
+                        filename_full, table, {key: str(value) for key, value in meta}
+                    )
+                else:
+                    raise ValueError("Unknown file format '%s'" % file_format)
 
-                    row = [
-                        event_ID,
-                        log.simTime,
-                        log.vehicle.ID,
-                        log.vehicle.vehicle_type.ID,
-                        log.battery_level,
-                        log.vehicle.battery.energy_real,
-                        current_area_ID,
-                        power,
-                        log.action,
-                        relevance_cm,
-                        log.overdue_trips,
-                        log.depot_count_total,
-                    ]
-
-                    for area_ID in log.area_counts:
-                        row.append(log.area_counts[area_ID])
-
-                    row.append(log.init_store_count)
-
-                    if len(row) > 0:
-                        ws.append(row)
-
-                # Add another sheet with trip data
-                self.append_tripdata(wb)
-
-                # save
                 if hasattr(self.depot, "view"):
-                    wb.save(self.depot.view.path_results + filename + ".xlsx")
                     return True
                 else:
-                    filename_full = (
-                        globalConstants["depot"]["path_results"] + filename + ".xlsx"
-                    )
-                    wb.save(filename_full)
                     print(
                         "Vehicle event data and trip data exported to %s"
                         % filename_full
@@ -3774,14 +3577,10 @@ class DepotAnalysis:
 
         return return_frame
 
-    def append_tripdata(self, wb):
+    def tripdata_rows(self):
         """
-        Extend wb by trip data.
+        Return rows of trip data and rows of summarizing trip checks.
         """
-        # wb = Workbook()
-        ws = wb.create_sheet("TripData")
-        # ws = wb.active
-
         # headers
         headers = [
             "ID",
@@ -3801,10 +3600,9 @@ class DepotAnalysis:
             "overdue",
         ]
 
-        ws.append(headers)
+        rows = [headers]
 
-        # Add sheet with summarizing infos
-        ws2 = wb.create_sheet("TripChecks")
+        # Summarizing infos
         vehicle_types = list(globalConstants["depot"]["vehicle_types"].keys())
         overdueChecks = []
         # overdueByType = {vehicleType: 0 for vehicleType in
@@ -3840,8 +3638,7 @@ class DepotAnalysis:
                 pos4,
             ]
 
-            if len(row) > 0:
-                ws.append(row)
+            rows.append(row)
 
             # For summarizing info
             if pos4 is not None:
@@ -3881,80 +3678,6 @@ class DepotAnalysis:
             + list(typeCounter.values())
         )
 
-        # Fill sheet (transposed)
-        for ti, va in zip(headers2, addData):
-            ws2.append([ti, va])
-        # ws2.append(headers2)
-        # ws2.append(addData)
-
-
-class DepotLog:
-    def __init__(self, simTime, action, event):
-        """
-        simTime: simpy environment simTime
-        vehicle: eflips.SimpleVehicle instance
-        action: string, available options in [DepotAnalysis]
-        event: simpy put or get event or FullyCharged or Departure.
-            Must be provided if *action* is ACTION_POP_PARK or
-            ACTION_POP_UNPARK.
-        """
-        self.simTime = simTime
-        self.action = action
-        self.slot = None
-
-        if action == "ACTION_POP_PARK":
-            self.vehicle = event.item
-            self.area = event.resource
-        elif action == "ACTION_POP_UNPARK":
-            self.vehicle = event.value
-            self.area = event.resource
-        else:
-            self.vehicle = event.item
-            self.area = self.vehicle.dwd.current_area
-
-        if action == "ACTION_CHARGE_FULL" or action == "ACTION_CHARGE_START":
-            self.slot = self.vehicle.dwd.current_area.items.index(self.vehicle)
-
-        self.battery_level = self.vehicle.battery.energy
-
-
-class ChargeStart:
-    eventname = "ACTION_CHARGE_START"
-
-    def __init__(self, env, item):
-        self.env = env
-        self.item = item
-
-
-class FullyCharged:
-    eventname = "ACTION_CHARGE_FULL"
-
-    def __init__(self, env, item):
-        self.env = env
-        self.item = item
-
-
-class ProcessFinished:
-    eventname = "ACTION_PROCESS_FINISHED"
-
-    def __init__(self, env, item):
-        self.env = env
-        self.item = item
-
-
-class ProcessCalled:
-    """Lo for time, when vehicle would like to proceed to next area. Needed for congestion calculation."""
-
-    eventname = "ACTION_PROCESS_CALLED"
-
-    def __init__(self, env, item):
-        self.env = env
-        self.item = item
-
-
-class Departure:
-    eventname = "ACTION_POP_DEPART"
-
-    def __init__(self, env, item):
-        self.env = env
-        self.item = item
+        # Transposed
+        rows_checks = [[ti, va] for ti, va in zip(headers2, addData)]
+        return rows, rows_checks
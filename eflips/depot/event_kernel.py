@@ -0,0 +1,643 @@
+# -*- coding: utf-8 -*-
+"""
+Event-queue kernel for a restricted class of depots.
+
+For depots that consist of Direct areas only and offer only Standby and
+ChargeEquationSteps processes, most of the SimPy machinery (exclusive
+requests, store connectors, process generators and the many zero-delay events
+between them) is not needed. DirectDepotKernel simulates such depots with a
+plain heapq-based event list instead. It operates on the same objects as the
+SimPy simulation (vehicles, trips, areas, process objects, loggers), so that
+all results are available for evaluation as usual.
+
+The SimPy environment clock is advanced along with the kernel by running it
+until a SimPy timeout that is created when a callback is scheduled. Setters that
+log at env.now and SimPy processes that are independent of the vehicle flow
+(e.g. delay events of trips) therefore work as before.
+
+Events at the same point of time are processed in the order they were
+scheduled, as in SimPy. Chains of zero-delay SimPy events (such as between a
+put request and the start of processes) are imitated by the same number of
+rescheduling steps ("hops") so that actions of different vehicles at the same
+point of time keep their order. Urgent SimPy events (process initialization,
+interrupts) are executed immediately.
+
+SimulationHost selects the kernel automatically if DirectDepotKernel.supports
+accepts the depot.
+"""
+import math
+import warnings
+from heapq import heappop, heappush
+from itertools import count
+
+from eflips.settings import globalConstants
+
+from eflips.depot.depot import (
+    AreaGroup,
+    DirectArea,
+    DSSmart,
+    ParkingAreaGroup,
+)
+from eflips.depot.events import BatteryLog
+from eflips.depot.filters import VehicleFilter
+from eflips.depot.processes import (
+    ChargeEquationSteps,
+    ProcessStatus,
+    Standby,
+)
+
+
+class KernelProcessHandle:
+    """Stand-in for the SimPy process of a depot process that is executed by a
+    DirectDepotKernel. Makes BaseDepotProcess.cancel usable, e.g. by the
+    dispatch.
+
+    Attributes:
+    stage: [str] one of 'waiting' (before the action started), 'action',
+        'ended' (action completed, cleanup pending), 'done' and 'cancelled'
+    """
+
+    def __init__(self, kernel, process):
+        self.kernel = kernel
+        self.process = process
+        self.stage = "waiting"
+
+    def interrupt(self, cause=None):
+        self.kernel.cancel_process(self.process)
+
+
+class DirectDepotKernel:
+    """Simulation of a depot without SimPy processes.
+
+    Use DirectDepotKernel.supports to check if a depot can be simulated.
+    Instantiate after VehicleGenerator.run, then call run instead of
+    env.run.
+
+    Parameters:
+    env: [simpy.Environment] of the simulation. Its clock is advanced by the
+        kernel.
+    depot: [Depot] to simulate
+    timetable: [Timetable] that issues the trips at *depot*
+    """
+
+    parking_strategy_names = ("FIRST", "LINEFIRST")
+    """Parking strategies that put a vehicle on the first vacant slot if
+    there are Direct areas only."""
+
+    entry_hops = {
+        DirectArea: (1, 1),
+        ParkingAreaGroup: (2, 4),
+        AreaGroup: (3, 4),
+    }
+    """Number of SimPy events between a successful put request and getting the
+    vehicle from its previous area, by type of plan entry. The first value is
+    for immediate success, the second one for success after waiting."""
+
+    def __init__(self, env, depot, timetable):
+        self.env = env
+        self.depot = depot
+        self.timetable = timetable
+
+        self._queue = []
+        self._seq = count()
+
+        self._departure_stores = depot.depot_control.departure_areas.stores
+        self._waiting_trips = []  # trips waiting for their vehicle
+        self._waiting_puts = []  # vehicles waiting for a slot
+        self._cancelled = []  # processes that are cancelled but not cleaned up
+        self._n_running = {}  # number of running processes by vehicle
+
+        self._log_steps = (
+            globalConstants["general"]["LOG_ATTRIBUTES"]
+            and globalConstants["general"]["LOG_SPECIFIC_STEPS"]
+        )
+
+    @classmethod
+    def supports(cls, depots, timetable):
+        """Check if *depots* and *timetable* can be simulated by the kernel.
+
+        Return a tuple (supported [bool], reason [str]). reason is empty if
+        supported is True.
+        """
+        if len(depots) != 1:
+            return False, "only a single depot is supported"
+        depot = depots[0]
+        if timetable is None:
+            return False, "no timetable"
+
+        gc = globalConstants["depot"]
+        if gc["prioritize_init_store"]:
+            return False, "option prioritize_init_store is not supported"
+        if gc["dispatch_retrigger_interval"] is not None:
+            return False, "option dispatch_retrigger_interval is not supported"
+        if gc["log_cm_data"]:
+            return False, "option log_cm_data is not supported"
+        if depot.depot_control.dispatch_strategy is not DSSmart:
+            return False, "only dispatch strategy SMART is supported"
+        if depot.resource_switches:
+            return False, "resource switches are not supported"
+
+        for area in depot.list_areas:
+            if type(area) is not DirectArea:
+                return False, "area %s is not a DirectArea" % area.ID
+            if hasattr(area, "view"):
+                return False, "areas with a view are not supported"
+
+        for procID, procdata in depot.processes.items():
+            if procdata["type"] is Standby:
+                if procdata["kwargs"].get("required_resources"):
+                    return False, "process %s requires resources" % procID
+            elif procdata["type"] is not ChargeEquationSteps:
+                return False, "process type of %s is not supported" % procID
+
+        for group in depot.groups.values():
+            if type(group) is ParkingAreaGroup:
+                if group.parking_strategy_name not in cls.parking_strategy_names:
+                    return False, "parking strategy of %s is not supported" % group.ID
+            elif type(group) is not AreaGroup:
+                return False, "group type of %s is not supported" % group.ID
+
+        for plan in [depot.default_plan] + list(depot.list_spec_plans):
+            for entry in plan:
+                if not isinstance(entry, (AreaGroup, DirectArea)):
+                    return False, "plan entry %s is not supported" % entry
+
+        for trip in timetable.trips:
+            if trip.origin not in (depot, depot.ID) or trip.destination not in (
+                depot,
+                depot.ID,
+            ):
+                return False, "trip %s does not start and end at the depot" % trip.ID
+
+        return True, ""
+
+    def schedule(self, t, callback, *args):
+        """Schedule *callback* to be called with *args* at time *t*.
+
+        For a future time, a SimPy timeout is created now that ends at *t*,
+        so that env.now has the same value and type as with SimPy processes.
+        """
+        timeout = self._timeout_at(t) if t > self.env.now else None
+        heappush(self._queue, (t, next(self._seq), callback, args, timeout))
+
+    def later(self, hops, callback, *args):
+        """Call *callback* with *args* after *hops* events at the current
+        time, the equivalent of a chain of zero-delay SimPy events.
+        """
+        if hops:
+            self.schedule(self.env.now, self.later, hops - 1, callback, *args)
+        else:
+            callback(*args)
+
+    def run(self, until):
+        """Issue the trips of the timetable and process events until
+        simulation time *until*.
+        """
+        self._issue_requests()
+
+        env = self.env
+        step = env.step
+        queue = self._queue
+        while queue and queue[0][0] < until:
+            t, _, callback, args, timeout = heappop(queue)
+            if timeout is not None:
+                # Same as env.run(until=timeout) without the overhead of
+                # stopping the environment
+                while timeout.callbacks is not None:
+                    step()
+            callback(*args)
+
+        if until > env.now:
+            env.run(until=until)
+
+    def _timeout_at(self, t):
+        """Return a SimPy timeout that ends at exactly time *t*.
+
+        SimPy computes the end as now + delay, which can differ from *t* in
+        the last bit for floats, so the delay is adjusted if necessary.
+        """
+        now = self.env.now
+        delay = t - now
+        while now + delay < t:
+            delay = math.nextafter(delay, math.inf)
+        while now + delay > t:
+            delay = math.nextafter(delay, -math.inf)
+        return self.env.timeout(delay)
+
+    # Timetable and departures
+
+    def _issue_requests(self):
+        """Counterpart of Timetable.run and DepotControl.register_for_dispatch.
+        Events are scheduled in the same order as the SimPy processes would.
+        """
+        self.timetable._complete([self.depot])
+        lead_time_match = globalConstants["depot"]["lead_time_match"]
+
+        for trip in self.timetable.trips:
+            self.timetable.trips_issued.append(trip)
+            self.depot.pending_departures.append(trip)
+            self.schedule(trip.std, self.later, 1, self._departure, trip)
+
+        for trip in self.timetable.trips:
+            self.schedule(
+                max(trip.std - lead_time_match, 0), self._schedule_for_matching, trip
+            )
+            if trip.std - lead_time_match >= 0:
+                self.schedule(trip.std - lead_time_match, self._notify_due, trip)
+            self.schedule(trip.std, self._notify_due, trip)
+
+    def _schedule_for_matching(self, trip):
+        self.depot.unassigned_trips.append(trip)
+
+    def _notify_due(self, trip):
+        if trip.vehicle is None:
+            self.dispatch()
+
+    def _departure(self, trip):
+        """Counterpart of DepotControl.process_request_prio_parking at the
+        scheduled time of departure.
+        """
+        self.dispatch()
+
+        vehicle = trip.vehicle
+        if vehicle is not None and vehicle.dwd.current_area in self._departure_stores:
+            area = vehicle.dwd.current_area
+            area.get_direct(vehicle)
+            self.later(
+                1, self._left_area, area, self.later, 1, self._checkout, vehicle, trip
+            )
+        else:
+            self.later(1, self._departure_from_init, trip)
+
+    def _departure_from_init(self, trip):
+        vf = VehicleFilter(filter_names=["trip_vehicle_match"], trip=trip)
+        if self.depot.init_store.find("any", vf):
+            self.depot.unassigned_trips.remove(trip)
+            vehicle = self.depot.init_store.get(vf).value
+            self.later(1, self._checkout, vehicle, trip, True)
+        else:
+            # Wait until a vehicle is assigned
+            self._waiting_trips.append(trip)
+
+    def _serve_waiting_trips(self):
+        """Let delayed trips depart that got a vehicle assigned."""
+        for trip in [
+            trip
+            for trip in self._waiting_trips
+            if trip.vehicle is not None
+            and trip.vehicle.dwd.current_area in self._departure_stores
+        ]:
+            self._waiting_trips.remove(trip)
+            vehicle = trip.vehicle
+            area = vehicle.dwd.current_area
+            area.get_direct(vehicle)
+            self.later(
+                1, self._left_area, area, self.later, 2, self._checkout, vehicle, trip
+            )
+
+    def _checkout(self, vehicle, trip, system_entry=False):
+        if system_entry:
+            vehicle.system_entry = True
+        vehicle.trip = trip
+        trip.vehicle = vehicle
+        vehicle.trip_at_departure = trip
+        self.depot.depot_control.register_departure(vehicle)
+
+        self.dispatch()
+
+        vehicle.battery_logs.append(BatteryLog(self.env.now, vehicle, "consume_start"))
+        self.schedule(self.env.now + trip.duration, self._arrival, vehicle)
+
+    def dispatch(self):
+        """Trigger the dispatch of the depot and handle the consequences."""
+        self.depot.depot_control.trigger_dispatch()
+        self._serve_waiting_trips()
+
+        while self._cancelled:
+            self._cleanup_cancelled(self._cancelled.pop(0))
+
+    # Arrivals and movement inside the depot
+
+    def _arrival(self, vehicle):
+        """Counterpart of SimpleVehicle.drive after driving and
+        DepotControl.checkin.
+        """
+        vehicle.consume()
+        vehicle.battery_logs.append(BatteryLog(self.env.now, vehicle, "consume_end"))
+        trip = vehicle.trip
+        vehicle.mileage += trip.distance if trip.distance is not None else 0
+
+        depot = trip.destination
+        depot.depot_control.register_arrival(vehicle)
+        self._proceed(vehicle)
+        depot.checkins += 1
+
+    def _proceed(self, vehicle):
+        """Counterpart of DepotControl.proceed."""
+        current_area = vehicle.dwd.current_area
+        issink = current_area.issink if current_area is not None else False
+
+        if vehicle.dwd.plan and not issink:
+            next_entry = vehicle.dwd.plan.pop(0)
+            if isinstance(next_entry, AreaGroup):
+                stores = next_entry.stores
+                permissions = next_entry.check_entry_filters(vehicle)
+            else:
+                stores = [next_entry]
+                permissions = [next_entry.entry_filter(vehicle)]
+
+            candidates = {}
+            for store, permission in zip(stores, permissions):
+                if permission:
+                    process_IDs = self.depot.depot_control.get_process_need(
+                        vehicle, store
+                    )
+                    if process_IDs:
+                        candidates[store] = process_IDs
+
+            if candidates:
+                vehicle.dwd.on_hold = True
+                request = (vehicle, candidates, self.env.now, current_area, next_entry)
+                for store in candidates:
+                    # Pending requests come first, like in a SimPy put queue
+                    self._serve_waiting_puts(store)
+                    if store.vacant:
+                        self._enter_area(request, store, False)
+                        break
+                else:
+                    self._waiting_puts.append(request)
+            else:
+                self._proceed(vehicle)
+
+        else:
+            vehicle.dwd.plan.clear()
+            self._serve_waiting_trips()
+            self.dispatch()
+
+    def _serve_waiting_puts(self, area):
+        """Let vehicles waiting for a slot in *area* in."""
+        while self._waiting_puts and area.vacant:
+            request = next(
+                (request for request in self._waiting_puts if area in request[1]),
+                None,
+            )
+            if request is None:
+                break
+            self._waiting_puts.remove(request)
+            self._enter_area(request, area, True)
+
+    def _enter_area(self, request, area, waited):
+        """Put a vehicle into *area*. The put request callbacks and the rest
+        of DepotControl.proceed_group follow like in SimPy.
+        """
+        vehicle, candidates, t_request, current_area, entry = request
+        area.put_direct(vehicle)
+        self.later(1, self._entered_area, request, area)
+
+        hops = self.entry_hops[type(entry)][waited]
+        if current_area is not None:
+            self.later(hops, self._leave_previous_area, request, area)
+        else:
+            self.later(hops, self._run_processes, vehicle, candidates[area])
+
+    def _entered_area(self, request, area):
+        """Counterpart of the put request callbacks."""
+        vehicle, candidates, t_request, current_area, entry = request
+        now = self.env.now
+
+        area.tus_put.append(now - t_request)
+
+        vehicle.dwd.previous_area = vehicle.dwd.current_area
+        vehicle.dwd.current_area = area
+        if self._log_steps:
+            if hasattr(vehicle, "logger"):
+                vehicle.logger.steplog()
+            if hasattr(area, "logger"):
+                area.logger.steplog()
+        if area.issink:
+            self.depot.evaluation.log_sl()
+        if globalConstants["general"]["LOG_ATTRIBUTES"]:
+            vehicle.logger.loggedData["area_waiting_time"][now] = {
+                "waiting_time": now - t_request,
+                "vehicle": vehicle.ID,
+                "area": area.ID,
+            }
+
+    def _leave_previous_area(self, request, area):
+        """Get the vehicle from the area it was in before entering *area*."""
+        vehicle, candidates, t_request, current_area, entry = request
+        if (
+            self.env.now > t_request
+            and isinstance(entry, ParkingAreaGroup)
+            and self.depot.depot_control.parking_congestion_event_cls is not None
+        ):
+            self.depot.depot_control.parking_congestion_event_cls(self.env).succeed()
+
+        current_area.get_direct(vehicle)
+        self.later(
+            1,
+            self._left_area,
+            current_area,
+            self._run_processes,
+            vehicle,
+            candidates[area],
+        )
+
+    def _left_area(self, area, callback, *args):
+        """Counterpart of the get request callbacks. Call *callback* with
+        *args* afterwards.
+        """
+        self._serve_waiting_puts(area)
+        if self._log_steps and hasattr(area, "logger"):
+            area.logger.steplog()
+        if area.issink:
+            self.depot.evaluation.log_sl()
+        callback(*args)
+
+    # Processes
+
+    def _run_processes(self, vehicle, process_IDs):
+        """Counterpart of DepotControl.run_processes and the start of
+        BaseDepotProcess._pem.
+        """
+        vehicle.dwd.any_active_processes = True
+        vehicle.dwd.on_hold = False
+
+        processes = [
+            self.depot.processes[procID]["type"](
+                env=self.env, **self.depot.processes[procID]["kwargs"]
+            )
+            for procID in process_IDs
+        ]
+        for process in processes:
+            process._pre(vehicle=vehicle)
+            process.proc = KernelProcessHandle(self, process)
+        self._n_running[vehicle] = len(processes)
+
+        for process in processes:
+            if isinstance(process, ChargeEquationSteps):
+                ci = process.charging_interface
+                process.requests = [
+                    ci.request(
+                        caller=process,
+                        priority=process.priority,
+                        preempt=process.preempt,
+                    )
+                ]
+                process.status = ProcessStatus.WAITING
+                self.later(2, self._start_action, process)
+            else:
+                process.status = ProcessStatus.WAITING
+                self.later(1, self._start_action, process)
+
+    def _start_action(self, process):
+        """Counterpart of BaseDepotProcess._pem after getting resources."""
+        handle = process.proc
+        if handle.stage != "waiting":
+            return
+        handle.stage = "action"
+        handle.action_start = self.env.now
+        process.starts.append(self.env.now)
+        self.later(1, self._set_in_progress, process)
+
+        if isinstance(process, ChargeEquationSteps):
+            self._start_charging(process)
+        else:
+            self.schedule(self.env.now + process.dur, self._end_action, process)
+
+    def _set_in_progress(self, process):
+        if process.proc.stage in ("action", "ended"):
+            process.status = ProcessStatus.IN_PROGRESS
+
+    def _start_charging(self, process):
+        """First part of ChargeEquationSteps._action."""
+        vehicle = process.vehicle
+        battery = vehicle.battery
+        vehicle.battery_logs.append(BatteryLog(self.env.now, vehicle, "charge_start"))
+        battery.active_processes.append(process)
+
+        if process.soc_target == "soc_max":
+            process.soc_target = battery.soc_max
+        assert (
+            battery.soc < process.soc_target
+        ), "soc is already higher than this process can achieve. Case should be avoided with a vehicle filter."
+
+        self._start_charge_step(process)
+
+    def _start_charge_step(self, process):
+        vehicle = process.vehicle
+        battery = vehicle.battery
+
+        soc_interval = min(process.precision, process.soc_target - battery.soc)
+        soc_target_step = battery.soc + soc_interval
+        amount = battery.energy_real * soc_interval
+        power = process.power
+        effective_power = (
+            power * process.efficiency * vehicle.vehicle_type.charging_efficiency
+        )
+        process.dur = round(amount / effective_power * 3600, 12)
+
+        if process.dur == 0:
+            # See ChargeEquationSteps._action
+            process.dur = 1
+            amount_1s = 1 / 3600 * effective_power
+            soc_interval_1s = amount_1s / battery.energy_real
+            soc_target_1s = battery.soc + soc_interval_1s
+            soc_target_step = min(soc_target_1s, process.soc_target)
+
+        process.charging_interface.current_power = power
+        vehicle.power_logs[self.env.now] = effective_power
+        self.schedule(
+            self.env.now + process.dur, self._end_charge_step, process, soc_target_step
+        )
+
+    def _end_charge_step(self, process, soc_target_step):
+        if process.proc.stage != "action":
+            return
+        battery = process.vehicle.battery
+
+        if soc_target_step < process.soc_target:
+            amount_step = battery.energy_real * soc_target_step - battery.energy
+            process.update_battery("charge_step", amount=amount_step)
+            self._start_charge_step(process)
+        else:
+            rest = round(battery.energy_real * process.soc_target - battery.energy, 14)
+            if rest > 0:
+                process.update_battery("charge_end", amount=rest)
+            self._stop_charging(process)
+            self._end_action(process)
+
+    def _stop_charging(self, process):
+        """Last part of ChargeEquationSteps._action."""
+        vehicle = process.vehicle
+        process.charging_interface.current_power = 0
+        vehicle.power_logs[self.env.now] = 0
+        vehicle.battery.active_processes.remove(process)
+        vehicle.battery.n_charges += 1
+
+    def _end_action(self, process):
+        if process.proc.stage != "action":
+            return
+        process.proc.stage = "ended"
+        self.later(1, self._complete_process, process)
+
+    def _complete_process(self, process):
+        """End of BaseDepotProcess._pem after successful execution."""
+        if process.proc.stage != "ended":
+            return
+        process.proc.stage = "done"
+        self._release(process)
+        process.ends.append(self.env.now)
+        process.status = ProcessStatus.COMPLETED
+        process.vehicle.dwd.remove_active_process(process)
+        self.later(1, self._finish, process)
+
+    def cancel_process(self, process):
+        """Cancel *process*. Cleanup follows at the end of the current
+        dispatch, like an interrupt in SimPy.
+        """
+        if process.proc.stage != "done" and process not in self._cancelled:
+            self._cancelled.append(process)
+
+    def _cleanup_cancelled(self, process):
+        """Counterpart of the interruption of BaseDepotProcess._pem and
+        ChargeEquationSteps._action.
+        """
+        handle = process.proc
+        stage = handle.stage
+        handle.stage = "cancelled"
+
+        self._release(process)
+        if stage != "waiting":
+            process.ends.append(self.env.now)
+        process.status = ProcessStatus.CANCELLED
+        process.vehicle.dwd.remove_active_process(process)
+
+        if stage == "action" and isinstance(process, ChargeEquationSteps):
+            process.update_battery("charge_interrupt")
+            warnings.warn(
+                "It is unclear whether interrupting a charging process of this type returns the desired "
+                "result. Double-check the battery state after the simulation."
+            )
+            self._stop_charging(process)
+
+        self.later(1, self._finish, process)
+
+    def _release(self, process):
+        for request in process.requests:
+            request.resource.release(request)
+
+    def _finish(self, process):
+        """Counterpart of the success of process.finished."""
+        vehicle = process.vehicle
+        if process.cancellable_for_dispatch:
+            process.notify_assignment()
+            self._serve_waiting_trips()
+
+        self._n_running[vehicle] -= 1
+        if not self._n_running[vehicle]:
+            self.later(2, self._processes_finished, vehicle)
+
+    def _processes_finished(self, vehicle):
+        vehicle.dwd.any_active_processes = False
+        self._proceed(vehicle)
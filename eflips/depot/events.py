@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight containers and event markers that are logged during the
+simulation.
+
+This module has no dependencies on plotting or table libraries so that the
+simulation core can import it without loading the evaluation.
+
+Logs can be restricted to an evaluation window with the optional setting
+globalConstants['general']['LOG_WINDOW'] = [start, end] (end may be None).
+Values of state logs such as power or battery energy before the window are
+not kept, except the last one as checkpoint of the state at the window
+start. Events before and all logs after the window are dropped.
+
+"""
+from weakref import WeakKeyDictionary
+
+from eflips.settings import globalConstants
+
+
+class LogWindow:
+    """Time window [start, end) in which logs are recorded.
+
+    Parameters:
+    start: [int] start of the window
+    end: [int or None] exclusive end of the window. None for no end.
+    """
+
+    _windows = WeakKeyDictionary()
+
+    def __init__(self, start=0, end=None):
+        self.start = start
+        self.end = end if end is not None else float("inf")
+
+    @classmethod
+    def of(cls, env):
+        """Return the window of simulation environment *env* from the setting
+        LOG_WINDOW or None if the setting is missing or None.
+        """
+        if env in cls._windows:
+            return cls._windows[env]
+        setting = globalConstants["general"].get("LOG_WINDOW")
+        window = cls._windows[env] = cls(*setting) if setting is not None else None
+        return window
+
+    def __contains__(self, t):
+        return self.start <= t < self.end
+
+    def __repr__(self):
+        return "{LogWindow} [%s, %s)" % (self.start, self.end)
+
+
+class WindowedDict(dict):
+    """Dict {time: value} that only stores values logged in *window*.
+
+    Parameters:
+    window: [LogWindow]
+    data: [dict] initial entries
+    checkpoint: [bool] if True, the dict logs a state and keeps the last
+        value logged before the window start. If False, the dict logs events
+        and values before the window are dropped.
+    """
+
+    def __init__(self, window, data=(), checkpoint=True):
+        super().__init__()
+        self.window = window
+        self.checkpoint = checkpoint
+        for t, value in dict(data).items():
+            self[t] = value
+
+    def __setitem__(self, t, value):
+        window = self.window
+        if t >= window.end:
+            return
+        if t < window.start:
+            if not self.checkpoint:
+                return
+            # Only the latest state before the window is needed
+            self.clear()
+        super().__setitem__(t, value)
+
+
+class WindowedList(list):
+    """List of log objects that only stores objects logged in *window*.
+
+    Parameters:
+    window: [LogWindow]
+    time_attr: [str] name of the attribute with the time of an object
+    checkpoint: [bool] see WindowedDict
+    """
+
+    def __init__(self, window, time_attr, checkpoint=True):
+        super().__init__()
+        self.window = window
+        self.time_attr = time_attr
+        self.checkpoint = checkpoint
+
+    def append(self, entry):
+        window = self.window
+        t = getattr(entry, self.time_attr)
+        if t >= window.end:
+            return
+        if t < window.start:
+            if not self.checkpoint:
+                return
+            if self:
+                # Only the latest state before the window is needed
+                self[-1] = entry
+                return
+        super().append(entry)
+
+
+def windowed_dict(env, data=None, checkpoint=True):
+    """Return a dict {time: value} for logging in the window of *env*. This
+    is a WindowedDict if a window is set, otherwise a plain dict.
+    """
+    data = {} if data is None else data
+    window = LogWindow.of(env)
+    if window is None:
+        return data
+    return WindowedDict(window, data, checkpoint)
+
+
+def windowed_list(env, time_attr, checkpoint=True):
+    """Return a list for logging objects with time attribute *time_attr* in
+    the window of *env*. This is a WindowedList if a window is set, otherwise
+    a plain list.
+    """
+    window = LogWindow.of(env)
+    if window is None:
+        return []
+    return WindowedList(window, time_attr, checkpoint)
+
+
+class ArrivalLog:
+    """Container for data to be logged when a vehicle arrives at a depot.
+    Independent from the DataLogger. Temporary, may be replaced by a DataLogger
+    rework.
+    """
+
+    def __init__(self, t, vehicle):
+        self.arrival_time = t
+        self.vehicle = vehicle
+        self.trip = vehicle.trip
+        self.energy = vehicle.battery.energy
+        self.energy_real = vehicle.battery.energy_real
+
+
+class BatteryLog:
+    """Container for logging data related to charging. Independent from the
+    DataLogger. Temporary, may be replaced by a DataLogger rework.
+
+    Parameters:
+    event_name: [str]
+    """
+
+    def __init__(self, t, vehicle, event_name):
+        self.t = t
+        self.energy = vehicle.battery.energy
+        self.energy_real = vehicle.battery.energy_real
+        self.event_name = event_name
+
+
+class DepotLog:
+    def __init__(self, simTime, action, event):
+        """
+        simTime: simpy environment simTime
+        vehicle: eflips.SimpleVehicle instance
+        action: string, available options in [DepotAnalysis]
+        event: simpy put or get event or FullyCharged or Departure.
+            Must be provided if *action* is ACTION_POP_PARK or
+            ACTION_POP_UNPARK.
+        """
+        self.simTime = simTime
+        self.action = action
+        self.slot = None
+
+        if action == "ACTION_POP_PARK":
+            self.vehicle = event.item
+            self.area = event.resource
+        elif action == "ACTION_POP_UNPARK":
+            self.vehicle = event.value
+            self.area = event.resource
+        else:
+            self.vehicle = event.item
+            self.area = self.vehicle.dwd.current_area
+
+        if action == "ACTION_CHARGE_FULL" or action == "ACTION_CHARGE_START":
+            self.slot = self.vehicle.dwd.current_area.items.index(self.vehicle)
+
+        self.battery_level = self.vehicle.battery.energy
+
+
+class ChargeStart:
+    eventname = "ACTION_CHARGE_START"
+
+    def __init__(self, env, item):
+        self.env = env
+        self.item = item
+
+
+class FullyCharged:
+    eventname = "ACTION_CHARGE_FULL"
+
+    def __init__(self, env, item):
+        self.env = env
+        self.item = item
+
+
+class ProcessFinished:
+    eventname = "ACTION_PROCESS_FINISHED"
+
+    def __init__(self, env, item):
+        self.env = env
+        self.item = item
+
+
+class ProcessCalled:
+    """Lo for time, when vehicle would like to proceed to next area. Needed for congestion calculation."""
+
+    eventname = "ACTION_PROCESS_CALLED"
+
+    def __init__(self, env, item):
+        self.env = env
+        self.item = item
+
+
+class Departure:
+    eventname = "ACTION_POP_DEPART"
+
+    def __init__(self, env, item):
+        self.env = env
+        self.item = item
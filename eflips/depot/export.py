@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Column-wise tables and streaming file export for evaluation results.
+
+Tables are dicts {header: column} with columns of equal length (NumPy arrays
+or lists). Sparse logs such as {time: value} are forward-filled to common
+times with NumPy. Excel files are written row by row with xlsxwriter in
+constant_memory mode, so that only the current row is held in memory.
+Parquet export requires the optional dependency pyarrow.
+
+"""
+import numpy as np
+
+
+def logged_items(logger, attr):
+    """Return the (time, value) pairs of *attr* logged by *logger*
+    (DataLogger or ColumnarLogger) in ascending order of time.
+    """
+    data = logger.loggedData
+    if hasattr(data, "items_of"):
+        return list(data.items_of(attr))
+    return sorted(data[attr].items())
+
+
+def forward_fill(items, times):
+    """Return an array with the values of sorted (time, value) pairs *items*
+    at *times*, i.e. the last value logged at or before each time. Times
+    before the first logged value are None.
+    """
+    times = np.asarray(times)
+    if not items:
+        return np.full(len(times), None, dtype=object)
+    log_times = np.fromiter((t for t, _ in items), dtype=float, count=len(items))
+    values = np.asarray([value for _, value in items])
+    positions = np.searchsorted(log_times, times, side="right") - 1
+    missing = positions < 0
+    result = values[np.maximum(positions, 0)]
+    if missing.any():
+        result = result.astype(object)
+        result[missing] = None
+    return result
+
+
+def union_times(*logs):
+    """Return the sorted array of all times in the (time, value) pairs
+    *logs*.
+    """
+    times = [np.fromiter((t for t, _ in items), dtype=float) for items in logs]
+    times = np.unique(np.concatenate(times)) if times else np.empty(0)
+    if times.size and np.all(times == np.floor(times)):
+        times = times.astype(np.int64)
+    return times
+
+
+def table_rows(table):
+    """Yield the rows of *table* as lists of Python values."""
+    columns = [
+        column.tolist() if isinstance(column, np.ndarray) else column
+        for column in table.values()
+    ]
+    for row in zip(*columns):
+        yield list(row)
+
+
+def _text_width(value):
+    return len(str(value)) if value is not None else 0
+
+
+def write_xlsx(filename, sheets):
+    """Write sheets row by row to xlsx file *filename*.
+
+    sheets: [iterable] of (sheet name, rows) with rows being an iterable of
+        lists. Rows may be generated lazily. Column widths are adjusted to
+        the longest value.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(filename, {"constant_memory": True})
+    try:
+        for name, rows in sheets:
+            worksheet = workbook.add_worksheet(name)
+            widths = []
+            for row_no, row in enumerate(rows):
+                worksheet.write_row(row_no, 0, row)
+                for col, value in enumerate(row):
+                    width = _text_width(value)
+                    if col == len(widths):
+                        widths.append(width)
+                    elif width > widths[col]:
+                        widths[col] = width
+            for col, width in enumerate(widths):
+                worksheet.set_column(col, col, width)
+    finally:
+        workbook.close()
+
+
+def write_parquet(filename, table, metadata=None):
+    """Write *table* to Parquet file *filename*. Requires pyarrow.
+
+    metadata: [dict] of str to str that is stored in the file's schema.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "Parquet export requires pyarrow. Install it with 'pip install pyarrow'."
+        ) from None
+
+    arrow_table = pa.table(
+        {
+            header: (
+                column.tolist()
+                if isinstance(column, np.ndarray) and column.dtype == object
+                else column
+            )
+            for header, column in table.items()
+        }
+    )
+    if metadata:
+        arrow_table = arrow_table.replace_schema_metadata(metadata)
+    pq.write_table(arrow_table, filename)
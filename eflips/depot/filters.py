@@ -151,6 +151,9 @@ class VehicleFilter:
                     "attribute vehicle_types to be set before call."
                 )
             # print(self.vehicle_types, self.vehicle_types_str)
+            # Replace the list instead of converting it in place because it
+            # may be shared with a depot template
+            self.vehicle_types = self.vehicle_types.copy()
             for no, ID in enumerate(self.vehicle_types):
                 if isinstance(ID, str):
                     try:
@@ -1,7 +1,143 @@
-"""Crawl spot prices and built data frame."""
+"""Crawl spot prices, import local price dumps and built data frame."""
 import pandas as pd
+import numpy as np
 import datetime
+import os
 import pickle
+import re
+import warnings
+
+
+# Rows of the quarter-hourly prices in the table of the intraday page
+INTRADAY_ROWS = [
+    2,
+    3,
+    5,
+    6,
+    9,
+    10,
+    12,
+    13,
+    16,
+    17,
+    19,
+    20,
+    23,
+    24,
+    26,
+    27,
+    30,
+    31,
+    33,
+    34,
+    37,
+    38,
+    40,
+    41,
+    44,
+    45,
+    47,
+    48,
+    51,
+    52,
+    54,
+    55,
+    58,
+    59,
+    61,
+    62,
+    65,
+    66,
+    68,
+    69,
+    72,
+    73,
+    75,
+    76,
+    79,
+    80,
+    82,
+    83,
+    86,
+    87,
+    89,
+    90,
+    93,
+    94,
+    96,
+    97,
+    100,
+    101,
+    103,
+    104,
+    107,
+    108,
+    110,
+    111,
+    114,
+    115,
+    117,
+    118,
+    121,
+    122,
+    124,
+    125,
+    128,
+    129,
+    131,
+    132,
+    135,
+    136,
+    138,
+    139,
+    142,
+    143,
+    145,
+    146,
+    149,
+    150,
+    152,
+    153,
+    156,
+    157,
+    159,
+    160,
+    163,
+    164,
+    166,
+    167,
+]
+
+
+def day_ahead_prices(tables, date):
+    """
+    Extracts the prices of a day-ahead auction page, which shows the hourly prices of seven days.
+    :param tables: list of pd.DataFrame as returned by pd.read_html for the page
+    :param date: datetime.date of the last day of the page
+    :return: dict of datetime.date and pd.Series of prices in EUR/kWh
+    """
+    pd_frame = tables[8].dropna()
+    index = pd_frame.iloc[:, 0]
+
+    prices = {}
+    for i in range(2, 9):
+        values = pd_frame.iloc[:, i] / 1000
+        prices[date + datetime.timedelta(days=(i - 8))] = pd.Series(
+            list(values), index=index
+        )
+    return prices
+
+
+def intraday_prices(tables):
+    """
+    Extracts the quarter-hourly prices of an intraday page.
+    :param tables: list of pd.DataFrame as returned by pd.read_html for the page
+    :return: pd.Series of prices in EUR/kWh
+    """
+    raw_pd_frame = tables[0]
+    values = raw_pd_frame.iloc[INTRADAY_ROWS, 7].astype("float") / 1000
+    index = raw_pd_frame.iloc[INTRADAY_ROWS, 2]
+    return pd.Series(list(values), index=index)
 
 
 class InputReader:
@@ -15,10 +151,15 @@ class InputReader:
     COUNTRY_DAY_AHEAD = "/DE_LU/24"
 
     def __init__(self, type, start_date, end_date, safe_path):
+        """
+        :param safe_path: directory for one pickle per day, ending with a separator, or file of a PriceStore (see
+        PriceStore.FORMATS) for all days
+        """
         self.type = type  # "day_ahead" or "intraday"
         self.start_date = start_date
         self.end_date = end_date
         self.safe_path = safe_path
+        self.prices = {}
 
     def start_input(self):
         """Decides which input reader to run."""
@@ -30,27 +171,29 @@ class InputReader:
             self.input_intraday()
         else:
             print("No valid type.")
+            return
+
+        if PriceStore.is_store(self.safe_path):
+            PriceStore.from_days(self.prices).save(self.safe_path)
+
+    def save_day(self, date, series):
+        """Saves the prices of a day as pickle or keeps them for the PriceStore."""
+        if PriceStore.is_store(self.safe_path):
+            self.prices[date] = series
+        else:
+            pickle.dump(series, open(self.safe_path + str(date) + ".p", "wb"))
 
     def input_day_ahead(self):
         """Input reader for https://www.epexspot.com/en/market-data/dayaheadauction/auction-table/2018-10-27/DE_LU/24"""
 
         date = self.start_date
         while date <= self.end_date:
-            raw_pd_frame = pd.read_html(
+            tables = pd.read_html(
                 InputReader.LINK_DAY_AHEAD + str(date) + InputReader.COUNTRY_DAY_AHEAD
-            )[8]
-            pd_frame = raw_pd_frame.dropna()
-            index = pd_frame.iloc[:, 0]
-
-            i = 2
-            while i < 9:
-                values = pd_frame.iloc[:, i] / 1000
-                series = pd.Series(list(values), index=index)
-                date_name = str(
-                    date + datetime.timedelta(days=(i - 8))
-                )  # because of the +6 on top and the structure of the pd_frame it has to be +8
-                pickle.dump(series, open(self.safe_path + date_name + ".p", "wb"))
-                i += 1
+            )
+            # because of the +6 on top, the page of date shows the six days before as well
+            for day, series in day_ahead_prices(tables, date).items():
+                self.save_day(day, series)
 
             print(str(date) + ":imported")
             date = date + datetime.timedelta(days=7)
@@ -58,122 +201,350 @@ class InputReader:
     def input_intraday(self):
         """Input reader for https://www.epexspot.com/en/market-data/intradaycontinuous/intraday-table/2018-10-18/DE"""
         date = self.start_date
-        vector_row_needed = [
-            2,
-            3,
-            5,
-            6,
-            9,
-            10,
-            12,
-            13,
-            16,
-            17,
-            19,
-            20,
-            23,
-            24,
-            26,
-            27,
-            30,
-            31,
-            33,
-            34,
-            37,
-            38,
-            40,
-            41,
-            44,
-            45,
-            47,
-            48,
-            51,
-            52,
-            54,
-            55,
-            58,
-            59,
-            61,
-            62,
-            65,
-            66,
-            68,
-            69,
-            72,
-            73,
-            75,
-            76,
-            79,
-            80,
-            82,
-            83,
-            86,
-            87,
-            89,
-            90,
-            93,
-            94,
-            96,
-            97,
-            100,
-            101,
-            103,
-            104,
-            107,
-            108,
-            110,
-            111,
-            114,
-            115,
-            117,
-            118,
-            121,
-            122,
-            124,
-            125,
-            128,
-            129,
-            131,
-            132,
-            135,
-            136,
-            138,
-            139,
-            142,
-            143,
-            145,
-            146,
-            149,
-            150,
-            152,
-            153,
-            156,
-            157,
-            159,
-            160,
-            163,
-            164,
-            166,
-            167,
-        ]
         while date < (self.end_date + datetime.timedelta(days=1)):
             date += datetime.timedelta(days=1)
 
-            raw_pd_frame = pd.read_html(
+            tables = pd.read_html(
                 InputReader.LINK_INTRADAY + str(date) + InputReader.COUNTRY_INTRADAY
-            )[0]
-            values = raw_pd_frame.iloc[vector_row_needed, 7].astype("float") / 1000
-            index = raw_pd_frame.iloc[vector_row_needed, 2]
-            series = pd.Series(list(values), index=index)
-            pickle.dump(
-                series,
-                open(
-                    self.safe_path + str(date - datetime.timedelta(days=1)) + ".p", "wb"
-                ),
             )
+            self.save_day(date - datetime.timedelta(days=1), intraday_prices(tables))
             print("Import complet: " + str(date - datetime.timedelta(days=1)))
 
 
+def has_time_zone(times):
+    """
+    :param times: pd.Series of time strings or timestamps
+    :return: True if the first time has a time zone
+    """
+    if times.empty:
+        return False
+    return pd.Timestamp(times.iloc[0]).tzinfo is not None
+
+
+class PriceImporter:
+    """
+    Converts local dumps of day-ahead or intraday prices into one PriceStore on a regular grid, without network
+    access.
+
+    Supported dumps:
+        .csv: a time and a price column (named "time" and "price", or the first two columns). Times without time
+            zone are local times of timezone.
+        .html/.htm: a saved EPEX page as read by InputReader. The file name has to contain the date of the page
+            as in the URL (e.g. "auction-table_2018-10-27.html").
+
+    Parameters:
+    type: [str] "day_ahead" or "intraday", type of the pages of HTML dumps
+    step: [int] length of the intervals of the store in seconds. Finer prices are averaged, coarser prices are
+        repeated.
+    price_factor: [float] factor that converts the prices of CSV files to EUR/kWh. The default converts from
+        EUR/MWh.
+    timezone: [str] local time zone of the store
+    fill_gaps: [bool] if False, gaps in the prices raise a ValueError. If True, the last price before a gap is
+        continued and a warning is issued.
+    resolution: [int] usual length of the intervals of the dumps in seconds. Longer intervals are gaps. If None, the
+        smallest interval of the dumps is used. Has to be given for dumps with different resolutions.
+
+    Attributes:
+    gaps: [pd.DataFrame] start and end of the gaps found by the last call of import_files, in local time
+
+    If any dump has times with time zone, gaps are searched and prices are resampled in UTC and only the result is
+    converted to local time. The hour skipped at the change to daylight saving time is not a gap and the prices of
+    the hour repeated at the change back are averaged. Dumps without time zone are localized with the daylight
+    saving time inferred from the order of the times. If no dump has a time zone, all times are used as they are.
+    """
+
+    def __init__(
+        self,
+        type="day_ahead",
+        step=900,
+        price_factor=1 / 1000,
+        timezone="Europe/Berlin",
+        fill_gaps=False,
+        resolution=None,
+    ):
+        if type not in ("day_ahead", "intraday"):
+            raise ValueError("No valid type: %s" % type)
+        self.type = type
+        self.step = step
+        self.price_factor = price_factor
+        self.timezone = timezone
+        self.fill_gaps = fill_gaps
+        self.resolution = resolution
+        self.gaps = pd.DataFrame(columns=["start", "end"])
+
+    def read(self, path):
+        """
+        :param path: path of a dump
+        :return: pd.Series of prices in EUR/kWh with the start times of the intervals as index. The times are in UTC
+        for CSV files with time zone and local times without time zone otherwise.
+        """
+        extension = os.path.splitext(str(path))[1].lower()
+        if extension == ".csv":
+            frame = pd.read_csv(path)
+            if "time" in frame and "price" in frame:
+                frame = frame[["time", "price"]]
+            times = frame.iloc[:, 0]
+            # Offsets change with daylight saving time, which only parses to a datetime dtype in UTC
+            times = pd.to_datetime(times, utc=has_time_zone(times))
+            return pd.Series(
+                frame.iloc[:, 1].to_numpy(dtype=float) * self.price_factor,
+                index=pd.DatetimeIndex(times),
+            )
+        if extension in (".html", ".htm"):
+            match = re.search(r"\d{4}-\d{2}-\d{2}", os.path.basename(str(path)))
+            if match is None:
+                raise ValueError("The name of %s does not contain a date." % path)
+            date = datetime.date.fromisoformat(match.group())
+            tables = pd.read_html(path)
+            if self.type == "day_ahead":
+                days = day_ahead_prices(tables, date)
+            else:
+                days = {date - datetime.timedelta(days=1): intraday_prices(tables)}
+            return PriceStore.from_days(days).series()
+        raise ValueError("Unknown format of price dump %s." % path)
+
+    def get_resolution(self, series):
+        """:return: the usual length of the intervals of series as np.timedelta64"""
+        if self.resolution is not None:
+            return np.timedelta64(int(self.resolution), "s")
+        differences = np.diff(series.index.to_numpy())
+        if not len(differences):
+            return np.timedelta64(self.step, "s")
+        return differences.min()
+
+    def find_gaps(self, series):
+        """
+        :param series: pd.Series of prices with sorted DatetimeIndex
+        :return: pd.DataFrame of the start and end of the gaps, i.e. of the missing periods between intervals that
+        are longer than the usual interval. The last price before a gap is valid until its usual end.
+        """
+        times = series.index.to_numpy()
+        resolution = self.get_resolution(series)
+        gaps = np.flatnonzero(np.diff(times) > resolution)
+        return pd.DataFrame({"start": times[gaps] + resolution, "end": times[gaps + 1]})
+
+    def import_files(self, paths):
+        """
+        Reads and merges the dumps. Prices of the same time in several dumps are taken from the later one.
+        :param paths: iterable of paths of dumps
+        :return: PriceStore with intervals of length step
+        """
+        parts = [self.read(path) for path in paths]
+        aware = any(part.index.tz is not None for part in parts)
+        if aware:
+            # Gaps and resampling are computed in UTC without time zone
+            parts = [
+                (
+                    part
+                    if part.index.tz is not None
+                    else part.tz_localize(self.timezone, ambiguous="infer")
+                )
+                .tz_convert("UTC")
+                .tz_localize(None)
+                for part in parts
+            ]
+        series = pd.concat(parts)
+        series = series[~series.index.duplicated(keep="last")].sort_index()
+        if series.empty:
+            raise ValueError("No prices found.")
+
+        self.gaps = self.find_gaps(series)
+        if aware:
+            self.gaps = self.gaps.apply(self.to_local)
+        if not self.gaps.empty:
+            message = "%d gaps in the prices, the first from %s to %s." % (
+                len(self.gaps),
+                self.gaps.start.iloc[0],
+                self.gaps.end.iloc[0],
+            )
+            if not self.fill_gaps:
+                raise ValueError(message)
+            warnings.warn(message + " The last price before each gap is continued.")
+
+        # Finer prices are averaged, coarser prices (and gaps) are held until the next price. The last price is
+        # valid for the usual interval length.
+        step = pd.Timedelta(seconds=self.step)
+        resampled = series.resample(step).mean()
+        index = pd.date_range(
+            resampled.index[0],
+            series.index[-1] + self.get_resolution(series),
+            freq=step,
+            inclusive="left",
+        )
+        resampled = resampled.reindex(index).ffill()
+        if aware:
+            # The repeated hour at the end of daylight saving time is averaged
+            resampled.index = self.to_local(resampled.index)
+            resampled = resampled.groupby(level=0).mean()
+        return PriceStore(resampled.index.to_numpy(), resampled.to_numpy())
+
+    def to_local(self, times):
+        """Converts UTC times without time zone (pd.Series or pd.DatetimeIndex) to local times of timezone."""
+        if isinstance(times, pd.Series):
+            return pd.Series(self.to_local(pd.DatetimeIndex(times)), index=times.index)
+        return times.tz_localize("UTC").tz_convert(self.timezone).tz_localize(None)
+
+    def import_to(self, paths, store_path):
+        """Imports the dumps and saves the PriceStore to store_path (see PriceStore.FORMATS)."""
+        price_store = self.import_files(paths)
+        price_store.save(store_path)
+        return price_store
+
+
+class PriceStore:
+    """
+    Electricity prices of a whole period in one columnar file instead of one pickle per day.
+
+    Supported formats, chosen by the file extension:
+        .npy: structured array with the fields "time" (datetime64[s]) and "price". Loaded memory-mapped.
+        .npz: arrays "time" and "price"
+        .parquet: columns "time" and "price" (needs pyarrow or fastparquet)
+        .csv: columns "time" and "price"
+    Prices are in EUR/kWh, times are the local start times of the price intervals. The end of an interval is the start of
+    the next one, the last interval has the length of the one before.
+    """
+
+    FORMATS = (".npy", ".npz", ".parquet", ".csv")
+
+    def __init__(self, time, price):
+        """
+        :param time: array-like of the start times of the price intervals in ascending order
+        :param price: array-like of the prices
+        """
+        self.time = np.asarray(time, dtype="datetime64[s]")
+        self.price = np.asarray(price, dtype=float)
+        if self.time.shape != self.price.shape:
+            raise ValueError("time and price must have the same length.")
+        if np.any(self.time[1:] <= self.time[:-1]):
+            raise ValueError("The times of the price store must be ascending.")
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def is_store(cls, path):
+        """Checks if path is a file of a supported format."""
+        return os.path.splitext(str(path))[1].lower() in cls.FORMATS
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: path of a file in one of the FORMATS
+        :return: PriceStore
+        """
+        extension = os.path.splitext(str(path))[1].lower()
+        if extension == ".npy":
+            data = np.load(path, mmap_mode="r")
+            return cls(data["time"], data["price"])
+        if extension == ".npz":
+            with np.load(path) as data:
+                return cls(data["time"], data["price"])
+        if extension == ".parquet":
+            frame = pd.read_parquet(path, columns=["time", "price"])
+        elif extension == ".csv":
+            frame = pd.read_csv(
+                path, usecols=["time", "price"], float_precision="round_trip"
+            )
+        else:
+            raise ValueError(
+                "Unknown format of price store %s. Supported are %s."
+                % (path, ", ".join(cls.FORMATS))
+            )
+        return cls(pd.to_datetime(frame["time"]).to_numpy(), frame["price"])
+
+    def save(self, path):
+        """
+        :param path: path of the file. The format is chosen by the extension, see FORMATS.
+        """
+        extension = os.path.splitext(str(path))[1].lower()
+        if extension == ".npy":
+            data = np.empty(
+                len(self), dtype=[("time", "datetime64[s]"), ("price", float)]
+            )
+            data["time"] = self.time
+            data["price"] = self.price
+            np.save(path, data)
+        elif extension == ".npz":
+            np.savez(path, time=self.time, price=self.price)
+        elif extension in (".parquet", ".csv"):
+            frame = pd.DataFrame({"time": self.time, "price": self.price})
+            if extension == ".parquet":
+                frame.to_parquet(path, index=False)
+            else:
+                frame.to_csv(path, index=False)
+        else:
+            raise ValueError(
+                "Unknown format of price store %s. Supported are %s."
+                % (path, ", ".join(cls.FORMATS))
+            )
+
+    @classmethod
+    def from_pickles(cls, price_data_path, start_date, end_date):
+        """
+        Converts the pickled price series of each day (as written by InputReader) into one PriceStore.
+        :param price_data_path: directory of the pickles, ending with a separator
+        :param start_date: datetime.date of the first day
+        :param end_date: datetime.date of the last day
+        :return: PriceStore
+        """
+        days = [
+            start_date + datetime.timedelta(days=day)
+            for day in range((end_date - start_date).days + 1)
+        ]
+        return cls.from_days({day: load_day(price_data_path, day) for day in days})
+
+    @classmethod
+    def from_days(cls, prices):
+        """
+        :param prices: dict of datetime.date and the prices of the day (e.g. pd.Series) in equal intervals
+        :return: PriceStore
+        """
+        times, values = [], []
+        for day in sorted(prices):
+            price = np.asarray(prices[day], dtype=float)
+            step = np.timedelta64(86400 // len(price), "s")
+            times.append(np.datetime64(day, "s") + step * np.arange(len(price)))
+            values.append(price)
+        return cls(np.concatenate(times), np.concatenate(values))
+
+    def series(self):
+        """:return: the prices as pd.Series with the start times as index"""
+        return pd.Series(self.price, index=pd.DatetimeIndex(self.time), name="price")
+
+    def intervals(self, start, end):
+        """
+        :param start: datetime64 or datetime of the beginning of the period
+        :param end: datetime64 or datetime of the end of the period
+        :return: start, end (as datetime64[s]) and price arrays of the intervals that begin in [start, end)
+        """
+        start = np.datetime64(start, "s")
+        end = np.datetime64(end, "s")
+        if len(self) > 1:
+            last_step = self.time[-1] - self.time[-2]
+        else:
+            last_step = np.timedelta64(900, "s")
+        ends = np.append(self.time[1:], self.time[-1:] + last_step)
+        if not len(self) or start < self.time[0] or ends[-1] < end:
+            raise ValueError(
+                "The price store does not cover the period from %s to %s."
+                % (start, end)
+            )
+        first, last = np.searchsorted(self.time, [start, end])
+        return (
+            self.time[first:last],
+            ends[first:last],
+            np.asarray(self.price[first:last]),
+        )
+
+
+def load_day(price_data_path, day):
+    """
+    :return: the prices of a day from a pickle written by InputReader as array
+    """
+    with open(price_data_path + str(day) + ".p", "rb") as f:
+        return np.asarray(pickle.load(f), dtype=float)
+
+
 class PowerFrame:
     """Constructs a pdFrame, which is used by the smart charging skript."""
 
@@ -185,20 +556,34 @@ class PowerFrame:
 
     def pdframe(self):
         """
-        :return: power-pdframe with the power prices
+        :return: power-pdframe with the power prices of all days until max_sim_time. price_data_path is either a
+        PriceStore file or a directory with one pickle per day.
         """
-        power = pd.DataFrame(columns=["start_time", "end_time", "price"])
-        current_day = self.start_date
-        time_in_sec = 0  # sim time in sec
-        while time_in_sec <= self.max_sim_time:
-            power_price = pickle.load(
-                open(self.price_data_path + str(current_day) + ".p", "rb")
+        n_days = int(self.max_sim_time // 86400) + 1
+        if PriceStore.is_store(self.price_data_path):
+            origin = np.datetime64(self.start_date, "s")
+            starts, ends, price = PriceStore.load(self.price_data_path).intervals(
+                origin, origin + np.timedelta64(n_days * 86400, "s")
             )
-            time_delta = 86400 / power_price.size
-            for price in power_price:
-                row = [time_in_sec, time_in_sec + time_delta, price]
-                power.loc[time_in_sec] = row
-                time_in_sec += time_delta
-            current_day += datetime.timedelta(days=1)
-
-        return power
+            start_time = (starts - origin).astype(float)
+            end_time = (ends - origin).astype(float)
+        else:
+            start_time, end_time, price = [], [], []
+            for day in range(n_days):
+                day_price = load_day(
+                    self.price_data_path,
+                    self.start_date + datetime.timedelta(days=day),
+                )
+                time_delta = 86400 / day_price.size
+                day_start = day * 86400 + time_delta * np.arange(day_price.size)
+                start_time.append(day_start)
+                end_time.append(day_start + time_delta)
+                price.append(day_price)
+            start_time = np.concatenate(start_time)
+            end_time = np.concatenate(end_time)
+            price = np.concatenate(price)
+
+        return pd.DataFrame(
+            {"start_time": start_time, "end_time": end_time, "price": price},
+            index=start_time,
+        )
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Per-vehicle indexes of process intervals and battery levels for queries
+after the simulation.
+
+The indexes are built once from the process logs and battery logs of the
+vehicles and answer point and window queries such as "which processes were
+active at time t" or "all intervals of process P between t0 and t1" by binary
+search on sorted NumPy arrays instead of walking the logs again.
+
+"""
+import numpy as np
+
+from eflips.depot.step_series import StepSeries
+
+
+def _time_array(times):
+    """Return *times* as array of int64, or float64 if there are floats."""
+    times = np.asarray(times)
+    if times.dtype.kind not in "iuf":
+        times = times.astype(np.int64)
+    return times
+
+
+class IntervalIndex:
+    """Sorted intervals [start, end) with a label each. Intervals with
+    start == end are treated as points.
+
+    Parameters:
+    starts, ends: [iterable] of int interval bounds
+    labels: [list] of labels (e.g. process objects or IDs) of the intervals
+
+    Attributes:
+    starts, ends: [np.ndarray] sorted by start (stable). int64 unless
+        times are floats.
+    labels: [list] of labels in the same order
+    """
+
+    def __init__(self, starts, ends, labels):
+        starts = _time_array(starts)
+        ends = _time_array(ends)
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.labels = [labels[i] for i in order]
+        # Running maximum of ends. All intervals before the first position
+        # where it reaches t have ended before t.
+        self._max_ends = np.maximum.accumulate(self.ends) if len(order) else self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        return "{IntervalIndex} %d intervals" % len(self)
+
+    def _candidates(self, start, end):
+        """Return the positions of intervals that overlap [start, end)."""
+        lo = np.searchsorted(self._max_ends, start, side="left")
+        hi = np.searchsorted(self.starts, end, side="left")
+        positions = np.arange(lo, max(lo, hi))
+        ends = self.ends[positions]
+        points = ends == self.starts[positions]
+        return positions[(ends > start) | points & (ends >= start)]
+
+    def at(self, t):
+        """Return the labels of intervals with start <= t < end."""
+        positions = self._candidates(t, t + 1)
+        return [self.labels[i] for i in positions]
+
+    def overlapping(self, start=None, end=None):
+        """Return (starts, ends, labels) of the intervals that overlap
+        [start, end). Bounds are not clipped.
+        """
+        if start is None and end is None:
+            return self.starts, self.ends, list(self.labels)
+        start = np.iinfo(np.int64).min if start is None else start
+        end = np.iinfo(np.int64).max if end is None else end
+        positions = self._candidates(start, end)
+        return (
+            self.starts[positions],
+            self.ends[positions],
+            [self.labels[i] for i in positions],
+        )
+
+
+class SocIndex:
+    """Battery energy of one vehicle from its BatteryLog objects.
+
+    Between two logs, the energy is interpolated linearly from the last log
+    at the earlier time to the first log at the later time. Before the first
+    and after the last log, the energy is constant.
+
+    Parameters:
+    battery_logs: [list] of BatteryLog objects in ascending order of time
+    exclude: [iterable] of event names of logs to ignore
+
+    Attributes:
+    times, energy, energy_real, soc: [np.ndarray] values of the logs. times
+        are int64 unless they are floats.
+    event_names: [list] of str
+    """
+
+    def __init__(self, battery_logs, exclude=()):
+        logs = [log for log in battery_logs if log.event_name not in exclude]
+        self.times = _time_array([log.t for log in logs])
+        self.energy = np.fromiter(
+            (log.energy for log in logs), dtype=float, count=len(logs)
+        )
+        self.energy_real = np.fromiter(
+            (log.energy_real for log in logs), dtype=float, count=len(logs)
+        )
+        self.soc = self.energy / self.energy_real
+        self.event_names = [log.event_name for log in logs]
+
+    def __len__(self):
+        return len(self.times)
+
+    def position(self, t):
+        """Return the position(s) of the last log at or before *t*, or -1."""
+        return np.searchsorted(self.times, t, side="right") - 1
+
+    def _interpolate(self, values, t):
+        if not len(self.times):
+            raise ValueError("No battery logs to interpolate.")
+        t = np.asarray(t)
+        i = np.clip(self.position(t), 0, len(self.times) - 1)
+        j = np.minimum(i + 1, len(self.times) - 1)
+        t0 = self.times[i]
+        t1 = self.times[j]
+        span = np.where(t1 > t0, t1 - t0, 1)
+        weight = np.clip((t - t0) / span, 0, 1)
+        result = values[i] + (values[j] - values[i]) * weight
+        return np.where(t < self.times[0], values[0], result)
+
+    def energy_at(self, t):
+        """Return the interpolated battery energy at time(s) *t*."""
+        return self._interpolate(self.energy, t)
+
+    def soc_at(self, t):
+        """Return the interpolated state of charge at time(s) *t*."""
+        return self._interpolate(self.soc, t)
+
+    def to_dense(self, end, start=0, values="energy"):
+        """Return an array with the interpolated *values* ('energy' or 'soc')
+        for each second in [start, end).
+        """
+        return self._interpolate(getattr(self, values), np.arange(start, end))
+
+
+class VehicleIndex:
+    """Process intervals and battery levels of all vehicles of a simulation.
+
+    Parameters:
+    vehicles: [iterable] of SimpleVehicle
+    end: [int] end of processes that were not finished at the end of the
+        simulation
+
+    Attributes:
+    processes: [dict] {vehicle ID: IntervalIndex} with process objects as
+        labels
+    by_process: [dict] {process ID: IntervalIndex} with vehicle IDs as labels
+    """
+
+    def __init__(self, vehicles, end):
+        self.end = end
+        self.vehicles = {vehicle.ID: vehicle for vehicle in vehicles}
+        self.processes = {}
+        rows = {}
+        for vehicle in self.vehicles.values():
+            starts, ends, labels = [], [], []
+            for process in dict.fromkeys(vehicle.dwd.process_log.processes):
+                for startno, start in enumerate(process.starts):
+                    stop = process.ends[startno] if startno < len(process.ends) else end
+                    starts.append(start)
+                    ends.append(stop)
+                    labels.append(process)
+                    rows.setdefault(process.ID, ([], [], []))
+                    rows[process.ID][0].append(start)
+                    rows[process.ID][1].append(stop)
+                    rows[process.ID][2].append(vehicle.ID)
+            self.processes[vehicle.ID] = IntervalIndex(starts, ends, labels)
+        self.by_process = {ID: IntervalIndex(*data) for ID, data in rows.items()}
+        self._soc = {}
+        self._power = {}
+
+    def active_processes(self, vehicle_ID, t):
+        """Return the processes of vehicle *vehicle_ID* active at time *t*."""
+        return self.processes[vehicle_ID].at(t)
+
+    def process_intervals(self, vehicle_ID, process_IDs=None, start=None, end=None):
+        """Return a list of (process ID, start, end) of vehicle *vehicle_ID*
+        in ascending order of start. Optionally restricted to processes with
+        an ID in *process_IDs* and intervals that overlap [start, end).
+        """
+        starts, ends, processes = self.processes[vehicle_ID].overlapping(start, end)
+        return [
+            (process.ID, t0, t1)
+            for process, t0, t1 in zip(processes, starts.tolist(), ends.tolist())
+            if process_IDs is None or process.ID in process_IDs
+        ]
+
+    def intervals_of(self, process_ID, start=None, end=None):
+        """Return (starts, ends, vehicle IDs) of all intervals of process
+        *process_ID* that overlap [start, end).
+        """
+        index = self.by_process.get(process_ID)
+        if index is None:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, []
+        return index.overlapping(start, end)
+
+    def soc(self, vehicle_ID):
+        """Return the SocIndex of vehicle *vehicle_ID*."""
+        soc = self._soc.get(vehicle_ID)
+        if soc is None:
+            soc = self._soc[vehicle_ID] = SocIndex(
+                self.vehicles[vehicle_ID].battery_logs
+            )
+        return soc
+
+    def soc_at(self, vehicle_ID, t):
+        """Return the state of charge of vehicle *vehicle_ID* at time(s)
+        *t*.
+        """
+        return self.soc(vehicle_ID).soc_at(t)
+
+    def power(self, vehicle_ID):
+        """Return the power of vehicle *vehicle_ID* at charging interfaces as
+        StepSeries.
+        """
+        power = self._power.get(vehicle_ID)
+        if power is None:
+            power = self._power[vehicle_ID] = StepSeries.from_dict(
+                self.vehicles[vehicle_ID].power_logs, self.end
+            )
+        return power
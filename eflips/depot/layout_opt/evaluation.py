@@ -5,7 +5,7 @@ from mpl_toolkits.mplot3d import Axes3D
 import pickle
 from datetime import datetime
 from eflips.depot.layout_opt.settings import OPT_CONSTANTS as OC
-from eflips.depot.evaluation import baseplot, savefig
+from eflips.depot.plotting import baseplot, savefig
 from eflips.settings import globalConstants
 from eflips.helperFunctions import cm2in
 
@@ -2,6 +2,7 @@
 optimization scenario with objectives c and urfd.
 """
 import eflips
+from eflips.helperFunctions import load_json
 from eflips.depot.layout_opt import opt_tools
 from eflips.depot.layout_opt.settings import OPT_CONSTANTS as OC
 
@@ -20,6 +21,8 @@ SIM_TIME = GC["general"]["SIMULATION_TIME"]
 # Load data from excel to init a Timetable once for all simulation runs
 filename_timetable = OC["scenario"]["filename_timetable"]
 timetabledata = eflips.depot.standalone.timetabledata_from_excel(filename_timetable)
+# Trip data reused by all simulations of this process
+trip_args = eflips.depot.standalone.timetabledata_to_trip_args(timetabledata)
 
 
 def estimate_max_total_delay(ttd):
@@ -28,10 +31,7 @@ def estimate_max_total_delay(ttd):
 
     ttd: [eflips.depot.standalone.ExcelSheetData]
     """
-    n_vehicles = 0
-    for depot_ID in GC["depot"]["vehicle_count"]:
-        for vt_ID in GC["depot"]["vehicle_count"][depot_ID]:
-            n_vehicles += GC["depot"]["vehicle_count"][depot_ID][vt_ID]
+    n_vehicles = vehicle_count()
 
     index_std = ttd.map_headers()["std [s]"]
     count_skipped = 0
@@ -88,6 +88,39 @@ OC["scenario"]["max_capacity_estimate"] = opt_tools.init.CAPACITY_MAX
 OC["scenario"]["max_delay_estimate"] = estimate_max_total_delay(timetabledata)
 OC["scenario"]["max_congestion_estimate"] = estimate_max_total_congestion(timetabledata)
 
+# Identify fitness values of this scenario in a persistent FitnessMemory.
+# File paths are excluded so that only the content matters.
+SCENARIO_HASH = opt_tools.fitness_util.scenario_hash(
+    {
+        key: value
+        for key, value in OC["scenario"].items()
+        if not key.startswith("filename_")
+    },
+    load_json(filename_eflips_settings),
+    timetabledata.data,
+)
+
+
+def vehicle_count():
+    """Return the total number of vehicles in the scenario."""
+    return sum(
+        count
+        for counts in GC["depot"]["vehicle_count"].values()
+        for count in counts.values()
+    )
+
+
+def skip_simulation(ind):
+    """Return True if *ind* is not simulated and gets standard values for
+    urfd, delay and congestion instead. This is the case if the minimum
+    capacity is violated (unless simulate_below_capacity_min) or if *ind* was
+    screened out (see opt_tools.screening).
+    """
+    return (
+        not OC["scenario"]["simulate_below_capacity_min"]
+        and ind.capacity < OC["scenario"]["CAPACITY_MIN"]
+    ) or ind.results.get("screened", False)
+
 
 def evaluate(ind):
     """Return the fitness tuple capacity, urfd for an individual.
@@ -100,19 +133,25 @@ def evaluate(ind):
     evaluate_delay(ind)
     evaluate_congestion(ind)
 
-    if (
-        not OC["scenario"]["simulate_below_capacity_min"]
-        and ind.capacity < OC["scenario"]["CAPACITY_MIN"]
-    ):
-        # If the minimum capacity is violated, then skip simulation and assign
-        # standard values to delay and congestion (see designated evaluate-
-        # functions), to speed up evaluation. CAPACITY_MIN needs to be adapted
-        # to scenarios with new depot limits!
+    if skip_simulation(ind):
+        # If the minimum capacity is violated or ind was screened out, then
+        # skip simulation and assign standard values to delay and congestion
+        # (see designated evaluate-functions), to speed up evaluation.
+        # CAPACITY_MIN needs to be adapted to scenarios with new depot limits!
         ind.results["simtime"] = 0
 
     return c, urfd, ind.results
 
 
+def evaluate_ID(ID):
+    """Same as evaluate for the individual with *ID* (DepotPrototype.ID).
+    Allows sending only IDs to pool workers instead of pickled individuals.
+    """
+    ind = opt_tools.DepotPrototype()
+    ind.areas = opt_tools.init.areas_from_ID(ID)
+    return evaluate(ind)
+
+
 def evaluate_single(ind):
     """Return the capacity fitness as tuple (for single objective)."""
     c = evaluate_capacity(ind)
@@ -132,10 +171,7 @@ def evaluate_capacity(ind):
 
 def evaluate_urfd(ind):
     """Objective function value for number of unblocked rfd vehicles."""
-    if (
-        not OC["scenario"]["simulate_below_capacity_min"]
-        and ind.capacity < OC["scenario"]["CAPACITY_MIN"]
-    ):
+    if skip_simulation(ind):
         urfd = 0
     else:
         evaluate_simulation(ind)
@@ -145,10 +181,7 @@ def evaluate_urfd(ind):
 
 def evaluate_delay(ind):
     """Evaluate the delay (result in hours!)."""
-    if (
-        not OC["scenario"]["simulate_below_capacity_min"]
-        and ind.capacity < OC["scenario"]["CAPACITY_MIN"]
-    ):
+    if skip_simulation(ind):
         ind.results["delay"] = OC["scenario"]["max_delay_estimate"] / 3600
     else:
         evaluate_simulation(ind)
@@ -157,10 +190,7 @@ def evaluate_delay(ind):
 
 def evaluate_congestion(ind):
     """Evaluate the congestion (result in hours!)."""
-    if (
-        not OC["scenario"]["simulate_below_capacity_min"]
-        and ind.capacity < OC["scenario"]["CAPACITY_MIN"]
-    ):
+    if skip_simulation(ind):
         ind.results["congestion"] = OC["scenario"]["max_congestion_estimate"] / 3600
     else:
         evaluate_simulation(ind)
@@ -210,7 +240,7 @@ def evaluate_simulation(ind):
     Delay and congestion values are converted to hours.
     """
     if not ind.results["simulated"]:
-        simulation_host = opt_tools.simulate(ind, timetabledata)
+        simulation_host = opt_tools.simulate(ind, timetabledata, trip_args=trip_args)
         ev = simulation_host.depots[0].evaluation
 
         # Total delay sum
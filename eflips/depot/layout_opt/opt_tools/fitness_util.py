@@ -2,12 +2,27 @@
 individuals.
 """
 from operator import attrgetter
+from collections.abc import MutableMapping
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
 from eflips.depot.layout_opt import opt_tools
 
 
 def memorize(ind, memory):
-    """Register and individual in memory. Must be unknown."""
-    assert ind.ID not in memory, ind.ID
+    """Register and individual in memory. Must be unknown, unless *memory* is
+    a FitnessMemory shared with other processes that may have added it in the
+    meantime. Then the existing entry is kept and the hits counted by lookup
+    are written to the database.
+    """
+    if isinstance(memory, FitnessMemory):
+        memory.flush_counts()
+        if ind.ID in memory:
+            return
+    else:
+        assert ind.ID not in memory, ind.ID
     memory[ind.ID] = {"results": ind.results, "fitness": ind.fitness.values, "count": 1}
 
 
@@ -15,15 +30,228 @@ def lookup(ind, memory):
     """Assign results from memory to an individual if it's known already.
     An unkown individual is left unchanged.
     """
-    if ind.ID in memory:
-        ind.results = memory[ind.ID]["results"]
-        ind.fitness.values = memory[ind.ID]["fitness"]
-        memory[ind.ID]["count"] += 1
+    entry = memory.get(ind.ID)
+    if entry is not None:
+        ind.results = entry["results"]
+        ind.fitness.values = entry["fitness"]
+        if isinstance(memory, FitnessMemory):
+            memory.count_hit(ind.ID)
+        else:
+            entry["count"] += 1
+
+
+def scenario_hash(*data):
+    """Return a hex digest of *data* for telling apart fitness values from
+    different timetables and settings. *data* must be json serializable.
+    """
+    dump = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(dump.encode()).hexdigest()
+
+
+class FitnessMemory(MutableMapping):
+    """Persistent replacement for the memory dict of the optimization loop,
+    stored in an SQLite database. Maps DepotPrototype.ID to dicts with the
+    keys "results", "fitness" and "count" like the dict used with memorize and
+    lookup. Entries are separated by *scenario*, e.g. the result of
+    scenario_hash for the timetable and settings, so that a database can be
+    shared by multiple optimization scripts.
 
+    Each process opens its own connection, so the object can be passed to
+    pool workers. Concurrent writes are serialized by SQLite.
 
-def simulate(ind, timetabledata, print_timestamps=False):
+    Hits counted by lookup are kept in memory and written to the database by
+    flush_counts, which is called by memorize, save_checkpoint and close.
+    Until then, __getitem__ includes them in "count".
+
+    Additionally, checkpoints of the optimization loop can be saved to resume
+    a run from its last generation.
+
+    Attributes:
+    hits, misses: [int] number of successful and unsuccessful lookups via
+        __getitem__ or get since the last call of pop_stats.
+    """
+
+    def __init__(self, filename, scenario="", timeout=60):
+        self.filename = filename
+        self.scenario = scenario
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._pending_counts = {}
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        """SQLite connection of the current process."""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                self.filename, timeout=self.timeout, isolation_level=None
+            )
+            self._pid = os.getpid()
+            if self.filename != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fitness (scenario TEXT, ID TEXT, "
+                "fitness BLOB, results BLOB, count INTEGER, "
+                "PRIMARY KEY (scenario, ID))"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints (scenario TEXT, run TEXT, "
+                "gen INTEGER, state BLOB, PRIMARY KEY (scenario, run))"
+            )
+        return self._connection
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        # Pending hits are written by the process that counted them
+        state["_pending_counts"] = {}
+        return state
+
+    def __getitem__(self, ID):
+        row = self.connection.execute(
+            "SELECT fitness, results, count FROM fitness "
+            "WHERE scenario = ? AND ID = ?",
+            (self.scenario, ID),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            raise KeyError(ID)
+        self.hits += 1
+        return {
+            "fitness": pickle.loads(row[0]),
+            "results": pickle.loads(row[1]),
+            "count": row[2] + self._pending_counts.get(ID, 0),
+        }
+
+    def __setitem__(self, ID, value):
+        self._pending_counts.pop(ID, None)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?, ?)",
+            (
+                self.scenario,
+                ID,
+                pickle.dumps(tuple(value["fitness"])),
+                pickle.dumps(value["results"]),
+                value["count"],
+            ),
+        )
+
+    def __delitem__(self, ID):
+        self._pending_counts.pop(ID, None)
+        cursor = self.connection.execute(
+            "DELETE FROM fitness WHERE scenario = ? AND ID = ?", (self.scenario, ID)
+        )
+        if not cursor.rowcount:
+            raise KeyError(ID)
+
+    def __contains__(self, ID):
+        row = self.connection.execute(
+            "SELECT 1 FROM fitness WHERE scenario = ? AND ID = ?",
+            (self.scenario, ID),
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        rows = self.connection.execute(
+            "SELECT ID FROM fitness WHERE scenario = ?", (self.scenario,)
+        ).fetchall()
+        return (row[0] for row in rows)
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM fitness WHERE scenario = ?", (self.scenario,)
+        ).fetchone()[0]
+
+    def pop_stats(self):
+        """Return (hits, misses) and reset both."""
+        stats = self.hits, self.misses
+        self.hits = 0
+        self.misses = 0
+        return stats
+
+    def count_hit(self, ID):
+        """Count a successful lookup of *ID* without writing to the database."""
+        self._pending_counts[ID] = self._pending_counts.get(ID, 0) + 1
+
+    def flush_counts(self):
+        """Add the hits counted by count_hit to the database in one
+        transaction.
+        """
+        if not self._pending_counts:
+            return
+        connection = self.connection
+        connection.execute("BEGIN")
+        try:
+            connection.executemany(
+                "UPDATE fitness SET count = count + ? WHERE scenario = ? AND ID = ?",
+                (
+                    (count, self.scenario, ID)
+                    for ID, count in self._pending_counts.items()
+                ),
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        self._pending_counts = {}
+
+    def save_checkpoint(self, run, gen, state):
+        """Save the state of the optimization loop *run* [str] after
+        generation *gen* [int]. Replaces the previous checkpoint of *run*.
+
+        state: [dict] picklable objects such as the population and logbook
+        """
+        self.flush_counts()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+            (self.scenario, run, gen, pickle.dumps(state)),
+        )
+
+    def load_checkpoint(self, run):
+        """Return (gen, state) of the last checkpoint of *run* or (None, None)
+        if there is none.
+        """
+        row = self.connection.execute(
+            "SELECT gen, state FROM checkpoints WHERE scenario = ? AND run = ?",
+            (self.scenario, run),
+        ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], pickle.loads(row[1])
+
+    def close(self):
+        self.flush_counts()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def init_worker(filename_opt_settings=None):
+    """Initializer for pool workers of the optimization. Loads the opt
+    settings unless inherited from the parent process and imports
+    fitness_c_urfd, which loads the eflips settings and timetable and
+    prepares the trip data once per worker instead of once per evaluation.
+    """
+    from eflips.depot.layout_opt import settings
+
+    if (
+        filename_opt_settings is not None
+        and settings.OPT_CONSTANTS.get("FILENAME") != filename_opt_settings
+    ):
+        settings.load_settings(filename_opt_settings)
+    import eflips.depot.layout_opt.opt_tools.fitness_c_urfd
+
+
+def simulate(ind, timetabledata, print_timestamps=False, trip_args=None):
     """Set up a simulation based on *ind* and run.
     Return the SimulationHost if simulated, else None.
+
+    trip_args: [tuple or None] result of
+        eflips.depot.standalone.timetabledata_to_trip_args(timetabledata) to
+        skip converting the timetable for each simulation.
     """
     import eflips
 
@@ -33,7 +261,7 @@ def simulate(ind, timetabledata, print_timestamps=False):
         print_timestamps=print_timestamps,
         tictocname="",
     )
-    simulation_host.init_timetable(timetabledata)
+    simulation_host.init_timetable(timetabledata, trip_args)
     prototype_to_template(ind, simulation_host)
     simulation_host.complete()
     simulation_host.run()
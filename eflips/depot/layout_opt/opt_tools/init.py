@@ -5,6 +5,13 @@ from collections import Counter
 import random
 from copy import deepcopy
 from abc import ABC
+from functools import lru_cache
+import inspect
+import json
+import os
+import re
+import tempfile
+import warnings
 from deap import creator
 from eflips.depot.layout_opt import packing
 from eflips.depot.layout_opt.settings import OPT_CONSTANTS as OC
@@ -19,7 +26,7 @@ def get_capacity_max(visu_class, capacity_min, limit=200):
     Return the capacity [int] or None if not even the minimum fits.
     """
     dims = packing.BinWithDistances(
-        OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"]
+        OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"], validate=False
     )
     for c in range(capacity_min, limit + 1):
         candidate = visu_class(capacity=c)
@@ -41,26 +48,40 @@ def get_count_max(visu_class, capacity):
     """Determine the maximum number of areas of *visu_class* with *capacity*
     within DEPOT_A, DEPOT_B. Return the count [int] or None if not even one
     area fits and the BinWithDistances object populated with the max count.
+
+    Items of the same type and capacity are put one after another in the same
+    order, so if n areas don't fit, n + 1 don't either. This allows to double
+    the count until packing fails and then bisect instead of repacking for
+    each additional area.
     """
     dvisu = packing.BinWithDistances(
-        OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"]
+        OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"], validate=False
     )
-    item = visu_class(capacity=capacity)
-    dvisu.items.append(item)
-    dvisu.pack()
-    while dvisu.feasible:
-        item = visu_class(capacity=capacity)
-        dvisu.items.append(item)
+
+    def fits(count):
+        dvisu.items = [visu_class(capacity=capacity) for _ in range(count)]
         dvisu.repack()
+        return dvisu.feasible
 
-    if len(dvisu.items) == 1:
+    if not fits(1):
         # Not even 1 area fits
         return None, dvisu
-    else:
-        # Remove the last item as it didn't fit
-        dvisu.items.remove(item)
-        # dvisu.repack()    # skipped, dvisu.feasible only seems False until calling repack()
-        return len(dvisu.items), dvisu
+
+    lower = 1
+    upper = 2
+    while fits(upper):
+        lower = upper
+        upper *= 2
+    while upper - lower > 1:
+        middle = (lower + upper) // 2
+        if fits(middle):
+            lower = middle
+        else:
+            upper = middle
+
+    if len(dvisu.items) != lower:
+        fits(lower)
+    return lower, dvisu
 
 
 def get_count_max_with_capacity_max(visu_class, capacity_min):
@@ -69,7 +90,7 @@ def get_count_max_with_capacity_max(visu_class, capacity_min):
     or None if not even one area fits and the BinWithDistances object populated
     with the max count.
     """
-    capacity_max = get_capacity_max(visu_class, capacity_min)
+    capacity_max = cached_capacity_max(visu_class, capacity_min)
     return get_count_max(visu_class, capacity_max)
 
 
@@ -82,6 +103,122 @@ def get_count_max_with_capacity_min(visu_class, capacity_min):
     return get_count_max(visu_class, capacity_min)
 
 
+# Cached precomputations
+
+# Results are memoized in memory and in a json file so that they are computed
+# once for all pool workers and optimization runs with the same depot
+# dimensions. The file can be set with OC["scenario"]["filename_precomp_cache"]
+# (None disables the file).
+PRECOMP_CACHE_DEFAULT = os.path.join(
+    tempfile.gettempdir(), "eflips_layout_opt_precomps.json"
+)
+# Increase if the packing procedure changes to invalidate existing files
+PRECOMP_CACHE_VERSION = 1
+_precomp_cache = {}
+
+
+@lru_cache(maxsize=None)
+def visu_parameters(visu_class):
+    """Return the default geometry parameters of *visu_class* as tuple of
+    (name, value) pairs.
+    """
+    parameters = inspect.signature(visu_class.__init__).parameters
+    return tuple(
+        (name, parameter.default)
+        for name, parameter in parameters.items()
+        if name not in ("self", "capacity", "x", "y", "text")
+    )
+
+
+def precomp_cache_filename():
+    """Return the path of the precomputation cache file or None."""
+    return OC["scenario"].get("filename_precomp_cache", PRECOMP_CACHE_DEFAULT)
+
+
+def load_precomp_cache(filename):
+    """Return the content of the cache file *filename* as dict. Missing or
+    unreadable files result in an empty dict.
+    """
+    try:
+        with open(filename) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_precomp(filename, key, value):
+    """Add *key*: *value* to the cache file *filename*. Entries added by other
+    processes in the meantime are kept. The file is replaced atomically.
+    """
+    content = load_precomp_cache(filename)
+    content[key] = value
+    directory = os.path.dirname(os.path.abspath(filename))
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            json.dump(content, file)
+        os.replace(file.name, filename)
+    except OSError as e:
+        warnings.warn("Could not write precomputation cache: %s" % e)
+
+
+def cached_precomp(function, visu_class, arg):
+    """Return the result of *function*(*visu_class*, *arg*) from the cache or
+    compute and cache it. The result must be json serializable. The cache key
+    consists of DEPOT_A, DEPOT_B, the visu class and its parameters.
+    """
+    key = json.dumps(
+        [
+            PRECOMP_CACHE_VERSION,
+            function.__name__,
+            OC["scenario"]["DEPOT_A"],
+            OC["scenario"]["DEPOT_B"],
+            visu_class.__name__,
+            visu_parameters(visu_class),
+            arg,
+        ]
+    )
+    if key in _precomp_cache:
+        return _precomp_cache[key]
+
+    filename = precomp_cache_filename()
+    if filename is not None:
+        content = load_precomp_cache(filename)
+        if key in content:
+            _precomp_cache[key] = content[key]
+            return content[key]
+
+    value = function(visu_class, arg)
+    _precomp_cache[key] = value
+    if filename is not None:
+        save_precomp(filename, key, value)
+    return value
+
+
+def cached_capacity_max(visu_class, capacity_min):
+    """Cached version of get_capacity_max."""
+    return cached_precomp(get_capacity_max, visu_class, capacity_min)
+
+
+def _count_max(visu_class, capacity):
+    return get_count_max(visu_class, capacity)[0]
+
+
+def cached_count_max(visu_class, capacity):
+    """Cached version of get_count_max returning the count only."""
+    return cached_precomp(_count_max, visu_class, capacity)
+
+
+class CapacityMax:
+    """Descriptor for AreaPrototype.capacity_max that determines the value on
+    first access for the current DEPOT_A, DEPOT_B.
+    """
+
+    def __get__(self, instance, owner):
+        return cached_capacity_max(owner.visu_class, owner.capacity_min)
+
+
 # Initializers
 
 
@@ -89,7 +226,7 @@ class AreaPrototype(ABC):
     """Abstract base class for a simple area representation."""
 
     capacity_min = int()
-    capacity_max = int()
+    capacity_max = CapacityMax()
     typename = str()
     visu_class = None
 
@@ -146,7 +283,6 @@ class DSRPrototype(AreaPrototype):
     """Class for a simple DSR area representation."""
 
     capacity_min = 1
-    capacity_max = get_capacity_max(packing.VisuDataDirectSingleRow, capacity_min)
     typename = "DSR"
     visu_class = packing.VisuDataDirectSingleRow
 
@@ -158,7 +294,6 @@ class DSR_90Prototype(AreaPrototype):
     """Class for a simple DSR_90 area representation."""
 
     capacity_min = 1
-    capacity_max = get_capacity_max(packing.VisuDataDirectSingleRow_90, capacity_min)
     typename = "DSR_90"
     visu_class = packing.VisuDataDirectSingleRow_90
 
@@ -170,7 +305,6 @@ class DDRPrototype(AreaPrototype):
     """Class for a simple DDR area representation."""
 
     capacity_min = 2
-    capacity_max = get_capacity_max(packing.VisuDataDirectDoubleRow, capacity_min)
     typename = "DDR"
     visu_class = packing.VisuDataDirectDoubleRow
 
@@ -182,8 +316,6 @@ class LinePrototype(AreaPrototype):
     """Class for a simple Line area representation."""
 
     capacity_min = 2
-    capacity_max = get_capacity_max(packing.VisuDataLine, capacity_min)
-
     typename = "L"
     visu_class = packing.VisuDataLine
 
@@ -199,96 +331,116 @@ OTHER_AREA_TYPES = {
 }
 
 
-# Do some precomputing
+# Precomputed bounds
 
-# Estimate the total maximum capacity (max with all areas of the same type
-# with maximum capacity)
-count_max_with_capacity_max_dsr, dims_dsr_cap_max = get_count_max_with_capacity_max(
-    packing.VisuDataDirectSingleRow, DSRPrototype.capacity_min
-)
-(
-    count_max_with_capacity_max_dsr_90,
-    dims_dsr_90_cap_max,
-) = get_count_max_with_capacity_max(
-    packing.VisuDataDirectSingleRow_90, DSR_90Prototype.capacity_min
-)
-count_max_with_capacity_max_ddr, dims_ddr_cap_max = get_count_max_with_capacity_max(
-    packing.VisuDataDirectDoubleRow, DDRPrototype.capacity_min
-)
-count_max_with_capacity_max_line, dims_line_cap_max = get_count_max_with_capacity_max(
-    packing.VisuDataLine, LinePrototype.capacity_min
-)
-# count_max_single = max(count_max_dsr, count_max_ddr, count_max_line)
-CAPACITY_MAX = max(
-    dims_dsr_cap_max.count_inner,
-    dims_dsr_90_cap_max.count_inner,
-    dims_ddr_cap_max.count_inner,
-    dims_line_cap_max.count_inner,
+AREA_TYPES = {
+    "dsr": DSRPrototype,
+    "dsr_90": DSR_90Prototype,
+    "ddr": DDRPrototype,
+    "line": LinePrototype,
+}
+COUNT_MIN = 1
+TYPENAMES = tuple(area_type.typename for area_type in AREA_TYPES.values())
+# Matches the parts of DepotPrototype.ID such as "2x10DSR_90"
+ID_PATTERN = re.compile(
+    r"(\d+)x(\d+)(%s)(?=_|$)" % "|".join(sorted(TYPENAMES, key=len, reverse=True))
 )
 
-# Estimate the total maximum number of areas (max of all areas of the same
-# type with minimum capacity)
-count_max_with_capacity_min_dsr, dims_dsr_count_max = get_count_max_with_capacity_min(
-    packing.VisuDataDirectSingleRow, DSRPrototype.capacity_min
-)
-(
-    count_max_with_capacity_min_dsr_90,
-    dims_dsr_90_count_max,
-) = get_count_max_with_capacity_min(
-    packing.VisuDataDirectSingleRow_90, DSR_90Prototype.capacity_min
-)
-count_max_with_capacity_min_ddr, dims_ddr_count_max = get_count_max_with_capacity_min(
-    packing.VisuDataDirectDoubleRow, DDRPrototype.capacity_min
-)
-count_max_with_capacity_min_line, dims_line_count_max = get_count_max_with_capacity_min(
-    packing.VisuDataLine, LinePrototype.capacity_min
-)
-COUNT_MAX = max(
-    count_max_with_capacity_min_dsr,
-    count_max_with_capacity_min_dsr_90,
-    count_max_with_capacity_min_ddr,
-    count_max_with_capacity_min_line,
-)
-COUNT_MIN = 1
+
+def areas_from_ID(ID):
+    """Return a list of area prototypes based on *ID* (DepotPrototype.ID).
+    Inverse of DepotPrototype.generate_ID except for the order of areas.
+    """
+    types = {area_type.typename: area_type for area_type in AREA_TYPES.values()}
+    areas = []
+    for n, capacity, typename in ID_PATTERN.findall(ID):
+        for i in range(int(n)):
+            areas.append(types[typename](int(capacity)))
+    return areas
+
+
+def area_precomps():
+    """Return a dict with bounds for the current DEPOT_A, DEPOT_B, computed on
+    first use:
+    capacity_max_<type>: maximum capacity of an area
+    count_max_with_capacity_max_<type>: maximum number of areas with maximum
+        capacity (the a-dimension)
+    slots_max_<type>: total slots with count_max_with_capacity_max_<type>
+        areas
+    count_max_with_capacity_min_<type>: maximum number of areas with minimum
+        capacity
+    CAPACITY_MAX: estimate of the total maximum capacity (max with all areas
+        of the same type with maximum capacity)
+    COUNT_MAX: estimate of the total maximum number of areas (max of all areas
+        of the same type with minimum capacity)
+    """
+    precomps = {}
+    for name, area_type in AREA_TYPES.items():
+        capacity_max = area_type.capacity_max
+        count = cached_count_max(area_type.visu_class, capacity_max)
+        precomps["capacity_max_" + name] = capacity_max
+        precomps["count_max_with_capacity_max_" + name] = count
+        # Same as the count_inner of the packed bin
+        precomps["slots_max_" + name] = (
+            count * capacity_max if count is not None else capacity_max
+        )
+        precomps["count_max_with_capacity_min_" + name] = cached_count_max(
+            area_type.visu_class, area_type.capacity_min
+        )
+    precomps["CAPACITY_MAX"] = max(precomps["slots_max_" + name] for name in AREA_TYPES)
+    precomps["COUNT_MAX"] = max(
+        precomps["count_max_with_capacity_min_" + name] for name in AREA_TYPES
+    )
+    return precomps
+
+
+PRECOMP_NAMES = {"CAPACITY_MAX", "COUNT_MAX"} | {
+    prefix + name
+    for prefix in (
+        "capacity_max_",
+        "count_max_with_capacity_max_",
+        "slots_max_",
+        "count_max_with_capacity_min_",
+    )
+    for name in AREA_TYPES
+}
+
+
+def __getattr__(name):
+    """Provide the former module-level precomputations such as CAPACITY_MAX,
+    COUNT_MAX and dims_dsr_cap_max lazily.
+    """
+    if name.startswith("dims_"):
+        for suffix, function in (
+            ("_cap_max", get_count_max_with_capacity_max),
+            ("_count_max", get_count_max_with_capacity_min),
+        ):
+            type_name = name[len("dims_") : -len(suffix)]
+            if name.endswith(suffix) and type_name in AREA_TYPES:
+                area_type = AREA_TYPES[type_name]
+                return function(area_type.visu_class, area_type.capacity_min)[1]
+    elif name in PRECOMP_NAMES:
+        return area_precomps()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def print_area_precomps():
+    precomps = area_precomps()
     print(
         "Depot a: %d m, b: %d m"
         % (OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"])
     )
-    print(
-        "capacity_max_dsr: %d, count_max_dsr: %d, total slots: %d"
-        % (
-            dims_dsr_cap_max.items[0].count_inner,
-            count_max_with_capacity_max_dsr,
-            dims_dsr_cap_max.count_inner,
-        )
-    )
-    print(
-        "capacity_max_dsr_90: %d, count_max_dsr_90: %d, total slots: %d"
-        % (
-            dims_dsr_90_cap_max.items[0].count_inner,
-            count_max_with_capacity_max_dsr_90,
-            dims_dsr_90_cap_max.count_inner,
-        )
-    )
-    print(
-        "capacity_max_ddr: %d, count_max_ddr: %d, total slots: %d"
-        % (
-            dims_ddr_cap_max.items[0].count_inner,
-            count_max_with_capacity_max_ddr,
-            dims_ddr_cap_max.count_inner,
-        )
-    )
-    print(
-        "capacity_max_line: %d, count_max_line: %d, total slots: %d"
-        % (
-            dims_line_cap_max.items[0].count_inner,
-            count_max_with_capacity_max_line,
-            dims_line_cap_max.count_inner,
+    for name in AREA_TYPES:
+        print(
+            "capacity_max_%s: %d, count_max_%s: %d, total slots: %d"
+            % (
+                name,
+                precomps["capacity_max_" + name],
+                name,
+                precomps["count_max_with_capacity_max_" + name],
+                precomps["slots_max_" + name],
+            )
         )
-    )
 
 
 def init_random_area():
@@ -316,7 +468,10 @@ class DepotPrototype:
     def visu(self):
         if self._visu is None:
             self._visu = packing.BinWithDistances(
-                OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"], False
+                OC["scenario"]["DEPOT_A"],
+                OC["scenario"]["DEPOT_B"],
+                False,
+                validate=False,
             )
             for area in self.areas:
                 self._visu.items.append(area.visu)
@@ -445,7 +600,7 @@ def init_random_depot(dcls):
     within bounds.
     """
     depot = dcls()
-    area_count = random.randint(COUNT_MIN, COUNT_MAX)
+    area_count = random.randint(COUNT_MIN, area_precomps()["COUNT_MAX"])
     for i in range(area_count):
         depot.areas.append(init_random_area())
     return depot
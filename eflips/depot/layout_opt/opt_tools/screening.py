@@ -0,0 +1,123 @@
+"""Screening of individuals before simulation. Individuals that cannot enter
+the Pareto front even with optimistic estimates of their fitness are not
+simulated. Assumes maximization of both objectives capacity and urfd.
+"""
+import numpy as np
+from eflips.depot.layout_opt.opt_tools.init import TYPENAMES, ID_PATTERN
+
+
+def features_from_ID(ID):
+    """Return the features of a depot for UrfdSurrogate based on its *ID*
+    (DepotPrototype.ID): a constant and the number of areas and total
+    capacity per area type.
+    """
+    features = np.zeros(1 + 2 * len(TYPENAMES))
+    features[0] = 1
+    for n, capacity, typename in ID_PATTERN.findall(ID):
+        i = 1 + 2 * TYPENAMES.index(typename)
+        features[i] += int(n)
+        features[i + 1] += int(n) * int(capacity)
+    return features
+
+
+class UrfdSurrogate:
+    """Linear regression of urfd (results["rfd_unblocked"]) on the area
+    composition, trained on simulated individuals in a fitness memory. Used to
+    tighten the upper bound of urfd during screening.
+
+    The upper bound is the prediction plus the largest absolute training
+    residual. Unlike the analytic bounds it is not guaranteed, so a screening
+    with surrogate may rarely discard an individual of the Pareto front.
+
+    min_samples: [int] minimum number of simulated individuals for fitting.
+        Fewer leave the surrogate unfitted.
+    """
+
+    def __init__(self, min_samples=30):
+        self.min_samples = min_samples
+        self.coef = None
+        self.margin = None
+
+    @property
+    def fitted(self):
+        return self.coef is not None
+
+    def fit(self, memory):
+        """Fit to the simulated individuals in *memory* (dict or
+        FitnessMemory). Return self.
+        """
+        X = []
+        y = []
+        for ID, entry in memory.items():
+            results = entry["results"]
+            if results.get("simulated") and "rfd_unblocked" in results:
+                X.append(features_from_ID(ID))
+                y.append(results["rfd_unblocked"])
+        if len(y) < self.min_samples:
+            self.coef = None
+            self.margin = None
+            return self
+
+        X = np.array(X)
+        y = np.array(y)
+        self.coef = np.linalg.lstsq(X, y, rcond=None)[0]
+        self.margin = np.abs(X @ self.coef - y).max()
+        return self
+
+    def upper_bound(self, ind):
+        """Return an estimated upper bound of urfd for *ind* or None if not
+        fitted.
+        """
+        if not self.fitted:
+            return None
+        return features_from_ID(ind.ID) @ self.coef + self.margin
+
+
+def dominated(values, front):
+    """Return True if any individual in *front* dominates fitness *values*."""
+    for other in front:
+        if all(a >= b for a, b in zip(other.fitness.values, values)) and any(
+            a > b for a, b in zip(other.fitness.values, values)
+        ):
+            return True
+    return False
+
+
+def optimistic_fitness(ind, evaluate_capacity, urfd_max, surrogate=None):
+    """Return an upper bound of the fitness (capacity, urfd) of *ind* without
+    simulation.
+
+    evaluate_capacity: [function] returning the capacity fitness of *ind*
+        (packing only)
+    urfd_max: [int] upper bound of urfd for any individual, e.g. the number of
+        vehicles
+    surrogate: [UrfdSurrogate or None]
+    """
+    c = evaluate_capacity(ind)
+    # Unblocked vehicles can only be at parking areas
+    urfd = min(ind.capacity, urfd_max)
+    if surrogate is not None and surrogate.fitted:
+        urfd = min(urfd, max(surrogate.upper_bound(ind), 0))
+    return c, urfd
+
+
+def screen(inds, front, evaluate_capacity, urfd_max, surrogate=None):
+    """Split *inds* into individuals that are worth simulating and individuals
+    that are dominated by *front* even with optimistic fitness. The latter
+    are marked with results["screened"] = True.
+    Return both lists.
+
+    front: [deap.tools.ParetoFront] or iterable of evaluated individuals
+    For the other parameters see optimistic_fitness.
+    """
+    front = list(front)
+    promising = []
+    screened = []
+    for ind in inds:
+        values = optimistic_fitness(ind, evaluate_capacity, urfd_max, surrogate)
+        if dominated(values, front):
+            ind.results["screened"] = True
+            screened.append(ind)
+        else:
+            promising.append(ind)
+    return promising, screened
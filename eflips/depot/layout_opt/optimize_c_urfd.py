@@ -19,8 +19,13 @@ eflips.depot.layout_opt.settings.load_settings(filename_opt_settings)
 from eflips.depot.layout_opt.settings import OPT_CONSTANTS as OC
 
 from eflips.depot.layout_opt import opt_tools, util, evaluation
-from eflips.depot.layout_opt.opt_tools.fitness_util import memorize, lookup
+from eflips.depot.layout_opt.opt_tools.fitness_util import (
+    memorize,
+    lookup,
+    FitnessMemory,
+)
 import eflips.depot.layout_opt.opt_tools.fitness_c_urfd
+from eflips.depot.layout_opt.opt_tools.screening import screen, UrfdSurrogate
 from eflips.helperFunctions import Tictoc
 
 
@@ -41,6 +46,23 @@ MUTSIGMA_AREA_CAPACITY = OC["algorithm"]["MUTSIGMA_AREA_CAPACITY"]
 # Set max. generations
 NGEN = 1000
 
+# Fitness values are memorized in a database shared by all runs. Set RESUME
+# to True to continue an interrupted run from its last generation if there is
+# a checkpoint with the same RUN_ID and scenario. Finished runs are not
+# resumed. Otherwise, a new run is started and replaces the checkpoint.
+FILENAME_MEMORY = OC["scenario"].get(
+    "filename_fitness_memory", filename_opt_settings + "_memory.sqlite"
+)
+RUN_ID = filename_opt_settings
+RESUME = False
+
+# Individuals that are dominated by the Pareto front even with optimistic
+# fitness estimates are not simulated if SCREENING is True. SURROGATE
+# additionally estimates urfd with a regression on the memorized results,
+# which is faster but not exact.
+SCREENING = True
+SURROGATE = False
+
 # Set up optimization tools
 
 creator.create("FitnessMulti", base.Fitness, weights=(1.0, 1.0))
@@ -65,6 +87,28 @@ toolbox.register(
 # toolbox.register('select', tools.selTournamentDCD)
 toolbox.register("select", tools.selNSGA2)
 toolbox.register("evaluate", opt_tools.fitness_c_urfd.evaluate)
+# Workers only receive IDs and rebuild the individuals
+toolbox.register("evaluate_ID", opt_tools.fitness_c_urfd.evaluate_ID)
+
+
+def save_checkpoint(g, pop, logbook, crossovers, finished=False):
+    """Save the state after generation *g* to memory to be able to resume.
+    The checkpoint of a *finished* run is not resumed.
+    """
+    memory.save_checkpoint(
+        RUN_ID,
+        g,
+        {
+            "pop": pop,
+            "logbook": logbook,
+            "crossovers": crossovers,
+            "hof": list(hof),
+            "bestfit_history": stopping_criteria.bestfit_history,
+            "mutations": opt_tools.mutation.mutations,
+            "random_state": random.getstate(),
+            "finished": finished,
+        },
+    )
 
 
 def main():
@@ -77,62 +121,96 @@ def main():
     tictoc = Tictoc(print_timestamps=False)
     tictoc.tic()
 
-    # Initialize a population
-    pop = toolbox.population(n=POP_SIZE)
-
-    # Evaluate the entire population
-
-    # Split individuals into uniques and duplicates to lower the evaluation
-    # effort
-    uniques, duplicates = util.attrbased_set(pop, "ID")
-    results = list(pool.map(toolbox.evaluate, uniques))
-    # results = list(map(toolbox.evaluate, uniques))
-    fitnesses = [result[:-1] for result in results]
-    ind_results = [result[-1] for result in results]
-    for ind, fit, ind_result in zip(uniques, fitnesses, ind_results):
-        ind.fitness.values = fit
-        ind.results = ind_result
-        memorize(ind, memory)
-    for ind in duplicates:
-        # Look up fitness for duplicates
-        lookup(ind, memory)
-    tools.emo.assignCrowdingDist(pop)
-
-    # Prepare logging and stats
-    logbook = tools.Logbook()
-    logbook.header = (
-        "gen",
-        "evals",
-        "duplicates_this_gen",
-        "looked_up",
-        "skipped",
-        "memorized",
-        "comptime",
-        "fitness",
-    )
-    logbook.chapters["fitness"].header = "min", "avg", "max", "std", "feasible"
     cx_this_gen = 0
-    crossovers = []
-    # Log stats
-    record = mstats.compile(pop)
-    skipped = sum(ind.results["simtime"] == 0 for ind in pop)
-    feasible = sum(
-        eflips.depot.layout_opt.opt_tools.fitness_c_urfd.feasible(ind) for ind in pop
-    ) / len(pop)
-    logbook.record(
-        gen=g,
-        evals=len(pop),
-        duplicates_this_gen=len(duplicates),
-        looked_up=0,
-        skipped=skipped,
-        memorized=len(memory),
-        comptime=tictoc.last_interval,
-        feasible=feasible,
-        **record
-    )
-    print()
-    print(logbook.stream)  # values of initial population
-    hof.update(pop)
+    # Screened individuals of this run with estimated fitness. Kept apart from
+    # memory because their fitness is only valid compared to this run's front.
+    screened = {}
+    surrogate = UrfdSurrogate() if SURROGATE else None
+    checkpoint_gen, checkpoint = memory.load_checkpoint(RUN_ID)
+    resume = RESUME and checkpoint is not None
+    if resume and checkpoint.get("finished", False):
+        print("Run %s is finished, starting a new run" % RUN_ID)
+        resume = False
+    if resume:
+        # Continue after the last completed generation
+        g = checkpoint_gen
+        pop = checkpoint["pop"]
+        logbook = checkpoint["logbook"]
+        crossovers = checkpoint["crossovers"]
+        hof.update(checkpoint["hof"])
+        stopping_criteria.bestfit_history.update(checkpoint["bestfit_history"])
+        opt_tools.mutation.mutations[:] = checkpoint["mutations"]
+        random.setstate(checkpoint["random_state"])
+        print("Resumed %s after generation %d" % (RUN_ID, g))
+    else:
+        # Initialize a population
+        pop = toolbox.population(n=POP_SIZE)
+
+        # Evaluate the entire population
+
+        # Split individuals into uniques and duplicates to lower the evaluation
+        # effort
+        uniques, duplicates = util.attrbased_set(pop, "ID")
+        # Look up fitness for individuals that are memorized from earlier runs
+        for ind in uniques:
+            lookup(ind, memory)
+        new_inds = [ind for ind in uniques if not ind.fitness.valid]
+        results = list(pool.map(toolbox.evaluate_ID, [ind.ID for ind in new_inds]))
+        # results = list(map(toolbox.evaluate, new_inds))
+        fitnesses = [result[:-1] for result in results]
+        ind_results = [result[-1] for result in results]
+        for ind, fit, ind_result in zip(new_inds, fitnesses, ind_results):
+            ind.fitness.values = fit
+            ind.results = ind_result
+            memorize(ind, memory)
+        for ind in duplicates:
+            # Look up fitness for duplicates
+            lookup(ind, memory)
+        tools.emo.assignCrowdingDist(pop)
+
+        # Prepare logging and stats
+        logbook = tools.Logbook()
+        logbook.header = (
+            "gen",
+            "evals",
+            "duplicates_this_gen",
+            "looked_up",
+            "skipped",
+            "memorized",
+            "screened",
+            "hits",
+            "misses",
+            "comptime",
+            "fitness",
+        )
+        logbook.chapters["fitness"].header = "min", "avg", "max", "std", "feasible"
+        crossovers = []
+        # Log stats
+        record = mstats.compile(pop)
+        skipped = sum(ind.results["simtime"] == 0 for ind in pop)
+        feasible = sum(
+            eflips.depot.layout_opt.opt_tools.fitness_c_urfd.feasible(ind)
+            for ind in pop
+        ) / len(pop)
+        hits, misses = memory.pop_stats()
+        logbook.record(
+            gen=g,
+            evals=len(new_inds),
+            duplicates_this_gen=len(duplicates),
+            looked_up=len(pop) - len(new_inds),
+            skipped=skipped,
+            memorized=len(memory),
+            screened=0,
+            hits=hits,
+            misses=misses,
+            comptime=tictoc.last_interval,
+            feasible=feasible,
+            **record
+        )
+        print()
+        print(logbook.stream)  # values of initial population
+        hof.update(pop)
+        save_checkpoint(g, pop, logbook, crossovers)
     tictoc.toc()
 
     while not stopping_criteria.check(
@@ -147,8 +225,8 @@ def main():
         g += 1
 
         # Clone the population to prepare the offspring
-        offspring = list(pool.map(toolbox.clone, pop))
-        # offspring = list(map(toolbox.clone, pop))
+        # (locally, pickling the population to workers is more expensive)
+        offspring = list(map(toolbox.clone, pop))
 
         # Apply crossover on the offspring
         for child1, child2 in zip(offspring[::2], offspring[1::2]):
@@ -175,9 +253,28 @@ def main():
         # Look up fitness for individuals that are memorized
         for ind in uniques:
             lookup(ind, memory)
+            if not ind.fitness.valid:
+                lookup(ind, screened)
         # Evaluate the individuals that really are new
         new_inds = [ind for ind in uniques if not ind.fitness.valid]
-        results = list(pool.map(toolbox.evaluate, new_inds))
+        # Don't simulate individuals that cannot enter the Pareto front
+        screened_inds = []
+        if SCREENING:
+            if surrogate is not None:
+                surrogate.fit(memory)
+            new_inds, screened_inds = screen(
+                new_inds,
+                hof,
+                eflips.depot.layout_opt.opt_tools.fitness_c_urfd.evaluate_capacity,
+                eflips.depot.layout_opt.opt_tools.fitness_c_urfd.vehicle_count(),
+                surrogate,
+            )
+            for ind in screened_inds:
+                result = toolbox.evaluate(ind)
+                ind.fitness.values = result[:-1]
+                ind.results = result[-1]
+                memorize(ind, screened)
+        results = list(pool.map(toolbox.evaluate_ID, [ind.ID for ind in new_inds]))
         # results = list(map(toolbox.evaluate, new_inds))
         fitnesses = [result[:-1] for result in results]
         ind_results = [result[-1] for result in results]
@@ -189,6 +286,8 @@ def main():
         # or memorized even earlier
         for ind in duplicates:
             lookup(ind, memory)
+            if not ind.fitness.valid:
+                lookup(ind, screened)
 
         # Select the next generation individuals from pop and offspring
         tools.emo.assignCrowdingDist(pop + offspring)  # required for selTournamentDCD
@@ -200,6 +299,7 @@ def main():
         cx_this_gen = 0
         record = mstats.compile(pop)
         skipped = sum(ind.results["simtime"] == 0 for ind in new_inds)
+        hits, misses = memory.pop_stats()
         feasible = sum(
             eflips.depot.layout_opt.opt_tools.fitness_c_urfd.feasible(ind)
             for ind in pop
@@ -211,12 +311,17 @@ def main():
             looked_up=len(modified_inds) - len(new_inds),
             skipped=skipped,
             memorized=len(memory),
+            screened=len(screened_inds),
+            hits=hits,
+            misses=misses,
             comptime=tictoc.last_interval,
             feasible=feasible,
             **record
         )
         print(logbook.stream)
+        save_checkpoint(g, pop, logbook, crossovers)
         tictoc.toc()
+    save_checkpoint(g, pop, logbook, crossovers, finished=True)
 
     tictoc.print_timestamps = True
     tictoc.toc()
@@ -230,7 +335,13 @@ if __name__ == "__main__":
 
     # Set up multiprocessing (must be protected by "if __name__ == '__main__'")
     n_processes = os.cpu_count() - 1  # os.cpu_count() is default
-    pool = Pool(n_processes, maxtasksperchild=100)
+    # init_worker prepares the timetable once per worker
+    pool = Pool(
+        n_processes,
+        initializer=opt_tools.fitness_util.init_worker,
+        initargs=(filename_opt_settings,),
+        maxtasksperchild=100,
+    )
     # maxtasksperchild: renew processes after a certain amount of tasks (proved
     # to be critical for long optimization runs)
     print("Multiprocessing with %d processes" % n_processes)
@@ -247,7 +358,9 @@ if __name__ == "__main__":
     hof = tools.ParetoFront()
 
     # Set up memory and other logging
-    memory = {}
+    memory = FitnessMemory(
+        FILENAME_MEMORY, eflips.depot.layout_opt.opt_tools.fitness_c_urfd.SCENARIO_HASH
+    )
 
     # Set stopping criteria
     maxfitness_estimate = creator.FitnessMulti()
@@ -1,11 +1,13 @@
 """Utilities for defining a depot layout as a packing problem and solving it.
 """
 import math
+from bisect import bisect_left, insort_right
 from decimal import Decimal
 from random import randint
 from operator import attrgetter
 import itertools
 from copy import copy
+import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
@@ -542,14 +544,23 @@ def irab_arat(av, item):
 class Bin(Rectangle):
     """Rectangular container with best-fit-decreasing algorithm for rectangle
     packing.
+
+    The available spaces are maximal rectangles that are kept sorted by b and
+    a. Containment of availables is only checked for the ones created by
+    the last put, as others can't be contained in each other.
+
+    validate: [bool] if True, check after each put that no available
+        intersects a packed item and after packing that no packed items
+        intersect. Costly for many items.
     """
 
-    def __init__(self, a, b, record_history=True, fill=False):
+    def __init__(self, a, b, record_history=True, fill=False, validate=True):
         super(Bin, self).__init__(a, b, fill=fill)
         self.items = []
         self.availables = []
         self.packed_items = []
         self.record_history = record_history
+        self.validate = validate
         self.history = {"items": [], "availables": []}
         self._feasible = None
         self._precheck_passed = None
@@ -662,7 +673,8 @@ class Bin(Rectangle):
                 self.history["items"].append(self.packed_items.copy())
                 self.history["availables"].append(self.availables.copy())
 
-        assert self.valid
+        if self.validate:
+            assert self.valid
         self._feasible = True
         # print('packed')
 
@@ -684,7 +696,7 @@ class Bin(Rectangle):
         item may be manipulated regardless of the
         result.
         """
-        for av in self.availables:
+        for av in self.availables[self.first_available(item) :]:
             if av.a >= item.a and av.b >= item.b:
                 # success
                 item.x = av.x
@@ -692,6 +704,12 @@ class Bin(Rectangle):
                 return True, av
         return False, None
 
+    def first_available(self, item):
+        """Return the index of the first available in self.availables that is
+        not lower than *item*. Availables before are too small.
+        """
+        return bisect_left(self.availables, item.b, key=attrgetter("b"))
+
     def update_availables(self, item):
         """Update availables after packing *item*."""
         # Split existing availables that intersect item into several smaller
@@ -761,33 +779,37 @@ class Bin(Rectangle):
                             else:
                                 new_avs.extend(self.case_4(av, item))
 
-        for av in removals:
-            self.availables.remove(av)
-        self.availables.extend(new_avs)
+        removal_IDs = {id(av) for av in removals}
+        self.availables = [av for av in self.availables if id(av) not in removal_IDs]
 
         # Remove availables that are fully enclosed by others and therefore
-        # redundant
-        removals = set()
-        # Sort to be able to use combinations instead of permutations (less
-        # pairs, therefore faster)
-        pool = sorted(self.availables, key=lambda av: av.A, reverse=True)
-        for r1, r2 in itertools.combinations(pool, 2):
-            if contains(r1, r2):
-                removals.add(r2)
-                # print('Removing %s contained by %s' % (r1, r2))
-        for av in removals:
-            self.availables.remove(av)
-
-        # Validation
-        for av in self.availables:
-            assert av.a > 0 and av.b > 0
-            for pitem in self.packed_items:
-                assert not intersect(av, pitem)
-                # if intersect(av, pitem):
-                #     raise ValidationError('Intersection of av: %s and item %s' % (av, pitem))
+        # redundant. The remaining availables don't enclose each other and
+        # can't be enclosed by new ones, which lie within removed availables.
+        # Of identical new availables, the first is kept.
+        kept = []
+        for no, av in enumerate(new_avs):
+            if any(contains(other, av) for other in self.availables):
+                continue
+            # Of two identical availables, the first is kept
+            if any(
+                contains(other, av) and (other.A > av.A or other_no < no)
+                for other_no, other in enumerate(new_avs)
+                if other_no != no
+            ):
+                continue
+            kept.append(av)
+
+        # Insert sorted by b, then a, after availables with the same values
+        for av in kept:
+            insort_right(self.availables, av, key=attrgetter("b", "a"))
 
-        self.availables.sort(key=attrgetter("a"))
-        self.availables.sort(key=attrgetter("b"))
+        if self.validate:
+            for av in self.availables:
+                assert av.a > 0 and av.b > 0
+                for pitem in self.packed_items:
+                    assert not intersect(av, pitem)
+                    # if intersect(av, pitem):
+                    #     raise ValidationError('Intersection of av: %s and item %s' % (av, pitem))
 
     @staticmethod
     def case_1(av, item):
@@ -1092,10 +1114,15 @@ class BinWithDistances(Bin):
     items and the container edges.
 
     Distance handling based on https://doi.org/10.1051/ro/2012007
+
+    Packed items are indexed by their bounds including distances, so that
+    try_put only checks packed items near the position of the item.
     """
 
-    def __init__(self, a, b, record_history=True):
-        super(BinWithDistances, self).__init__(a, b, record_history)
+    def __init__(self, a, b, record_history=True, validate=True):
+        super(BinWithDistances, self).__init__(a, b, record_history, validate=validate)
+        self._packed_bounds = []
+        self._packed_bounds_array = None
 
         self.distance_left_inner = DistanceRectangle(EDGE_DISTANCE_A, b, x=0, y=0)
         self.distance_bottom_inner = DistanceRectangle(a, EDGE_DISTANCE_B, x=0, y=0)
@@ -1112,7 +1139,7 @@ class BinWithDistances(Bin):
         yes, else (False, None). x and y of item may be manipulated regardless
         of the result.
         """
-        for av in self.availables:
+        for av in self.availables[self.first_available(item) :]:
             if av.a >= item.a and av.b >= item.b:
                 # print('Considering av %s' % av)
                 # item fits without buffer distance. Assign preliminary position.
@@ -1154,8 +1181,10 @@ class BinWithDistances(Bin):
                         raise ValidationError("Feels like too many iterations")
                     # print(' ' * i + 'Checking left and right. Iteration=%s, item=%s. x=%s, y=%s' % (i, item.ID, item.x, item.y))
 
-                    # Left
-                    for pitem in self.packed_items:
+                    # Left. item only moves to the right.
+                    for pitem in self.packed_near(
+                        item.distance_left.x, item.y, None, item.y_top
+                    ):
                         if intersect(item.distance_left, pitem) or intersect(
                             item, pitem.distance_right
                         ):
@@ -1173,7 +1202,10 @@ class BinWithDistances(Bin):
 
                     # Bottom
                     if not bottom_ok:
-                        for pitem in self.packed_items:
+                        # item only moves to the top
+                        for pitem in self.packed_near(
+                            item.x, item.distance_bottom.y, item.x_right, None
+                        ):
                             if intersect(item.distance_bottom, pitem) or intersect(
                                 item, pitem.distance_top
                             ):
@@ -1200,9 +1232,15 @@ class BinWithDistances(Bin):
 
                 # Checks that make this av invalid for item if True
                 invalid = False
+                near = self.packed_near(
+                    item.distance_left.x,
+                    item.distance_bottom.y,
+                    item.distance_right.x_right,
+                    item.distance_top.y_top,
+                )
 
                 # Intersection with other items
-                for pitem in self.packed_items:
+                for pitem in near:
                     if intersect(item, pitem):
                         invalid = True
                         break
@@ -1217,7 +1255,7 @@ class BinWithDistances(Bin):
                     continue
 
                 # Right
-                for pitem in self.packed_items:
+                for pitem in near:
                     if intersect(item.distance_right, pitem) or intersect(
                         item, pitem.distance_left
                     ):
@@ -1235,7 +1273,7 @@ class BinWithDistances(Bin):
                     continue
 
                 # Top
-                for pitem in self.packed_items:
+                for pitem in near:
                     if intersect(item.distance_top, pitem) or intersect(
                         item, pitem.distance_bottom
                     ):
@@ -1250,6 +1288,58 @@ class BinWithDistances(Bin):
         # print('Couldnt find suitable av')
         return False, None
 
+    def put(self, item):
+        success = super(BinWithDistances, self).put(item)
+        if success:
+            self._packed_bounds.append(self.bounds_with_distances(item))
+            self._packed_bounds_array = None
+        return success
+
+    @staticmethod
+    def bounds_with_distances(item):
+        """Return [x_left, y_bottom, x_right, y_top] of *item* including its
+        distances as floats.
+        """
+        return [
+            float(item.distance_left.x),
+            float(item.distance_bottom.y),
+            float(item.distance_right.x_right),
+            float(item.distance_top.y_top),
+        ]
+
+    def packed_near(self, x_left, y_bottom, x_right, y_top):
+        """Return the packed items in the order of self.packed_items whose
+        bounds including distances may intersect the rectangle from
+        (x_left, y_bottom) to (x_right, y_top). None is unbounded. Exact
+        checks are left to the caller.
+        """
+        if len(self._packed_bounds) != len(self.packed_items):
+            # packed_items were changed from outside
+            self._packed_bounds = [
+                self.bounds_with_distances(pitem) for pitem in self.packed_items
+            ]
+            self._packed_bounds_array = None
+        if not self.packed_items:
+            return []
+        if self._packed_bounds_array is None:
+            self._packed_bounds_array = np.array(self._packed_bounds)
+        bounds = self._packed_bounds_array
+        # Tolerance for the conversion of Decimal to float
+        eps = 1e-6
+        mask = (bounds[:, 2] > float(x_left) - eps) & (
+            bounds[:, 3] > float(y_bottom) - eps
+        )
+        if x_right is not None:
+            mask &= bounds[:, 0] < float(x_right) + eps
+        if y_top is not None:
+            mask &= bounds[:, 1] < float(y_top) + eps
+        return [self.packed_items[i] for i in np.flatnonzero(mask)]
+
+    def repack(self):
+        self._packed_bounds = []
+        self._packed_bounds_array = None
+        super(BinWithDistances, self).repack()
+
     @staticmethod
     def case_16(av, item):
         return [
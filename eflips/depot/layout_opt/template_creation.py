@@ -1,5 +1,7 @@
 """Utilities for converting config data, config names, templates and visu."""
 import json
+from functools import lru_cache
+
 from eflips.depot.layout_opt import packing
 
 
@@ -64,18 +66,16 @@ def config_from_name_3a(name):
     return ac
 
 
-def template_from_config(area_config):
-    parking_capacity = 0
-    for data in area_config.values():
-        for capacity, n in data.items():
-            for ni in range(n):
-                parking_capacity += capacity
-
-    ID_counters = {"ci": 0, "pa": 0}
-
+@lru_cache(maxsize=None)
+def _template_base(power, capacity_service):
+    """Return the parts of a template that are the same for all area configs,
+    i.e. the service resource and switch, processes, service area, charging
+    interface and plan. Cached per *power* and *capacity_service*; the result
+    must not be modified.
+    """
     template = {
         "templatename_display": "",
-        "general": {"depotID": "", "dispatch_strategy_name": ""},
+        "general": {"depotID": "KLS", "dispatch_strategy_name": "SMART"},
         "resources": {},
         "resource_switches": {},
         "processes": {},
@@ -84,9 +84,6 @@ def template_from_config(area_config):
         "plans": {},
     }
 
-    template["general"]["depotID"] = "KLS"
-    template["general"]["dispatch_strategy_name"] = "SMART"
-
     template["resources"]["workers_service"] = {
         "typename": "DepotResource",
         "capacity": capacity_service,
@@ -135,22 +132,67 @@ def template_from_config(area_config):
         "cancellable_for_dispatch": False,
     }
 
-    # Areas
-    template["areas"]["Stauflaeche"] = {
+    template["areas"]["Serviceflaeche"] = {
         "typename": "DirectArea",
-        "capacity": parking_capacity,
-        "available_processes": ["standby_arr"],
+        "capacity": capacity_service,
+        "available_processes": ["serve"],
         "issink": False,
         "entry_filter": None,
     }
 
-    template["areas"]["Serviceflaeche"] = {
+    # Entry shared by all charging interfaces
+    template["charging_interface"] = {
+        "typename": "DepotChargingInterface",
+        "max_power": power,
+    }
+
+    template["plans"]["default"] = {
+        "typename": "DefaultActivityPlan",
+        "locations": ["Stauflaeche", "Serviceflaeche", "parking area group"],
+    }
+
+    return template
+
+
+def template_from_config(area_config, power=150, capacity_service=0, save=True):
+    """Create a template [dict] from area_config [dict]. Only the areas,
+    charging interfaces and groups are created per config, the other parts
+    are shared between all templates with the same *power* and
+    *capacity_service* (see _template_base). The templates can be loaded by
+    DepotConfigurator without copying, but must not be modified otherwise.
+
+    save: [bool] if True, the template is saved to the templates directory.
+    """
+    base = _template_base(power, capacity_service)
+
+    parking_capacity = 0
+    for data in area_config.values():
+        for capacity, n in data.items():
+            for ni in range(n):
+                parking_capacity += capacity
+
+    ID_counters = {"ci": 0, "pa": 0}
+
+    template = {
+        "templatename_display": "",
+        "general": base["general"],
+        "resources": dict(base["resources"]),
+        "resource_switches": dict(base["resource_switches"]),
+        "processes": base["processes"],
+        "areas": {},
+        "groups": {},
+        "plans": base["plans"],
+    }
+
+    # Areas
+    template["areas"]["Stauflaeche"] = {
         "typename": "DirectArea",
-        "capacity": capacity_service,
-        "available_processes": ["serve"],
+        "capacity": parking_capacity,
+        "available_processes": ["standby_arr"],
         "issink": False,
         "entry_filter": None,
     }
+    template["areas"].update(base["areas"])
 
     # Parking areas
     def add_parking_area_direct(capacity):
@@ -202,10 +244,7 @@ def template_from_config(area_config):
     # Charging interfaces
     for i in range(ID_counters["ci"]):
         ID = "ci_" + str(i)
-        template["resources"][ID] = {
-            "typename": "DepotChargingInterface",
-            "max_power": power,
-        }
+        template["resources"][ID] = base["charging_interface"]
 
     # Charging switches
     for i in range(ID_counters["ci"]):
@@ -224,17 +263,14 @@ def template_from_config(area_config):
         "parking_strategy_name": "SMART2",
     }
 
-    # Plan
-    template["plans"]["default"] = {
-        "typename": "DefaultActivityPlan",
-        "locations": ["Stauflaeche", "Serviceflaeche", "parking area group"],
-    }
-
     name = name_from_config(area_config)
     template["templatename_display"] = name
 
-    save_json(template, "templates\\" + name)
-    print("Saved ", name)
+    if save:
+        save_json(template, "templates\\" + name)
+        print("Saved ", name)
+
+    return template
 
 
 def visu_from_config(area_config, a, b):
@@ -281,13 +317,11 @@ def ind_from_config(area_config, creator):
     return ind
 
 
-def template_from_name(name):
-    template_from_config(config_from_name(name))
+def template_from_name(name, **kwargs):
+    return template_from_config(config_from_name(name), **kwargs)
 
 
 if __name__ == "__main__":
-    power = 150
-    capacity_service = 0
     # area_config = {
     #     'd': {
     #         148: 1
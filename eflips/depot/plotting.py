@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for plots of evaluation results.
+
+Matplotlib is imported on the first access of plt, ticker, mpatches, mlines
+or font_manager, i.e. on the first plot call. Importing this module and the
+evaluation is therefore cheap for simulations that never plot.
+
+"""
+from datetime import datetime, timedelta
+import importlib
+import locale
+
+from eflips.helperFunctions import cm2in
+from eflips.settings import globalConstants
+
+
+class LazyModule:
+    """Placeholder for a module that is imported on the first attribute
+    access.
+
+    Parameters:
+    name: [str] absolute module name, e.g. 'matplotlib.pyplot'
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return "{LazyModule} %s (%s)" % (
+            self._name,
+            "loaded" if self._module is not None else "not loaded",
+        )
+
+
+plt = LazyModule("matplotlib.pyplot")
+ticker = LazyModule("matplotlib.ticker")
+mpatches = LazyModule("matplotlib.patches")
+mlines = LazyModule("matplotlib.lines")
+font_manager = LazyModule("matplotlib.font_manager")
+
+# Settings for dates on x axis
+abs_time_fmt = "%"
+base_date = datetime(2018, 12, 4, 0, 0)  # arbitrary Tuesday 0:00
+datefmt_general = "%a %H:%M"  # format to "Mon 00:00"
+datefmt_major = "%a"  # 'Mon'
+datefmt_major2 = "%H:%M\n%a"  # '00:00\nMon'
+datefmt_minor = "%H:%M"  # '00:00'
+xdatespacing_major = 86400  # show major x ticks at these multiplier seconds
+# divisor for of xdatespacing_major to show  minor ticks at (e.g. 4 for every
+# 6 hours if xdatespacing_major is 86400)
+minor_intervals_per_major_tick = 4
+
+color_bvg_yellow = "#f0d722"
+
+
+def baseplot(show, figsize=None):
+    """Return new fig and ax after setting interactive mode based on *show*
+    [bool].
+    figsize: [None or tuple] figure size in cm (not inches)
+    """
+    if show:
+        plt.ion()
+        plt.show()  # may be required to return to the console
+    else:
+        plt.ioff()
+
+    if figsize is not None:
+        figsize = cm2in(*figsize)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    return fig, ax
+
+
+def setting_language(language):
+    # English (default)
+    if language == "eng":
+        locale.setlocale(locale.LC_ALL, "en_US")
+
+    # German
+    if language == "de":
+        locale.setlocale(locale.LC_ALL, "de_DE")
+
+
+def savefig(fig, filename, formats=("png",), confirm=True, dpi=None, **kwargs):
+    """filename: [str] including path, excluding extension.
+
+    formats: [tuple] of file extensions [str]
+    dpi: Parameter of fig.savefig()
+
+    Accepts other arguments of fig.savefig as kwargs
+    (example: bbox_inches='tight').
+    """
+    if "png" in formats:
+        fig.savefig(filename + ".png", dpi=dpi, **kwargs)
+        if confirm:
+            print("Saved %s.png" % filename)
+    if "pdf" in formats:
+        fig.savefig(filename + ".pdf", dpi=dpi, **kwargs)
+        if confirm:
+            print("Saved %s.pdf" % filename)
+
+
+def seconds2date(si, datefmt=datefmt_general, *args):
+    """Convert a second to a date based on base_date being equivalent to 0.
+    Return a str of *datefmt*.
+    """
+    return (base_date + timedelta(seconds=si)).strftime(datefmt)
+
+
+def seconds2date_major(si, *args):
+    """Convert a second to a date based on base_date being equivalent to 0."""
+    return seconds2date(si, datefmt_major, *args)
+
+
+def seconds2date_major2(si, *args):
+    """Convert a second to a date based on base_date being equivalent to 0."""
+    return seconds2date(si, datefmt_major2, *args)
+
+
+def seconds2date_minor(si, *args):
+    """Convert a second to a date based on base_date being equivalent to 0."""
+    return seconds2date(si, datefmt_minor, *args)
+
+
+def to_dateaxis(ax):
+    """Format a date x axis. Set base_date, datefmt and byhour at the top of
+    the script. Assumes that one step equals one second.
+
+    ax: [Axes]
+    """
+    fmt_major = ticker.FuncFormatter(seconds2date_major2)
+    ax.xaxis.set_major_formatter(fmt_major)
+    ax.xaxis.set_major_locator(ticker.MultipleLocator(xdatespacing_major))
+
+    fmt_minor = ticker.FuncFormatter(seconds2date_minor)
+    ax.xaxis.set_minor_formatter(fmt_minor)
+    ax.xaxis.set_minor_locator(ticker.AutoMinorLocator(minor_intervals_per_major_tick))
+
+    # plt.gcf().autofmt_xdate(which='both')
+    ax.tick_params(axis="x", which="both", labelsize=8)
+    # ax.tick_params(axis='y', labelsize=12)
+    # ax.tick_params(axis='x', which='major', pad=15)
+    ax.tick_params(axis="x", which="minor", pad=5)
+    # ax.set_xlabel('Time', fontsize=10)
+    # ax.set_xlabel('Zeit', fontsize=12)
+
+    ax.xaxis.grid(which="major", color="grey", linewidth=1.5)
+    ax.tick_params(axis="x", which="major", width=1.5)
+    ax.xaxis.grid(which="minor", color="lightgrey", linestyle="--", dashes=(5, 5))
+    ax.tick_params(which="minor", left=False, right=False, bottom=True)
+
+
+def adjust_plt():
+    plt.xlim(left=0, right=globalConstants["general"]["SIMULATION_TIME"])
+    plt.ylim(bottom=0)
+    plt.grid(True)
+    plt.show()
+
+
+def adjust_plt_hist():
+    plt.xlim(left=0)
+    plt.ylim(bottom=0)
+    plt.gca().yaxis.grid(True)
+    plt.show()
+
+
+def make_patch_spines_invisible(ax):
+    """Helper function for a third or following y axis.
+    From: https://matplotlib.org/gallery/ticks_and_spines/multiple_yaxis_with_spines.html
+    """
+    ax.set_frame_on(True)
+    ax.patch.set_visible(False)
+    for sp in ax.spines.values():
+        sp.set_visible(False)
+
+
+def align_yaxis(ax1, v1, ax2, v2):
+    """Adjust ax2 ylimit so that v2 in ax2 is aligned to v1 in ax1.
+    Modified; from: https://stackoverflow.com/questions/10481990/matplotlib-axis-with-two-scales-shared-origin
+    """
+    _, y1 = ax1.transData.transform((0, v1))
+    _, y2 = ax2.transData.transform((0, v2))
+    inv = ax2.transData.inverted()
+    _, dy = inv.transform((0, 0)) - inv.transform((0, y1 - y2))
+    miny, maxy = ax2.get_ylim()
+    ax2.set_ylim(miny + dy, maxy)
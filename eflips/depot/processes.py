@@ -3,16 +3,17 @@
 import math
 import warnings
 from abc import ABC, abstractmethod
+from bisect import bisect_right
 from enum import auto, Enum
 from warnings import warn
 
-import numpy as np
 import simpy
 from eflips.helperFunctions import flexprint
 from eflips.settings import globalConstants
 
 import eflips
-from eflips.depot.evaluation import (
+from eflips.depot.data_logger import ProcessLog
+from eflips.depot.events import (
     BatteryLog,
     ChargeStart,
     FullyCharged,
@@ -284,7 +285,7 @@ class BaseDepotProcess(ABC):
             self._cleanup()
             self.status = ProcessStatus.COMPLETED
             if hasattr(self, "vehicle") and self.vehicle is not None:
-                self.vehicle.dwd.active_processes.remove(self)
+                self.vehicle.dwd.remove_active_process(self)
             self.finished.succeed()
 
         except simpy.Interrupt:
@@ -322,6 +323,8 @@ class BaseDepotProcess(ABC):
 
             if self.resume:  # Process may be resumed
                 self._cleanup()
+                if hasattr(self, "vehicle") and self.vehicle is not None:
+                    self.vehicle.dwd.process_log.record(ProcessLog.INTERRUPT, self)
 
                 if self.dur_predefined:
                     # Process requires pre-definition of the (remaining)
@@ -464,7 +467,7 @@ class BaseDepotProcess(ABC):
         self._cleanup()
         self.status = ProcessStatus.CANCELLED
         if hasattr(self, "vehicle") and self.vehicle is not None:
-            self.vehicle.dwd.active_processes.remove(self)
+            self.vehicle.dwd.remove_active_process(self)
         self.finished.succeed()
 
     def interrupt(self):
@@ -541,7 +544,7 @@ class VehicleProcess(BaseDepotProcess, ABC):
         # flexprint('in _pre of %s for vehicle %s. slot: %s'
         #         % (self.ID, self.vehicle.ID, self.vehicle.dwd.current_slot),
         #         env=self.env, switch='objID', objID=self.vehicle.ID)
-        self.vehicle.dwd.active_processes.append(self)
+        self.vehicle.dwd.add_active_process(self)
 
         if (
             hasattr(self.vehicle, "logger")
@@ -1449,14 +1452,14 @@ def charging_curve_power(vehicle, charging_interface, peq_params):
     precision = peq_params.get("precision", 0.01)
     current_soc = vehicle.battery.soc
     p_max = charging_interface.max_power
-    target_step_soc = min(vehicle.battery.soc + precision, vehicle.battery.soc_max)
+    target_step_soc = min(current_soc + precision, vehicle.battery.soc_max)
 
     power_current_soc = min(
-        p_max, np.interp(current_soc, peq_params["soc"], peq_params["power"])
+        p_max, interp(current_soc, peq_params["soc"], peq_params["power"])
     )
 
     power_target_soc = min(
-        p_max, np.interp(target_step_soc, peq_params["soc"], peq_params["power"])
+        p_max, interp(target_step_soc, peq_params["soc"], peq_params["power"])
     )
 
     current_power = min(power_current_soc, power_target_soc)
@@ -1464,6 +1467,22 @@ def charging_curve_power(vehicle, charging_interface, peq_params):
     return float(current_power)
 
 
+def interp(x, xp, fp):
+    """Return the same value as numpy.interp for a scalar *x* and sequences
+    *xp* and *fp*, without the overhead of array conversion. *xp* must be
+    increasing.
+    """
+    j = bisect_right(xp, x) - 1
+    if j < 0:
+        return fp[0]
+    if j >= len(xp) - 1:
+        return fp[-1]
+    if xp[j] == x:
+        return fp[j]
+    slope = (fp[j + 1] - fp[j]) / (xp[j + 1] - xp[j])
+    return slope * (x - xp[j]) + fp[j]
+
+
 class Standby(VehicleProcess):
     """Process of mandatory waiting such as standby times."""
 
@@ -8,7 +8,8 @@ import simpy
 from simpy.core import BoundClass
 from simpy.resources.resource import PriorityRequest, Release
 from eflips.settings import globalConstants
-from eflips.evaluation import DataLogger
+from eflips.depot.data_logger import create_logger
+from eflips.depot.events import windowed_dict
 from eflips.helperFunctions import flexprint
 from eflips.depot.processes import BaseDepotProcess
 
@@ -76,7 +77,7 @@ class DepotResource(simpy.PreemptiveResource):
         self.depot = depot
 
         if globalConstants["general"]["LOG_ATTRIBUTES"]:
-            self.logger = DataLogger(env, self, "DEPOTRESOURCE")
+            self.logger = create_logger(env, self, "DEPOTRESOURCE")
 
     request = BoundClass(DepotResourceRequest)
     release = BoundClass(DepotResourceRelease)
@@ -105,7 +106,8 @@ class DepotChargingInterface(DepotResource):
         super(DepotChargingInterface, self).__init__(env, ID, depot, capacity=1)
         self.max_power = max_power
         self._current_power = 0
-        self.power_logs_ci = {0: 0}  # Container for power logs at ci
+        # Container for power logs at ci
+        self.power_logs_ci = windowed_dict(env, {0: 0})
 
     @property
     def current_power(self):
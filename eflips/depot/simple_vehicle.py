@@ -9,9 +9,9 @@ Vehicle components for the depot simulation.
 """
 from eflips.helperFunctions import flexprint
 from eflips.settings import globalConstants
-from eflips.evaluation import DataLogger
+from eflips.depot.data_logger import create_logger
 from eflips.depot.depot import DepotWorkingData
-from eflips.depot.evaluation import BatteryLog
+from eflips.depot.events import BatteryLog, windowed_dict, windowed_list
 
 
 class VehicleType:
@@ -124,22 +124,39 @@ class SimpleVehicle:
         )
         self.mileage = 0
         self.dwd = DepotWorkingData(env, self, home_depot)
-        self.trip = None
+        self._trip = None
         self.trip_at_departure = None
         self.finished_trips = []
         self.system_entry = False
 
         if globalConstants["general"]["LOG_ATTRIBUTES"]:
-            self.logger = DataLogger(env, self, "VEHICLE")
-            self.logger.loggedData["area_waiting_time"] = {}
-            self.logger.loggedData["canceled_precondition"] = {}
+            self.logger = create_logger(env, self, "VEHICLE")
+            self.logger.loggedData["area_waiting_time"] = windowed_dict(
+                env, checkpoint=False
+            )
+            self.logger.loggedData["canceled_precondition"] = windowed_dict(
+                env, checkpoint=False
+            )
 
-        self.battery_logs = []  # Container for BatteryLog objects, temporary
-        self.power_logs = {0: 0}  # Container for power logs
+        # Container for BatteryLog objects, temporary
+        self.battery_logs = windowed_list(env, "t")
+        self.power_logs = windowed_dict(env, {0: 0})  # Container for power logs
 
     def __repr__(self):
         return "{%s} %s" % (type(self).__name__, self.ID)
 
+    @property
+    def trip(self):
+        return self._trip
+
+    @trip.setter
+    def trip(self, value):
+        previous = self._trip
+        self._trip = value
+        if (value is None) is not (previous is None):
+            for area in self.dwd.stored_in:
+                area.update_scheduled(1 if value is not None else -1)
+
     def drive(self):
         """Process one trip.
         Simplifies everything that happens outside of the depot to consuming
@@ -161,6 +178,18 @@ class SimpleVehicle:
         self.battery_logs.append(BatteryLog(self.env.now, self, "consume_start"))
         yield self.env.timeout(self.trip.duration)
 
+        self.consume()
+
+        self.battery_logs.append(BatteryLog(self.env.now, self, "consume_end"))
+
+        # Driving time is over, now check in at the depot
+        self.mileage += self.trip.distance if self.trip.distance is not None else 0
+        self.trip.destination.checkin(self)
+
+    def consume(self):
+        """Subtract the energy used on self.trip from the battery according
+        to the consumption calculation mode set in globalConstants.
+        """
         if globalConstants["depot"]["consumption_calc_mode"] == "CR_distance_based":
             amount = self.trip.distance * self.vehicle_type.CR
             self.battery.get(amount)
@@ -181,12 +210,6 @@ class SimpleVehicle:
                 % globalConstants["depot"]["consumption_calc_mode"]
             )
 
-        self.battery_logs.append(BatteryLog(self.env.now, self, "consume_end"))
-
-        # Driving time is over, now check in at the depot
-        self.mileage += self.trip.distance if self.trip.distance is not None else 0
-        self.trip.destination.checkin(self)
-
 
 class SimpleBattery:
     """Battery for a vehicle.
@@ -36,8 +36,14 @@ class DepotHost:
         self.depot = self.configurator.depot
 
     def load_and_complete_template(self, filename_template):
-        """Load depot template, validate and complete it."""
-        success, errormsg = self.configurator.load(filename_template)
+        """Load depot template, validate and complete it. *filename_template*
+        may also be a ConfigurationSnapshot, which is loaded without
+        validation.
+        """
+        if isinstance(filename_template, eflips.depot.ConfigurationSnapshot):
+            success, errormsg = self.configurator.load_snapshot(filename_template)
+        else:
+            success, errormsg = self.configurator.load(filename_template)
         if not success:
             raise ValueError("Error while loading template: " + errormsg)
 
@@ -64,6 +70,9 @@ class SimulationHost:
 
         The parallel simulation of multiple depots has not been tested yet,
         therefore to_simulate must have only one entry.
+    use_kernel: [bool] if True, the simulation is run with a DirectDepotKernel
+        instead of SimPy processes if the depot qualifies. See
+        DirectDepotKernel.supports. Set to False to force SimPy processes.
 
     Attributes:
     tictoc: [eflips.helperFunctions.Tictoc] measures execution time
@@ -71,12 +80,20 @@ class SimulationHost:
     depot_hosts: [list] of DepotHost instances
     timetable: [eflips.depot.standalone.Timetable]
     vg: [eflips.depot.standalone.VehicleGenerator]
+    kernel: [DirectDepotKernel or None] kernel used in the last call of run
     """
 
     def __init__(
-        self, to_simulate, run_progressbar=False, print_timestamps=True, tictocname=""
+        self,
+        to_simulate,
+        run_progressbar=False,
+        print_timestamps=True,
+        tictocname="",
+        use_kernel=True,
     ):
         self.to_simulate = to_simulate
+        self.use_kernel = use_kernel
+        self.kernel = None
 
         self.tictoc = eflips.helperFunctions.Tictoc(print_timestamps, tictocname)
         self.tictoc.tic()
@@ -123,10 +140,14 @@ class SimulationHost:
         timetabledata = eflips.depot.standalone.timetabledata_from_excel(filename)
         self.init_timetable(timetabledata)
 
-    def init_timetable(self, timetabledata):
-        """Use timetabledata to init a timetable."""
+    def init_timetable(self, timetabledata, trip_args=None):
+        """Use timetabledata to init a timetable.
+
+        trip_args: [tuple or None] see
+            eflips.depot.standalone.timetable_from_timetabledata
+        """
         self.timetable = eflips.depot.standalone.timetable_from_timetabledata(
-            self.env, timetabledata
+            self.env, timetabledata, trip_args
         )
         self.filename_timetable = timetabledata.filename.replace(".xlsx", "")
 
@@ -143,7 +164,18 @@ class SimulationHost:
     def run(self):
         """Run the simulation. All depot configurations have to be complete."""
         self.vg.run(self.depots)
-        self.env.process(self.timetable.run(self.depots))
+
+        self.kernel = None
+        if self.use_kernel:
+            supported, _ = eflips.depot.DirectDepotKernel.supports(
+                self.depots, self.timetable
+            )
+            if supported:
+                self.kernel = eflips.depot.DirectDepotKernel(
+                    self.env, self.depots[0], self.timetable
+                )
+        if self.kernel is None:
+            self.env.process(self.timetable.run(self.depots))
 
         if self.run_progressbar:
             self.env.process(
@@ -158,9 +190,14 @@ class SimulationHost:
         self.tictoc.toc("list")  # mark the end of the configuration phase
 
         # Run env
-        self.env.run(
-            until=eflips.settings.globalConstants["general"]["SIMULATION_TIME"]
-        )
+        if self.kernel is not None:
+            self.kernel.run(
+                eflips.settings.globalConstants["general"]["SIMULATION_TIME"]
+            )
+        else:
+            self.env.run(
+                until=eflips.settings.globalConstants["general"]["SIMULATION_TIME"]
+            )
 
         self.tictoc.toc("list")  # mark the end of the simulation phase
         if self.tictoc.print_timestamps:
@@ -5,9 +5,13 @@ import eflips.evaluation
 from eflips.settings import globalConstants
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import matplotlib.lines as mlines
+from eflips.depot.plotting import (
+    mlines,
+    mpatches,
+    plt,
+    setting_language,
+    to_dateaxis,
+)
 import math
 import datetime
 
@@ -24,7 +28,7 @@ class SmartCharging:
 
         :param data: data for schedule (DepotEvaluation or pd.Frame
         :param start_date:
-        :param price_data_path:
+        :param price_data_path: directory of the price pickles of each day or file of a PriceStore
         :param power_limit_grid: int or dict of powerlimits (15 min intervalls) (if list is not long enough, the list starts over again, the last value has to be given for Ex. for a day key 86400 has to exist),
                 only the changeges has to be in the dict, index of dict has to be the time in seconds.
          [or an function] not yet implemnted
@@ -69,23 +73,21 @@ class SmartCharging:
             print("Immediately charging, went wrong.")
 
     def add_power_limit_grid_to_power(self, data):
-        if isinstance(data, int):  # backward compatible
+        if isinstance(data, (int, float)):  # backward compatible
             self.power["limit_grid"] = data
 
         if isinstance(data, dict):
-            power_limit_grid = []
-            time = 0
-            for key, power_limit in data.items():
-                while time < int(key):
-                    power_limit_grid.append(pre_power_limit)
-                    time += 900
-                pre_power_limit = power_limit
-
-            while len(self.power.index) > len(power_limit_grid):
-                power_limit_grid += power_limit_grid
-
-            # for performance
-            self.power["limit_grid"] = power_limit_grid[0 : len(self.power.index)]
+            # Each limit is valid from its key until the next key. The last key is the length of the period, after
+            # which the limits start over again.
+            keys = np.array([int(key) for key in data], dtype=float)
+            power_limits = np.array(list(data.values()))
+            if keys[0] > 0:
+                raise ValueError("The power_limit_grid has to start at 0.")
+            period = math.ceil(keys[-1] / 900) * 900
+            time = self.power["start_time"].to_numpy(dtype=float) % period
+            self.power["limit_grid"] = power_limits[
+                np.searchsorted(keys, time, side="right") - 1
+            ]
 
     def schedule_method(self, ev):
         """
@@ -254,11 +256,12 @@ class SmartCharging:
         :return: a dict, in which al the charging intervalles of the vehicles will be stored
         """
         columns = ["start", "end", "power", "price"]
+        empty = pd.DataFrame(columns=columns)
         dict_of_pd = {}
         for ID in list(self.schedule.index):
             # words = ID.split("_")
             # ID_bus = words[0] + "_" + words[1]
-            dict_of_pd[ID] = pd.DataFrame(columns=columns)
+            dict_of_pd[ID] = empty.copy()
 
         return dict_of_pd
 
@@ -266,140 +269,226 @@ class SmartCharging:
         """
         needs self.schedule, self.power_price (start_time, end_time, price), power_limi_grid. Implements the algorithm of Lauth, Mundt,
         Göhlich.
+        Each bus is charged in the cheapest intervals of its stay, limited by the power left in the grid. The intervals of all buses
+        are computed on arrays of self.power, the charging logs are written when all buses are done.
         :return: False if smart charging is not possible, a pd Frame with the time intervalls and the charging power, if smart charging was possible
         """
+        self.power = self.power.sort_values(by=["price"])
+        limit_grid = self.power["limit_grid"].to_numpy(dtype=float)
+        used_power = self.power["used_power_smart"].to_numpy(dtype=float, copy=True)
+        logs = {}
 
+        try:
+            return self.smart_allocation(limit_grid, used_power, logs)
+        finally:
+            self.power["used_power_smart"] = used_power
+            self.write_charging_logs(self.charging_log, logs)
+
+    def smart_allocation(self, limit_grid, used_power, logs, verbose=True):
+        """
+        Allocation of smart_charging_algorithm on arrays in the order of self.power, which has to be sorted by price.
+        Doesn't modify self, so that it can be used to test power limits.
+        :param limit_grid: array of the power limit of the grid
+        :param used_power: array of the power already used. Is adjusted in place.
+        :param logs: dict, to which the charging logs of the buses are added as dict of arrays start, end, power and
+        price
+        :param verbose: if True, prints the bus for which smart charging is not possible
+        :return: False if smart charging is not possible, else True
+        """
         schedule = self.schedule.sort_values(by=["time_charging_flex"])
+        start_time, end_time, price = self.power_arrays()
 
-        self.power = self.power.sort_values(by=["price"])
-        for ID_bus, row_bus in schedule.iterrows():
+        for row_bus in schedule.itertuples():
+            ID_bus = row_bus.Index
             # power delta is needed for later adjustments, to match the real energy need
             energy_delta = row_bus.energy_demand - row_bus.energy_demand_real
 
-            for ID_power, row_power in self.power.iterrows():
-                if row_bus.energy_demand <= 0:
-                    break
-                power_rest = (
-                    row_power.limit_grid - row_power.used_power_smart
-                )  # determines the left power
-                interval = self.intersection(
-                    [row_power.start_time, row_power.end_time],
-                    [row_bus.time_arrival, row_bus.time_depart],
-                )
-                if isinstance(interval, list) and power_rest > 0:
-                    self.energy_calculation_smart(
-                        interval[0],
-                        interval[1],
-                        row_bus,
-                        row_power,
-                        ID_power,
-                        power_rest,
-                        ID_bus,
-                    )
-
-            if row_bus.energy_demand >= 50:  # needed against numerical error
-                print(row_bus.energy_demand, ID_bus, " Smart")
+            power_rest = limit_grid - used_power  # determines the left power
+            lower = np.maximum(start_time, row_bus.time_arrival)
+            upper = np.minimum(end_time, row_bus.time_depart)
+            intervals = np.flatnonzero((lower < upper) & (power_rest > 0))
+            duration = upper[intervals] - lower[intervals]
+            # a factor which scales the power, if a bus intervall is not complet in a power intervall
+            factor_power_used = duration / (end_time[intervals] - start_time[intervals])
+            power_rest = power_rest[intervals]
+
+            efficiency = row_bus.charging_efficiency
+            unlimited = power_rest >= row_bus.charging_power / efficiency
+            capacity = np.where(
+                unlimited,
+                duration * row_bus.charging_power,
+                duration * power_rest * efficiency,
+            )
+            power = np.where(
+                unlimited,
+                (row_bus.charging_power / efficiency) * factor_power_used,
+                power_rest * factor_power_used,
+            )
+            full, energy_demand = self.fill_intervals(
+                row_bus.energy_demand, capacity, stop_at_zero=True
+            )
+            if full < len(intervals) and energy_demand > 0:
+                # The last interval is only used partly
+                power[full] = (
+                    energy_demand / (duration[full] * efficiency)
+                ) * factor_power_used[full]
+                energy_demand = 0
+                full += 1
+
+            intervals = intervals[:full]
+            used_power[intervals] += power[:full]
+            logs[ID_bus] = {
+                "start": lower[intervals],
+                "end": upper[intervals],
+                "power": power[:full] * efficiency,
+                "price": price[intervals],
+            }
+
+            if energy_demand >= 50:  # needed against numerical error
+                if verbose:
+                    print(energy_demand, ID_bus, " Smart")
                 return False
 
             # Make adjustments so the charging energy fit the real energy
             if energy_delta > 0:
                 self.compensate_to_energy_real(
-                    energy_delta, ID_bus, row_bus, self.charging_log, "used_power_smart"
+                    energy_delta, logs[ID_bus], efficiency, used_power, intervals
                 )
 
         return True
 
-    def energy_calculation_smart(
-        self, start_time, end_time, row_bus, row_power, ID_power, power_rest, ID_bus
-    ):
+    def smart_charging_possible(self, power_limit_grid):
         """
-        For outsource some of the stuff of smart_charging_algorithm
-        :param start_time:
-        :param end_time:
-        :param row_bus:
-        :param ID_power:
-        :param power_rest:
-        :return:
+        Checks if smart_charging_algorithm succeeds with the constant power limit power_limit_grid without changing
+        the results. self.power has to be sorted by price.
+        :param power_limit_grid: number
+        :return: bool
         """
-        factor_power_used = (end_time - start_time) / (
-            row_power.end_time - row_power.start_time
-        )  # a factor which scales the power, if a bus intervall is not complet in a power intervall
+        used_power = self.base_power().to_numpy(dtype=float, copy=True)
+        limit_grid = np.full(len(used_power), float(power_limit_grid))
+        return self.smart_allocation(limit_grid, used_power, {}, verbose=False)
 
-        if power_rest >= row_bus.charging_power / row_bus.charging_efficiency:
-            if (
-                row_bus.energy_demand
-                >= (end_time - start_time) * row_bus.charging_power
-            ):
-                energy = (end_time - start_time) * row_bus.charging_power
-                row_bus.energy_demand -= energy
-                # self.energy_log.at[row_power.start_time,ID_bus] = energy
-
-                power = (
-                    row_bus.charging_power / row_bus.charging_efficiency
-                ) * factor_power_used
-                self.power.at[ID_power, "used_power_smart"] += power
-                row = [
-                    start_time,
-                    end_time,
-                    power * row_bus.charging_efficiency,
-                    row_power.price,
-                ]
-                self.charging_log[ID_bus].loc[int(start_time)] = row
-            else:
-                power = (
-                    row_bus.energy_demand
-                    / ((end_time - start_time) * row_bus.charging_efficiency)
-                    * factor_power_used
-                )
-                self.power.at[ID_power, "used_power_smart"] += power
-                row = [
-                    start_time,
-                    end_time,
-                    power * row_bus.charging_efficiency,
-                    row_power.price,
-                ]
-                self.charging_log[ID_bus].loc[int(start_time)] = row
-
-                # self.energy_log.at[row_power.start_time, ID_bus] = row_bus.energy_demand
-                row_bus.energy_demand = 0
-        else:
-            if (
-                row_bus.energy_demand
-                >= (end_time - start_time) * power_rest * row_bus.charging_efficiency
-            ):
-                energy = (
-                    (end_time - start_time) * power_rest * row_bus.charging_efficiency
-                )
-                row_bus.energy_demand -= energy
-                # self.energy_log.at[row_power.start_time, ID_bus] = energy
-
-                power = power_rest * factor_power_used
-                self.power.at[ID_power, "used_power_smart"] += power
-                row = [
-                    start_time,
-                    end_time,
-                    power * row_bus.charging_efficiency,
-                    row_power.price,
-                ]
-                self.charging_log[ID_bus].loc[int(start_time)] = row
-            else:
-                power = (
-                    row_bus.energy_demand
-                    / ((end_time - start_time) * row_bus.charging_efficiency)
-                ) * factor_power_used
-                self.power.at[ID_power, "used_power_smart"] += power
-                row = [
-                    start_time,
-                    end_time,
-                    power * row_bus.charging_efficiency,
-                    row_power.price,
-                ]
-                self.charging_log[ID_bus].loc[int(start_time)] = row
-
-                # self.energy_log.at[row_power.start_time, ID_bus] = row_bus.energy_demand
-                row_bus.energy_demand = 0
-
-        return row_bus.energy_demand
+    def base_power(self):
+        """
+        :return: the power used before smart charging as pd Series in the order of self.power (the power of
+        preconditioning, if any)
+        """
+        if "precondition" in self.power:
+            return self.power["precondition"]
+        return pd.Series(float(0), index=self.power.index)
+
+    def set_power_limit_grid(self, power_limit_grid):
+        """
+        Sets a new power limit of the grid and resets the results of smart charging.
+        :param power_limit_grid: number or dict, see __init__
+        """
+        self.power = self.power.sort_values(by=["start_time"])
+        self.add_power_limit_grid_to_power(power_limit_grid)
+        self.power["used_power_smart"] = self.base_power()
+        self.charging_log = self.construct_empty_dict_charging_log()
+
+    def flow_network(self):
+        """
+        Builds the transport network of the schedule and self.power for flow_feasible and caches it until self.power
+        is reordered.
+        Grid energy flows from the source to the buses (energy demand at the grid), from the buses to the power
+        intervals of their stay (limited by the charging power during the overlap) and from the intervals to the sink
+        (limited by the power left in the grid).
+        :return: dict
+        """
+        network = getattr(self, "_flow_network", None)
+        if network is not None and network["index"].equals(self.power.index):
+            return network
+
+        start_time, end_time, _ = self.power_arrays()
+        schedule = self.schedule
+        efficiency = schedule["charging_efficiency"].to_numpy(dtype=float)
+        arrival = schedule["time_arrival"].to_numpy(dtype=float)
+        depart = schedule["time_depart"].to_numpy(dtype=float)
+        overlap = np.minimum(end_time, depart[:, None]) - np.maximum(
+            start_time, arrival[:, None]
+        )
+        bus, interval = np.nonzero(overlap > 0)
+        # smart_charging_algorithm tolerates a remaining demand below 50
+        demand = (
+            np.maximum(schedule["energy_demand"].to_numpy(dtype=float) - 50, 0)
+            / efficiency
+        )
+        bus_capacity = (
+            overlap[bus, interval]
+            * schedule["charging_power"].to_numpy(dtype=float)[bus]
+            / efficiency[bus]
+        )
+        # Capacities have to be integers. The unit is chosen so that the sums fit into int32, demands are rounded down
+        # and capacities up, so that the test is never stricter than smart_charging_algorithm.
+        unit = max(1.0, demand.sum() / 2**28)
+        n_bus = len(demand)
+        network = {
+            "index": self.power.index,
+            "unit": unit,
+            "n_bus": n_bus,
+            "n_intervals": len(start_time),
+            "demand": np.floor(demand / unit).astype(np.int64),
+            "bus": bus,
+            "interval": interval,
+            "bus_capacity": np.ceil(bus_capacity / unit).astype(np.int64),
+            "duration": end_time - start_time,
+            "base_power": self.base_power().to_numpy(dtype=float),
+        }
+        self._flow_network = network
+        return network
+
+    def flow_feasible(self, power_limit_grid):
+        """
+        Checks if the energy demand of all buses can be met with the constant power limit power_limit_grid by any
+        charging schedule, using the maximum flow of flow_network. This is a necessary condition for the success of
+        smart_charging_algorithm (which charges greedily) and much cheaper to test.
+        :param power_limit_grid: number
+        :return: bool
+        """
+        network = self.flow_network()
+        n_bus = network["n_bus"]
+        n_intervals = network["n_intervals"]
+        source = n_bus + n_intervals
+        sink = source + 1
+        unit = network["unit"]
+        grid_capacity = np.ceil(
+            np.maximum(power_limit_grid - network["base_power"], 0)
+            * network["duration"]
+            / unit
+        )
+        grid_capacity = np.minimum(grid_capacity, 2**30).astype(np.int64)
+
+        tails = np.concatenate(
+            (
+                np.full(n_bus, source),
+                network["bus"],
+                n_bus + np.arange(n_intervals),
+            )
+        )
+        heads = np.concatenate(
+            (
+                np.arange(n_bus),
+                n_bus + network["interval"],
+                np.full(n_intervals, sink),
+            )
+        )
+        capacities = np.concatenate(
+            (
+                network["demand"],
+                np.minimum(network["bus_capacity"], 2**30),
+                grid_capacity,
+            )
+        ).astype(np.int32)
+        # scipy is only needed here, so it is not imported with eflips.depot
+        import scipy.sparse
+        import scipy.sparse.csgraph
+
+        graph = scipy.sparse.csr_array(
+            (capacities, (tails, heads)), shape=(sink + 1, sink + 1)
+        )
+        flow = scipy.sparse.csgraph.maximum_flow(graph, source, sink)
+        return flow.flow_value >= network["demand"].sum()
 
     def smart_charging_algorithm_even(self):  # Outdated, not maintained
         """Same power curve, just buses will always be charged."""
@@ -550,80 +639,114 @@ class SmartCharging:
         :return: pd Frame
         """
 
-        schedule = self.schedule.copy()
-
         self.power = self.power.sort_values(by=["start_time"])
-        for ID_bus, row_bus in schedule.iterrows():
-            # power delta is needed for later adjustments, to match the real energy need
-            energy_delta = row_bus.energy_demand - row_bus.energy_demand_real
+        start_time, end_time, price = self.power_arrays()
+        used_power = self.power["used_power_immediately"].to_numpy(
+            dtype=float, copy=True
+        )
+        logs = {}
 
-            for ID_power, row_power in self.power.iterrows():
-                interval = self.intersection(
-                    [row_power.start_time, row_power.end_time],
-                    [row_bus.time_arrival, row_bus.time_depart],
+        try:
+            for row_bus in self.schedule.itertuples():
+                ID_bus = row_bus.Index
+                # power delta is needed for later adjustments, to match the real energy need
+                energy_delta = row_bus.energy_demand - row_bus.energy_demand_real
+
+                lower = np.maximum(start_time, row_bus.time_arrival)
+                upper = np.minimum(end_time, row_bus.time_depart)
+                intervals = np.flatnonzero(lower < upper)
+                duration = upper[intervals] - lower[intervals]
+                # a factor which scales the power, if a bus intervall is not complet in a power intervall
+                factor_power_used = duration / (
+                    end_time[intervals] - start_time[intervals]
                 )
-                if isinstance(interval, list):
-                    self.energy_calculation_immediately(
-                        interval[0], interval[1], row_bus, row_power, ID_power, ID_bus
-                    )
 
-            if row_bus.energy_demand >= 50:  # needed against numerical error
-                print(row_bus.energy_demand, ID_bus, "Imm")
-                return False
-
-            # Make adjustments so the charging energy fit the real energy
-            if energy_delta > 0:
-                self.compensate_to_energy_real(
-                    energy_delta,
-                    ID_bus,
-                    row_bus,
-                    self.charging_log_imm,
-                    "used_power_immediately",
+                efficiency = row_bus.charging_efficiency
+                full, energy_demand = self.fill_intervals(
+                    row_bus.energy_demand,
+                    duration * row_bus.charging_power,
+                    stop_at_zero=False,
                 )
+                power_at_grid = np.zeros(len(intervals))
+                power_at_grid[:full] = (
+                    row_bus.charging_power / efficiency
+                ) * factor_power_used[:full]
+                power_at_bus = power_at_grid * efficiency
+                power_at_bus[:full] = row_bus.charging_power
+                if full < len(intervals):
+                    # Charged in the next interval and done afterwards. The
+                    # remaining intervals are logged with power 0.
+                    power_at_grid[full] = (
+                        energy_demand / (duration[full] * efficiency)
+                    ) * factor_power_used[full]
+                    power_at_bus[full] = power_at_grid[full] * efficiency
+                    energy_demand = 0
+
+                used_power[intervals] += power_at_grid
+                logs[ID_bus] = {
+                    "start": lower[intervals],
+                    "end": upper[intervals],
+                    "power": power_at_bus,
+                    "price": price[intervals],
+                }
+
+                if energy_demand >= 50:  # needed against numerical error
+                    print(energy_demand, ID_bus, "Imm")
+                    return False
+
+                # Make adjustments so the charging energy fit the real energy
+                if energy_delta > 0:
+                    self.compensate_to_energy_real(
+                        energy_delta, logs[ID_bus], efficiency, used_power, intervals
+                    )
+        finally:
+            self.power["used_power_immediately"] = used_power
+            self.write_charging_logs(self.charging_log_imm, logs)
 
         print("Immediately charging done.")
         return True
 
-    def energy_calculation_immediately(
-        self, start_time, end_time, row_bus, row_power, ID_power, ID_bus
-    ):
+    def power_arrays(self):
         """
-        Helper
-        :param start_time:
-        :param end_time:
-        :param row_bus:
-        :param row_power:
-        :param ID_power:
-        :return:
+        :return: start_time, end_time and price of self.power as arrays in the order of self.power
         """
+        return (
+            self.power["start_time"].to_numpy(dtype=float),
+            self.power["end_time"].to_numpy(dtype=float),
+            self.power["price"].to_numpy(dtype=float),
+        )
 
-        factor_power_used = (end_time - start_time) / (
-            row_power.end_time - row_power.start_time
-        )  # a factor which scales the power, if a bus intervall is not complet in a power intervall
-
-        if row_bus.energy_demand >= (end_time - start_time) * row_bus.charging_power:
-            row_bus.energy_demand -= (end_time - start_time) * row_bus.charging_power
-            self.power.at[ID_power, "used_power_immediately"] += (
-                row_bus.charging_power / row_bus.charging_efficiency
-            ) * factor_power_used
-            row = [start_time, end_time, row_bus.charging_power, row_power.price]
-            self.charging_log_imm[ID_bus].loc[int(start_time)] = row
-        else:
-            power_at_grid = (
-                row_bus.energy_demand
-                / ((end_time - start_time) * row_bus.charging_efficiency)
-            ) * factor_power_used
-            self.power.at[ID_power, "used_power_immediately"] += power_at_grid
-            row_bus.energy_demand = 0
-            row = [
-                start_time,
-                end_time,
-                power_at_grid * row_bus.charging_efficiency,
-                row_power.price,
-            ]
-            self.charging_log_imm[ID_bus].loc[int(start_time)] = row
-
-        return row_bus.energy_demand
+    @staticmethod
+    def fill_intervals(energy_demand, capacity, stop_at_zero):
+        """
+        Charges energy_demand in intervals in the given order. An interval is used completely as long as the remaining
+        energy demand is at least its capacity. Remaining demands are computed by successive subtraction like the
+        charging of single intervals.
+        :param energy_demand: energy to charge
+        :param capacity: array of the energy that can be charged in each interval
+        :param stop_at_zero: if True, charging stops as soon as the remaining energy demand is not positive
+        :return: number of completely used intervals and the remaining energy demand before the next interval
+        """
+        remaining = np.subtract.accumulate(np.concatenate(([energy_demand], capacity)))
+        stop = remaining[:-1] < capacity
+        if stop_at_zero:
+            stop |= remaining[:-1] <= 0
+        full = int(np.argmax(stop)) if stop.any() else len(capacity)
+        return full, remaining[full]
+
+    def write_charging_logs(self, charging_log, logs):
+        """
+        Writes charging logs at once.
+        :param charging_log: the dict of charging logs to write to
+        :param logs: dict of bus ID and dict of arrays start, end, power and price. Replaces the charging log of the bus
+        if it isn't empty.
+        """
+        columns = ["start", "end", "power", "price"]
+        for ID_bus, log in logs.items():
+            if len(log["start"]):
+                charging_log[ID_bus] = pd.DataFrame(
+                    log, index=log["start"].astype(np.int64), columns=columns
+                )
 
     def intersection(self, interval_a, interval_b):
         """
@@ -649,74 +772,77 @@ class SmartCharging:
         return False
 
     def compensate_to_energy_real(
-        self, energy_delta, ID_bus, row_bus, charging_log, type_of_power
+        self, energy_delta, log, charging_efficiency, used_power, positions=None
     ):
         """
-        Makes the correct adjustments, so charg_eqaution_steps can be implemented.
+        Makes the correct adjustments, so charg_eqaution_steps can be implemented. Reduces the power of the latest
+        charging intervals until energy_delta is compensated.
         :param energy_delta: differnce between energy and energy_real
-        :param ID_bus:
-        :param row_bus:
-        :param charging_log: the charging log the function should use
-        type_of_power: "used_power_smart" or "used_power_immediately"
+        :param log: charging log of the bus as dict of arrays start, end, power and price in the order of self.power.
+        Is sorted by start descending and adjusted in place.
+        :param charging_efficiency:
+        :param used_power: array of the used power in the order of self.power, e.g. of "used_power_smart" or
+        "used_power_immediately". Is adjusted in place.
+        :param positions: optional array of the positions of the log entries in self.power. Looked up by the start of
+        the entries if not given.
         :return:
         """
+        order = np.argsort(-log["start"], kind="stable")
+        for key in log:
+            log[key] = log[key][order]
+        start_time = log["start"].astype(np.int64)
+        duration = log["end"] - log["start"]
+        energy_slot = duration * log["power"]
+
+        # find the correct time slot in power and substract the power
+        if positions is None:
+            power_time = (start_time / 900).astype(np.int64) * 900
+            positions = self.power.index.get_indexer(power_time)
+            if (positions < 0).any():
+                raise KeyError(power_time[positions < 0][0])
+        else:
+            positions = positions[order]
 
-        charging_log[ID_bus] = charging_log[ID_bus].sort_values(
-            by="start", ascending=False
+        full, energy_delta = self.fill_intervals(
+            energy_delta, energy_slot, stop_at_zero=True
         )
-        for start_time, charg_log in charging_log[ID_bus].iterrows():
-            energy_slot = (charg_log.end - charg_log.start) * charg_log.power
-
-            if energy_delta >= energy_slot:
-                energy_delta -= energy_slot
-
-                # find the correct time slot in power and substract the power
-                power_time = int(start_time / 900) * 900
-
-                self.power.at[power_time, type_of_power] -= (
-                    charg_log.power / row_bus.charging_efficiency
-                )
-
-                charging_log[ID_bus].at[start_time, "power"] = 0
-
-            else:
-                energy_slot = energy_slot - energy_delta
-                energy_delta = 0
-
-                # find the correct time slot in power and substract the power
-                power_time = int(start_time / 900) * 900
-                power_at_bus = energy_slot / (charg_log.end - charg_log.start)
-
-                self.power.at[power_time, type_of_power] -= (
-                    charg_log.power - power_at_bus
-                ) / row_bus.charging_efficiency
-                charging_log[ID_bus].at[start_time, "power"] = power_at_bus
+        np.subtract.at(
+            used_power, positions[:full], log["power"][:full] / charging_efficiency
+        )
+        log["power"][:full] = 0
 
-            if energy_delta <= 0:
-                break
+        if full < len(energy_slot) and energy_delta > 0:
+            power_at_bus = (energy_slot[full] - energy_delta) / duration[full]
+            used_power[positions[full]] -= (
+                log["power"][full] - power_at_bus
+            ) / charging_efficiency
+            log["power"][full] = power_at_bus
 
     def precondition(self):
         """Writes only the power in the power DF not in the charging logs. Writes the power always in all three charging type columns"""
 
         self.power = self.power.sort_values(by=["start_time"])
+        start_time, end_time, _ = self.power_arrays()
+        columns = ["used_power_immediately", "used_power_smart", "precondition"]
         self.power["precondition"] = float(0)
-        for ID_bus, row_bus in self.precondition_schedule.iterrows():
-            for ID_power, row_power in self.power.iterrows():
-                interval = self.intersection(
-                    [row_power.start_time, row_power.end_time],
-                    [row_bus.time_start, row_bus.time_ends],
-                )
-                if isinstance(interval, list):
-                    factor_power_used = (interval[1] - interval[0]) / (
-                        row_power.end_time - row_power.start_time
-                    )
-                    power = (
-                        row_bus.charging_power / row_bus.charging_efficiency
-                    ) * factor_power_used
-                    self.power.at[ID_power, "used_power_immediately"] += power
-                    self.power.at[ID_power, "used_power_smart"] += power
-                    # self.power.at[ID_power,"used_power_smart_even"] += power
-                    self.power.at[ID_power, "precondition"] += power
+        used_power = {
+            column: self.power[column].to_numpy(dtype=float, copy=True)
+            for column in columns
+        }
+        for row_bus in self.precondition_schedule.itertuples():
+            lower = np.maximum(start_time, row_bus.time_start)
+            upper = np.minimum(end_time, row_bus.time_ends)
+            intervals = np.flatnonzero(lower < upper)
+            factor_power_used = (upper[intervals] - lower[intervals]) / (
+                end_time[intervals] - start_time[intervals]
+            )
+            power = (
+                row_bus.charging_power / row_bus.charging_efficiency
+            ) * factor_power_used
+            for column in columns:
+                used_power[column][intervals] += power
+        for column in columns:
+            self.power[column] = used_power[column]
 
     def plot_results(self, language="eng"):
         """
@@ -735,7 +861,7 @@ class SmartCharging:
         y_max = max(used_power_immediately) + 2000
 
         fig, ax1 = plt.subplots(figsize=(7, 4.5))
-        eflips.depot.evaluation.setting_language(language)
+        setting_language(language)
 
         if language == "eng":
             ax1.set_xlabel("Time")
@@ -747,7 +873,7 @@ class SmartCharging:
         )
 
         # Convert x axis seconds to dates
-        eflips.depot.evaluation.to_dateaxis(ax1)
+        to_dateaxis(ax1)
 
         # plot used_power_smart
         if "used_power_smart" in power:
@@ -1263,6 +1389,35 @@ class SmartCharging:
         print("Smart charging is valid: " + str(valid))
 
 
+def search_lowest(probe, lower, upper, accuracy, threads=1):
+    """
+    Narrows down the lowest value for which probe is True by bisection. probe has to be False for lower and True for
+    upper and is assumed to be monotonous. With threads > 1, that many values are probed in parallel per step, which
+    divides the interval into threads + 1 parts.
+    :param probe: function of a number that returns a bool
+    :param accuracy: relative accuracy (upper - lower) / lower at which the search stops
+    :return: lower, upper
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while (upper - lower) / lower > accuracy:
+            candidates = [
+                lower + (upper - lower) * (no + 1) / (threads + 1)
+                for no in range(threads)
+            ]
+            if threads > 1:
+                results = list(executor.map(probe, candidates))
+            else:
+                results = [probe(candidates[0])]
+            for candidate, result in zip(candidates, results):
+                if result:
+                    upper = candidate
+                    break
+                lower = candidate
+    return lower, upper
+
+
 class ControlSmartCharging:
     """Some control units for the Smart Charging class. Does multiple runs with the same basic settings."""
 
@@ -1281,74 +1436,65 @@ class ControlSmartCharging:
         :param price_data_path:
         :param power_limit_grid: int or list of powerlimits (15 min intervalls) [or an function] not yet implemnted
         :param capacity_charge: "Jahresleistungspreis" in EUR/kW*a
-        :param charging_efficiency:
+        :param charging_efficiency: not used, the charging efficiency is part of the schedule
         """
         self.smart_charging = eflips.depot.SmartCharging(
-            data, start_date, price_data_path, power_limit_grid, charging_efficiency
+            data, start_date, price_data_path, power_limit_grid
         )
-        self.power_limit_gird = power_limit_grid
+        self.power_limit_grid = power_limit_grid
 
-    def lowest_power(self, accuracy):
+    def lowest_power(self, accuracy, threads=1, plot=True):
         """
         Uses as the first upper boundary the max power of immediately charging, if no power_limit_grid is given, only works if the power_limit_grid is an int
+        The boundaries are first narrowed down with the flow test SmartCharging.flow_feasible, which is a lower bound
+        for the success of smart charging. smart_charging_algorithm is only probed between this lower bound and the
+        upper boundary, and the charging logs are only computed for the final upper boundary.
         :param accuracy: in percent
+        :param threads: number of power limits that are probed in parallel
+        :param plot: if True, plots the results
         :return: results of the last succesful power run, power_lower_boundary and power_upper_boundary
         """
         accuracy = accuracy / 100
-        if not (isinstance(self.power_limit_grid, int)):
+        if not (isinstance(self.power_limit_grid, (int, float))):
             raise Exception(
                 "Function (lowest_power) only works if, the power_limit_grid is an integer."
             )
-        if self.power_limit_gird <= 0:
-            potential_power_boundary = self.power.max().used_power_immediately
+        smart_charging = self.smart_charging
+        if self.power_limit_grid <= 0:
+            power_upper_boundary = smart_charging.power.max().used_power_immediately
         else:
-            potential_power_boundary = self.power_limit_gird
-        power_upper_boundary = potential_power_boundary
+            power_upper_boundary = self.power_limit_grid
         power_lower_boundary = 1  # because of not dividing by zero
 
-        self.smart_charging.set_power_limit_grid(potential_power_boundary)
-        if self.smart_charging.smart_charging_algorithm():
-            power_upper_boundary = potential_power_boundary
-            potential_power_boundary = (
-                power_upper_boundary - (power_upper_boundary - power_lower_boundary) / 2
-            )
-            deviation = (
-                power_upper_boundary - power_lower_boundary
-            ) / power_lower_boundary
-        else:
+        smart_charging.power = smart_charging.power.sort_values(by=["price"])
+        if not smart_charging.smart_charging_possible(power_upper_boundary):
             print("Power limit grid is to low.")
             return
 
-        while accuracy < deviation:
-            self.smart_charging.set_power_limit_grid(potential_power_boundary)
-            if self.smart_charging.smart_charging_algorithm():
-                power_upper_boundary = potential_power_boundary
-                potential_power_boundary = (
-                    power_upper_boundary
-                    - (power_upper_boundary - power_lower_boundary) / 2
-                )
-                deviation = (
-                    power_upper_boundary - power_lower_boundary
-                ) / power_lower_boundary
-            else:
-                power_lower_boundary = potential_power_boundary
-                potential_power_boundary = (
-                    power_upper_boundary
-                    - (power_upper_boundary - power_lower_boundary) / 2
-                )
-                deviation = (
-                    power_upper_boundary - power_lower_boundary
-                ) / power_lower_boundary
-
-        # Just for safety.
-        self.smart_charging.set_power_limit_grid(power_upper_boundary)
-        self.smart_charging.smart_charging_algorithm()
+        # Warm start: no charging schedule exists below the lower boundary of the flow test
+        power_lower_boundary, flow_upper_boundary = search_lowest(
+            smart_charging.flow_feasible,
+            power_lower_boundary,
+            power_upper_boundary,
+            accuracy,
+            threads,
+        )
+        if smart_charging.smart_charging_possible(flow_upper_boundary):
+            power_upper_boundary = flow_upper_boundary
+        else:
+            power_lower_boundary, power_upper_boundary = search_lowest(
+                smart_charging.smart_charging_possible,
+                flow_upper_boundary,
+                power_upper_boundary,
+                accuracy,
+                threads,
+            )
 
-        self.smart_charging.immediately_charging()
+        smart_charging.set_power_limit_grid(power_upper_boundary)
+        smart_charging.smart_charging_algorithm()
 
-        self.smart_charging.smart_charging_algorithm_even()
-        self.smart_charging.plot_results()
-        self.smart_charging.plot_charging_intervalls_smart()
-        self.smart_charging.plot_charging_intervalls_smart_even()
+        if plot:
+            smart_charging.plot_results()
+            smart_charging.plot_charging_intervalls_smart()
 
         return self.smart_charging.results(), power_lower_boundary, power_upper_boundary
@@ -11,7 +11,7 @@ simulation.
 from math import ceil
 from warnings import warn
 
-from eflips.evaluation import DataLogger
+from eflips.depot.data_logger import create_logger
 from eflips.helperFunctions import flexprint
 from eflips.settings import globalConstants
 from xlrd import open_workbook
@@ -40,7 +40,7 @@ class VehicleGenerator(BackgroundStore):
         self.map_depots = {depot.ID: depot for depot in depots}
 
         if globalConstants["general"]["LOG_ATTRIBUTES"]:
-            self.logger = DataLogger(self.env, self, "BACKGROUNDSTORE")
+            self.logger = create_logger(self.env, self, "BACKGROUNDSTORE")
 
     def run(self, depots):
         """Intialize vehicles based on data in eflips settings. Executed and
@@ -214,7 +214,7 @@ class SimpleTrip:
         self.atd = None
         self.ata = None
 
-        self.vehicle = None
+        self._vehicle = None
         self.reserved_for_init = False
         self.vehicle_from = None
 
@@ -229,6 +229,19 @@ class SimpleTrip:
     def __repr__(self):
         return "{%s} %s" % (type(self).__name__, self.ID)
 
+    @property
+    def vehicle(self):
+        return self._vehicle
+
+    @vehicle.setter
+    def vehicle(self, value):
+        previous = self._vehicle
+        self._vehicle = value
+        if (value is None) is not (previous is None):
+            pending_departures = getattr(self.origin, "pending_departures", None)
+            if pending_departures is not None:
+                pending_departures.update_assignment(self)
+
     @property
     def vehicle_types_str(self):
         """Return IDs of self.vehicle_types in a list."""
@@ -549,13 +562,19 @@ def timetabledata_from_excel(filename):
     return ExcelSheetData(filename, "Tripdata")
 
 
-def timetable_from_timetabledata(env, timetabledata):
+def timetable_from_timetabledata(env, timetabledata, trip_args=None):
     """Initialize and return a Timetable instance with SimpleTrip objects
     based on *timetabledata*.
 
     timetabledata: [ExcelSheetData] from timetabledata_from_excel()
+    trip_args: [tuple or None] result of
+        timetabledata_to_trip_args(timetabledata) to skip the conversion, e.g.
+        when simulating the same timetable many times.
     """
-    trips = timetabledata_to_trips(env, timetabledata)
+    if trip_args is None:
+        trips = timetabledata_to_trips(env, timetabledata)
+    else:
+        trips = trips_from_trip_args(env, trip_args)
     timetable = Timetable(env, trips)
     return timetable
 
@@ -568,11 +587,20 @@ def timetabledata_to_trips(env, timetabledata):
         to be sorted by std in ascending order because run() relies on
         this order. In init(), trips is created from this data.
     """
+    return trips_from_trip_args(env, timetabledata_to_trip_args(timetabledata))
+
+
+def timetabledata_to_trip_args(timetabledata):
+    """Convert route data from excel to a tuple of SimpleTrip arguments
+    (excluding env). The result is immutable and can be reused to create
+    trips for multiple simulations with trips_from_trip_args.
+
+    timetabledata: see timetabledata_to_trips
+    """
     assert timetabledata.check_for_same_length()
     datamap = timetabledata.map_headers()
 
-    # Instantiate SimpleTrip objects from the Excel data
-    trips = []
+    trip_args = []
     for entry in timetabledata.data[1:]:
         # At least one of trip's vehicle_types entry must be specified in
         # globalConstants
@@ -582,14 +610,13 @@ def timetabledata_to_trips(env, timetabledata):
                 for vt in entry[datamap["vehicle_types"]].split(", ")
             ]
         ):
-            trips.append(
-                SimpleTrip(
-                    env,
+            trip_args.append(
+                (
                     str(entry[datamap["ID"]]),
                     str(entry[datamap["line_name"]]),
                     entry[datamap["origin"]],
                     entry[datamap["destination"]],
-                    entry[datamap["vehicle_types"]].split(", "),
+                    tuple(entry[datamap["vehicle_types"]].split(", ")),
                     int(round(entry[datamap["std [s]"]])),
                     int(round(entry[datamap["sta [s]"]])),
                     entry[datamap["distance [km]"]],
@@ -610,4 +637,15 @@ def timetabledata_to_trips(env, timetabledata):
                     globalConstants["FILENAME_SETTINGS"],
                 )
             )
-    return trips
+    return tuple(trip_args)
+
+
+def trips_from_trip_args(env, trip_args):
+    """Instantiate SimpleTrip objects from the result of
+    timetabledata_to_trip_args.
+    """
+    # vehicle_types is converted during simulation and therefore copied
+    return [
+        SimpleTrip(env, ID, line_name, origin, destination, list(vehicle_types), *rest)
+        for ID, line_name, origin, destination, vehicle_types, *rest in trip_args
+    ]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar tables of vehicle stays and process intervals for the evaluation
+after the simulation.
+
+The tables are extracted once from the vehicle loggers and process logs and
+are the basis for aggregations in DepotEvaluation, such as congestion,
+occupancy rates and idle times.
+
+"""
+import numpy as np
+import pandas as pd
+
+from eflips.depot.export import logged_items
+
+STAY_COLUMNS = [
+    "vehicle",
+    "vehicle_type",
+    "visit",
+    "area",
+    "issink",
+    "slot",
+    "start",
+    "end",
+    "finished",
+    "waiting",
+]
+
+
+def stay_table(vehicles, end):
+    """Return a DataFrame with one row per stay of a vehicle at a slot of an
+    area. Requires logging of vehicle attributes.
+
+    vehicles: [iterable] of SimpleVehicle
+    end: [int] end of stays that lasted until the end of the simulation
+
+    Columns:
+    vehicle, vehicle_type: [str] IDs
+    visit: [int] number of the depot visit of the vehicle, starting at 0
+    area: [str] area ID
+    issink: [bool] True if the area is a sink (parking area)
+    slot: [int] slot number
+    start, end: time of entering and leaving the slot
+    finished: [bool] False if the stay lasted until the end of the simulation
+    waiting: time the vehicle waited for entering the area
+    """
+    columns = {name: [] for name in STAY_COLUMNS}
+
+    def close(vehicle, visit, area, slot, start, t, finished, waiting):
+        columns["vehicle"].append(vehicle.ID)
+        columns["vehicle_type"].append(vehicle.vehicle_type.ID)
+        columns["visit"].append(visit)
+        columns["area"].append(area.ID)
+        columns["issink"].append(area.issink)
+        columns["slot"].append(slot)
+        columns["start"].append(start)
+        columns["end"].append(t)
+        columns["finished"].append(finished)
+        columns["waiting"].append(waiting)
+
+    for vehicle in vehicles:
+        logged_data = vehicle.logger.loggedData
+        slots = dict(logged_items(vehicle.logger, "dwd.current_slot"))
+        waiting_times = logged_data["area_waiting_time"]
+
+        visit = -1
+        current = None
+        for t, area in logged_items(vehicle.logger, "dwd.current_area"):
+            key = (area, slots.get(t)) if area is not None else None
+            if key == current:
+                continue
+            if current is not None:
+                close(vehicle, visit, *current, start, t, True, waiting)
+            if key is not None:
+                if current is None:
+                    visit += 1
+                start = t
+                entry = waiting_times.get(t)
+                waiting = (
+                    entry["waiting_time"]
+                    if entry is not None and entry["area"] == area.ID
+                    else 0
+                )
+            current = key
+
+        if current is not None:
+            close(vehicle, visit, *current, start, end, False, waiting)
+
+    return pd.DataFrame(columns, columns=STAY_COLUMNS)
+
+
+def depot_periods(stays):
+    """Return a DataFrame with one row per depot visit with the columns
+    vehicle, vehicle_type, visit, start (entry of the first area), end (exit
+    from the depot) and finished.
+
+    stays: [DataFrame] as returned by stay_table
+    """
+    return (
+        stays.groupby(["vehicle", "visit"], sort=False)
+        .agg(
+            vehicle_type=("vehicle_type", "first"),
+            start=("start", "first"),
+            end=("end", "last"),
+            finished=("finished", "last"),
+        )
+        .reset_index()
+    )
+
+
+def park_periods(stays):
+    """Return a DataFrame with one row per depot visit that included parking
+    with the columns vehicle, vehicle_type, visit, start (entry of the first
+    parking area), end (exit from the depot) and finished.
+
+    stays: [DataFrame] as returned by stay_table
+    """
+    visits = stays.groupby(["vehicle", "visit"], sort=False).agg(
+        end=("end", "last"), finished=("finished", "last")
+    )
+    parking = (
+        stays[stays["issink"]]
+        .groupby(["vehicle", "visit"], sort=False)
+        .agg(vehicle_type=("vehicle_type", "first"), start=("start", "first"))
+    )
+    periods = parking.join(visits).reset_index()
+    return periods[["vehicle", "vehicle_type", "visit", "start", "end", "finished"]]
+
+
+def iter_process_intervals(vehicle, process_IDs, end):
+    """Yield (process ID, start, end) for each start of a process of *vehicle*
+    with an ID in *process_IDs*. *end* is used for processes that were not
+    finished at the end of the simulation.
+    """
+    # Processes in the order of their first start
+    for process in dict.fromkeys(vehicle.dwd.process_log.processes):
+        if process.ID in process_IDs:
+            for startno, start in enumerate(process.starts):
+                if startno < len(process.ends):
+                    yield process.ID, start, process.ends[startno]
+                else:
+                    yield process.ID, start, end
+
+
+def process_intervals(vehicles, process_IDs, end):
+    """Return a DataFrame with one row per start of a process with an ID in
+    *process_IDs* with the columns vehicle, process, start and end. See
+    iter_process_intervals.
+    """
+    process_IDs = set(process_IDs)
+    rows = [
+        (vehicle.ID, *interval)
+        for vehicle in vehicles
+        for interval in iter_process_intervals(vehicle, process_IDs, end)
+    ]
+    return pd.DataFrame(rows, columns=["vehicle", "process", "start", "end"])
+
+
+def clip_durations(start, end, xlim):
+    """Return the lengths of intervals [start, end] within *xlim* as array.
+    Intervals outside of *xlim* have length 0.
+    """
+    lower = np.maximum(np.asarray(start), xlim[0])
+    upper = np.minimum(np.asarray(end), xlim[1])
+    return np.maximum(upper - lower, 0)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Sparse step-function time series for the evaluation of logged data.
+
+Logged values such as vehicle counts, power or stress levels only change at
+events. StepSeries stores the change points and values as NumPy arrays
+instead of one value per simulated second and supports the operations that
+are used by DepotEvaluation. Dense per-second arrays are only created by
+StepSeries.to_dense.
+
+"""
+from functools import reduce
+import operator
+
+import numpy as np
+
+
+class StepSeries:
+    """Piecewise constant time series on the interval [start, end).
+
+    The value at time t is values[i] for times[i] <= t < times[i + 1]. The
+    first change point is always at *start*. Consecutive equal values are
+    merged.
+
+    Parameters:
+    times: [iterable] of int change point times in ascending order.
+    values: [iterable] of values at *times*, same length as *times*.
+    end: [int] exclusive upper bound of the series, e.g. SIMULATION_TIME.
+    first: value before the first change point.
+    start: [int] inclusive lower bound of the series. Change points before
+        *start* only determine the value at *start*.
+
+    Attributes:
+    times: [np.ndarray] of int64 change point times
+    values: [np.ndarray] of values at times
+    """
+
+    def __init__(self, times, values, end, first=0, start=0):
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values)
+        if not values.size:
+            values = np.asarray([], dtype=np.asarray(first).dtype)
+        self.start = int(start)
+        self.end = int(end)
+
+        if self.end <= self.start:
+            self.times = np.empty(0, dtype=np.int64)
+            self.values = values[:0]
+            return
+
+        # Value at start from the last change point before or at start
+        i0 = np.searchsorted(times, self.start, side="right")
+        i1 = np.searchsorted(times, self.end, side="left")
+        initial = values[i0 - 1] if i0 else first
+        times = np.concatenate(([self.start], times[i0:i1]))
+        values = np.concatenate((np.asarray([initial]), values[i0:i1]))
+
+        # Last value of equal times, then merge equal consecutive values
+        keep = np.ones(len(times), dtype=bool)
+        keep[:-1] = times[1:] != times[:-1]
+        times = times[keep]
+        values = values[keep]
+        keep = np.ones(len(times), dtype=bool)
+        keep[1:] = values[1:] != values[:-1]
+        self.times = times[keep]
+        self.values = values[keep]
+
+    @classmethod
+    def from_items(cls, items, end, first=0, start=0, subkeys=None):
+        """Create a StepSeries from (time, value) pairs in ascending order of
+        time. Values that are None are ignored, i.e. the previous value
+        continues.
+
+        subkeys: [list] of keys that may be supplied if values are dicts,
+            optionally further nested. The series value is then extracted from
+            the dict with all keys.
+        """
+        times = []
+        values = []
+        for t, value in items:
+            if subkeys:
+                value = reduce(operator.getitem, subkeys, value)
+            if value is not None:
+                times.append(t)
+                values.append(value)
+        return cls(times, values, end, first, start)
+
+    @classmethod
+    def from_dict(cls, data, end, first=0, start=0, subkeys=None):
+        """Create a StepSeries from a dict {time: value} of discrete logs,
+        e.g. power_logs or sl_logs. See from_items.
+        """
+        return cls.from_items(sorted(data.items()), end, first, start, subkeys)
+
+    @classmethod
+    def from_logger(cls, logger, attr, end, first=0, start=0):
+        """Create a StepSeries from the values of *attr* logged by *logger*
+        (DataLogger or ColumnarLogger).
+        """
+        data = logger.loggedData
+        if hasattr(data, "items_of"):
+            items = data.items_of(attr)
+        else:
+            items = sorted(data[attr].items())
+        return cls.from_items(items, end, first, start)
+
+    @classmethod
+    def constant(cls, value, end, start=0):
+        return cls([start], [value], end, start=start)
+
+    @classmethod
+    def sum(cls, series, end=None, start=0):
+        """Return the sum of an iterable of StepSeries. *end* and *start* are
+        only used if *series* is empty.
+        """
+        series = list(series)
+        if not series:
+            return cls.constant(0, end, start)
+        return cls.combine(series, np.add)
+
+    @classmethod
+    def combine(cls, series, ufunc):
+        """Apply binary *ufunc* such as np.add or np.maximum to a list of
+        StepSeries with equal bounds.
+        """
+        first = series[0]
+        if any(s.start != first.start or s.end != first.end for s in series):
+            raise ValueError("StepSeries must have the same start and end.")
+        times = reduce(np.union1d, (s.times for s in series))
+        values = reduce(ufunc, (s.at(times) for s in series))
+        return cls(times, values, first.end, start=first.start)
+
+    def __len__(self):
+        """Return the number of time steps, like the length of the dense
+        series.
+        """
+        return max(self.end - self.start, 0)
+
+    def __repr__(self):
+        return "{StepSeries} [%d, %d) %d change points" % (
+            self.start,
+            self.end,
+            len(self.times),
+        )
+
+    def _apply(self, other, ufunc):
+        if isinstance(other, StepSeries):
+            return StepSeries.combine([self, other], ufunc)
+        return StepSeries(
+            self.times, ufunc(self.values, other), self.end, start=self.start
+        )
+
+    def __add__(self, other):
+        return self._apply(other, np.add)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._apply(other, np.subtract)
+
+    def __mul__(self, other):
+        return self._apply(other, np.multiply)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return StepSeries(self.times, -self.values, self.end, start=self.start)
+
+    def maximum(self, other):
+        return self._apply(other, np.maximum)
+
+    def minimum(self, other):
+        return self._apply(other, np.minimum)
+
+    @property
+    def durations(self):
+        """Number of time steps per change point."""
+        return np.diff(self.times, append=self.end)
+
+    def at(self, t):
+        """Return the value(s) at time(s) *t* within [start, end)."""
+        return self.values[np.searchsorted(self.times, t, side="right") - 1]
+
+    def window(self, start=None, end=None):
+        """Return the series restricted to [start, end)."""
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        return StepSeries(self.times, self.values, end, start=start)
+
+    def min(self):
+        if not self.times.size:
+            raise ValueError("min() of an empty StepSeries")
+        return self.values.min()
+
+    def max(self):
+        if not self.times.size:
+            raise ValueError("max() of an empty StepSeries")
+        return self.values.max()
+
+    def integral(self):
+        """Return the sum of the values over all time steps."""
+        return np.dot(self.values, self.durations)
+
+    def mean(self):
+        """Return the mean of the values over all time steps."""
+        return self.integral() / len(self)
+
+    def quantile_step(self, k):
+        """Return the *k*-th smallest of the values over all time steps."""
+        order = np.argsort(self.values, kind="stable")
+        cumulated = np.cumsum(self.durations[order])
+        return self.values[order[np.searchsorted(cumulated, k, side="right")]]
+
+    def median(self):
+        """Return the median of the values over all time steps like
+        np.median of the dense series.
+        """
+        n = len(self)
+        if not n:
+            return np.nan
+        return np.mean([self.quantile_step((n - 1) // 2), self.quantile_step(n // 2)])
+
+    def resample(self, step, how="mean"):
+        """Return a series with change points every *step* time steps
+        starting at start. *how* is 'mean', 'max' or 'min' and determines the
+        value of each interval.
+        """
+        grid = np.arange(self.start, self.end, step, dtype=np.int64)
+        times = np.union1d(self.times, grid)
+        values = self.at(times)
+        bins = np.searchsorted(times, grid)
+        if how == "mean":
+            durations = np.diff(times, append=self.end)
+            sums = np.add.reduceat(values * durations, bins)
+            values = sums / np.diff(grid, append=self.end)
+        elif how == "max":
+            values = np.maximum.reduceat(values, bins)
+        elif how == "min":
+            values = np.minimum.reduceat(values, bins)
+        else:
+            raise ValueError("Unknown resampling method '%s'" % how)
+        return StepSeries(grid, values, self.end, start=self.start)
+
+    def to_dense(self, dtype=None):
+        """Return an array with one value per time step. The default dtype is
+        int32 for integer and float32 for other values.
+        """
+        if dtype is None:
+            if np.issubdtype(self.values.dtype, np.integer) or (
+                self.values.dtype == bool
+            ):
+                dtype = np.int32
+            else:
+                dtype = np.float32
+        return np.repeat(self.values.astype(dtype), self.durations)
+
+    def xy(self):
+        """Return x and y arrays for plotting with drawstyle 'steps-post'."""
+        x = np.append(self.times, self.end)
+        y = np.append(self.values, self.values[-1:])
+        return x, y
+
+    def plot(self, ax, *args, **kwargs):
+        """Plot the series on matplotlib axes *ax* as steps. Further
+        arguments are passed to ax.plot.
+        """
+        return ax.plot(*self.xy(), *args, drawstyle="steps-post", **kwargs)
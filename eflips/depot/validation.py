@@ -1,14 +1,102 @@
 """
 Validation tests for after executing the depot simulation.
 
+The periods-related tests check all vehicles at once. Periods are collected
+as NumPy arrays of vehicle numbers, starts and ends from the stay table and
+the vehicle index of DepotEvaluation. Containment and overlap are then
+determined by sorting the periods by (vehicle, start) and binary search
+instead of comparing the period lists of each vehicle pairwise.
+
 """
 from collections import Counter
 
+import numpy as np
+import pandas as pd
+
+from eflips.depot.stays import depot_periods, park_periods
+
+
+def _encode(*pairs):
+    """Encode (vehicle numbers, times) array pairs as int64 keys that sort
+    like the tuples (vehicle number, time). Times are replaced by their rank
+    among all times in *pairs*, so that keys cannot overflow.
+
+    Returns a list of key arrays, one per pair.
+    """
+    times = np.concatenate([t for _, t in pairs])
+    unique, inverse = np.unique(times, return_inverse=True)
+    base = len(unique)
+    keys = []
+    position = 0
+    for vehicles, t in pairs:
+        n = len(t)
+        keys.append(
+            np.asarray(vehicles, dtype=np.int64) * base
+            + inverse[position : position + n]
+        )
+        position += n
+    return keys
+
+
+def _latest_end(box_starts, box_ends, queries, strict):
+    """Return the maximum end key of the boxes that start at or before
+    (strict=False) or before (strict=True) each of the *queries* keys, or -1
+    if there is none.
+
+    Since the vehicle number is the leading part of the keys, the ends of
+    boxes of a preceding vehicle are smaller than any key of the queried
+    vehicle and are never counted as covering.
+    """
+    order = np.argsort(box_starts, kind="stable")
+    starts = box_starts[order]
+    max_ends = np.maximum.accumulate(box_ends[order]) if len(order) else box_ends
+    positions = np.searchsorted(starts, queries, side="left" if strict else "right") - 1
+    result = np.full(len(queries), -1, dtype=np.int64)
+    found = positions >= 0
+    result[found] = max_ends[positions[found]]
+    return result
+
+
+def contained(boxes, items):
+    """Return a bool array that is True for each period in *items* that lies
+    within a period in *boxes* of the same vehicle (bounds included).
+
+    boxes, items: [tuple] of arrays (vehicle numbers, starts, ends)
+    """
+    box_starts, box_ends, item_starts, item_ends = _encode(
+        (boxes[0], boxes[1]),
+        (boxes[0], boxes[2]),
+        (items[0], items[1]),
+        (items[0], items[2]),
+    )
+    return _latest_end(box_starts, box_ends, item_starts, strict=False) >= item_ends
+
+
+def strictly_inside(boxes, vehicles, times):
+    """Return a bool array that is True for each point in time in *times* that
+    lies strictly inside a period in *boxes* of the same vehicle.
+
+    boxes: [tuple] of arrays (vehicle numbers, starts, ends)
+    vehicles, times: [np.ndarray] vehicle number and time of the points
+    """
+    box_starts, box_ends, points = _encode(
+        (boxes[0], boxes[1]), (boxes[0], boxes[2]), (vehicles, times)
+    )
+    return _latest_end(box_starts, box_ends, points, strict=True) > points
+
 
 class Validator:
     """
 
     ev: [DepotEvaluation]
+
+    Attributes:
+    results: [dict] of test name and result dict with the keys 'valid'
+        [bool], 'checked' [int] number of checked periods or trips, 'failed'
+        [int] number of failures and test-specific data. The periods-related
+        tests have 'result' [dict] of vehicle ID and list of bool per period
+        in ascending order of start, and 'failures' [list] of tuples
+        (vehicle ID, start, end) of the periods that failed.
     """
 
     def __init__(self, ev):
@@ -30,166 +118,110 @@ class Validator:
             'serve': 'serve',
             'charge': ['charge_dc', 'charge_oc']}
         """
-        # Unpack names for getting data
-        period_names = []
-        for v in periods_map.values():
-            if isinstance(v, str):
-                period_names.append(v)
-            else:
-                for vi in v:
-                    period_names.append(vi)
-
-        # Get data
-        vehicledata = {}
-        vehicle_no = 0
-        for vehicle in self.ev.vehicle_generator.items:
-            vehicledata[vehicle.ID] = {}
-            vehicledata[vehicle.ID]["plotdata"] = self.ev.get_periods(
-                vehicle, vehicle_no, periods=period_names
-            )
-            vehicle_no += 1
+        self._vehicle_IDs = [vehicle.ID for vehicle in self.ev.vehicle_generator.items]
+        self._vehicle_nos = {ID: no for no, ID in enumerate(self._vehicle_IDs)}
+
+        # Get data for all vehicles
+        stays = self.ev.get_stay_table()
+        generals = self._from_frame(depot_periods(stays))
+        parks = self._from_frame(park_periods(stays))
+        charges = self._from_processes(periods_map["charge"])
+        serves = self._from_processes([periods_map["serve"]])
 
         # Run specific tests
-        self._park_inside_depot(
-            vehicledata,
-            name_general=periods_map["depot general"],
-            name_park=periods_map["park"],
+        self._periods_result("park_inside_depot", parks, contained(generals, parks))
+        self._periods_result("charge_inside_park", charges, contained(parks, charges))
+        self._periods_result(
+            "service_outside_park",
+            serves,
+            ~(
+                strictly_inside(parks, serves[0], serves[1])
+                | strictly_inside(parks, serves[0], serves[2])
+            ),
         )
-        self._charge_inside_park(
-            vehicledata,
-            name_park=periods_map["park"],
-            names_charge=periods_map["charge"],
+        trips = self._trips()
+        self._periods_result(
+            "trip_outside_depot",
+            trips,
+            ~(
+                strictly_inside(generals, trips[0], trips[1])
+                | strictly_inside(generals, trips[0], trips[2])
+            ),
         )
-        self._service_outside_park(
-            vehicledata, name_park=periods_map["park"], name_serve=periods_map["serve"]
+
+    @staticmethod
+    def _sorted(vehicles, starts, ends):
+        """Return the periods as arrays sorted by vehicle and start. Times are
+        truncated to full seconds like the times of logged vehicle areas.
+        """
+        vehicles = np.asarray(vehicles, dtype=np.int64)
+        starts = np.floor(np.asarray(starts, dtype=float)).astype(np.int64)
+        ends = np.floor(np.asarray(ends, dtype=float)).astype(np.int64)
+        order = np.lexsort((starts, vehicles))
+        return vehicles[order], starts[order], ends[order]
+
+    def _from_frame(self, periods):
+        """Return the periods in DataFrame *periods* with the columns vehicle,
+        start and end as arrays.
+        """
+        return self._sorted(
+            periods["vehicle"].map(self._vehicle_nos).to_numpy(),
+            periods["start"].to_numpy(),
+            periods["end"].to_numpy(),
         )
-        self._trip_outside_depot(vehicledata, name_general=periods_map["depot general"])
-
-    def _park_inside_depot(self, vehicledata, name_general, name_park):
-        """Check if all parking periods are inside general depot periods."""
-        result = {}
-        for vID in vehicledata:
-            generals = vehicledata[vID]["plotdata"][name_general]["xranges"]
-            parks = vehicledata[vID]["plotdata"][name_park]["xranges"]
-
-            found = [False] * len(parks)
-            i = 0
-            for park_start, park_dur in parks:
-                for general_start, general_dur in generals:
-                    if (
-                        park_start >= general_start
-                        and park_start + park_dur <= general_start + general_dur
-                    ):
-                        found[i] = True
-                        i += 1
-                        break
-            result[vID] = found
-
-        valid = True
-        for ri in result.values():
-            if not all(ri):
-                valid = False
-                break
-
-        self.results["park_inside_depot"] = {"valid": valid, "result": result}
-
-    def _charge_inside_park(self, vehicledata, name_park, names_charge):
-        """Check if all charging periods are inside parking periods.
-
-        names_charge relies on vehicles only having one type of charging
-        process (e.g. charge_fc or charge_oc, but not both)
+
+    def _from_processes(self, process_IDs):
+        """Return the intervals of the processes with an ID in *process_IDs*
+        as arrays.
+        """
+        index = self.ev.get_vehicle_index()
+        vehicles, starts, ends = [], [], []
+        for process_ID in process_IDs:
+            process_starts, process_ends, vehicle_IDs = index.intervals_of(process_ID)
+            vehicles.extend(self._vehicle_nos[ID] for ID in vehicle_IDs)
+            starts.append(process_starts)
+            ends.append(process_ends)
+        if not starts:
+            return self._sorted([], [], [])
+        return self._sorted(vehicles, np.concatenate(starts), np.concatenate(ends))
+
+    def _trips(self):
+        """Return departure and arrival times of the finished trips as
+        arrays.
         """
-        result = {}
-        for vID in vehicledata:
-            parks = vehicledata[vID]["plotdata"][name_park]["xranges"]
-            # Find the applicable charging process name
-            for name_charge in names_charge:
-                # if 'GN' in vID:
-                #     print(vID, name_charge)
-                #     print(vehicledata[vID]['plotdata'])
-                if vehicledata[vID]["plotdata"][name_charge]["xranges"]:
-                    break
-            charges = vehicledata[vID]["plotdata"][name_charge]["xranges"]
-
-            found = [False] * len(charges)
-            i = 0
-            for charge_start, charge_dur in charges:
-                for park_start, park_dur in parks:
-                    if (
-                        charge_start >= park_start
-                        and charge_start + charge_dur <= park_start + park_dur
-                    ):
-                        found[i] = True
-                        i += 1
-                        break
-            result[vID] = found
-
-        valid = True
-        for ri in result.values():
-            if not all(ri):
-                valid = False
-                break
-
-        self.results["charge_inside_park"] = {"valid": valid, "result": result}
-
-    def _service_outside_park(self, vehicledata, name_park, name_serve):
-        """Check if all service periods are outside parking periods."""
-        result = {}
-        for vID in vehicledata:
-            parks = vehicledata[vID]["plotdata"][name_park]["xranges"]
-            serves = vehicledata[vID]["plotdata"][name_serve]["xranges"]
-
-            not_found = [True] * len(serves)
-            i = 0
-            for serve_start, serve_dur in serves:
-                for park_start, park_dur in parks:
-                    park_end = park_start + park_dur
-                    if (
-                        park_start < serve_start < park_end
-                        or park_start < serve_start + serve_dur < park_end
-                    ):
-                        not_found[i] = False
-                        i += 1
-                        break
-            result[vID] = not_found
-
-        valid = True
-        for ri in result.values():
-            if not all(ri):
-                valid = False
-                break
-
-        self.results["service_outside_park"] = {"valid": valid, "result": result}
-
-    def _trip_outside_depot(self, vehicledata, name_general):
-        """Check if all trip periods are outside general depot periods."""
-        result = {}
-
-        for vID in vehicledata:
-            generals = vehicledata[vID]["plotdata"][name_general]["xranges"]
-            trips = self.ev.vehicle_generator.select(vID).finished_trips
-
-            not_found = [True] * len(trips)
-            i = 0
-            for trip in trips:
-                for general_start, general_dur in generals:
-                    general_end = general_start + general_dur
-                    if (
-                        general_start < trip.atd < general_end
-                        or general_start < trip.ata < general_end
-                    ):
-                        not_found[i] = False
-                        i += 1
-                        break
-            result[vID] = not_found
-
-        valid = True
-        for ri in result.values():
-            if not all(ri):
-                valid = False
-                break
-
-        self.results["trip_outside_depot"] = {"valid": valid, "result": result}
+        vehicles, atds, atas = [], [], []
+        for no, vehicle in enumerate(self.ev.vehicle_generator.items):
+            for trip in vehicle.finished_trips:
+                vehicles.append(no)
+                atds.append(trip.atd)
+                atas.append(trip.ata)
+        return self._sorted(vehicles, atds, atas)
+
+    def _periods_result(self, name, periods, passed):
+        """Store the result of a periods-related test in self.results.
+
+        periods: [tuple] of arrays (vehicle numbers, starts, ends) sorted by
+            vehicle
+        passed: [np.ndarray] of bool per period
+        """
+        vehicles, starts, ends = periods
+        bounds = np.searchsorted(vehicles, np.arange(len(self._vehicle_IDs) + 1))
+        passed_list = passed.tolist()
+        result = {
+            ID: passed_list[bounds[no] : bounds[no + 1]]
+            for no, ID in enumerate(self._vehicle_IDs)
+        }
+        failed = np.flatnonzero(~passed)
+        self.results[name] = {
+            "valid": not failed.size,
+            "checked": len(passed),
+            "failed": failed.size,
+            "result": result,
+            "failures": [
+                (self._vehicle_IDs[vehicles[i]], starts[i].item(), ends[i].item())
+                for i in failed
+            ],
+        }
 
     def single_matches(self):
         """Check if trips are assigned only to one vehicle each."""
@@ -198,5 +230,40 @@ class Validator:
             trips.update(trip.ID for trip in vehicle.finished_trips)
         self.results["single_matches"] = {
             "valid": len(trips) == sum(trips.values()),
+            "checked": len(trips),
+            "failed": sum(1 for count in trips.values() if count > 1),
             "trips": trips,
         }
+
+    def summary(self):
+        """Return a DataFrame with one row per executed test and the columns
+        valid, checked, failed and vehicles (IDs of vehicles with failures).
+        """
+        rows = {}
+        for name, result in self.results.items():
+            vehicles = sorted({failure[0] for failure in result.get("failures", ())})
+            rows[name] = {
+                "valid": result["valid"],
+                "checked": result.get("checked"),
+                "failed": result.get("failed"),
+                "vehicles": vehicles,
+            }
+        return pd.DataFrame.from_dict(
+            rows, orient="index", columns=["valid", "checked", "failed", "vehicles"]
+        )
+
+    def report(self):
+        """Print the summary of all executed tests."""
+        print("Validation %s" % ("passed" if self.valid else "FAILED"))
+        for name, row in self.summary().iterrows():
+            line = "\t%s: %s (%s checked" % (
+                name,
+                "valid" if row["valid"] else "INVALID",
+                row["checked"],
+            )
+            if row["failed"]:
+                line += ", %s failed" % row["failed"]
+            line += ")"
+            if row["vehicles"]:
+                line += " vehicles: " + ", ".join(row["vehicles"])
+            print(line)
@@ -42,6 +42,8 @@ from eflips.depot.api import (
 from eflips.depot.api.private.depot import DepotConfigurationWish, AreaInformation
 from eflips.depot.api.private.depot import (
     area_needed_for_vehicle_parking,
+    depot_to_template,
+    DepotTemplateBuilder,
     generate_depot,
     depot_smallest_possible_size,
     group_rotations_by_start_end_stop,
@@ -717,3 +719,168 @@ class TestGenerateOptimalDepot(TestHelpers):
         assert len(charging_areas) == 2 * len(
             vehicle_types
         ), "Charging areas for each vehicle type were expected to be created in the depot!"
+
+    def test_depot_template_builder(self, session, full_scenario):
+        station_rotation_group = group_rotations_by_start_end_stop(
+            full_scenario.id, session
+        )
+        (station, _), _ = next(iter(station_rotation_group.items()))
+        area_infos = []
+        for vt in session.query(VehicleType).all():
+            area_infos.append(
+                AreaInformation(
+                    vehicle_type_id=vt.id,
+                    area_type=AreaType.DIRECT_ONESIDE,
+                    capacity=20,
+                    power=150,
+                )
+            )
+            area_infos.append(
+                AreaInformation(
+                    vehicle_type_id=vt.id,
+                    area_type=AreaType.LINE,
+                    capacity=12,
+                    power=150,
+                    block_length=6,
+                )
+            )
+        depot_wish = DepotConfigurationWish(
+            station_id=station.id,
+            auto_generate=False,
+            default_power=150,
+            standard_block_length=6,
+            cleaning_slots=2,
+            shunting_slots=2,
+            shunting_duration=timedelta(minutes=5),
+            cleaning_duration=timedelta(minutes=10),
+            areas=area_infos,
+        )
+        generate_optimal_depot_layout(
+            [depot_wish], full_scenario, delete_existing_depot=True
+        )
+        depot = session.query(Depot).filter(Depot.scenario_id == full_scenario.id).one()
+
+        def summary(template):
+            charging_areas = [
+                area
+                for area in template["areas"].values()
+                if area.get("charging_interfaces")
+            ]
+            return (
+                sorted(
+                    (
+                        area["typename"],
+                        area["capacity"],
+                        len(area["charging_interfaces"]),
+                    )
+                    for area in charging_areas
+                ),
+                sorted(len(group["stores"]) for group in template["groups"].values()),
+                template["processes"],
+                template["plans"],
+            )
+
+        builder = DepotTemplateBuilder(depot, depot_id="candidate")
+        template = builder.template(area_infos)
+        assert template["general"]["depotID"] == "candidate"
+        assert summary(template) == summary(depot_to_template(depot))
+
+        # Templates of other candidates share the invariant parts
+        other = builder.template(area_infos[:1])
+        assert len(summary(other)[0]) == 1
+        assert other["processes"] is template["processes"]
+        with pytest.raises(ValueError):
+            builder.template([])
+
+    def test_depot_template_builder_sizing_depots(self, session, full_scenario):
+        station_rotation_group = group_rotations_by_start_end_stop(
+            full_scenario.id, session
+        )
+        (station, _), vts_and_rotations = next(iter(station_rotation_group.items()))
+
+        def create_depot(line_capacity):
+            generate_depot(
+                {
+                    vt: {
+                        AreaType.LINE: line_capacity,
+                        AreaType.DIRECT_ONESIDE: 10,
+                        AreaType.DIRECT_TWOSIDE: 0,
+                    }
+                    for vt in vts_and_rotations
+                },
+                station,
+                full_scenario,
+                session,
+                cleaning_duration=None,
+                shunting_duration=None,
+            )
+            return (
+                session.query(Depot).filter(Depot.scenario_id == full_scenario.id).one()
+            )
+
+        savepoint = session.begin_nested()
+        try:
+            builder = DepotTemplateBuilder(create_depot(0))
+        finally:
+            savepoint.rollback()
+
+        savepoint = session.begin_nested()
+        try:
+            depot = create_depot(12)
+            template = builder.depot_template(depot)
+            expected = depot_to_template(depot)
+
+            assert template["general"] == expected["general"]
+            assert template["areas"].keys() == expected["areas"].keys()
+            assert {
+                name: sorted(group["stores"])
+                for name, group in template["groups"].items()
+            } == {
+                name: sorted(group["stores"])
+                for name, group in expected["groups"].items()
+            }
+            for key, area in expected["areas"].items():
+                assert template["areas"][key]["capacity"] == area["capacity"]
+                assert len(template["areas"][key]["available_processes"]) == len(
+                    area["available_processes"]
+                )
+        finally:
+            savepoint.rollback()
+
+    def test_optimize_depot_layout(self, session, full_scenario):
+        pytest.importorskip("deap")
+        from eflips.depot.api import optimize_depot_layout
+
+        simple_consumption_simulation(full_scenario, initialize_vehicles=True)
+        station_rotation_group = group_rotations_by_start_end_stop(
+            full_scenario.id, session
+        )
+        (station, _), _ = next(iter(station_rotation_group.items()))
+        depot_wish = DepotConfigurationWish(
+            station_id=station.id,
+            default_power=150,
+            cleaning_slots=2,
+            shunting_slots=2,
+        )
+
+        candidates = optimize_depot_layout(
+            depot_wish,
+            full_scenario,
+            depot_size=(60, 80),
+            delete_existing_depot=True,
+            population_size=6,
+            generations=2,
+            processes=1,
+            seed=42,
+        )
+        assert len(candidates) > 0
+        capacities = [candidate.capacity for candidate in candidates]
+        assert capacities == sorted(capacities)
+
+        depot = session.query(Depot).filter(Depot.scenario_id == full_scenario.id).one()
+        charging_areas = [area for area in depot.areas if area.vehicle_type_id]
+        chosen = max(
+            (candidate for candidate in candidates if candidate.feasible),
+            key=lambda c: (c.rfd_unblocked, c.capacity),
+        )
+        assert sum(area.capacity for area in charging_areas) == chosen.capacity
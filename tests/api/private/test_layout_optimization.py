@@ -0,0 +1,96 @@
+import random
+
+import pytest
+from eflips.model import AreaType
+
+pytest.importorskip("deap")
+
+from eflips.depot.api.private import layout_optimization
+from eflips.depot.api.private.layout_optimization import (
+    LayoutCandidate,
+    area_information_from_prototype,
+    choose_layout,
+    nsga2,
+    packable,
+)
+from eflips.depot.layout_opt.opt_tools import init
+from eflips.depot.layout_opt.settings import OPT_CONSTANTS as OC
+
+
+@pytest.fixture
+def depot_space(tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        OC,
+        "scenario",
+        {
+            "DEPOT_A": 60,
+            "DEPOT_B": 80,
+            "filename_precomp_cache": str(tmp_path / "precomps.json"),
+        },
+    )
+    monkeypatch.setattr(init, "_precomp_cache", {})
+
+
+class TestLayoutOptimization:
+    def test_area_information_from_prototype(self):
+        direct = area_information_from_prototype(init.DSR_90Prototype(5), 1, 150)
+        assert direct.area_type == AreaType.DIRECT_ONESIDE
+        assert direct.capacity == 5
+        assert direct.block_length is None
+
+        two_sided = area_information_from_prototype(init.DDRPrototype(7), 1, 150)
+        assert two_sided.area_type == AreaType.DIRECT_TWOSIDE
+        assert two_sided.capacity == 6
+
+        line = area_information_from_prototype(init.LinePrototype(4), 1, 150)
+        assert line.area_type == AreaType.LINE
+        assert line.capacity == line.block_length == 4
+        assert line.power == 150
+
+    def test_nsga2(self, depot_space):
+        evaluated = []
+
+        def evaluate(inds):
+            # Each configuration is evaluated once
+            ids = [ind.ID for ind in inds]
+            assert len(set(ids)) == len(ids)
+            assert not set(ids) & set(evaluated)
+            evaluated.extend(ids)
+
+            results = []
+            for ind in inds:
+                result = {"simulated": packable(ind), "capacity": ind.capacity}
+                direct = sum(
+                    area.capacity
+                    for area in ind.areas
+                    if not isinstance(area, init.LinePrototype)
+                )
+                fitness = (ind.capacity, direct) if result["simulated"] else (0, 0)
+                results.append((fitness, result))
+            return results
+
+        random.seed(1)
+        pareto_front = nsga2(evaluate, 10, 5, 0.5, 0.5)
+
+        assert len(pareto_front) > 0
+        assert len(evaluated) > 10
+        for ind in pareto_front:
+            assert ind.results["simulated"]
+            assert ind.ID in evaluated
+            assert packable(ind)
+            for other in pareto_front:
+                assert not other.fitness.dominates(ind.fitness)
+
+    def test_choose_layout(self):
+        candidates = [
+            LayoutCandidate("a", [], 10, 4.0, 0.0),
+            LayoutCandidate("b", [], 12, 5.0, 1.5),
+            LayoutCandidate("c", [], 14, 4.0, 0.0),
+        ]
+        assert choose_layout(candidates).id == "c"
+        assert choose_layout(candidates[1:2]) is None
+
+    def test_simulate_template_requires_init_worker(self, monkeypatch):
+        monkeypatch.setattr(layout_optimization, "_simulation_input", None)
+        with pytest.raises(RuntimeError):
+            layout_optimization.simulate_template({})
@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from eflips.model import EventType
+
+from eflips.depot.api.private.smart_charging import (
+    load_price_profile,
+    max_charging_power,
+    optimize_charging_events_min_price,
+    price_profile_span,
+    prices_at,
+    solve_min_price,
+    to_price_profile,
+)
+
+ORIGIN = datetime(2023, 1, 2, 0, 0, tzinfo=timezone.utc)
+
+
+def _event(start_hours, end_hours, soc_start, soc_end, capacity=100.0, power=50.0):
+    vehicle_type = SimpleNamespace(
+        battery_capacity=capacity, charging_curve=[[0, 150.0], [1, 150.0]]
+    )
+    process = SimpleNamespace(electric_power=power, duration=None)
+    return SimpleNamespace(
+        event_type=EventType.CHARGING_DEPOT,
+        time_start=ORIGIN + timedelta(hours=start_hours),
+        time_end=ORIGIN + timedelta(hours=end_hours),
+        soc_start=soc_start,
+        soc_end=soc_end,
+        vehicle=SimpleNamespace(vehicle_type=vehicle_type),
+        area=SimpleNamespace(id=1, processes=[process]),
+        timeseries=None,
+    )
+
+
+class TestSolveMinPrice:
+    def test_cheapest_steps(self):
+        prices = np.array([0.3, 0.1, 0.2, 0.1])
+        schedule = solve_min_price(
+            starts=np.array([0.0]),
+            ends=np.array([4 * 3600.0]),
+            energies=np.array([100.0]),
+            max_powers=np.array([50.0]),
+            prices=prices,
+            time_step=3600.0,
+        )
+        assert np.allclose(schedule.powers[0], [0, 50, 0, 50])
+        assert schedule.energy_cost == pytest.approx(10.0)
+
+    def test_energies_met_and_peak_flattened(self):
+        schedule = solve_min_price(
+            starts=np.array([0.0, 0.0]),
+            ends=np.array([4 * 3600.0, 4 * 3600.0]),
+            energies=np.array([80.0, 80.0]),
+            max_powers=np.array([100.0, 100.0]),
+            prices=np.full(4, 0.2),
+            time_step=3600.0,
+            peak_cost=1.0,
+        )
+        assert [p.sum() for p in schedule.powers] == pytest.approx([80.0, 80.0])
+        assert schedule.peak_power == pytest.approx(40.0)
+
+    def test_partial_steps(self):
+        # The event covers half of the first and last step, the cheap steps
+        schedule = solve_min_price(
+            starts=np.array([1800.0]),
+            ends=np.array([3 * 3600.0 + 1800.0]),
+            energies=np.array([150.0]),
+            max_powers=np.array([50.0]),
+            prices=np.array([0.1, 0.3, 0.3, 0.1]),
+            time_step=3600.0,
+        )
+        assert schedule.first_step[0] == 0
+        assert np.allclose(schedule.powers[0], [25, 50, 50, 25])
+        assert not schedule.unchanged[0]
+        assert schedule.peak_power == pytest.approx(50.0)
+
+    def test_short_event_within_one_step(self):
+        # 12 minutes at 50 kW within a 1 h step
+        schedule = solve_min_price(
+            starts=np.array([600.0]),
+            ends=np.array([1320.0]),
+            energies=np.array([10.0]),
+            max_powers=np.array([50.0]),
+            prices=np.array([0.2]),
+            time_step=3600.0,
+        )
+        assert np.allclose(schedule.powers[0], [10.0])
+        assert schedule.energy_cost == pytest.approx(2.0)
+
+    def test_energy_above_max_power_is_unchanged(self):
+        schedule = solve_min_price(
+            starts=np.array([0.0, 0.0]),
+            ends=np.array([720.0, 3600.0]),
+            energies=np.array([12.0, 10.0]),
+            max_powers=np.array([50.0, 50.0]),
+            prices=np.array([0.2]),
+            time_step=3600.0,
+        )
+        assert schedule.unchanged.tolist() == [True, False]
+        assert np.allclose(schedule.powers[0], 0)
+        assert schedule.powers[1].sum() == pytest.approx(10.0)
+
+    def test_grid_limit(self):
+        kwargs = dict(
+            starts=np.array([0.0, 0.0]),
+            ends=np.array([2 * 3600.0, 2 * 3600.0]),
+            energies=np.array([60.0, 60.0]),
+            max_powers=np.array([100.0, 100.0]),
+            prices=np.array([0.1, 0.3]),
+            time_step=3600.0,
+        )
+        schedule = solve_min_price(grid_limit=80.0, **kwargs)
+        total = schedule.powers[0] + schedule.powers[1]
+        assert total.max() <= 80.0 + 1e-6
+        assert total.sum() == pytest.approx(120.0)
+
+        with pytest.raises(ValueError):
+            solve_min_price(grid_limit=50.0, **kwargs)
+
+
+class TestOptimizeChargingEvents:
+    def test_timeseries(self):
+        events = [_event(0, 6, 0.2, 0.8), _event(1.5, 5.25, 0.5, 0.9)]
+        index = pd.date_range(ORIGIN, periods=6, freq="1h")
+        prices = pd.Series([0.3, 0.3, 0.1, 0.1, 0.3, 0.3], index=index)
+
+        schedule = optimize_charging_events_min_price(events, prices)
+
+        assert schedule is not None
+        for event in events:
+            times = pd.to_datetime(event.timeseries["time"])
+            socs = np.array(event.timeseries["soc"])
+            assert times[0] == event.time_start and times[-1] == event.time_end
+            assert times.is_monotonic_increasing
+            assert np.all(np.diff(socs) >= -1e-9)
+            assert socs[0] == pytest.approx(event.soc_start)
+            assert socs[-1] == pytest.approx(event.soc_end)
+
+            # The power bound holds in every segment of the timeseries
+            hours = times.to_series().diff().dt.total_seconds().to_numpy()[1:] / 3600
+            powers = np.diff(socs) * 100.0 / hours
+            assert powers.max() <= 50.0 + 1e-6
+
+    def test_price_profile_not_covering_events(self):
+        events = [_event(0, 30, 0.2, 0.8), _event(1.5, 5.25, 0.5, 0.9)]
+        # One day of hourly prices for events lasting 30 hours
+        index = pd.date_range(ORIGIN, periods=24, freq="1h")
+        prices = pd.Series(0.1, index=index)
+        with pytest.raises(ValueError, match="price profile covers"):
+            optimize_charging_events_min_price(events, prices)
+
+        # Prices starting after the first event
+        with pytest.raises(ValueError, match="price profile covers"):
+            optimize_charging_events_min_price(events[1:], prices[2:])
+        assert all(event.timeseries is None for event in events)
+
+    def test_no_events(self):
+        assert optimize_charging_events_min_price([], pd.Series(dtype=float)) is None
+
+
+def test_load_price_profile(tmp_path):
+    path = tmp_path / "prices.csv"
+    path.write_text(
+        "time,price\n2023-01-02T00:00:00+01:00,0.25\n2023-01-02T01:00:00+01:00,0.15\n"
+    )
+    profile = load_price_profile(str(path))
+    assert str(profile.index.tz) == "UTC"
+    assert profile.tolist() == [0.25, 0.15]
+
+    times = pd.DatetimeIndex(
+        [datetime(2023, 1, 2, 0, 30, tzinfo=timezone.utc)], tz="UTC"
+    )
+    assert prices_at(profile, times).tolist() == [0.15]
+
+
+def test_price_profile_span():
+    profile = pd.Series(
+        [0.25, 0.15, 0.2], index=pd.date_range(ORIGIN, periods=3, freq="15min")
+    )
+    assert price_profile_span(profile) == (ORIGIN, ORIGIN + timedelta(minutes=45))
+    with pytest.raises(ValueError):
+        price_profile_span(profile[:1])
+
+
+def test_max_charging_power_of_vehicle_type():
+    event = _event(0, 2, 0.2, 0.8, power=200.0)
+    # The power limit comes from the vehicle's type, like the energy
+    event.vehicle_type = SimpleNamespace(charging_curve=[[0, 10.0], [1, 10.0]])
+    assert max_charging_power(event) == 150.0
+
+
+def test_price_profile_from_environment(tmp_path, monkeypatch):
+    path = tmp_path / "prices.csv"
+    path.write_text("time,price\n2023-01-02T00:00:00+00:00,0.25\n")
+    monkeypatch.delenv("PRICE_PROFILE", raising=False)
+    with pytest.raises(ValueError, match="price_profile"):
+        to_price_profile(None)
+
+    monkeypatch.setenv("PRICE_PROFILE", str(path))
+    assert to_price_profile(None).tolist() == [0.25]
+    # An explicit price profile takes precedence
+    profile = pd.Series([0.1], index=pd.DatetimeIndex([ORIGIN]))
+    assert to_price_profile(profile).tolist() == [0.1]
@@ -0,0 +1,22 @@
+import datetime
+import pickle
+
+import numpy as np
+import pandas as pd
+
+START_DATE = (2019, 6, 3)
+
+
+def write_prices(path, days, seed=1):
+    """Write one pickled price series with 96 values per day as expected by
+    PowerFrame.
+    """
+    rng = np.random.default_rng(seed)
+    date = datetime.date(*START_DATE)
+    for day in range(days):
+        prices = pd.Series(np.round(rng.uniform(20, 60, 96)) / 1000)
+        with open(
+            str(path / str(date + datetime.timedelta(days=day))) + ".p", "wb"
+        ) as f:
+            pickle.dump(prices, f)
+    return str(path) + "/"
@@ -0,0 +1,122 @@
+import json
+import os
+from functools import lru_cache
+
+import pytest
+
+import eflips
+import eflips.depot
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "sample_simulation")
+
+
+@pytest.fixture(autouse=True)
+def settings():
+    """Load the sample settings for each test of a module that imports this
+    fixture.
+    """
+    eflips.settings.reset_settings()
+    eflips.depot.SimulationHost.load_eflips_settings(
+        os.path.join(SAMPLE_PATH, "settings")
+    )
+
+
+@pytest.fixture(scope="module")
+def evaluation():
+    """DepotEvaluation of direct_depot_template() simulated with the sample
+    settings and schedule, for the tests of a module that imports this
+    fixture. The sample settings stay loaded until the module is done.
+    """
+    eflips.settings.reset_settings()
+    eflips.depot.SimulationHost.load_eflips_settings(
+        os.path.join(SAMPLE_PATH, "settings")
+    )
+    yield simulate_sample_evaluation()
+    eflips.settings.reset_settings()
+
+
+@lru_cache(maxsize=None)
+def simulate_sample_evaluation():
+    """Simulate direct_depot_template() with the sample settings and schedule
+    and return the DepotEvaluation. The simulation runs only once per test
+    session, so the result must not be modified.
+    """
+    simulation_host = eflips.depot.SimulationHost(
+        [
+            eflips.depot.Depotinput(
+                filename_template=direct_depot_template(), show_gui=False
+            )
+        ],
+        print_timestamps=False,
+    )
+    simulation_host.standard_setup(
+        os.path.join(SAMPLE_PATH, "settings"), os.path.join(SAMPLE_PATH, "schedule")
+    )
+    simulation_host.run()
+    return simulation_host.depot_hosts[0].evaluation
+
+
+def direct_depot_template():
+    """Return the sample depot template reduced to Direct areas, standby and
+    charging processes.
+    """
+    with open(os.path.join(SAMPLE_PATH, "sample_depot.json")) as f:
+        template = json.load(f)
+
+    parking_areas = {
+        "Parking_AB_group": ["-01-", "-11-"],
+        "Parking_SB_group": ["-12-", "-15-"],
+    }
+    areas = ["S_1", "S_2"] + [a for stores in parking_areas.values() for a in stores]
+    template["areas"] = {ID: template["areas"][ID] for ID in areas}
+    for area in template["areas"].values():
+        area["available_processes"] = [
+            procID for procID in area["available_processes"] if procID != "precondition"
+        ]
+    template["processes"] = {
+        ID: template["processes"][ID]
+        for ID in ["charge_dc", "charge_oc", "standby_arr", "standby_dep"]
+    }
+    for process in template["processes"].values():
+        if process["vehicle_filter"] is None:
+            process["vehicle_filter"] = {}
+    template["resource_switches"] = {}
+    template["groups"] = {
+        "Stauflaeche_group": template["groups"]["Stauflaeche_group"],
+    }
+    for ID, stores in parking_areas.items():
+        template["groups"][ID] = {
+            "typename": "ParkingAreaGroup",
+            "stores": stores,
+            "parking_strategy_name": "FIRST",
+        }
+    template["plans"]["default"]["locations"] = [
+        "Stauflaeche_group",
+        "Parking_AB_group",
+        "Parking_SB_group",
+    ]
+    return template
+
+
+def simulate(timetabledata, template=None, trip_args=None):
+    """Simulate *template* (default: direct_depot_template()) with the
+    timetable from *timetabledata* and return (ID, atd, ata) of all trips.
+
+    trip_args: [tuple or None] see SimulationHost.init_timetable
+    """
+    if template is None:
+        template = direct_depot_template()
+    simulation_host = eflips.depot.SimulationHost(
+        [eflips.depot.Depotinput(filename_template=template, show_gui=False)],
+        print_timestamps=False,
+    )
+    simulation_host.init_timetable(timetabledata, trip_args)
+    for depot_host, depot_input in zip(
+        simulation_host.depot_hosts, simulation_host.to_simulate
+    ):
+        depot_host.load_and_complete_template(depot_input.filename_template)
+    simulation_host.complete()
+    simulation_host.run()
+    return [
+        (trip.ID, trip.atd, trip.ata) for trip in simulation_host.timetable.all_trips
+    ]
@@ -0,0 +1,61 @@
+import copy
+import os
+
+import pytest
+import simpy
+
+import eflips
+import eflips.depot
+from eflips.depot.standalone import timetabledata_from_excel
+
+# settings is an autouse fixture
+from tests.sample_depot import (  # noqa: F401
+    SAMPLE_PATH,
+    direct_depot_template,
+    settings,
+    simulate,
+)
+
+
+@pytest.fixture(scope="module")
+def timetabledata():
+    return timetabledata_from_excel(os.path.join(SAMPLE_PATH, "schedule"))
+
+
+def test_simulate_with_shared_template(timetabledata):
+    template = direct_depot_template()
+    original = copy.deepcopy(template)
+
+    expected = simulate(timetabledata, direct_depot_template())
+    # The template is not altered by loading it and can be reused
+    assert simulate(timetabledata, template) == expected
+    assert template == original
+    assert simulate(timetabledata, template) == expected
+
+
+def test_simulate_with_snapshot(timetabledata):
+    snapshot = eflips.depot.ConfigurationSnapshot(direct_depot_template())
+
+    expected = simulate(timetabledata, direct_depot_template())
+    # A snapshot can be loaded into the configurators of multiple runs
+    assert simulate(timetabledata, snapshot) == expected
+    assert simulate(timetabledata, snapshot) == expected
+
+
+def test_edit_after_load_snapshot():
+    snapshot = eflips.depot.ConfigurationSnapshot(direct_depot_template())
+    areas = copy.deepcopy(snapshot.areas)
+
+    configurator = eflips.depot.DepotConfigurator(simpy.Environment())
+    configurator.load_snapshot(snapshot)
+    configurator.remove_process("charge_dc")
+    # The snapshot is not altered by changes to the loaded depot
+    assert snapshot.areas == areas
+
+
+def test_snapshot_of_invalid_template():
+    template = direct_depot_template()
+    for group in template["groups"].values():
+        group["stores"] = []
+    with pytest.raises(ValueError):
+        eflips.depot.ConfigurationSnapshot(template)
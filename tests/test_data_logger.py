@@ -0,0 +1,222 @@
+import os
+
+import pytest
+
+import eflips
+import eflips.depot
+from eflips.depot import ColumnarLogger
+from eflips.depot.data_logger import LoggedData, RESULT_ATTRIBUTES, Symbols
+from eflips.depot.events import LogWindow
+from eflips.evaluation import DataLogger
+
+from tests.sample_depot import direct_depot_template
+
+
+class TestLoggedData:
+    def test_columns(self):
+        data = LoggedData(Symbols())
+        area = object()
+        data.append("area", 0, None)
+        data.append("area", 5, area)
+        data.append("area", 5, area)
+        data.append("processes", 0, [])
+        data.append("processes", 5, [area])
+        data.append("processes", 5, [area, area])
+        data.append("users", 0, {})
+
+        assert "area" in data
+        assert list(data) == ["area", "processes", "users"]
+        assert data["area"] == {0: None, 5: area}
+        assert data["area"][5] is area
+        assert data["processes"] == {0: [], 5: [area, area]}
+        assert data["users"] == {0: {}}
+
+    def test_cache_and_fallback(self):
+        data = LoggedData(Symbols())
+        data.append("count", 0, 1)
+        assert data["count"] == {0: 1}
+        data.append("count", 3, 2)
+        assert data["count"] == {0: 1, 3: 2}
+
+        # A value of a different kind converts the column to a dict
+        data.append("count", 4, [1])
+        assert data["count"] == {0: 1, 3: 2, 4: [1]}
+        data.append("count", 5, 0)
+        assert data["count"][5] == 0
+
+    def test_float_times(self):
+        data = LoggedData(Symbols())
+        data.append("count", 0, 1)
+        data.append("count", 2.5, 2)
+        data.append("processes", 0, [])
+        data.append("processes", 2.5, [1])
+        # Times are not truncated and keep their type
+        assert data["count"] == {0: 1, 2.5: 2}
+        assert [type(t) for t in data["count"]] == [int, float]
+        assert data["processes"] == {0: [], 2.5: [1]}
+
+    def test_custom_dicts(self):
+        data = LoggedData(Symbols())
+        data["area_waiting_time"] = {}
+        data["area_waiting_time"][10] = {"waiting_time": 5}
+        assert data["area_waiting_time"] == {10: {"waiting_time": 5}}
+
+    def test_window(self):
+        data = LoggedData(Symbols(), LogWindow(10, 20))
+        for t in (0, 5, 10, 15, 20):
+            data.append("count", t, t)
+            data.append("processes", t, [t])
+            data.append("users", t, {"t": t})
+        assert data["count"] == {5: 5, 10: 10, 15: 15}
+        assert data["processes"] == {5: [5], 10: [10], 15: [15]}
+        assert data["users"] == {5: {"t": 5}, 10: {"t": 10}, 15: {"t": 15}}
+
+
+class TestColumnarLogger:
+    @pytest.fixture(autouse=True)
+    def clear_settings(self):
+        eflips.settings.reset_settings()
+
+    def simulate(self, log_columnar, logged_attributes=None, log_window=None):
+        absolute_path = os.path.dirname(__file__)
+        simulation_host = eflips.depot.SimulationHost(
+            [
+                eflips.depot.Depotinput(
+                    filename_template=direct_depot_template(), show_gui=False
+                )
+            ],
+            print_timestamps=False,
+        )
+        simulation_host.load_eflips_settings(
+            os.path.join(absolute_path, "sample_simulation", "settings")
+        )
+        eflips.globalConstants["general"]["LOG_COLUMNAR"] = log_columnar
+        if logged_attributes is not None:
+            eflips.globalConstants["general"]["LOGGED_ATTRIBUTES"] = logged_attributes
+        if log_window is not None:
+            eflips.globalConstants["general"]["LOG_WINDOW"] = log_window
+        simulation_host.load_timetable(
+            os.path.join(absolute_path, "sample_simulation", "schedule")
+        )
+        for depot_host, depot_input in zip(
+            simulation_host.depot_hosts, simulation_host.to_simulate
+        ):
+            depot_host.load_and_complete_template(depot_input.filename_template)
+        simulation_host.complete()
+        simulation_host.run()
+        return simulation_host.depot_hosts[0].evaluation
+
+    def test_same_data_as_data_logger(self):
+        ev_dict = self.simulate(log_columnar=False)
+        ev_columnar = self.simulate(log_columnar=True)
+
+        loggers_dict = [v.logger for v in ev_dict.vehicle_generator.items]
+        loggers_dict += [area.logger for area in ev_dict.depot.list_areas]
+        loggers_columnar = [v.logger for v in ev_columnar.vehicle_generator.items]
+        loggers_columnar += [area.logger for area in ev_columnar.depot.list_areas]
+        assert all(isinstance(logger, DataLogger) for logger in loggers_dict)
+        assert all(isinstance(logger, ColumnarLogger) for logger in loggers_columnar)
+
+        for logger_dict, logger_columnar in zip(loggers_dict, loggers_columnar):
+            assert set(logger_dict.loggedData) == set(logger_columnar.loggedData)
+            for attr, data in logger_dict.loggedData.items():
+                data_columnar = logger_columnar.loggedData[attr]
+                assert list(data) == list(data_columnar)
+                for value, value_columnar in zip(data.values(), data_columnar.values()):
+                    if isinstance(value, list):
+                        assert [p.ID for p in value] == [p.ID for p in value_columnar]
+                    elif hasattr(value, "ID"):
+                        assert value.ID == value_columnar.ID
+                    else:
+                        assert value == value_columnar
+
+        for area_dict, area_columnar in zip(
+            ev_dict.depot.list_areas, ev_columnar.depot.list_areas
+        ):
+            assert area_dict.logger.get_valList(
+                "count", ev_dict.SIM_TIME
+            ) == area_columnar.logger.get_valList("count", ev_columnar.SIM_TIME)
+
+    def test_attribute_selection(self):
+        ev = self.simulate(
+            log_columnar=True, logged_attributes={"VEHICLE": ["dwd.current_area"]}
+        )
+        vehicle = ev.vehicle_generator.items[0]
+        assert "dwd.current_area" in vehicle.logger.loggedData
+        assert "dwd.current_slot" not in vehicle.logger.loggedData
+        assert "dwd.active_processes_copy" not in vehicle.logger.loggedData
+
+    def test_result_attributes(self):
+        ev_full = self.simulate(log_columnar=True)
+        ev = self.simulate(log_columnar=True, logged_attributes=RESULT_ATTRIBUTES)
+
+        for vehicle_full, vehicle in zip(
+            ev_full.vehicle_generator.items, ev.vehicle_generator.items
+        ):
+            assert "dwd.current_area" not in vehicle.logger.loggedData
+            snapshots_full = [
+                (t, [p.ID for p in processes])
+                for t, processes in vehicle_full.dwd.process_log.snapshots()
+            ]
+            snapshots = [
+                (t, [p.ID for p in processes])
+                for t, processes in vehicle.dwd.process_log.snapshots()
+            ]
+            assert snapshots == snapshots_full
+
+        ev_full.calc_count_rfd_unblocked_total()
+        ev.calc_count_rfd_unblocked_total()
+        assert (
+            ev.results["count_rfd_unblocked_total"]
+            == ev_full.results["count_rfd_unblocked_total"]
+        )
+
+    def test_process_log(self):
+        ev = self.simulate(log_columnar=True)
+        for vehicle in ev.vehicle_generator.items:
+            process_log = vehicle.dwd.process_log
+            records = list(process_log)
+            starts = [r.process for r in records if r.kind == "start"]
+            ends = [r.process for r in records if r.kind in ("end", "cancel")]
+            assert set(ends) <= set(starts)
+            assert len(starts) - len(ends) == len(vehicle.dwd.active_processes)
+            assert all(r.area is not None and r.slot is not None for r in records)
+
+            snapshots = dict(process_log.snapshots())
+            assert snapshots == vehicle.logger.loggedData["dwd.active_processes_copy"]
+            assert process_log.last_snapshot() == list(snapshots.items())[-1]
+
+    def test_log_window(self):
+        start, end = 86400, 2 * 86400
+        ev_full = self.simulate(log_columnar=True)
+        ev_window = self.simulate(log_columnar=True, log_window=[start, end])
+        assert ev_window.xlim == (start, end)
+
+        def in_window(items):
+            return [(t, value) for t, value in items if start <= t < end]
+
+        for area_full, area_window in zip(
+            ev_full.depot.list_areas, ev_window.depot.list_areas
+        ):
+            count_full = list(area_full.logger.loggedData.items_of("count"))
+            count_window = list(area_window.logger.loggedData.items_of("count"))
+            assert in_window(count_window) == in_window(count_full)
+            assert all(t < end for t, _ in count_window)
+            # At most one checkpoint before the window
+            assert sum(t < start for t, _ in count_window) <= 1
+
+        assert in_window(ev_window.power_logs.items()) == in_window(
+            ev_full.power_logs.items()
+        )
+        for vehicle_full, vehicle_window in zip(
+            ev_full.vehicle_generator.items, ev_window.vehicle_generator.items
+        ):
+            energies_full = [(log.t, log.energy) for log in vehicle_full.battery_logs]
+            energies_window = [
+                (log.t, log.energy) for log in vehicle_window.battery_logs
+            ]
+            assert in_window(energies_window) == in_window(energies_full)
+            # The state at the window start is kept as checkpoint
+            checkpoint_full = [entry for entry in energies_full if entry[0] < start]
+            checkpoint_window = [entry for entry in energies_window if entry[0] < start]
+            assert checkpoint_window == checkpoint_full[-1:]
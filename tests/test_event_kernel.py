@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+import eflips
+import eflips.depot
+from eflips.depot import DirectDepotKernel
+
+from tests.sample_depot import SAMPLE_PATH, direct_depot_template
+
+
+def small_parking_template():
+    """Direct depot with parking areas too small for all vehicles, so that
+    vehicles wait for a slot.
+    """
+    template = direct_depot_template()
+    for ID, capacity in (("-01-", 3), ("-11-", 3), ("-12-", 11), ("-15-", 11)):
+        area = template["areas"][ID]
+        area["capacity"] = capacity
+        area["charging_interfaces"] = area["charging_interfaces"][:capacity]
+    return template
+
+
+def cancellable_charging_template():
+    template = direct_depot_template()
+    for ID in ("charge_dc", "charge_oc"):
+        template["processes"][ID]["cancellable_for_dispatch"] = True
+    return template
+
+
+def direct_plan_entry_template():
+    template = direct_depot_template()
+    template["plans"]["default"]["locations"][0] = "S_1"
+    return template
+
+
+def linefirst_template():
+    template = direct_depot_template()
+    for ID in ("Parking_AB_group", "Parking_SB_group"):
+        template["groups"][ID]["parking_strategy_name"] = "LINEFIRST"
+    return template
+
+
+def setup(template, use_kernel, vehicle_count=None):
+    eflips.settings.reset_settings()
+    simulation_host = eflips.depot.SimulationHost(
+        [eflips.depot.Depotinput(filename_template=template, show_gui=False)],
+        print_timestamps=False,
+        use_kernel=use_kernel,
+    )
+    simulation_host.load_eflips_settings(os.path.join(SAMPLE_PATH, "settings"))
+    if vehicle_count is not None:
+        eflips.globalConstants["depot"]["vehicle_count"] = vehicle_count
+    simulation_host.load_timetable(os.path.join(SAMPLE_PATH, "schedule"))
+    for depot_host, depot_input in zip(
+        simulation_host.depot_hosts, simulation_host.to_simulate
+    ):
+        depot_host.load_and_complete_template(depot_input.filename_template)
+    simulation_host.complete()
+    return simulation_host
+
+
+def simulate(template, use_kernel, vehicle_count=None):
+    simulation_host = setup(template, use_kernel, vehicle_count)
+    simulation_host.run()
+    return simulation_host
+
+
+def logged_items(data):
+    """Return the items of logged *data* with objects replaced by IDs."""
+
+    def to_ID(value):
+        if isinstance(value, list):
+            return [to_ID(v) for v in value]
+        return getattr(value, "ID", value)
+
+    return [(t, to_ID(value)) for t, value in data.items()]
+
+
+class TestDirectDepotKernel:
+    def test_selected_automatically(self):
+        simulation_host = simulate(direct_depot_template(), use_kernel=True)
+        assert isinstance(simulation_host.kernel, DirectDepotKernel)
+
+        simulation_host = simulate(direct_depot_template(), use_kernel=False)
+        assert simulation_host.kernel is None
+
+    def test_sample_depot_not_supported(self):
+        simulation_host = setup(os.path.join(SAMPLE_PATH, "sample_depot"), True)
+        supported, reason = DirectDepotKernel.supports(
+            simulation_host.depots, simulation_host.timetable
+        )
+        assert not supported
+        assert reason
+
+    @pytest.mark.parametrize(
+        "template, vehicle_count",
+        [
+            (direct_depot_template(), None),
+            (small_parking_template(), None),
+            (cancellable_charging_template(), None),
+            (direct_plan_entry_template(), None),
+            (linefirst_template(), None),
+            # Too few vehicles, so that trips are delayed
+            (direct_depot_template(), {"KLS": {"SB_DC": 14, "AB_OC": 3}}),
+        ],
+        ids=[
+            "direct",
+            "small_parking",
+            "cancellable_charging",
+            "direct_plan_entry",
+            "linefirst",
+            "few_vehicles",
+        ],
+    )
+    def test_same_results_as_simpy(self, template, vehicle_count):
+        sh_simpy = simulate(template, False, vehicle_count)
+        sh_kernel = simulate(template, True, vehicle_count)
+        assert sh_simpy.kernel is None
+        assert isinstance(sh_kernel.kernel, DirectDepotKernel)
+
+        assert [
+            (t.ID, t.atd, t.ata, t.vehicle.ID) for t in sh_simpy.timetable.all_trips
+        ] == [(t.ID, t.atd, t.ata, t.vehicle.ID) for t in sh_kernel.timetable.all_trips]
+
+        ev_simpy = sh_simpy.depot_hosts[0].evaluation
+        ev_kernel = sh_kernel.depot_hosts[0].evaluation
+
+        vehicles_simpy = ev_simpy.vehicle_generator.items
+        vehicles_kernel = ev_kernel.vehicle_generator.items
+        assert [v.ID for v in vehicles_simpy] == [v.ID for v in vehicles_kernel]
+        assert sum(len(v.finished_trips) for v in vehicles_kernel) > 0
+
+        for v_simpy, v_kernel in zip(vehicles_simpy, vehicles_kernel):
+            assert [
+                (log.t, log.energy, log.event_name) for log in v_simpy.battery_logs
+            ] == [(log.t, log.energy, log.event_name) for log in v_kernel.battery_logs]
+            assert dict(v_simpy.power_logs) == dict(v_kernel.power_logs)
+            assert list(v_simpy.logger.loggedData) == list(v_kernel.logger.loggedData)
+            for attr, data in v_simpy.logger.loggedData.items():
+                assert logged_items(data) == logged_items(
+                    v_kernel.logger.loggedData[attr]
+                )
+
+        for area_simpy, area_kernel in zip(
+            ev_simpy.depot.list_areas, ev_kernel.depot.list_areas
+        ):
+            assert area_simpy.max_count == area_kernel.max_count
+            assert list(area_simpy.logger.loggedData) == list(
+                area_kernel.logger.loggedData
+            )
+            for attr, data in area_simpy.logger.loggedData.items():
+                assert logged_items(data) == logged_items(
+                    area_kernel.logger.loggedData[attr]
+                )
+
+        assert dict(ev_simpy.power_logs) == dict(ev_kernel.power_logs)
+        assert ev_simpy.sl_logs == ev_kernel.sl_logs
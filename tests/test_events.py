@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from eflips.depot.events import LogWindow, WindowedDict, WindowedList
+
+
+class TestLogWindow:
+    def test_contains(self):
+        window = LogWindow(10, 20)
+        assert 10 in window
+        assert 19 in window
+        assert 9 not in window
+        assert 20 not in window
+        assert 10**9 in LogWindow(10)
+
+    def test_windowed_dict_checkpoint(self):
+        logs = WindowedDict(LogWindow(10, 20), {0: 0})
+        logs[5] = 1
+        logs[8] = 2
+        assert logs == {8: 2}
+        logs[10] = 3
+        logs[15] = 4
+        logs[20] = 5
+        assert logs == {8: 2, 10: 3, 15: 4}
+
+    def test_windowed_dict_events(self):
+        logs = WindowedDict(LogWindow(10, 20), checkpoint=False)
+        logs[5] = 1
+        logs[12] = 2
+        logs[25] = 3
+        assert logs == {12: 2}
+
+    def test_windowed_list(self):
+        entries = [SimpleNamespace(t=t) for t in (0, 5, 10, 15, 20)]
+        logs = WindowedList(LogWindow(10, 20), "t")
+        for entry in entries:
+            logs.append(entry)
+        assert [entry.t for entry in logs] == [5, 10, 15]
+
+        logs = WindowedList(LogWindow(10, 20), "t", checkpoint=False)
+        for entry in entries:
+            logs.append(entry)
+        assert [entry.t for entry in logs] == [10, 15]
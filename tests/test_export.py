@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from eflips.depot.export import (
+    forward_fill,
+    table_rows,
+    union_times,
+    write_parquet,
+    write_xlsx,
+)
+
+
+class TestExport:
+    def test_forward_fill(self):
+        count = [(0, 1), (10, 2), (20, 0)]
+        power = [(5, 1.5), (10.5, 3.0)]
+        times = union_times(count, power)
+        assert times.tolist() == [0, 5, 10, 10.5, 20]
+
+        assert forward_fill(count, times).tolist() == [1, 1, 2, 2, 0]
+        assert forward_fill(power, times).tolist() == [None, 1.5, 1.5, 3.0, 3.0]
+        assert forward_fill([], times).tolist() == [None] * 5
+
+        times = union_times(count)
+        assert times.dtype == np.int64
+
+    def test_write_xlsx(self, tmp_path):
+        openpyxl = pytest.importorskip("openpyxl")
+        table = {"time": np.array([0, 5]), "count": np.array([1, 2]), "ID": ["a", None]}
+        filename = str(tmp_path / "export.xlsx")
+        write_xlsx(
+            filename,
+            [("Table", [list(table)] + list(table_rows(table))), ("Empty", [])],
+        )
+
+        wb = openpyxl.load_workbook(filename)
+        assert wb.sheetnames == ["Table", "Empty"]
+        rows = [list(row) for row in wb["Table"].iter_rows(values_only=True)]
+        assert rows == [["time", "count", "ID"], [0, 1, "a"], [5, 2, None]]
+
+    def test_write_parquet(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        table = {"time": np.array([0, 5]), "ID": np.array(["a", None], dtype=object)}
+        filename = str(tmp_path / "export.parquet")
+        write_parquet(filename, table, {"depot ID": "1"})
+
+        data = pq.read_table(filename)
+        assert data.column("time").to_pylist() == [0, 5]
+        assert data.column("ID").to_pylist() == ["a", None]
+        assert data.schema.metadata[b"depot ID"] == b"1"
@@ -0,0 +1,105 @@
+import multiprocessing
+import pickle
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("deap")
+
+from eflips.depot.layout_opt.opt_tools.fitness_util import (
+    FitnessMemory,
+    lookup,
+    memorize,
+    scenario_hash,
+)
+
+
+def individual(ID, fitness=()):
+    return SimpleNamespace(
+        ID=ID, results={"simtime": 1.0}, fitness=SimpleNamespace(values=fitness)
+    )
+
+
+def write_entries(memory, start):
+    for i in range(start, start + 20):
+        memorize(individual("ind_%d" % i, (i, 0.5)), memory)
+
+
+@pytest.fixture
+def memory(tmp_path):
+    return FitnessMemory(str(tmp_path / "memory.sqlite"), "scenario")
+
+
+def test_memorize_lookup(memory):
+    memorize(individual("1x10DSR", (10, 0.5)), memory)
+    memorize(individual("1x10DSR", (99, 0.0)), memory)
+    assert len(memory) == 1
+
+    ind = individual("1x10DSR")
+    lookup(ind, memory)
+    assert ind.fitness.values == (10, 0.5)
+    assert ind.results == {"simtime": 1.0}
+    assert memory["1x10DSR"]["count"] == 2
+
+    unknown = individual("1x5L")
+    lookup(unknown, memory)
+    assert unknown.fitness.values == ()
+    assert memory.pop_stats() == (2, 1)
+    assert memory.pop_stats() == (0, 0)
+
+
+def test_lookup_counts_in_memory(memory):
+    memorize(individual("1x10DSR", (10, 0.5)), memory)
+
+    def stored_count():
+        return memory.connection.execute(
+            "SELECT count FROM fitness WHERE ID = '1x10DSR'"
+        ).fetchone()[0]
+
+    for _ in range(3):
+        lookup(individual("1x10DSR"), memory)
+    assert stored_count() == 1
+    assert memory["1x10DSR"]["count"] == 4
+
+    memory.save_checkpoint("run", 1, {})
+    assert stored_count() == 4
+
+    lookup(individual("1x10DSR"), memory)
+    memorize(individual("1x5L", (5, 0.5)), memory)
+    assert stored_count() == 5
+
+    lookup(individual("1x10DSR"), memory)
+    memory.close()
+    assert FitnessMemory(memory.filename, "scenario")["1x10DSR"]["count"] == 6
+
+
+def test_persistent_per_scenario(memory):
+    memorize(individual("1x10DSR", (10, 0.5)), memory)
+    memory.close()
+
+    assert "1x10DSR" in FitnessMemory(memory.filename, "scenario")
+    assert "1x10DSR" not in FitnessMemory(memory.filename, "other")
+
+
+def test_scenario_hash():
+    assert scenario_hash({"a": 1, "b": [2]}) == scenario_hash({"b": [2], "a": 1})
+    assert scenario_hash({"a": 1}) != scenario_hash({"a": 2})
+
+
+def test_concurrent_processes(memory):
+    # The connection is reopened in each process
+    memory["ind_0"] = {"results": {}, "fitness": (0, 0), "count": 1}
+    with multiprocessing.Pool(3) as pool:
+        pool.starmap(write_entries, [(memory, start) for start in (0, 10, 20)])
+    assert sorted(memory) == sorted("ind_%d" % i for i in range(40))
+    assert memory["ind_35"]["fitness"] == (35, 0.5)
+
+
+def test_checkpoint(memory):
+    assert memory.load_checkpoint("run") == (None, None)
+    memory.save_checkpoint("run", 3, {"pop": [1, 2]})
+    memory.save_checkpoint("run", 4, {"pop": [2, 3]})
+    assert memory.load_checkpoint("run") == (4, {"pop": [2, 3]})
+
+    copy = pickle.loads(pickle.dumps(memory))
+    assert copy.load_checkpoint("run") == (4, {"pop": [2, 3]})
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from eflips.depot.intervals import IntervalIndex, SocIndex
+from eflips.depot.stays import iter_process_intervals
+
+from tests.sample_depot import evaluation
+
+
+class TestIntervalIndex:
+    def test_queries(self):
+        index = IntervalIndex([20, 0, 5, 5, 10], [25, 10, 5, 8, 30], list("eabcd"))
+        assert index.labels == list("abcde")
+        assert index.at(5) == ["a", "b", "c"]
+        assert index.at(9) == ["a"]
+        assert index.at(10) == ["d"]
+        assert index.at(30) == []
+
+        starts, ends, labels = index.overlapping(26, 40)
+        assert starts.tolist() == [10]
+        assert labels == ["d"]
+        starts, ends, labels = index.overlapping()
+        assert labels == list("abcde")
+
+    def test_empty(self):
+        index = IntervalIndex([], [], [])
+        assert index.at(0) == []
+        assert index.overlapping(0, 10)[2] == []
+
+
+class TestSocIndex:
+    def test_interpolation(self):
+        logs = [
+            SimpleNamespace(t=t, energy=energy, energy_real=100, event_name=name)
+            for t, energy, name in [
+                (10, 50, "a"),
+                (20, 70, "a"),
+                (20, 90, "update"),
+                (30, 60, "a"),
+            ]
+        ]
+        soc = SocIndex(logs)
+        # Before the first log, between logs from the last log at the earlier
+        # time to the first log at the later time, after the last log
+        assert soc.energy_at([0, 10, 15, 20, 25, 30, 40]).tolist() == [
+            50,
+            50,
+            60,
+            90,
+            75,
+            60,
+            60,
+        ]
+        assert soc.soc_at(15) == pytest.approx(0.6)
+        assert soc.to_dense(12, start=9).tolist() == [50, 50, 52]
+        assert soc.position(20) == 2
+
+        soc = SocIndex(logs, exclude=("update",))
+        assert soc.energy_at(25) == 65
+
+
+class TestVehicleIndex:
+    def test_process_intervals(self, evaluation):
+        index = evaluation.get_vehicle_index()
+        assert evaluation.get_vehicle_index() is index
+        process_IDs = set(evaluation.depot.processes)
+
+        for vehicle in evaluation.vehicle_generator.items:
+            expected = sorted(
+                iter_process_intervals(vehicle, process_IDs, evaluation.SIM_TIME),
+                key=lambda interval: interval[1],
+            )
+            intervals = index.process_intervals(vehicle.ID)
+            assert sorted(intervals, key=lambda i: i[1]) == expected
+
+            for ID, start, end in intervals:
+                if end > start:
+                    assert ID in [
+                        p.ID for p in index.active_processes(vehicle.ID, start)
+                    ]
+
+        for ID in process_IDs:
+            start, end = 86400, 2 * 86400
+            starts, ends, vehicle_IDs = index.intervals_of(ID, start, end)
+            expected = [
+                (vehicle.ID, s, e)
+                for vehicle in evaluation.vehicle_generator.items
+                for pID, s, e in index.process_intervals(vehicle.ID, [ID])
+                if s < end and (e > start or s == e >= start)
+            ]
+            assert sorted(zip(vehicle_IDs, starts.tolist(), ends.tolist())) == sorted(
+                expected
+            )
+
+    def test_soc(self, evaluation):
+        index = evaluation.get_vehicle_index()
+        vehicle = next(
+            v for v in evaluation.vehicle_generator.items if len(v.battery_logs) > 1
+        )
+        soc = index.soc(vehicle.ID)
+        for log in vehicle.battery_logs:
+            position = soc.position(log.t)
+            assert soc.times[position] == log.t
+        last = vehicle.battery_logs[-1]
+        assert index.soc_at(vehicle.ID, evaluation.SIM_TIME) == pytest.approx(
+            last.energy / last.energy_real
+        )
+        dense = soc.to_dense(evaluation.SIM_TIME)
+        assert len(dense) == evaluation.SIM_TIME
+        assert np.all(dense >= 0)
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+pytest.importorskip("deap")
+
+from eflips.depot.layout_opt import packing
+from eflips.depot.layout_opt.opt_tools import init
+from eflips.depot.layout_opt.settings import OPT_CONSTANTS as OC
+
+
+@pytest.fixture
+def scenario(tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        OC,
+        "scenario",
+        {
+            "DEPOT_A": 120,
+            "DEPOT_B": 150,
+            "filename_precomp_cache": str(tmp_path / "precomps.json"),
+        },
+    )
+    monkeypatch.setattr(init, "_precomp_cache", {})
+    return tmp_path / "precomps.json"
+
+
+def count_max_linear(visu_class, capacity):
+    dvisu = packing.BinWithDistances(
+        OC["scenario"]["DEPOT_A"], OC["scenario"]["DEPOT_B"], validate=False
+    )
+    count = 0
+    while True:
+        dvisu.items.append(visu_class(capacity=capacity))
+        dvisu.repack()
+        if not dvisu.feasible:
+            return count or None
+        count += 1
+
+
+@pytest.mark.parametrize("area_type", list(init.AREA_TYPES.values()))
+def test_count_max_same_as_linear(scenario, area_type):
+    for capacity in (area_type.capacity_min, area_type.capacity_max):
+        count, dvisu = init.get_count_max(area_type.visu_class, capacity)
+        assert count == count_max_linear(area_type.visu_class, capacity)
+        assert len(dvisu.items) == count
+        assert dvisu.feasible
+
+
+def test_precomps_cached_on_disk(scenario, monkeypatch):
+    capacity_max = init.DSRPrototype.capacity_max
+    precomps = init.area_precomps()
+    assert precomps["capacity_max_dsr"] == capacity_max
+    assert init.CAPACITY_MAX == max(
+        precomps["slots_max_" + name] for name in init.AREA_TYPES
+    )
+    assert init.dims_dsr_cap_max.count_inner == precomps["slots_max_dsr"]
+    assert len(json.loads(scenario.read_text())) == 12
+
+    # A new process reads the file instead of packing again
+    monkeypatch.setattr(init, "_precomp_cache", {})
+    monkeypatch.setattr(init, "packing", None)
+    assert init.area_precomps() == precomps
+
+    # Other depot dimensions are computed separately
+    monkeypatch.setitem(OC["scenario"], "DEPOT_B", 151)
+    with pytest.raises(AttributeError):
+        init.area_precomps()
+
+
+def test_areas_from_ID(scenario):
+    depot = init.DepotPrototype()
+    depot.areas = [
+        init.DSRPrototype(4),
+        init.DSR_90Prototype(3),
+        init.DSRPrototype(4),
+        init.LinePrototype(6),
+        init.DDRPrototype(8),
+    ]
+    areas = init.areas_from_ID(depot.ID)
+    assert sorted((a.typename, a.capacity) for a in areas) == sorted(
+        (a.typename, a.capacity) for a in depot.areas
+    )
+    rebuilt = init.DepotPrototype()
+    rebuilt.areas = areas
+    assert rebuilt.ID == depot.ID
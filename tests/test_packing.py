@@ -0,0 +1,70 @@
+import itertools
+import random
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pytest
+
+from eflips.depot.layout_opt import packing
+
+
+def fill(bin, n, seed, distances):
+    random.seed(seed)
+    for _ in range(n):
+        bin.items.append(packing.VisuDataDirectSingleRow(capacity=random.randint(1, 5)))
+        bin.items.append(packing.VisuDataLine(capacity=random.randint(2, 4)))
+        if distances:
+            bin.items.append(
+                packing.VisuDataDirectDoubleRow(capacity=random.randint(2, 5))
+            )
+    return bin
+
+
+def result(bin):
+    return (
+        bin.feasible,
+        [(p.x, p.y) for p in bin.packed_items],
+        [(av.x, av.y, av.a, av.b) for av in bin.availables],
+    )
+
+
+@pytest.mark.parametrize(
+    "bin_class, n, size",
+    [
+        (packing.Bin, 40, 300),
+        (packing.BinWithDistances, 20, 250),
+        (packing.BinWithDistances, 20, 150),
+    ],
+)
+def test_validate_off_same_result(bin_class, n, size):
+    for seed in range(3):
+        validated = fill(bin_class(size, size, False), n, seed, True)
+        fast = fill(bin_class(size, size, False, validate=False), n, seed, True)
+        validated.pack()
+        fast.pack()
+        assert result(fast) == result(validated)
+        if fast.feasible:
+            assert fast.valid
+
+
+def test_availables_invariants():
+    bin = fill(packing.BinWithDistances(250, 250, False), 20, 1, True)
+    bin.pack()
+    assert bin.feasible
+    keys = [(av.b, av.a) for av in bin.availables]
+    assert keys == sorted(keys)
+    for av1, av2 in itertools.permutations(bin.availables, 2):
+        assert not packing.contains(av1, av2)
+    for av in bin.availables:
+        for pitem in bin.packed_items:
+            assert not packing.intersect(av, pitem)
+
+
+def test_repack():
+    bin = fill(packing.BinWithDistances(200, 200, False, validate=False), 8, 2, True)
+    bin.pack()
+    first = result(bin)
+    bin.repack()
+    assert result(bin) == first
@@ -0,0 +1,29 @@
+import os
+
+import matplotlib
+
+from eflips.depot.plotting import LazyModule, baseplot, plt, savefig, to_dateaxis
+
+
+class TestLazyModule:
+    def test_import_on_first_access(self):
+        module = LazyModule("email.mime.text")
+        assert module._module is None
+        assert "not loaded" in repr(module)
+
+        assert module.MIMEText("text").get_payload() == "text"
+        assert module._module is not None
+        assert "not loaded" not in repr(module)
+
+
+class TestPlotting:
+    def test_baseplot_and_savefig(self, tmp_path):
+        matplotlib.use("Agg")
+        fig, ax = baseplot(show=False, figsize=(10, 6))
+        ax.plot([0, 86400, 2 * 86400], [0, 1, 0])
+        to_dateaxis(ax)
+
+        filename = os.path.join(tmp_path, "plot")
+        savefig(fig, filename, formats=("png",), confirm=False)
+        plt.close(fig)
+        assert os.path.isfile(filename + ".png")
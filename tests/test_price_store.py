@@ -0,0 +1,235 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from eflips.depot import PowerFrame, PriceImporter, PriceStore
+from eflips.depot.input_epex_power_price import day_ahead_prices
+
+from tests.price_data import START_DATE, write_prices
+
+
+@pytest.fixture
+def price_path(tmp_path):
+    return write_prices(tmp_path, days=3)
+
+
+class TestPriceStore:
+    def test_from_pickles(self, price_path):
+        start = datetime.date(*START_DATE)
+        price_store = PriceStore.from_pickles(
+            price_path, start, start + datetime.timedelta(days=2)
+        )
+        assert len(price_store) == 3 * 96
+        assert price_store.time[0] == np.datetime64("2019-06-03T00:00:00")
+        assert price_store.time[-1] == np.datetime64("2019-06-05T23:45:00")
+
+    @pytest.mark.parametrize("extension", [".npy", ".npz", ".csv", ".parquet"])
+    def test_save_load(self, price_path, tmp_path, extension):
+        if extension == ".parquet":
+            pytest.importorskip("pyarrow")
+        start = datetime.date(*START_DATE)
+        price_store = PriceStore.from_pickles(
+            price_path, start, start + datetime.timedelta(days=2)
+        )
+        path = str(tmp_path / ("prices" + extension))
+        price_store.save(path)
+
+        loaded = PriceStore.load(path)
+        assert np.array_equal(loaded.time, price_store.time)
+        assert np.array_equal(loaded.price, price_store.price)
+        if extension == ".npy":
+            # Views of the memory-mapped file, not copies
+            assert not loaded.price.flags.owndata
+            assert not loaded.time.flags.owndata
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            PriceStore.load(str(tmp_path / "prices.p"))
+
+    def test_not_ascending(self):
+        with pytest.raises(ValueError):
+            PriceStore(
+                ["2019-06-03T01:00", "2019-06-03T00:00"],
+                [0.1, 0.2],
+            )
+
+    def test_intervals(self):
+        price_store = PriceStore(
+            np.datetime64("2019-06-03") + np.arange(4) * np.timedelta64(1, "h"),
+            [0.1, 0.2, 0.3, 0.4],
+        )
+        starts, ends, prices = price_store.intervals(
+            np.datetime64("2019-06-03T01:00"), np.datetime64("2019-06-03T04:00")
+        )
+        assert prices.tolist() == [0.2, 0.3, 0.4]
+        assert ends[-1] == np.datetime64("2019-06-03T04:00")
+
+        with pytest.raises(ValueError):
+            price_store.intervals(
+                np.datetime64("2019-06-03T00:00"), np.datetime64("2019-06-03T05:00")
+            )
+
+
+@pytest.mark.parametrize("extension", [".npy", ".csv"])
+def test_power_frame_from_store(price_path, tmp_path, extension):
+    start = datetime.date(*START_DATE)
+    path = str(tmp_path / ("prices" + extension))
+    PriceStore.from_pickles(price_path, start, start + datetime.timedelta(days=2)).save(
+        path
+    )
+
+    from_pickles = PowerFrame(100000, start, price_path).pdframe()
+    from_store = PowerFrame(100000, start, path).pdframe()
+    assert len(from_pickles) == 2 * 96
+    assert from_store.equals(from_pickles)
+    assert (from_store.index == from_store.start_time).all()
+    assert np.allclose(from_store.end_time - from_store.start_time, 900)
+
+
+def write_csv(path, times, prices):
+    pd.DataFrame({"time": times, "price": prices}).to_csv(path, index=False)
+    return str(path)
+
+
+class TestPriceImporter:
+    def test_hourly_to_quarter_hours(self, tmp_path):
+        times = pd.date_range("2019-06-03", periods=24, freq="1h")
+        path = write_csv(tmp_path / "prices.csv", times, np.arange(24) * 10.0)
+
+        price_store = PriceImporter().import_files([path])
+        assert len(price_store) == 96
+        assert price_store.time[-1] == np.datetime64("2019-06-03T23:45")
+        assert np.allclose(price_store.price, np.repeat(np.arange(24) / 100, 4))
+
+    def test_finer_prices_are_averaged(self, tmp_path):
+        times = pd.date_range("2019-06-03", periods=6, freq="5min")
+        path = write_csv(tmp_path / "prices.csv", times, [10, 20, 30, 40, 50, 60])
+
+        price_store = PriceImporter(price_factor=1).import_files([path])
+        assert price_store.price.tolist() == [20.0, 50.0]
+
+    def test_time_zone_and_duplicates(self, tmp_path):
+        first = write_csv(
+            tmp_path / "a.csv",
+            ["2019-06-02T22:00:00+00:00", "2019-06-02T23:00:00+00:00"],
+            [1.0, 2.0],
+        )
+        second = write_csv(tmp_path / "b.csv", ["2019-06-03T01:00:00"], [3.0])
+
+        price_store = PriceImporter(price_factor=1, step=3600).import_files(
+            [first, second]
+        )
+        assert price_store.time[0] == np.datetime64("2019-06-03T00:00")
+        assert price_store.price.tolist() == [1.0, 3.0]
+
+    def test_gaps(self, tmp_path):
+        times = pd.date_range("2019-06-03", periods=24, freq="1h").delete([5, 6])
+        path = write_csv(tmp_path / "prices.csv", times, np.arange(22.0))
+
+        with pytest.raises(ValueError):
+            PriceImporter().import_files([path])
+
+        importer = PriceImporter(fill_gaps=True, price_factor=1)
+        with pytest.warns(UserWarning):
+            price_store = importer.import_files([path])
+        assert importer.gaps.start.tolist() == [pd.Timestamp("2019-06-03T05:00")]
+        assert importer.gaps.end.tolist() == [pd.Timestamp("2019-06-03T07:00")]
+        assert len(price_store) == 96
+        # The price before the gap is held
+        assert (price_store.price[16:28] == 4.0).all()
+
+    @pytest.mark.parametrize("start, hours", [("2023-03-25", 48), ("2023-10-28", 47)])
+    def test_daylight_saving_time(self, tmp_path, start, hours):
+        # 48 hourly prices in UTC, written with the offsets of local time
+        times = pd.date_range(
+            start, periods=48, freq="1h", tz="Europe/Berlin"
+        ).tz_convert("UTC")
+        local = times.tz_convert("Europe/Berlin")
+        path = write_csv(
+            tmp_path / "prices.csv", local.map(pd.Timestamp.isoformat), np.arange(48.0)
+        )
+
+        importer = PriceImporter(price_factor=1)
+        price_store = importer.import_files([path])
+        assert importer.gaps.empty
+        # The skipped hour is not in the store, the repeated hour is averaged
+        assert len(price_store) == hours * 4
+        assert price_store.time[0] == np.datetime64(start + "T00:00")
+        assert np.all(np.diff(price_store.time) > np.timedelta64(0))
+        assert price_store.price.mean() == pytest.approx(
+            np.arange(48.0).mean(), abs=0.5
+        )
+
+    def test_daylight_saving_time_repeated_hour(self, tmp_path):
+        times = pd.date_range(
+            "2023-10-29 01:00", periods=4, freq="1h", tz="Europe/Berlin"
+        )
+        path = write_csv(
+            tmp_path / "prices.csv",
+            times.map(pd.Timestamp.isoformat),
+            [1.0, 2.0, 4.0, 8.0],
+        )
+
+        price_store = PriceImporter(price_factor=1, step=3600).import_files([path])
+        assert price_store.time.tolist() == [
+            np.datetime64("2023-10-29T01:00", "s").item(),
+            np.datetime64("2023-10-29T02:00", "s").item(),
+            np.datetime64("2023-10-29T03:00", "s").item(),
+        ]
+        assert price_store.price.tolist() == [1.0, 3.0, 8.0]
+
+    def test_daylight_saving_time_gap(self, tmp_path):
+        times = (
+            pd.date_range("2023-03-26", periods=6, freq="1h", tz="Europe/Berlin")
+            .delete([4])
+            .tz_convert("UTC")
+        )
+        path = write_csv(
+            tmp_path / "prices.csv", times.map(pd.Timestamp.isoformat), np.arange(5.0)
+        )
+
+        importer = PriceImporter(fill_gaps=True, price_factor=1)
+        with pytest.warns(UserWarning):
+            importer.import_files([path])
+        # Only the missing hour is a gap, reported in local time
+        assert importer.gaps.start.tolist() == [pd.Timestamp("2023-03-26T05:00")]
+        assert importer.gaps.end.tolist() == [pd.Timestamp("2023-03-26T06:00")]
+
+    def test_import_to(self, tmp_path):
+        times = pd.date_range("2019-06-03", periods=48, freq="1h")
+        path = write_csv(tmp_path / "prices.csv", times, np.ones(48))
+
+        PriceImporter().import_to([path], str(tmp_path / "prices.npy"))
+        frame = PowerFrame(
+            86399, datetime.date(2019, 6, 3), str(tmp_path / "prices.npy")
+        ).pdframe()
+        assert len(frame) == 96
+        assert np.allclose(frame.price, 0.001)
+
+    def test_day_ahead_tables(self):
+        table = pd.DataFrame(
+            [
+                ["%02d - %02d" % (h, h + 1), None] + [h * 10.0 + d for d in range(7)]
+                for h in range(24)
+            ]
+        )
+        table.iloc[:, 1] = ""
+        prices = day_ahead_prices([None] * 8 + [table], datetime.date(2019, 6, 9))
+        assert sorted(prices) == [
+            datetime.date(2019, 6, 3) + datetime.timedelta(days=d) for d in range(7)
+        ]
+        assert prices[datetime.date(2019, 6, 3)].tolist()[:2] == [0.0, 0.01]
+        assert prices[datetime.date(2019, 6, 9)].tolist()[1] == pytest.approx(0.016)
+
+    def test_html_dump(self, tmp_path):
+        pytest.importorskip("lxml")
+        values = np.arange(200) * 4.0
+        frame = pd.DataFrame({i: values for i in range(8)})
+        path = tmp_path / "intraday-table_2019-06-04.html"
+        path.write_text(frame.to_html(index=False))
+
+        price_store = PriceImporter(type="intraday").import_files([str(path)])
+        assert price_store.time[0] == np.datetime64("2019-06-03T00:00")
+        assert len(price_store) == 96
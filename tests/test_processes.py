@@ -0,0 +1,22 @@
+import random
+
+import numpy as np
+
+from eflips.depot.processes import interp
+
+
+class TestInterp:
+    def test_same_as_numpy(self):
+        rnd = random.Random(5)
+        xp = [0, 0.5, 0.8, 0.9, 1.0]
+        fp = [150, 150, 120, 60, 10]
+        xs = xp + [-0.1, 1.1] + [rnd.uniform(-0.2, 1.2) for _ in range(1000)]
+        for x in xs:
+            assert interp(x, xp, fp) == np.interp(x, xp, fp)
+
+    def test_charging_curve_with_duplicate_soc(self):
+        # A step in the charging curve
+        xp = [0, 0.8, 0.8, 1.0]
+        fp = [150, 150, 50, 50]
+        for x in (0.5, 0.8, 0.9):
+            assert interp(x, xp, fp) == np.interp(x, xp, fp)
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("deap")
+
+from eflips.depot.layout_opt.opt_tools import screening
+
+
+def individual(ID, capacity, fitness=None):
+    return SimpleNamespace(
+        ID=ID,
+        capacity=capacity,
+        results={"simulated": False},
+        fitness=SimpleNamespace(values=fitness),
+    )
+
+
+def evaluate_capacity(ind):
+    return ind.capacity
+
+
+def test_features_from_ID():
+    features = screening.features_from_ID("2x10DSR_1x4DSR_90_3x5L")
+    assert features.tolist() == [1, 2, 20, 1, 4, 0, 0, 3, 15]
+
+
+def test_screen():
+    front = [individual("", 100, (100, 40)), individual("", 60, (60, 55))]
+    inds = [
+        # Bound (50, 50) is dominated by (60, 55)
+        individual("a", 50),
+        # Bound (80, 55) is not dominated, even if urfd turns out lower
+        individual("b", 80),
+        # Bound (60, 55) equals a point of the front
+        individual("c", 60),
+    ]
+    promising, screened = screening.screen(inds, front, evaluate_capacity, 55)
+    assert [ind.ID for ind in screened] == ["a"]
+    assert [ind.ID for ind in promising] == ["b", "c"]
+    assert inds[0].results["screened"]
+    assert "screened" not in inds[1].results
+
+    # The number of vehicles bounds urfd
+    promising, screened = screening.screen(inds[1:2], front, evaluate_capacity, 30)
+    assert [ind.ID for ind in screened] == ["b"]
+
+
+def test_surrogate():
+    memory = {}
+    for n in range(1, 41):
+        ID = "%dx2L" % n
+        results = {"simulated": True, "rfd_unblocked": 0.5 * n + 1}
+        memory[ID] = {"results": results, "fitness": (2 * n, 0.5 * n + 1)}
+    memory["1x3DSR"] = {"results": {"simulated": False}, "fitness": (3, 0)}
+
+    surrogate = screening.UrfdSurrogate(min_samples=50).fit(memory)
+    assert not surrogate.fitted
+    assert surrogate.upper_bound(individual("4x2L", 8)) is None
+
+    surrogate = screening.UrfdSurrogate().fit(memory)
+    assert surrogate.upper_bound(individual("4x2L", 8)) == pytest.approx(3)
+
+    front = [individual("", 10, (10, 5))]
+    ind = individual("4x2L", 8)
+    assert screening.screen([ind], front, evaluate_capacity, 40)[0] == [ind]
+    assert screening.screen([ind], front, evaluate_capacity, 40, surrogate)[1] == [ind]
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import eflips
+import eflips.depot
+from eflips.depot.smart_charging import (
+    ControlSmartCharging,
+    SmartCharging,
+    search_lowest,
+)
+
+from tests.price_data import START_DATE, write_prices
+
+
+def schedule(n_bus=6, seed=2):
+    rng = np.random.default_rng(seed)
+    rows = {}
+    for bus in range(n_bus):
+        # Stays are aligned with the price intervals, so that the charged
+        # energy can be determined from the charging logs
+        arrival = 900.0 * rng.integers(55, 78)
+        depart = arrival + 900.0 * rng.integers(28, 39)
+        power = 150.0
+        duration = float(rng.integers(3000, 10000))
+        rows["B%d_0" % bus] = {
+            "charging_power": power,
+            "energy_demand_real": duration * power * 0.95,
+            "energy_demand": duration * power,
+            "time_arrival": arrival,
+            "time_depart": depart,
+            "time_charging_flex": depart - arrival - duration,
+            "charging_efficiency": 0.95,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def charged_energy(log):
+    return ((log["end"] - log["start"]) * log["power"]).sum()
+
+
+class TestSmartCharging:
+    @pytest.fixture
+    def price_path(self, tmp_path):
+        return write_prices(tmp_path, days=3)
+
+    def test_fill_intervals(self):
+        capacity = np.array([10.0, 10.0, 10.0])
+        assert SmartCharging.fill_intervals(25.0, capacity, True) == (2, 5.0)
+        assert SmartCharging.fill_intervals(20.0, capacity, True) == (2, 0.0)
+        assert SmartCharging.fill_intervals(20.0, capacity, False) == (2, 0.0)
+        assert SmartCharging.fill_intervals(40.0, capacity, True) == (3, 10.0)
+        assert SmartCharging.fill_intervals(0.0, capacity, True) == (0, 0.0)
+        assert SmartCharging.fill_intervals(5.0, capacity[:0], True) == (0, 5.0)
+
+    def test_smart_charging_algorithm(self, price_path):
+        data = schedule()
+        smart_charging = SmartCharging(data, START_DATE, price_path, 400)
+        assert smart_charging.smart_charging_algorithm()
+
+        power = smart_charging.power
+        assert (power["used_power_smart"] <= power["limit_grid"] + 1e-9).all()
+
+        for ID, row in data.iterrows():
+            for charging_log in [
+                smart_charging.charging_log,
+                smart_charging.charging_log_imm,
+            ]:
+                log = charging_log[ID]
+                assert charged_energy(log) == pytest.approx(row.energy_demand_real)
+                assert (log["start"] >= row.time_arrival).all()
+                assert (log["end"] <= row.time_depart).all()
+                assert list(log.index) == log["start"].astype(int).tolist()
+
+        # Smart charging is cheaper
+        def cost(column):
+            return (
+                power[column] * (power.end_time - power.start_time) * power.price
+            ).sum()
+
+        assert cost("used_power_smart") < cost("used_power_immediately")
+
+    def test_cheapest_intervals(self, price_path):
+        data = schedule(n_bus=1)
+        data["energy_demand_real"] = data["energy_demand"]
+        smart_charging = SmartCharging(data, START_DATE, price_path, 1000)
+        assert smart_charging.smart_charging_algorithm()
+
+        row = data.iloc[0]
+        log = smart_charging.charging_log[data.index[0]]
+        power = smart_charging.power
+        stay = power[
+            (power.end_time > row.time_arrival) & (power.start_time < row.time_depart)
+        ]
+        # All intervals that are cheaper than the most expensive one used are
+        # used completely
+        used = log["power"] > 0
+        unused = stay[~stay.start_time.isin(log["start"].astype(int) // 900 * 900)]
+        assert unused.empty or unused.price.min() >= log.loc[used, "price"].max()
+
+    def test_power_limit_grid_dict(self, price_path):
+        limits = {0: 300, 21600: 500, 64800: 400, 86400: 0}
+        smart_charging = SmartCharging(schedule(), START_DATE, price_path, limits)
+        power = smart_charging.power.sort_values(by=["start_time"])
+        hours = (power.start_time % 86400) // 3600
+        expected = np.where(hours < 6, 300, np.where(hours < 18, 500, 400))
+        assert power["limit_grid"].tolist() == expected.tolist()
+
+    def test_power_limit_too_low(self, price_path, capsys):
+        smart_charging = SmartCharging(schedule(), START_DATE, price_path, 100)
+        assert not smart_charging.smart_charging_algorithm()
+        assert "Smart" in capsys.readouterr().out
+
+
+class TestLowestPower:
+    @pytest.fixture
+    def price_path(self, tmp_path):
+        return write_prices(tmp_path, days=3)
+
+    def test_search_lowest(self):
+        for threads in [1, 3]:
+            lower, upper = search_lowest(lambda x: x >= 42.0, 1, 100, 0.001, threads)
+            assert lower < 42.0 <= upper
+            assert (upper - lower) / lower <= 0.001
+
+    def test_flow_feasible_is_necessary(self, price_path):
+        smart_charging = SmartCharging(schedule(n_bus=20), START_DATE, price_path, 0)
+        smart_charging.power = smart_charging.power.sort_values(by=["price"])
+        highest = smart_charging.power["used_power_immediately"].max()
+        results = [
+            (
+                smart_charging.smart_charging_possible(limit),
+                smart_charging.flow_feasible(limit),
+            )
+            for limit in np.linspace(1, highest, 40)
+        ]
+        assert all(flow for smart, flow in results if smart)
+        assert not results[0][1] and results[-1][0]
+
+    def test_lowest_power(self, price_path):
+        control = ControlSmartCharging(schedule(n_bus=20), START_DATE, price_path)
+        smart_charging = control.smart_charging
+        smart_charging.results = lambda: None
+        _, lower, upper = control.lowest_power(1, plot=False)
+
+        assert (upper - lower) / lower <= 0.01
+        assert not smart_charging.smart_charging_possible(lower)
+        power = smart_charging.power
+        assert (power["limit_grid"] == upper).all()
+        assert (power["used_power_smart"] <= upper + 1e-9).all()
+        for ID, row in schedule(n_bus=20).iterrows():
+            log = smart_charging.charging_log[ID]
+            assert charged_energy(log) == pytest.approx(row.energy_demand_real)
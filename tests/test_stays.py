@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from eflips.depot.stays import STAY_COLUMNS, park_periods, process_intervals
+
+from tests.sample_depot import evaluation
+
+
+class TestStayTable:
+    def test_stays(self, evaluation):
+        stays = evaluation.get_stay_table()
+        assert list(stays.columns) == STAY_COLUMNS
+        assert len(stays) > 0
+        assert evaluation.get_stay_table() is stays
+        assert set(stays["area"]) <= set(evaluation.depot.areas)
+        assert (stays["start"] <= stays["end"]).all()
+        assert (stays["waiting"] >= 0).all()
+
+        for vehicle_ID, vehicle_stays in stays.groupby("vehicle"):
+            # Stays of a vehicle don't overlap and only the last one is open
+            assert (
+                vehicle_stays["start"].values[1:] >= vehicle_stays["end"].values[:-1]
+            ).all()
+            assert vehicle_stays["finished"].values[:-1].all()
+            assert (np.diff(vehicle_stays["visit"]) >= 0).all()
+
+        unfinished = stays[~stays["finished"]]
+        assert (unfinished["end"] == evaluation.SIM_TIME).all()
+
+    def test_analytics(self, evaluation):
+        stays = evaluation.get_stay_table()
+
+        occupancy = evaluation.occupancy_rate_calculation()
+        assert set(occupancy) == set(evaluation.depot.areas)
+        total = sum(series.sum() for series in occupancy.values())
+        assert total == (stays["end"] - stays["start"]).sum()
+
+        (
+            total_congestion,
+            congestion_area_caused,
+            congestion_area_stands,
+            congestion_vehicle,
+            total_dwelltime,
+        ) = evaluation.congestion_calulation()
+        assert total_congestion == pytest.approx(stays["waiting"].sum() / 3600)
+        assert congestion_vehicle.sum() == pytest.approx(total_congestion)
+        assert congestion_area_caused.sum() == pytest.approx(total_congestion)
+        assert congestion_area_stands.sum() == pytest.approx(total_congestion)
+        assert len(congestion_vehicle) == len(evaluation.vehicle_generator.items)
+        assert total_dwelltime > 0
+
+    def test_periods(self, evaluation):
+        periods = park_periods(evaluation.get_stay_table())
+        assert len(periods) > 0
+        assert (periods["start"] <= periods["end"]).all()
+
+        intervals = process_intervals(
+            evaluation.vehicle_generator.items, ["charge_dc"], evaluation.SIM_TIME
+        )
+        assert len(intervals) > 0
+        assert set(intervals["process"]) == {"charge_dc"}
+        assert (intervals["start"] <= intervals["end"]).all()
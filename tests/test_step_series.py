@@ -0,0 +1,84 @@
+import random
+
+import numpy as np
+import pytest
+
+from eflips.depot import StepSeries
+
+
+def dense(data, end, first=0):
+    """Reference: forward filled list with one value per time step."""
+    vector = [None] * end
+    for t, value in data.items():
+        vector[int(t)] = value
+    if vector[0] is None:
+        vector[0] = first
+    for i, value in enumerate(vector):
+        if value is None:
+            vector[i] = vector[i - 1]
+    return np.array(vector)
+
+
+class TestStepSeries:
+    @pytest.fixture
+    def logs(self):
+        rnd = random.Random(3)
+        logs = []
+        for _ in range(20):
+            times = sorted(rnd.sample(range(1, 500), rnd.randint(0, 30)))
+            logs.append({t: rnd.randint(-5, 10) for t in times})
+        return logs
+
+    def test_from_dict(self, logs):
+        for data in logs:
+            series = StepSeries.from_dict(data, 500)
+            assert len(series) == 500
+            assert np.array_equal(series.to_dense(), dense(data, 500))
+            assert series.to_dense().dtype == np.int32
+
+        series = StepSeries.from_dict({0: 1, 10: None, 20: 2.5}, 30)
+        assert series.to_dense().dtype == np.float32
+        series = StepSeries.from_dict({3: {"a": 2}, 7: {"a": 3}}, 10, subkeys=["a"])
+        assert series.to_dense().tolist() == [0, 0, 0, 2, 2, 2, 2, 3, 3, 3]
+
+    def test_float_times(self):
+        series = StepSeries.from_dict({0: 0, 5.2: 1.5, 5.7: 2.5, 8.1: 0}, 10)
+        assert series.to_dense().tolist() == [0, 0, 0, 0, 0, 2.5, 2.5, 2.5, 0, 0]
+
+    def test_statistics(self, logs):
+        for data in logs:
+            series = StepSeries.from_dict(data, 500).window(100)
+            values = dense(data, 500)[100:]
+            assert series.min() == values.min()
+            assert series.max() == values.max()
+            assert series.mean() == pytest.approx(values.mean())
+            assert series.median() == np.median(values)
+            assert series.integral() == values.sum()
+
+    def test_operations(self, logs):
+        series = [StepSeries.from_dict(data, 500) for data in logs]
+        values = [dense(data, 500) for data in logs]
+
+        total = StepSeries.sum(series)
+        assert np.array_equal(total.to_dense(), sum(values))
+        assert np.array_equal((series[0] + 0.5).to_dense(), values[0] + 0.5)
+        assert np.array_equal(
+            series[0].maximum(series[1]).to_dense(),
+            np.maximum(values[0], values[1]),
+        )
+        assert np.array_equal(
+            StepSeries.sum([], 10).to_dense(), np.zeros(10, dtype=np.int32)
+        )
+        with pytest.raises(ValueError):
+            series[0] + series[1].window(100)
+
+    def test_resample(self, logs):
+        for data in logs:
+            series = StepSeries.from_dict(data, 500)
+            values = dense(data, 500)
+            mean = series.resample(60).to_dense(np.float64)
+            maximum = series.resample(60, how="max").to_dense()
+            for start in range(0, 500, 60):
+                chunk = values[start : start + 60]
+                assert mean[start] == pytest.approx(chunk.mean())
+                assert maximum[start] == chunk.max()
@@ -0,0 +1,48 @@
+import os
+
+import eflips
+import eflips.depot
+from eflips.depot.standalone import (
+    timetabledata_from_excel,
+    timetabledata_to_trip_args,
+    timetabledata_to_trips,
+)
+
+# settings is an autouse fixture
+from tests.sample_depot import SAMPLE_PATH, settings, simulate  # noqa: F401
+
+
+def trip_values(trip):
+    return (
+        trip.ID,
+        trip.origin,
+        trip.destination,
+        trip.vehicle_types,
+        trip.std,
+        trip.sta,
+        trip.distance,
+        trip.start_soc,
+        trip.end_soc,
+    )
+
+
+def test_trips_from_trip_args():
+    timetabledata = timetabledata_from_excel(os.path.join(SAMPLE_PATH, "schedule"))
+    trip_args = timetabledata_to_trip_args(timetabledata)
+    env = eflips.depot.SimulationHost([], print_timestamps=False).env
+    trips = eflips.depot.standalone.trips_from_trip_args(env, trip_args)
+    assert [trip_values(trip) for trip in trips] == [
+        trip_values(trip) for trip in timetabledata_to_trips(env, timetabledata)
+    ]
+
+
+def test_simulate_with_trip_args():
+    timetabledata = timetabledata_from_excel(os.path.join(SAMPLE_PATH, "schedule"))
+    trip_args = timetabledata_to_trip_args(timetabledata)
+
+    expected = simulate(timetabledata)
+    assert any(atd is not None for _, atd, _ in expected)
+    # Trip args are not altered by a simulation and can be reused
+    assert simulate(timetabledata, trip_args=trip_args) == expected
+    assert simulate(timetabledata, trip_args=trip_args) == expected
+    assert all(isinstance(vt, str) for args in trip_args for vt in args[4])
@@ -0,0 +1,64 @@
+from eflips.depot.depot import PendingDepartures, SortedTrips
+
+
+class Trip:
+    def __init__(self, ID, std, vehicle_types=("EN",), vehicle=None):
+        self.ID = ID
+        self.std = std
+        self.eta = std + 100
+        self.vehicle_types = list(vehicle_types)
+        self.vehicle_types_joinedstr = ", ".join(vehicle_types)
+        self.vehicle = vehicle
+
+    def __repr__(self):
+        return self.ID
+
+
+class TestSortedTrips:
+    def test_order_and_ranges(self):
+        trips = SortedTrips(key="std")
+        a, b, c, d = Trip("a", 10), Trip("b", 5), Trip("c", 10), Trip("d", 20)
+        trips.extend([a, b, c, d])
+
+        assert list(trips) == [b, a, c, d]
+        assert trips.until(10) == [b, a, c]
+        assert trips.before(10) == [b]
+        assert trips.index(c) == 2
+        assert Trip("e", 10) not in trips
+
+        trips.remove(a)
+        assert list(trips) == [b, c, d]
+        assert trips.pop(0) is b
+        assert trips.pop() is d
+        assert list(trips) == [c]
+
+
+class TestPendingDepartures:
+    def test_unassigned_index(self):
+        pending = PendingDepartures()
+        a = Trip("a", 10, ("EN",))
+        b = Trip("b", 20, ("EN", "GN"))
+        c = Trip("c", 30, ("EN",))
+        d = Trip("d", 40, ("GN",), vehicle="v1")
+        pending.extend([c, a, d, b])
+
+        assert pending.unassigned_counts(30) == {"EN": 2, "EN, GN": 1}
+        assert pending.first_unassigned("EN", {"EN": 2, "EN, GN": 1}, {}) == "EN"
+        assert (
+            pending.first_unassigned("EN", {"EN": 2, "EN, GN": 1}, {"EN": 1})
+            == "EN, GN"
+        )
+        assert pending.first_unassigned("GN", {"EN": 2}, {}) is None
+
+        a.vehicle = "v2"
+        pending.update_assignment(a)
+        assert pending.unassigned_counts(30) == {"EN": 1, "EN, GN": 1}
+
+        d.vehicle = None
+        pending.update_assignment(d)
+        assert pending.unassigned_counts(40) == {"EN": 1, "EN, GN": 1, "GN": 1}
+
+        pending.remove(b)
+        assert pending.unassigned_counts(40) == {"EN": 1, "GN": 1}
+        pending.update_assignment(b)
+        assert pending.unassigned_counts(40) == {"EN": 1, "GN": 1}
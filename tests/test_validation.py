@@ -0,0 +1,106 @@
+import numpy as np
+
+from eflips.depot import Validator
+from eflips.depot.validation import contained, strictly_inside
+
+from tests.sample_depot import evaluation
+
+
+def periods(*rows):
+    vehicles, starts, ends = zip(*rows)
+    return np.array(vehicles), np.array(starts), np.array(ends)
+
+
+class TestIntervalChecks:
+    def test_contained(self):
+        boxes = periods((0, 0, 100), (0, 200, 300), (1, 50, 60))
+        items = periods(
+            (0, 0, 100),
+            (0, 90, 210),
+            (0, 250, 300),
+            (0, 400, 400),
+            (1, 10, 20),
+            (1, 55, 55),
+            (2, 0, 1),
+        )
+        assert contained(boxes, items).tolist() == [
+            True,
+            False,
+            True,
+            False,
+            False,
+            True,
+            False,
+        ]
+
+    def test_contained_other_vehicle(self):
+        # The box of vehicle 0 covers the times, but not the vehicle
+        boxes = periods((0, 0, 1000), (2, 500, 600))
+        items = periods((1, 10, 20), (2, 10, 20))
+        assert not contained(boxes, items).any()
+
+    def test_strictly_inside(self):
+        boxes = periods((0, 0, 100), (1, 50, 60))
+        inside = strictly_inside(
+            boxes, np.array([0, 0, 0, 1, 1]), np.array([0, 50, 100, 55, 70])
+        )
+        assert inside.tolist() == [False, True, False, True, False]
+
+    def test_empty(self):
+        empty = periods((0, 0, 0))
+        empty = tuple(a[:0] for a in empty)
+        assert contained(empty, periods((0, 0, 1))).tolist() == [False]
+        assert contained(periods((0, 0, 1)), empty).tolist() == []
+
+
+class TestValidator:
+    periods_map = {
+        "depot general": "depot general",
+        "park": "park",
+        "serve": "standby_arr",
+        "charge": ["charge_dc", "charge_oc"],
+    }
+
+    def test_all_periods(self, evaluation):
+        validator = Validator(evaluation)
+        validator.all_periods(self.periods_map)
+        validator.single_matches()
+        assert validator.valid
+
+        vehicle_IDs = [v.ID for v in evaluation.vehicle_generator.items]
+        for name in [
+            "park_inside_depot",
+            "charge_inside_park",
+            "service_outside_park",
+            "trip_outside_depot",
+        ]:
+            result = validator.results[name]
+            assert list(result["result"]) == vehicle_IDs
+            assert result["checked"] == sum(map(len, result["result"].values()))
+            assert result["checked"] > 0
+            assert result["failed"] == 0
+            assert result["failures"] == []
+
+        trips = validator.results["trip_outside_depot"]["result"]
+        for vehicle in evaluation.vehicle_generator.items:
+            assert len(trips[vehicle.ID]) == len(vehicle.finished_trips)
+
+        summary = validator.summary()
+        assert list(summary.index) == list(validator.results)
+        assert summary["valid"].all()
+
+    def test_failures(self, evaluation, capsys):
+        # Charging periods are not outside of parking periods
+        periods_map = dict(self.periods_map, serve="charge_dc")
+        validator = Validator(evaluation)
+        validator.all_periods(periods_map)
+        assert not validator.valid
+
+        result = validator.results["service_outside_park"]
+        assert result["failed"] == result["checked"] > 0
+        vehicle_ID, start, end = result["failures"][0]
+        assert not result["result"][vehicle_ID][0]
+        assert vehicle_ID in validator.summary().loc["service_outside_park", "vehicles"]
+
+        validator.report()
+        assert "service_outside_park: INVALID" in capsys.readouterr().out